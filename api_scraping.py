@@ -29,10 +29,23 @@ logger = logging.getLogger("API_Scraping")
 
 # Importa lo script di scraping reale
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from pmi_contatti import ArchivioContatti
+from pmi_database import DatabasePMI
 from pmi_scraper_reale import PMIScraper
+from pmi_schema import Azienda
+
+# Colonne dei risultati mostrati nell'interfaccia, precedute dall'ID nell'archivio
+COLONNE_INTERFACCIA = [
+    'Ragione Sociale', 'Settore', 'Email', 'Telefono', 'Indirizzo', 'Città', 'Provincia', 'CAP',
+    'Sito Web', 'Descrizione', 'Dipendenti', 'Fatturato', 'Stato', 'Data Ultimo Contatto', 'Note'
+]
 
 app = Flask(__name__, static_folder='.')
 
+# Archivio SQLite con lo stato dei contatti, aperto alla prima richiesta
+DB_CONTATTI = 'pmi_data.db'
+archivio_contatti = None
+
 # Variabile globale per tenere traccia dello stato dello scraping
 scraping_status = {
     "in_progress": False,
@@ -108,6 +121,63 @@ def get_scrape_status():
         'progress': scraping_status["progress"]
     })
 
+def get_archivio_contatti():
+    """
+    Restituisce l'archivio dei contatti, aprendolo alla prima richiesta
+    """
+    global archivio_contatti
+    
+    if archivio_contatti is None:
+        archivio_contatti = ArchivioContatti(DB_CONTATTI)
+    return archivio_contatti
+
+@app.route('/api/contatti/stato', methods=['POST'])
+def update_contact_status():
+    """
+    Endpoint per aggiornare lo stato dei contatti senza riscrivere il file
+    
+    Accetta {"ids": [...], "stato": "...", "data": "AAAA-MM-GG"} per portare
+    più contatti nello stesso stato (stato obbligatorio), oppure {"aggiornamenti": [{"id": ...,
+    "stato": ..., "data_contatto": ..., "data_risposta": ..., "note": ...}]}
+    """
+    try:
+        data = request.json or {}
+        archivio = get_archivio_contatti()
+        
+        if 'aggiornamenti' in data:
+            aggiornati = archivio.aggiorna_molti(data['aggiornamenti'])
+        elif not data.get('stato'):
+            return jsonify({
+                'success': False,
+                'error': 'Campo "stato" obbligatorio'
+            }), 400
+        else:
+            aggiornati = archivio.transizione(data.get('ids', []), data['stato'], data.get('data'))
+        
+        return jsonify({
+            'success': True,
+            'updated': aggiornati
+        })
+    
+    except (ValueError, KeyError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Errore nell'aggiornamento dello stato dei contatti: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/contatti/conteggi', methods=['GET'])
+def get_contact_counts():
+    """
+    Endpoint con il numero di contatti per stato
+    """
+    return jsonify(get_archivio_contatti().conteggi())
+
 def run_scraping(settore, localita, num_pages):
     """
     Esegue lo scraping in un thread separato
@@ -119,9 +189,6 @@ def run_scraping(settore, localita, num_pages):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file = f"temp_results_{timestamp}.csv"
         
-        # Inizializza lo scraper
-        scraper = PMIScraper(output_file=output_file)
-        
         # Configura le fonti di dati
         sources = {
             'paginegialle': [
@@ -135,34 +202,32 @@ def run_scraping(settore, localita, num_pages):
                 {'settore': settore, 'paese': 'Italia', 'num_pages': num_pages}
             ]
         
-        # Esegui lo scraping
-        scraper.run_scraping(sources)
+        # Esegui lo scraping; la chiusura scrive i risultati in attesa e ferma
+        # il thread di scrittura periodica della destinazione
+        scraper = PMIScraper(output_file=output_file)
+        try:
+            scraper.run_scraping(sources)
+        finally:
+            scraper.close()
         
-        # Leggi i risultati dal file CSV
+        # Leggi i risultati dal file CSV, completo solo dopo la chiusura
         results = []
         if os.path.exists(output_file):
             with open(output_file, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
                     # Converti il formato dei dati per adattarsi all'interfaccia
-                    company = {
-                        'Ragione Sociale': row.get('Ragione Sociale', ''),
-                        'Settore': row.get('Settore', ''),
-                        'Email': row.get('Email', ''),
-                        'Telefono': row.get('Telefono', ''),
-                        'Indirizzo': row.get('Indirizzo', ''),
-                        'Città': row.get('Città', ''),
-                        'Provincia': row.get('Provincia', ''),
-                        'CAP': row.get('CAP', ''),
-                        'Sito Web': row.get('Sito Web', ''),
-                        'Descrizione': row.get('Descrizione', ''),
-                        'Dipendenti': '',
-                        'Fatturato': '',
-                        'Stato': 'Non contattato',
-                        'Data Ultimo Contatto': '',
-                        'Note': f"Importato da {row.get('Fonte', '')} il {datetime.now().strftime('%d/%m/%Y')}"
-                    }
-                    results.append(company)
+                    azienda = Azienda.da_riga(row)
+                    azienda.stato = azienda.stato or 'Non contattato'
+                    azienda.note = f"Importato da {azienda.fonte or ''} il {datetime.now().strftime('%d/%m/%Y')}"
+                    results.append(azienda.come_riga(COLONNE_INTERFACCIA))
+        
+        # Registra i risultati nell'archivio dei contatti: con il loro ID
+        # l'interfaccia ne aggiorna lo stato tramite /api/contatti/stato
+        if results:
+            with DatabasePMI(DB_CONTATTI) as db:
+                ids = db.inserisci_con_id(results)
+            results = [{'ID': id_azienda, **riga} for id_azienda, riga in zip(ids, results)]
         
         # Aggiorna lo stato dello scraping
         scraping_status["in_progress"] = False
@@ -183,9 +248,13 @@ if __name__ == '__main__':
     # Configura il parser degli argomenti
     parser = argparse.ArgumentParser(description='API per lo scraping di contatti PMI italiane')
     parser.add_argument('--port', type=int, default=5000, help='Porta su cui avviare il server (default: 5000)')
+    parser.add_argument('--db', default='pmi_data.db',
+                        help='Database SQLite con lo stato dei contatti (default: pmi_data.db)')
     
     # Parsa gli argomenti
     args = parser.parse_args()
     
+    DB_CONTATTI = args.db
+    
     # Avvia il server sulla porta specificata
     app.run(debug=True, port=args.port)
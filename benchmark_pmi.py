@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark PMI - Misura delle prestazioni dei generatori di dati PMI
+"""
+
+import glob
+import os
+import random
+import re
+import time
+
+import numpy as np
+
+from pmi_campionatori import CampionatoreAlias
+from pmi_estrazione import estrai_contatti, estrai_contatti_bulk
+from pmi_generator import PMIGenerator
+from pmi_html import analizza_html, backend_disponibili
+from pmi_partita_iva import GeneratorePartiteIva, cifra_controllo, valida_partite_iva
+
+
+def _cronometra(funzione, *args, **kwargs):
+    """
+    Esegue una funzione e ne misura il tempo di esecuzione
+
+    Returns:
+        tuple: (risultato, secondi)
+    """
+    inizio = time.perf_counter()
+    risultato = funzione(*args, **kwargs)
+    return risultato, time.perf_counter() - inizio
+
+
+def benchmark_generatore(num_aziende=100000, batch_size=100000, seed=42):
+    """
+    Confronta le righe al secondo della generazione per riga e di quella a blocchi NumPy
+
+    Args:
+        num_aziende (int): Numero di aziende da generare per ciascun percorso
+        batch_size (int): Dimensione dei blocchi vettoriali
+        seed (int): Seme del generatore NumPy
+
+    Returns:
+        dict: Righe al secondo per ciascun percorso
+    """
+    generator = PMIGenerator()
+
+    _, secondi_riga = _cronometra(lambda: [generator.genera_azienda() for _ in range(num_aziende)])
+
+    rng = np.random.default_rng(seed)
+
+    def genera_blocchi():
+        generate = 0
+        while generate < num_aziende:
+            blocco = generator.genera_batch(min(batch_size, num_aziende - generate), rng)
+            generate += len(blocco['Ragione Sociale'])
+
+    _, secondi_batch = _cronometra(genera_blocchi)
+
+    risultati = {
+        'per riga': num_aziende / secondi_riga,
+        'batch NumPy': num_aziende / secondi_batch
+    }
+
+    print(f"\n=== GENERAZIONE DI {num_aziende} AZIENDE ===")
+    for percorso, righe_al_secondo in risultati.items():
+        print(f"{percorso:>12}: {righe_al_secondo:12,.0f} righe/s")
+    print(f"{'speedup':>12}: {risultati['batch NumPy'] / risultati['per riga']:12.1f}x")
+
+    return risultati
+
+
+def benchmark_campionatori(num_estrazioni=1000000, seed=42):
+    """
+    Confronta le estrazioni al secondo di random.choices e dei campionatori alias
+
+    Args:
+        num_estrazioni (int): Numero di estrazioni per ciascun metodo
+        seed (int): Seme dei generatori casuali
+
+    Returns:
+        dict: Estrazioni al secondo per ciascun metodo
+    """
+    generator = PMIGenerator()
+    forme = list(generator.probabilita_forme.keys())
+    pesi = list(generator.probabilita_forme.values())
+    campionatore = CampionatoreAlias(forme, pesi)
+    fasce = generator.fasce_anni_attivita
+    pesi_fasce = generator.probabilita_fasce_anni
+    random.seed(seed)
+
+    def anno_precedente():
+        # Versione originale: sei randint valutati per tenerne uno solo
+        return random.choices([random.randint(inizio, fine) for inizio, fine in fasce], weights=pesi_fasce, k=1)[0]
+
+    misure = {
+        'random.choices': lambda: [random.choices(forme, weights=pesi, k=1)[0] for _ in range(num_estrazioni)],
+        'alias': lambda: [campionatore.estrai() for _ in range(num_estrazioni)],
+        'alias batch NumPy': lambda: campionatore.estrai_batch(num_estrazioni, np.random.default_rng(seed)),
+        'anno fondazione (prima)': lambda: [anno_precedente() for _ in range(num_estrazioni)],
+        'anno fondazione (alias)': lambda: [generator._genera_anno_fondazione() for _ in range(num_estrazioni)]
+    }
+
+    risultati = {}
+    print(f"\n=== {num_estrazioni} ESTRAZIONI PESATE ===")
+    for metodo, funzione in misure.items():
+        _, secondi = _cronometra(funzione)
+        risultati[metodo] = num_estrazioni / secondi
+        print(f"{metodo:>24}: {risultati[metodo]:14,.0f} estrazioni/s")
+
+    return risultati
+
+
+def benchmark_partite_iva(num_partite=1000000):
+    """
+    Misura generazione e validazione vettoriale delle partite IVA
+
+    Args:
+        num_partite (int): Numero di partite IVA
+
+    Returns:
+        dict: Partite IVA al secondo per ciascuna operazione
+    """
+    partite_iva, secondi_generazione = _cronometra(GeneratorePartiteIva().genera_batch, num_partite)
+    esito, secondi_validazione = _cronometra(valida_partite_iva, partite_iva)
+
+    risultati = {
+        'generazione': num_partite / secondi_generazione,
+        'validazione': num_partite / secondi_validazione
+    }
+
+    print(f"\n=== {num_partite} PARTITE IVA ===")
+    for operazione, al_secondo in risultati.items():
+        print(f"{operazione:>12}: {al_secondo:12,.0f} partite IVA/s")
+    print(f"{'valide':>12}: {int(esito.sum())}/{num_partite}")
+
+    return risultati
+
+
+def _pagina_elenco(indice, num_risultati=20):
+    """
+    Pagina di elenco sintetica con la struttura di Pagine Gialle
+
+    Returns:
+        str: HTML della pagina
+    """
+    risultati = ''.join(
+        f'''<div class="vcard listing"><h2><a class="org" href="/azienda/{indice}-{i}">Azienda {indice}-{i} S.r.l.</a></h2>
+        <div class="adr"><span class="street-address">Via Roma {i}</span> <span class="postal-code">20121</span>
+        <span class="locality">Milano</span> <span class="region">MI</span></div>
+        <span class="phone-number">02 1234{i:04d}</span><p>{'Descrizione dei servizi offerti. ' * 8}</p>
+        <a class="btn-details" href="/dettaglio/{indice}-{i}">Dettagli</a></div>'''
+        for i in range(num_risultati)
+    )
+    return (f'''<!DOCTYPE html><html lang="it"><head><title>Informatica a Milano - pagina {indice}</title>
+        <meta name="description" content="Aziende di informatica a Milano"><meta name="viewport" content="width=device-width">
+        <link rel="stylesheet" href="/css/main.css"><script src="/js/jquery-3.6.0.min.js"></script></head>
+        <body><nav><a href="/">Home</a></nav><h1>Informatica a Milano</h1><main>{risultati}</main>
+        <footer><a href="https://www.example.com" rel="nofollow">Partner</a></footer></body></html>''')
+
+
+def _estrai_pagina(html, backend):
+    """
+    Analizza una pagina con le ricerche usate da scraper e analizzatori
+
+    Returns:
+        int: Numero di valori estratti
+    """
+    documento = analizza_html(html, backend)
+    valori = 0
+    for risultato in documento.seleziona('.vcard'):
+        for selettore in ('.org', '.street-address', '.locality', '.postal-code', '.region', '.phone-number'):
+            elemento = risultato.seleziona_uno(selettore)
+            valori += elemento is not None and bool(elemento.testo.strip())
+        link = risultato.seleziona_uno('a.btn-details')
+        valori += link is not None and link.attributo('href') is not None
+    for selettore in ('title', 'meta[name=description]', 'meta[name=viewport]', 'link[rel~=stylesheet]'):
+        valori += documento.seleziona_uno(selettore) is not None
+    for selettore in ('h1', 'h2', 'a[href]', 'script[src]', 'img'):
+        valori += len(documento.seleziona(selettore))
+    return valori
+
+
+def benchmark_parser(cartella=None, num_pagine=200, ripetizioni=3):
+    """
+    Confronta le pagine al secondo dei backend HTML sulle stesse pagine
+
+    Args:
+        cartella (str): Cartella con pagine HTML salvate (default: pagine sintetiche)
+        num_pagine (int): Numero di pagine sintetiche se non è indicata una cartella
+        ripetizioni (int): Passaggi su tutte le pagine per ciascun backend
+
+    Returns:
+        dict: Pagine al secondo per ciascun backend
+    """
+    if cartella:
+        pagine = []
+        for percorso in sorted(glob.glob(os.path.join(cartella, '*.htm*'))):
+            with open(percorso, encoding='utf-8', errors='replace') as f:
+                pagine.append(f.read())
+        if not pagine:
+            raise ValueError(f"Nessuna pagina HTML in {cartella}")
+    else:
+        pagine = [_pagina_elenco(indice) for indice in range(num_pagine)]
+
+    risultati = {}
+    valori_attesi = None
+    print(f"\n=== ANALISI DI {len(pagine)} PAGINE HTML ({sum(map(len, pagine)) / 1024 / 1024:.1f} MB) ===")
+    for backend in backend_disponibili():
+        valori, secondi = _cronometra(
+            lambda: sum(_estrai_pagina(html, backend) for _ in range(ripetizioni) for html in pagine)
+        )
+        risultati[backend] = len(pagine) * ripetizioni / secondi
+        if valori_attesi is None:
+            valori_attesi = valori
+        nota = '' if valori == valori_attesi else f" (valori estratti: {valori}, attesi {valori_attesi})"
+        print(f"{backend:>12}: {risultati[backend]:10,.1f} pagine/s{nota}")
+
+    if 'bs4' in risultati:
+        migliore = max(risultati, key=risultati.get)
+        print(f"{'speedup':>12}: {risultati[migliore] / risultati['bs4']:10.1f}x ({migliore} rispetto a bs4)")
+
+    return risultati
+
+
+def _email_precedente(text):
+    """Estrazione dell'email precedente a pmi_estrazione: prima corrispondenza di un pattern non compilato"""
+    match = re.search(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}', text)
+    return match.group(0) if match else ''
+
+
+def _telefono_precedente(text):
+    """Estrazione del telefono precedente a pmi_estrazione: sei pattern provati uno dopo l'altro"""
+    phone_patterns = [
+        r'\+39\s?[0-9]{3}\s?[0-9]{7}',
+        r'\+39\s?[0-9]{2}\s?[0-9]{8}',
+        r'\+39\s?[0-9]{10}',
+        r'[0-9]{3}\s?[0-9]{7}',
+        r'[0-9]{2}\s?[0-9]{8}',
+        r'[0-9]{10}'
+    ]
+    for pattern in phone_patterns:
+        match = re.search(pattern, text)
+        if match:
+            return match.group(0)
+    return ''
+
+
+_FRASI_DETTAGLIO = (
+    "L'azienda offre consulenza e sviluppo software su misura per le piccole e medie imprese.",
+    "Il team segue ogni progetto dall'analisi dei requisiti fino all'assistenza post vendita.",
+    "Dal 1998 lavoriamo con clienti del settore manifatturiero, della logistica e dei servizi.",
+    "Le soluzioni proposte comprendono gestionali, siti web, e-commerce e integrazioni con i sistemi esistenti.",
+    "Operiamo in tutta la Lombardia con due sedi operative e una rete di partner certificati.",
+    "Richiedi un preventivo gratuito compilando il modulo oppure contattando il nostro ufficio commerciale.",
+    "Certificazione ISO 9001:2015 per la qualità dei processi di progettazione ed erogazione."
+)
+
+
+def _contatti_precedenti(text):
+    """Tutte le occorrenze con i pattern precedenti: un passaggio per l'email e uno per ogni pattern telefonico"""
+    trovati = re.findall(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}', text)
+    for pattern in (r'\+39\s?[0-9]{3}\s?[0-9]{7}', r'\+39\s?[0-9]{2}\s?[0-9]{8}', r'\+39\s?[0-9]{10}',
+                    r'[0-9]{3}\s?[0-9]{7}', r'[0-9]{2}\s?[0-9]{8}', r'[0-9]{10}'):
+        trovati.extend(re.findall(pattern, text))
+    return trovati
+
+
+def _pagina_dettaglio(indice, rng):
+    """
+    Testo sintetico di una pagina di dettaglio: contatti in testata e nel piè di pagina
+
+    Returns:
+        str: Testo della pagina
+    """
+    corpo = ' '.join(rng.choice(_FRASI_DETTAGLIO) for _ in range(rng.randint(10, 60)))
+    prime_cifre = f"{indice:07d}{rng.randint(1, 100):03d}"
+    partita_iva = prime_cifre + cifra_controllo(prime_cifre)
+    return (f"Azienda {indice} S.r.l. - Via Roma {indice % 200}, 20121 Milano (MI) - Tel. 02 {rng.randint(1000000, 9999999)}\n"
+            f"{corpo}\n"
+            f"Contatti: info@azienda{indice}.it - PEC: azienda{indice}@pec.it - "
+            f"Cell. 3{rng.randint(10, 99)} {rng.randint(1000000, 9999999)}\n"
+            f"P.IVA IT{partita_iva} - Capitale sociale 10.000 euro i.v.")
+
+
+def benchmark_estrazione(cartella=None, num_pagine=1000, ripetizioni=3, processi=1, seed=42):
+    """
+    Confronta l'estrazione dei contatti precedente con quella in un solo passaggio
+
+    Args:
+        cartella (str): Cartella con pagine HTML salvate (default: pagine sintetiche)
+        num_pagine (int): Numero di pagine sintetiche se non è indicata una cartella
+        ripetizioni (int): Passaggi su tutte le pagine per ciascun metodo
+        processi (int): Processi della modalità bulk
+        seed (int): Seme delle pagine sintetiche
+
+    Returns:
+        dict: Pagine al secondo per ciascun metodo
+    """
+    if cartella:
+        testi = []
+        for percorso in sorted(glob.glob(os.path.join(cartella, '*.htm*'))):
+            with open(percorso, encoding='utf-8', errors='replace') as f:
+                testi.append(analizza_html(f.read()).testo)
+        if not testi:
+            raise ValueError(f"Nessuna pagina HTML in {cartella}")
+    else:
+        rng = random.Random(seed)
+        testi = [_pagina_dettaglio(indice, rng) for indice in range(num_pagine)]
+
+    metodi = {
+        'precedente': lambda: [[_email_precedente(testo), _telefono_precedente(testo)] for testo in testi],
+        'prec. tutti': lambda: [_contatti_precedenti(testo) for testo in testi],
+        'un passaggio': lambda: [estrai_contatti(testo) for testo in testi],
+        'bulk': lambda: estrai_contatti_bulk(testi, processi=processi)
+    }
+
+    risultati = {}
+    print(f"\n=== ESTRAZIONE DEI CONTATTI DA {len(testi)} PAGINE ({sum(map(len, testi)) / 1024 / 1024:.1f} MB) ===")
+    for nome, metodo in metodi.items():
+        for _ in range(ripetizioni - 1):
+            metodo()
+        estratti, secondi = _cronometra(metodo)
+        risultati[nome] = len(testi) / secondi
+        trovati = sum(bool(valore) for contatti in estratti for valore in contatti)
+        print(f"{nome:>14}: {risultati[nome]:10,.1f} pagine/s ({trovati} contatti)")
+
+    print(f"{'speedup':>14}: {risultati['un passaggio'] / risultati['precedente']:10.1f}x rispetto al primo "
+          f"risultato, {risultati['un passaggio'] / risultati['prec. tutti']:.1f}x rispetto a tutte le occorrenze")
+    return risultati
+
+
+def main():
+    """
+    Funzione principale
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark dei generatori di dati PMI')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    parser_generatore = subparsers.add_parser('generatore', help='Generazione per riga contro generazione a blocchi')
+    parser_generatore.add_argument('--num', type=int, default=100000, help='Numero di aziende da generare')
+    parser_generatore.add_argument('--batch-size', type=int, default=100000, help='Dimensione dei blocchi vettoriali')
+    parser_generatore.add_argument('--seed', type=int, default=42, help='Seme del generatore NumPy')
+
+    parser_campionatori = subparsers.add_parser('campionatori', help='random.choices contro tabelle alias')
+    parser_campionatori.add_argument('--num', type=int, default=1000000, help='Numero di estrazioni')
+    parser_campionatori.add_argument('--seed', type=int, default=42, help='Seme dei generatori casuali')
+
+    parser_partite_iva = subparsers.add_parser('partite-iva', help='Generazione e validazione delle partite IVA')
+    parser_partite_iva.add_argument('--num', type=int, default=1000000, help='Numero di partite IVA')
+
+    parser_html = subparsers.add_parser('parser', help='Pagine al secondo dei backend HTML')
+    parser_html.add_argument('--cartella', default=None, help='Cartella con pagine HTML salvate (default: sintetiche)')
+    parser_html.add_argument('--num', type=int, default=200, help='Numero di pagine sintetiche')
+    parser_html.add_argument('--ripetizioni', type=int, default=3, help='Passaggi su tutte le pagine')
+
+    parser_estrazione = subparsers.add_parser('estrazione', help='Estrazione dei contatti dal testo delle pagine')
+    parser_estrazione.add_argument('--cartella', default=None, help='Cartella con pagine HTML salvate (default: sintetiche)')
+    parser_estrazione.add_argument('--num', type=int, default=1000, help='Numero di pagine sintetiche')
+    parser_estrazione.add_argument('--ripetizioni', type=int, default=3, help='Passaggi su tutte le pagine')
+    parser_estrazione.add_argument('--processi', type=int, default=os.cpu_count(), help='Processi della modalità bulk')
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'generatore':
+        benchmark_generatore(args.num, args.batch_size, args.seed)
+    elif args.benchmark == 'campionatori':
+        benchmark_campionatori(args.num, args.seed)
+    elif args.benchmark == 'partite-iva':
+        benchmark_partite_iva(args.num)
+    elif args.benchmark == 'parser':
+        benchmark_parser(args.cartella, args.num, args.ripetizioni)
+    elif args.benchmark == 'estrazione':
+        benchmark_estrazione(args.cartella, args.num, args.ripetizioni, args.processi)
+
+
+if __name__ == "__main__":
+    main()
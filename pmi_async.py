@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Async - Motore di download asincrono con concorrenza e cortesia per host
+
+Le pause tra le richieste allo stesso host sono decise dal limitatore per
+dominio e attese senza bloccare: mentre un host attende il proprio turno, le
+richieste verso altri host (e le altre ricerche) proseguono sullo stesso
+event loop.
+"""
+
+import asyncio
+from urllib.parse import urlsplit
+
+from pmi_http import StatisticheConnessioni, crea_sessione_async
+from pmi_limitatore import LimitatoreDomini
+
+
+def _aiohttp():
+    """
+    Importa aiohttp, necessario solo per il download asincrono
+
+    Returns:
+        module: aiohttp
+    """
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError("Il download asincrono richiede aiohttp: pip install aiohttp") from e
+    return aiohttp
+
+
+class MotoreAsincrono:
+    """
+    Client HTTP asincrono condiviso da tutte le fonti di uno scraping
+
+    Da usare come context manager asincrono:
+
+        async with MotoreAsincrono(headers) as motore:
+            stato, testo = await motore.scarica(url)
+    """
+
+    def __init__(self, headers=None, concorrenza_per_host=2, limitatore=None, timeout=15, cache=None):
+        """
+        Args:
+            headers (dict): Intestazioni inviate con ogni richiesta
+            concorrenza_per_host (int): Richieste contemporanee massime verso lo stesso host
+            limitatore (LimitatoreDomini): Limitatore condiviso (default: uno nuovo con i valori predefiniti)
+            timeout (float): Timeout predefinito di ogni richiesta in secondi
+            cache (CacheHTTP): Cache su disco delle risposte (default: nessuna cache)
+        """
+        self.headers = dict(headers or {})
+        self.concorrenza_per_host = concorrenza_per_host
+        self.limitatore = limitatore or LimitatoreDomini()
+        self.timeout = timeout
+        self.cache = cache
+        self.statistiche = StatisticheConnessioni()
+        self.session = None
+        self._semafori = {}
+
+    async def __aenter__(self):
+        self.session = crea_sessione_async(
+            self.headers, connessioni_per_host=self.concorrenza_per_host, statistiche=self.statistiche
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def _semaforo(self, host):
+        """Restituisce il semaforo di un host, creandolo al primo utilizzo"""
+        if host not in self._semafori:
+            self._semafori[host] = asyncio.Semaphore(self.concorrenza_per_host)
+        return self._semafori[host]
+
+    async def scarica(self, url, timeout=None):
+        """
+        Scarica una pagina rispettando limiti e backoff del suo host
+
+        Con una cache, le risposte ancora fresche sono restituite senza rete
+        né attesa del limitatore; quelle scadute sono rivalidate con una
+        richiesta condizionale e riutilizzate se il server risponde 304.
+        Le risposte 429/5xx e gli errori di rete vengono ripetuti dopo il
+        backoff deciso dal limitatore, fino a tentativi_massimi volte.
+
+        Args:
+            url (str): URL da scaricare
+            timeout (float): Timeout della richiesta in secondi
+
+        Returns:
+            tuple: (codice di stato, testo della risposta)
+        """
+        voce = chiave = None
+        if self.cache is not None:
+            chiave = self.cache.chiave(url, self.headers)
+            voce = self.cache.leggi(chiave)
+            if voce is not None and voce['fresca']:
+                self.cache.registra('hit', len(voce['testo']))
+                return voce['stato'], voce['testo']
+
+        condizionali = self.cache.intestazioni_condizionali(voce) if voce is not None else {}
+        stato, testo, intestazioni = await self._scarica_rete(url, timeout, condizionali)
+
+        if self.cache is not None:
+            if stato == 304 and voce is not None:
+                self.cache.rinnova(chiave)
+                self.cache.registra('rivalidate', len(voce['testo']))
+                return voce['stato'], voce['testo']
+            self.cache.registra('miss')
+            if stato == 200:
+                self.cache.salva(chiave, url, stato, testo,
+                                 intestazioni.get('ETag'), intestazioni.get('Last-Modified'))
+        return stato, testo
+
+    async def _scarica_rete(self, url, timeout, intestazioni_extra):
+        """
+        Esegue la richiesta con limitatore, backoff e ripetizioni
+
+        Returns:
+            tuple: (codice di stato, testo, intestazioni della risposta)
+        """
+        aiohttp = _aiohttp()
+        host = urlsplit(url).netloc
+        tentativi = self.limitatore.tentativi_massimi
+
+        for tentativo in range(tentativi + 1):
+            async with self._semaforo(host):
+                await self.limitatore.attendi_async(host)
+                try:
+                    async with self.session.get(
+                        url, headers=intestazioni_extra or None,
+                        timeout=aiohttp.ClientTimeout(total=timeout or self.timeout)
+                    ) as risposta:
+                        stato, testo = risposta.status, await risposta.text()
+                        intestazioni = risposta.headers
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    if not self.limitatore.registra_risposta(host, None) or tentativo == tentativi:
+                        raise
+                    continue
+
+            if not self.limitatore.registra_risposta(host, stato, intestazioni.get('Retry-After')):
+                break
+        return stato, testo, intestazioni
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Cache - Cache HTTP persistente su disco per le ripetizioni degli scraping
+
+Le risposte sono salvate compresse in un database SQLite, con chiave data
+dall'URL e dalle intestazioni che ne influenzano il contenuto. Entro il TTL
+una pagina è servita dalla cache senza rete; dopo il TTL viene rivalidata con
+If-None-Match / If-Modified-Since e, se il server risponde 304, il corpo
+salvato viene riutilizzato. Oltre la dimensione massima si eliminano le voci
+usate meno di recente.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+
+# Intestazioni della richiesta che fanno parte della chiave
+INTESTAZIONI_CHIAVE = ('Accept', 'Accept-Language')
+
+
+class CacheHTTP:
+    """
+    Cache HTTP su SQLite con rivalidazione condizionale, TTL ed eliminazione LRU
+    """
+
+    def __init__(self, percorso="pmi_cache.sqlite", ttl=86400, scadenza=30 * 86400,
+                 dimensione_massima=500 * 1024 * 1024):
+        """
+        Args:
+            percorso (str): File del database della cache
+            ttl (float): Secondi in cui una risposta è servita senza rivalidarla
+            scadenza (float): Secondi dopo i quali una risposta viene eliminata
+            dimensione_massima (int): Byte massimi dei corpi compressi in cache
+        """
+        self.percorso = percorso
+        self.ttl = ttl
+        self.scadenza = scadenza
+        self.dimensione_massima = dimensione_massima
+        self.statistiche = {'hit': 0, 'rivalidate': 0, 'miss': 0, 'byte_risparmiati': 0}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(percorso, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS risposte (
+                chiave TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                stato INTEGER NOT NULL,
+                corpo BLOB NOT NULL,
+                dimensione INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                salvata REAL NOT NULL,
+                usata REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_risposte_usata ON risposte (usata)")
+        self._db.commit()
+        # Byte dei corpi in cache, tenuti aggiornati da salva: calcolati qui da elimina_scadute
+        self._totale = 0
+        self.elimina_scadute()
+
+    @staticmethod
+    def chiave(url, headers=None):
+        """
+        Calcola la chiave di una richiesta
+
+        Args:
+            url (str): URL richiesto
+            headers (dict): Intestazioni della richiesta
+
+        Returns:
+            str: Hash SHA-256 di URL e intestazioni rilevanti
+        """
+        headers = headers or {}
+        parti = [url] + [f"{nome}:{headers.get(nome, '')}" for nome in INTESTAZIONI_CHIAVE]
+        return hashlib.sha256("\n".join(parti).encode('utf-8')).hexdigest()
+
+    def leggi(self, chiave):
+        """
+        Legge una risposta salvata e ne aggiorna l'ultimo utilizzo
+
+        Returns:
+            dict: stato, testo, etag, last_modified e fresca; None se assente
+        """
+        with self._lock:
+            riga = self._db.execute(
+                "SELECT stato, corpo, etag, last_modified, salvata FROM risposte WHERE chiave = ?", (chiave,)
+            ).fetchone()
+            if riga is None:
+                return None
+            self._db.execute("UPDATE risposte SET usata = ? WHERE chiave = ?", (time.time(), chiave))
+            self._db.commit()
+
+        stato, corpo, etag, last_modified, salvata = riga
+        return {
+            'stato': stato,
+            'testo': zlib.decompress(corpo).decode('utf-8'),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresca': time.time() - salvata < self.ttl
+        }
+
+    def intestazioni_condizionali(self, voce):
+        """
+        Intestazioni per rivalidare una voce scaduta
+
+        Returns:
+            dict: If-None-Match e/o If-Modified-Since
+        """
+        intestazioni = {}
+        if voce and voce['etag']:
+            intestazioni['If-None-Match'] = voce['etag']
+        if voce and voce['last_modified']:
+            intestazioni['If-Modified-Since'] = voce['last_modified']
+        return intestazioni
+
+    def salva(self, chiave, url, stato, testo, etag=None, last_modified=None):
+        """
+        Salva una risposta compressa ed elimina le voci in eccesso
+
+        Args:
+            chiave (str): Chiave della richiesta
+            url (str): URL richiesto
+            stato (int): Codice di stato
+            testo (str): Corpo della risposta
+            etag (str): Intestazione ETag
+            last_modified (str): Intestazione Last-Modified
+        """
+        corpo = zlib.compress(testo.encode('utf-8'), 6)
+        ora = time.time()
+        with self._lock:
+            # La voce sostituita esce dal totale
+            precedente = self._db.execute("SELECT dimensione FROM risposte WHERE chiave = ?", (chiave,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO risposte VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (chiave, url, stato, corpo, len(corpo), etag, last_modified, ora, ora)
+            )
+            self._totale += len(corpo) - (precedente[0] if precedente else 0)
+            if self._totale > self.dimensione_massima:
+                self._elimina_eccesso()
+            self._db.commit()
+
+    def rinnova(self, chiave):
+        """Segna come appena salvata una voce confermata da un 304"""
+        ora = time.time()
+        with self._lock:
+            self._db.execute("UPDATE risposte SET salvata = ?, usata = ? WHERE chiave = ?", (ora, ora, chiave))
+            self._db.commit()
+
+    def registra(self, esito, byte=0):
+        """
+        Aggiorna i contatori della cache
+
+        Args:
+            esito (str): 'hit', 'rivalidate' o 'miss'
+            byte (int): Byte di corpo non scaricati grazie alla cache
+        """
+        with self._lock:
+            self.statistiche[esito] += 1
+            self.statistiche['byte_risparmiati'] += byte
+
+    def _elimina_eccesso(self):
+        """Elimina le voci usate meno di recente finché la cache supera la dimensione massima"""
+        eccesso = self._totale - self.dimensione_massima
+        liberati = 0
+        da_eliminare = []
+        for chiave, dimensione in self._db.execute("SELECT chiave, dimensione FROM risposte ORDER BY usata"):
+            da_eliminare.append((chiave,))
+            liberati += dimensione
+            if liberati >= eccesso:
+                break
+        self._db.executemany("DELETE FROM risposte WHERE chiave = ?", da_eliminare)
+        self._totale -= liberati
+
+    def elimina_scadute(self):
+        """
+        Elimina le voci salvate da più di scadenza secondi
+
+        Returns:
+            int: Numero di voci eliminate
+        """
+        with self._lock:
+            eliminate = self._db.execute(
+                "DELETE FROM risposte WHERE salvata < ?", (time.time() - self.scadenza,)
+            ).rowcount
+            self._db.commit()
+            # Operazione rara (all'apertura): il totale si ricalcola per intero
+            self._totale = self._db.execute("SELECT COALESCE(SUM(dimensione), 0) FROM risposte").fetchone()[0]
+        return eliminate
+
+    def riepilogo(self):
+        """
+        Riepilogo leggibile dei contatori
+
+        Returns:
+            str: Hit, rivalidazioni, miss e dati risparmiati
+        """
+        s = self.statistiche
+        richieste = s['hit'] + s['rivalidate'] + s['miss']
+        quota = (s['hit'] + s['rivalidate']) / richieste if richieste else 0
+        return (f"Cache HTTP: {s['hit']} hit, {s['rivalidate']} rivalidate (304), {s['miss']} miss "
+                f"({quota:.0%} servite dalla cache, {s['byte_risparmiati'] / 1024 / 1024:.1f} MB risparmiati)")
+
+    def close(self):
+        """Chiude il database"""
+        with self._lock:
+            self._db.close()
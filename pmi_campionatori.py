@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Campionatori - Estrazioni pesate precalcolate con tabelle alias di Walker
+"""
+
+import random
+
+import numpy as np
+
+
+class CampionatoreAlias:
+    """
+    Campionatore pesato con tabella alias di Walker (metodo di Vose)
+
+    La tabella si costruisce una sola volta in O(n); ogni estrazione costa O(1)
+    e consuma un solo numero casuale, invece di ricalcolare i pesi cumulati
+    come random.choices.
+    """
+
+    def __init__(self, valori, pesi, rng=random):
+        """
+        Args:
+            valori (iterable): Valori da estrarre
+            pesi (iterable): Pesi non negativi, anche non normalizzati
+            rng: Sorgente casuale con metodo random() (default: modulo random)
+        """
+        self.valori = list(valori)
+        pesi = [float(peso) for peso in pesi]
+        if len(pesi) != len(self.valori) or not self.valori:
+            raise ValueError("valori e pesi devono avere la stessa lunghezza non nulla")
+        totale = sum(pesi)
+        if totale <= 0 or min(pesi) < 0:
+            raise ValueError("i pesi devono essere non negativi con somma positiva")
+
+        self.rng = rng
+        n = len(pesi)
+        scalati = [peso * n / totale for peso in pesi]
+        self.soglie = [1.0] * n
+        self.alias = list(range(n))
+
+        piccoli = [i for i, peso in enumerate(scalati) if peso < 1.0]
+        grandi = [i for i, peso in enumerate(scalati) if peso >= 1.0]
+        while piccoli and grandi:
+            piccolo = piccoli.pop()
+            grande = grandi[-1]
+            self.soglie[piccolo] = scalati[piccolo]
+            self.alias[piccolo] = grande
+            scalati[grande] -= 1.0 - scalati[piccolo]
+            if scalati[grande] < 1.0:
+                piccoli.append(grandi.pop())
+
+        # Array per le estrazioni vettoriali
+        self._soglie = np.array(self.soglie)
+        self._alias = np.array(self.alias)
+        self._valori = np.array(self.valori, dtype=object)
+
+    def estrai_indice(self, rng=None):
+        """
+        Estrae l'indice di un valore
+
+        Args:
+            rng: Sorgente casuale con metodo random() (default: quella del campionatore)
+
+        Returns:
+            int: Indice estratto
+        """
+        u = (self.rng if rng is None else rng).random() * len(self.soglie)
+        i = int(u)
+        return i if u - i < self.soglie[i] else self.alias[i]
+
+    def estrai(self, rng=None):
+        """
+        Estrae un valore
+
+        Args:
+            rng: Sorgente casuale con metodo random() (default: quella del campionatore)
+
+        Returns:
+            Valore estratto
+        """
+        return self.valori[self.estrai_indice(rng)]
+
+    def estrai_indici_batch(self, n, rng=None):
+        """
+        Estrae n indici con NumPy
+
+        Args:
+            n (int): Numero di estrazioni
+            rng (numpy.random.Generator): Generatore casuale (default: nuovo generatore)
+
+        Returns:
+            numpy.ndarray: Indici estratti
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        u = rng.random(n) * len(self.soglie)
+        i = u.astype(np.intp)
+        return np.where(u - i < self._soglie[i], i, self._alias[i])
+
+    def estrai_batch(self, n, rng=None):
+        """
+        Estrae n valori con NumPy
+
+        Args:
+            n (int): Numero di estrazioni
+            rng (numpy.random.Generator): Generatore casuale (default: nuovo generatore)
+
+        Returns:
+            numpy.ndarray: Valori estratti (dtype object)
+        """
+        return self._valori[self.estrai_indici_batch(n, rng)]
@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Carica - Caricamento tipizzato e a blocchi dei file di PMI
+
+I visualizzatori leggevano l'intero file con pd.read_csv: ogni colonna di
+testo diventava una colonna object, compresa la lunga Descrizione che
+nessuna analisi usa. Qui si leggono solo le colonne richieste, con i tipi
+dello schema canonico (pmi_schema): categorie per i campi a bassa
+cardinalità (settore, provincia, città, ...), numeri ridotti al tipo più
+piccolo che li contiene, stringhe pyarrow per il resto.
+
+Per file troppo grandi per la memoria, aggrega_a_blocchi applica
+un'aggregazione a ogni blocco e ne somma i risultati, senza mai tenere
+l'intero file in memoria:
+
+    df = carica_dataframe("pmi_italiane.csv", colonne=["Settore", "Provincia", "Dipendenti"])
+    per_settore = conta_valori("pmi_10m.csv", ["Settore"], dimensione_blocco=1_000_000)
+"""
+
+import csv
+import os
+
+import pandas as pd
+from pandas.api.types import is_numeric_dtype, union_categoricals
+
+from pmi_schema import ALIAS, CATEGORICI, DECIMALI, INTERI
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_DISPONIBILE = True
+except ImportError:
+    PYARROW_DISPONIBILE = False
+
+# Righe per blocco nella lettura a blocchi
+DIMENSIONE_BLOCCO = 500_000
+
+_ESTENSIONI_PARQUET = ('.parquet', '.pq')
+
+
+def _parquet(percorso):
+    """Il file è in formato Parquet"""
+    return str(percorso).lower().endswith(_ESTENSIONI_PARQUET)
+
+
+def intestazioni(percorso):
+    """
+    Colonne di un file CSV o Parquet, senza leggerne i dati
+
+    Args:
+        percorso (str): File CSV o Parquet
+
+    Returns:
+        list: Nomi delle colonne
+    """
+    if _parquet(percorso):
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(percorso).names)
+    with open(percorso, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), [])
+
+
+def _selezione(percorso, colonne):
+    """Colonne richieste presenti nel file, nell'ordine del file"""
+    presenti = intestazioni(percorso)
+    if colonne is None:
+        return presenti
+    richieste = set(colonne)
+    return [colonna for colonna in presenti if colonna in richieste]
+
+
+def _tipo_testo():
+    """Dtype delle colonne di testo: stringhe pyarrow se disponibili"""
+    return pd.StringDtype('pyarrow') if PYARROW_DISPONIBILE else object
+
+
+def tipi_colonne(colonne):
+    """
+    Dtype di lettura per le colonne di un file, secondo lo schema canonico
+
+    Le colonne numeriche non compaiono: vengono lette da pandas e poi ridotte
+    da ottimizza_tipi. Nemmeno quelle sconosciute allo schema, lasciate
+    all'inferenza di pandas.
+
+    Args:
+        colonne (list): Intestazioni del file
+
+    Returns:
+        dict: Intestazione -> dtype
+    """
+    tipi = {}
+    for colonna in colonne:
+        campo = ALIAS.get(colonna)
+        if campo is None or campo in INTERI or campo in DECIMALI:
+            continue
+        tipi[colonna] = 'category' if campo in CATEGORICI else _tipo_testo()
+    return tipi
+
+
+def ottimizza_tipi(df):
+    """
+    Riduce i tipi di un DataFrame già letto: numeri al tipo più piccolo,
+    campi a bassa cardinalità in categorie
+
+    Args:
+        df (DataFrame): Dati da ottimizzare (modificato sul posto)
+
+    Returns:
+        DataFrame: Lo stesso DataFrame
+    """
+    for colonna in df.columns:
+        campo = ALIAS.get(colonna)
+        serie = df[colonna]
+        if campo in INTERI or campo in DECIMALI:
+            if not is_numeric_dtype(serie):
+                serie = pd.to_numeric(serie, errors='coerce')
+            # Gli interi con valori mancanti restano decimali (float32)
+            if serie.isna().any() or campo in DECIMALI:
+                df[colonna] = pd.to_numeric(serie, downcast='float')
+            else:
+                df[colonna] = pd.to_numeric(serie, downcast='integer')
+        elif campo in CATEGORICI and not isinstance(serie.dtype, pd.CategoricalDtype):
+            df[colonna] = serie.astype('category')
+        elif campo is not None and serie.dtype == object:
+            df[colonna] = serie.astype(_tipo_testo())
+    return df
+
+
+def _leggi_csv(percorso, colonne, engine, **kw):
+    """pd.read_csv con le sole colonne richieste e i tipi dello schema"""
+    return pd.read_csv(
+        percorso, usecols=colonne, dtype=tipi_colonne(colonne), engine=engine, encoding='utf-8', **kw
+    )
+
+
+def leggi_a_blocchi(percorso, colonne=None, dimensione_blocco=DIMENSIONE_BLOCCO):
+    """
+    Legge un file a blocchi di righe già tipizzati
+
+    Args:
+        percorso (str): File CSV o Parquet
+        colonne (list): Colonne da leggere (default: tutte)
+        dimensione_blocco (int): Righe per blocco
+
+    Yields:
+        DataFrame: Blocchi di al più dimensione_blocco righe
+    """
+    selezione = _selezione(percorso, colonne)
+    if _parquet(percorso):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(percorso).iter_batches(batch_size=dimensione_blocco, columns=selezione):
+            yield ottimizza_tipi(batch.to_pandas())
+        return
+    # Il motore pyarrow di pandas non legge a blocchi: si usa quello C
+    with _leggi_csv(percorso, selezione, 'c', chunksize=dimensione_blocco) as lettore:
+        for blocco in lettore:
+            yield ottimizza_tipi(blocco)
+
+
+def _concatena(blocchi):
+    """Concatena blocchi tipizzati, unendo le categorie invece di perderle in object"""
+    if not blocchi:
+        return pd.DataFrame()
+    if len(blocchi) == 1:
+        return blocchi[0]
+    colonne = {}
+    for colonna in blocchi[0].columns:
+        serie = [blocco[colonna] for blocco in blocchi]
+        if all(isinstance(s.dtype, pd.CategoricalDtype) for s in serie):
+            colonne[colonna] = pd.Series(union_categoricals(serie, ignore_order=True), name=colonna)
+        else:
+            colonne[colonna] = pd.concat(serie, ignore_index=True)
+    return ottimizza_tipi(pd.DataFrame(colonne))
+
+
+def carica_dataframe(percorso, colonne=None, engine=None, nrows=None, dimensione_blocco=None):
+    """
+    Carica un file CSV o Parquet con le sole colonne richieste e tipi compatti
+
+    Args:
+        percorso (str): File CSV o Parquet
+        colonne (list): Colonne da leggere; quelle assenti dal file vengono
+                        ignorate (default: tutte)
+        engine (str): Motore di pd.read_csv, 'pyarrow' o 'c'
+                      (default: 'pyarrow' se installato)
+        nrows (int): Numero massimo di righe da leggere
+        dimensione_blocco (int): Se indicato, legge il file a blocchi di
+                                 queste righe e li concatena, limitando il
+                                 picco di memoria della lettura
+
+    Returns:
+        DataFrame: Dati tipizzati
+    """
+    if not os.path.exists(percorso):
+        raise FileNotFoundError(f"File non trovato: {percorso}")
+
+    selezione = _selezione(percorso, colonne)
+
+    if dimensione_blocco:
+        blocchi = []
+        letti = 0
+        for blocco in leggi_a_blocchi(percorso, selezione, dimensione_blocco):
+            if nrows is not None and letti + len(blocco) >= nrows:
+                blocchi.append(blocco.iloc[:nrows - letti])
+                break
+            blocchi.append(blocco)
+            letti += len(blocco)
+        return _concatena(blocchi).reset_index(drop=True)
+
+    if _parquet(percorso):
+        df = pd.read_parquet(percorso, columns=selezione)
+        return ottimizza_tipi(df.head(nrows) if nrows is not None else df)
+
+    if engine is None:
+        # Il motore pyarrow legge in parallelo ma non supporta nrows
+        engine = 'pyarrow' if PYARROW_DISPONIBILE and nrows is None else 'c'
+    elif engine == 'pyarrow' and not PYARROW_DISPONIBILE:
+        raise ImportError("Il motore pyarrow richiede pyarrow. Installa con: pip install pyarrow")
+    kw = {'nrows': nrows} if nrows is not None else {}
+    return ottimizza_tipi(_leggi_csv(percorso, selezione, engine, **kw))
+
+
+def aggrega_a_blocchi(percorso, funzione, colonne=None, dimensione_blocco=DIMENSIONE_BLOCCO):
+    """
+    Applica un'aggregazione a ogni blocco di un file e somma i risultati
+
+    La funzione deve restituire valori additivi (conteggi, somme) come
+    Series o DataFrame indicizzati per gruppo: i parziali dei blocchi
+    vengono sommati allineando gli indici. In memoria resta un solo blocco
+    alla volta.
+
+        totale = aggrega_a_blocchi("pmi.csv", lambda b: b.groupby("Settore", observed=True)["Dipendenti"].sum(),
+                                   colonne=["Settore", "Dipendenti"])
+
+    Args:
+        percorso (str): File CSV o Parquet
+        funzione (callable): Blocco (DataFrame) -> Series o DataFrame additivo
+        colonne (list): Colonne da leggere (default: tutte)
+        dimensione_blocco (int): Righe per blocco
+
+    Returns:
+        Series | DataFrame: Somma dei parziali, None se il file è vuoto
+    """
+    totale = None
+    for blocco in leggi_a_blocchi(percorso, colonne, dimensione_blocco):
+        parziale = funzione(blocco)
+        totale = parziale if totale is None else totale.add(parziale, fill_value=0)
+    return totale
+
+
+def conta_valori(percorso, colonne, dimensione_blocco=DIMENSIONE_BLOCCO):
+    """
+    Conteggio delle righe per valore di una o più colonne, letto a blocchi
+
+    Args:
+        percorso (str): File CSV o Parquet
+        colonne (list): Colonne da raggruppare
+        dimensione_blocco (int): Righe per blocco
+
+    Returns:
+        Series: Numero di righe per valore, dal più frequente
+    """
+    colonne = list(colonne)
+    conteggi = aggrega_a_blocchi(
+        percorso, lambda blocco: blocco.groupby(colonne, observed=True, dropna=False).size(), colonne, dimensione_blocco
+    )
+    if conteggi is None:
+        return pd.Series(dtype='int64')
+    return conteggi.astype('int64').sort_values(ascending=False)
+
+
+def main():
+    """
+    Funzione principale
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Caricamento tipizzato e a blocchi di file di PMI')
+    parser.add_argument('file', help='File CSV o Parquet')
+    parser.add_argument('--colonne', nargs='+', help='Colonne da caricare (default: tutte)')
+    parser.add_argument('--conta', nargs='+', metavar='COLONNA',
+                        help='Conta le righe per valore di queste colonne, leggendo a blocchi')
+    parser.add_argument('--chunk-size', type=int, default=DIMENSIONE_BLOCCO, help='Righe per blocco')
+    parser.add_argument('--engine', choices=('pyarrow', 'c'), help='Motore di lettura dei CSV')
+    parser.add_argument('--righe', type=int, default=20, help='Righe da mostrare')
+
+    args = parser.parse_args()
+
+    if args.conta:
+        conteggi = conta_valori(args.file, args.conta, args.chunk_size)
+        print(conteggi.head(args.righe).to_string())
+        print(f"\n{len(conteggi)} valori distinti, {conteggi.sum()} righe")
+        return
+
+    df = carica_dataframe(args.file, args.colonne, engine=args.engine)
+    print(f"{len(df)} righe, {df.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB in memoria\n")
+    print(df.dtypes.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Contatti - Stato dei contatti aggiornato sul posto
+
+Stato, data dell'ultimo contatto, data della risposta e note di ogni
+azienda vivono nell'archivio SQLite di pmi_database e si aggiornano per
+ID, singolarmente o a migliaia in un'unica transazione, senza riscrivere
+alcun file. Ogni cambio di stato viene annotato nello storico da un
+trigger del database.
+
+    with ArchivioContatti("pmi_data.db") as contatti:
+        contatti.transizione([12, 15, 18], "Email inviata")
+        contatti.aggiorna(12, stato="Risposta ricevuta", note="Richiamare a settembre")
+"""
+
+import sqlite3
+import threading
+from datetime import date
+
+from pmi_database import DatabasePMI
+
+# Stati possibili di un contatto, nell'ordine del funnel (come nella dashboard)
+STATI = (
+    'Non contattato',
+    'Email inviata',
+    'Risposta ricevuta',
+    'Non interessato',
+    'Cliente potenziale',
+    'Cliente acquisito'
+)
+
+# Stati che indicano una risposta dell'azienda
+STATI_RISPOSTA = frozenset(('Risposta ricevuta', 'Non interessato', 'Cliente potenziale', 'Cliente acquisito'))
+
+_SCHEMA_STORICO = """
+    CREATE TABLE IF NOT EXISTS storico_stati (
+        id INTEGER PRIMARY KEY,
+        azienda INTEGER NOT NULL REFERENCES aziende (id),
+        stato_precedente TEXT,
+        stato TEXT,
+        quando TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_storico_stati_azienda ON storico_stati (azienda);
+    CREATE TRIGGER IF NOT EXISTS trg_storico_stati AFTER UPDATE OF stato ON aziende
+    WHEN old.stato IS NOT new.stato
+    BEGIN
+        INSERT INTO storico_stati (azienda, stato_precedente, stato) VALUES (new.id, old.stato, new.stato);
+    END;
+"""
+
+# I valori None lasciano il campo invariato
+_AGGIORNAMENTO = """
+    UPDATE aziende SET
+        stato = COALESCE(?, stato),
+        data_ultimo_contatto = COALESCE(?, data_ultimo_contatto),
+        data_risposta = COALESCE(?, data_risposta),
+        note = COALESCE(?, note)
+    WHERE id = ?
+"""
+
+# Il ritorno a "Non contattato" azzera le date, che COALESCE lascerebbe invariate
+_AZZERAMENTO = """
+    UPDATE aziende SET stato = ?, data_ultimo_contatto = NULL, data_risposta = NULL WHERE id = ?
+"""
+
+
+def _verifica_stato(stato):
+    """Solleva ValueError per gli stati che la dashboard non conosce"""
+    if stato is not None and stato not in STATI:
+        raise ValueError(f"Stato sconosciuto: {stato!r} (ammessi: {', '.join(STATI)})")
+
+
+def _data(valore):
+    """Data in formato ISO (AAAA-MM-GG) da una data o da una stringa"""
+    if valore is None or isinstance(valore, str):
+        return valore
+    return valore.isoformat()
+
+
+class ArchivioContatti:
+    """
+    Stato dei contatti nell'archivio SQLite, aggiornabile per ID
+    """
+
+    def __init__(self, percorso="pmi_data.db"):
+        """
+        Args:
+            percorso (str): Database di pmi_database (creato con lo schema se assente)
+        """
+        self.percorso = percorso
+
+        # Crea lo schema delle aziende, se manca, con i suoi indici su stato e date
+        DatabasePMI(percorso).close()
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(percorso, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA_STORICO)
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def aggiorna(self, id_azienda, stato=None, data_contatto=None, data_risposta=None, note=None):
+        """
+        Aggiorna i campi di un contatto; quelli non indicati restano invariati
+
+        Un campo non si può quindi svuotare con aggiorna: per riportare un
+        contatto a "Non contattato" azzerandone le date si usa transizione.
+
+        Args:
+            id_azienda (int): ID dell'azienda nell'archivio
+            stato (str): Nuovo stato, tra quelli di STATI
+            data_contatto (str | date): Data dell'ultimo contatto
+            data_risposta (str | date): Data della risposta
+            note (str): Note
+
+        Returns:
+            bool: True se l'azienda esiste
+        """
+        _verifica_stato(stato)
+        with self._lock, self._db:
+            cursore = self._db.execute(
+                _AGGIORNAMENTO, (stato, _data(data_contatto), _data(data_risposta), note, id_azienda)
+            )
+        return cursore.rowcount > 0
+
+    def aggiorna_molti(self, aggiornamenti):
+        """
+        Aggiorna molti contatti in un'unica transazione
+
+        Args:
+            aggiornamenti (iterable): Dizionari con 'id' e, facoltativi, 'stato',
+                                      'data_contatto', 'data_risposta' e 'note'
+
+        Returns:
+            int: Numero di contatti aggiornati
+        """
+        parametri = []
+        for aggiornamento in aggiornamenti:
+            _verifica_stato(aggiornamento.get('stato'))
+            parametri.append((
+                aggiornamento.get('stato'), _data(aggiornamento.get('data_contatto')),
+                _data(aggiornamento.get('data_risposta')), aggiornamento.get('note'), aggiornamento['id']
+            ))
+        parametri.sort(key=lambda valori: valori[-1])
+        with self._lock, self._db:
+            aggiornati = self._db.executemany(_AGGIORNAMENTO, parametri).rowcount
+        return aggiornati
+
+    def transizione(self, ids, stato, data=None):
+        """
+        Porta più contatti nello stesso stato, aggiornando le date
+
+        Uno stato diverso da "Non contattato" registra la data dell'ultimo
+        contatto; gli stati di STATI_RISPOSTA anche la data della risposta.
+        Il ritorno a "Non contattato" azzera entrambe le date.
+
+        Args:
+            ids (iterable): ID delle aziende
+            stato (str): Nuovo stato, tra quelli di STATI (obbligatorio)
+            data (str | date): Data della transizione (default: oggi)
+
+        Returns:
+            int: Numero di contatti aggiornati
+        """
+        if stato is None:
+            raise ValueError("Stato mancante: indicare il nuovo stato dei contatti")
+        _verifica_stato(stato)
+        # In ordine di ID gli aggiornamenti visitano le pagine della tabella in sequenza
+        ids = sorted(ids)
+        if stato == 'Non contattato':
+            query, parametri = _AZZERAMENTO, ((stato, id_azienda) for id_azienda in ids)
+        else:
+            data = _data(data) or date.today().isoformat()
+            data_risposta = data if stato in STATI_RISPOSTA else None
+            query = _AGGIORNAMENTO
+            parametri = ((stato, data, data_risposta, None, id_azienda) for id_azienda in ids)
+        with self._lock, self._db:
+            aggiornati = self._db.executemany(query, parametri).rowcount
+        return aggiornati
+
+    def conteggi(self):
+        """
+        Numero di contatti per stato; le aziende senza stato contano come "Non contattato"
+
+        Returns:
+            dict: Stato -> numero di contatti, nell'ordine di STATI
+        """
+        with self._lock:
+            # Raggruppando sulla colonna, e non su un'espressione, il conteggio usa l'indice sullo stato
+            righe = self._db.execute("SELECT stato, COUNT(*) FROM aziende GROUP BY stato").fetchall()
+        conteggi = dict.fromkeys(STATI, 0)
+        for stato, numero in righe:
+            stato = stato or 'Non contattato'
+            conteggi[stato] = conteggi.get(stato, 0) + numero
+        return conteggi
+
+    def per_stato(self, stato, limite=None):
+        """
+        ID dei contatti in uno stato, tramite l'indice sullo stato
+
+        Args:
+            stato (str): Stato cercato
+            limite (int): Numero massimo di ID
+
+        Returns:
+            list: ID delle aziende
+        """
+        _verifica_stato(stato)
+        condizione = "stato IS NULL OR stato = ?" if stato == 'Non contattato' else "stato = ?"
+        query = f"SELECT id FROM aziende WHERE {condizione} ORDER BY id"
+        parametri = [stato]
+        if limite is not None:
+            query += " LIMIT ?"
+            parametri.append(limite)
+        with self._lock:
+            return [id_azienda for (id_azienda,) in self._db.execute(query, parametri)]
+
+    def da_ricontattare(self, prima_del, stato='Email inviata'):
+        """
+        Contatti in uno stato il cui ultimo contatto è anteriore a una data
+
+        Args:
+            prima_del (str | date): Data limite (esclusa)
+            stato (str): Stato dei contatti cercati
+
+        Returns:
+            list: Tuple (ID, ragione sociale, data dell'ultimo contatto), dalle meno recenti
+        """
+        _verifica_stato(stato)
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, ragione_sociale, data_ultimo_contatto FROM aziende "
+                "WHERE stato = ? AND data_ultimo_contatto < ? ORDER BY data_ultimo_contatto",
+                (stato, _data(prima_del))
+            ).fetchall()
+
+    def contatto(self, id_azienda):
+        """
+        Campi CRM di un contatto
+
+        Returns:
+            dict: Ragione sociale, stato, date e note; None se l'azienda non esiste
+        """
+        with self._lock:
+            riga = self._db.execute(
+                "SELECT ragione_sociale, stato, data_ultimo_contatto, data_risposta, note FROM aziende WHERE id = ?",
+                (id_azienda,)
+            ).fetchone()
+        if riga is None:
+            return None
+        campi = ('Ragione Sociale', 'Stato', 'Data Ultimo Contatto', 'Data Risposta', 'Note')
+        return dict(zip(campi, riga))
+
+    def storico(self, id_azienda):
+        """
+        Cambi di stato di un contatto, dal più vecchio
+
+        Returns:
+            list: Tuple (stato precedente, stato, quando)
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT stato_precedente, stato, quando FROM storico_stati WHERE azienda = ? ORDER BY id",
+                (id_azienda,)
+            ).fetchall()
+
+    def close(self):
+        """Chiude il database"""
+        with self._lock:
+            self._db.close()
+
+
+def main():
+    """
+    Funzione principale
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Stato dei contatti di PMI nell\'archivio SQLite')
+    parser.add_argument('--db', default='pmi_data.db', help='File del database SQLite')
+    sottocomandi = parser.add_subparsers(dest='comando', required=True)
+
+    stato = sottocomandi.add_parser('stato', help='Porta uno o più contatti in un nuovo stato')
+    stato.add_argument('id', type=int, nargs='+', help='ID delle aziende')
+    stato.add_argument('--stato', required=True, choices=STATI, help='Nuovo stato')
+    stato.add_argument('--data', help='Data della transizione, AAAA-MM-GG (default: oggi)')
+    stato.add_argument('--note', help='Note da registrare')
+
+    sottocomandi.add_parser('conteggi', help='Numero di contatti per stato')
+
+    mostra = sottocomandi.add_parser('mostra', help='Campi CRM e storico di un contatto')
+    mostra.add_argument('id', type=int, help='ID dell\'azienda')
+
+    ricontattare = sottocomandi.add_parser('ricontattare', help='Contatti senza risposta da una certa data')
+    ricontattare.add_argument('--prima-del', required=True, help='Data limite, AAAA-MM-GG')
+
+    args = parser.parse_args()
+
+    with ArchivioContatti(args.db) as contatti:
+        if args.comando == 'stato':
+            aggiornati = contatti.transizione(args.id, args.stato, args.data)
+            if args.note:
+                contatti.aggiorna_molti({'id': id_azienda, 'note': args.note} for id_azienda in args.id)
+            print(f"{aggiornati} contatti aggiornati a \"{args.stato}\"")
+        elif args.comando == 'conteggi':
+            for nome, numero in contatti.conteggi().items():
+                print(f"{nome}: {numero}")
+        elif args.comando == 'mostra':
+            dati = contatti.contatto(args.id)
+            if dati is None:
+                print(f"Azienda {args.id} non trovata")
+                return
+            for campo, valore in dati.items():
+                print(f"{campo}: {valore or ''}")
+            for precedente, nuovo, quando in contatti.storico(args.id):
+                print(f"{quando}: {precedente or 'Non contattato'} -> {nuovo}")
+        else:
+            for id_azienda, nome, data_contatto in contatti.da_ricontattare(args.prima_del):
+                print(f"{id_azienda}\t{nome}\t{data_contatto}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Database - Archivio SQLite normalizzato dei contatti generati e raccolti
+
+Generatori, scraper e finder scrivono nello stesso schema: una tabella
+aziende con settore, provincia, comune e fonte in tabelle di riferimento,
+indici su settore e provincia, comune, partita IVA, stato e date del contatto.
+Le righe arrivano con i nomi di colonna dei vari moduli (Ragione Sociale o
+Nome, Città, Fatturato in euro o in milioni, ...) e sono inserite a blocchi
+con executemany dentro una transazione, in modalità WAL.
+
+    with DatabasePMI("pmi_data.db") as db:
+        db.inserisci(aziende)
+        milanesi = db.cerca(settore="Informatica", provincia="MI")
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from pmi_schema import CAMPI as CAMPI_SCHEMA, piano_conversione
+
+# Colonne della tabella aziende, nell'ordine di inserimento
+COLONNE_DB = (
+    'ragione_sociale', 'partita_iva', 'forma_giuridica', 'settore', 'categoria', 'anno_fondazione',
+    'dipendenti', 'fatturato', 'telefono', 'cellulare', 'email', 'pec', 'sito_web', 'indirizzo', 'cap',
+    'comune', 'provincia', 'descrizione', 'fonte', 'stato', 'data_ultimo_contatto', 'data_risposta',
+    'note', 'data_inserimento'
+)
+
+# Campo canonico di pmi_schema -> colonna della tabella aziende
+COLONNA_DB = {campo: 'comune' if campo == 'citta' else campo for campo in CAMPI_SCHEMA}
+
+# Colonne restituite dalle ricerche, con i nomi usati dai moduli
+_SELEZIONE = """
+    SELECT a.id AS "ID", a.ragione_sociale AS "Ragione Sociale", a.partita_iva AS "Partita IVA",
+           a.forma_giuridica AS "Forma Giuridica", s.nome AS "Settore", a.categoria AS "Categoria",
+           a.anno_fondazione AS "Anno Fondazione", a.dipendenti AS "Dipendenti", a.fatturato AS "Fatturato",
+           a.telefono AS "Telefono", a.cellulare AS "Cellulare", a.email AS "Email", a.pec AS "PEC",
+           a.sito_web AS "Sito Web", a.indirizzo AS "Indirizzo", a.cap AS "CAP", c.nome AS "Città",
+           p.nome AS "Provincia", a.descrizione AS "Descrizione", f.nome AS "Fonte", a.stato AS "Stato",
+           a.data_ultimo_contatto AS "Data Ultimo Contatto", a.data_risposta AS "Data Risposta",
+           a.note AS "Note", a.data_inserimento AS "Data Inserimento"
+    FROM aziende a
+    LEFT JOIN settori s ON s.id = a.settore
+    LEFT JOIN comuni c ON c.id = a.comune
+    LEFT JOIN province p ON p.id = a.provincia
+    LEFT JOIN fonti f ON f.id = a.fonte
+"""
+
+_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS settori (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE);
+    CREATE TABLE IF NOT EXISTS province (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE);
+    CREATE TABLE IF NOT EXISTS comuni (
+        id INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL,
+        provincia INTEGER REFERENCES province (id),
+        UNIQUE (nome, provincia)
+    );
+    CREATE TABLE IF NOT EXISTS fonti (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE);
+    CREATE TABLE IF NOT EXISTS aziende (
+        id INTEGER PRIMARY KEY,
+        ragione_sociale TEXT NOT NULL,
+        partita_iva TEXT,
+        forma_giuridica TEXT,
+        settore INTEGER REFERENCES settori (id),
+        categoria TEXT,
+        anno_fondazione INTEGER,
+        dipendenti INTEGER,
+        fatturato REAL,
+        telefono TEXT,
+        cellulare TEXT,
+        email TEXT,
+        pec TEXT,
+        sito_web TEXT,
+        indirizzo TEXT,
+        cap TEXT,
+        comune INTEGER REFERENCES comuni (id),
+        provincia INTEGER REFERENCES province (id),
+        descrizione TEXT,
+        fonte INTEGER REFERENCES fonti (id),
+        stato TEXT,
+        data_ultimo_contatto TEXT,
+        data_risposta TEXT,
+        note TEXT,
+        data_inserimento TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_aziende_settore_provincia ON aziende (settore, provincia);
+    CREATE INDEX IF NOT EXISTS idx_aziende_provincia ON aziende (provincia);
+    CREATE INDEX IF NOT EXISTS idx_aziende_comune ON aziende (comune);
+    CREATE INDEX IF NOT EXISTS idx_aziende_partita_iva ON aziende (partita_iva);
+    CREATE INDEX IF NOT EXISTS idx_aziende_stato ON aziende (stato);
+    CREATE INDEX IF NOT EXISTS idx_aziende_data_ultimo_contatto ON aziende (data_ultimo_contatto);
+    CREATE INDEX IF NOT EXISTS idx_aziende_data_risposta ON aziende (data_risposta);
+    CREATE VIEW IF NOT EXISTS vista_aziende AS {_SELEZIONE};
+"""
+
+# Colonna -> posizione nella tupla inserita
+_POSIZIONI = {colonna: indice for indice, colonna in enumerate(COLONNE_DB)}
+
+
+class DatabasePMI:
+    """
+    Archivio SQLite condiviso delle aziende, sicuro tra thread
+    """
+
+    def __init__(self, percorso="pmi_data.db"):
+        """
+        Args:
+            percorso (str): File del database (creato con lo schema se assente)
+        """
+        self.percorso = percorso
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(percorso, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+        # Identificativi delle tabelle di riferimento già risolti
+        self._riferimenti = {'settori': {}, 'province': {}, 'fonti': {}, 'comuni': {}}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _id(self, tabella, nome, provincia=None):
+        """
+        Identificativo di un valore di una tabella di riferimento, inserito se nuovo
+
+        Args:
+            tabella (str): 'settori', 'province', 'fonti' o 'comuni'
+            nome (str): Valore
+            provincia (int): Provincia del comune (solo per 'comuni')
+
+        Returns:
+            int: Identificativo, None se il valore è vuoto
+        """
+        if nome is None:
+            return None
+        chiave = (nome, provincia) if tabella == 'comuni' else nome
+        cache = self._riferimenti[tabella]
+        if chiave not in cache:
+            # I comuni senza provincia hanno provincia NULL, che il vincolo UNIQUE non confronta
+            if tabella == 'comuni':
+                riga = self._db.execute("SELECT id FROM comuni WHERE nome = ? AND provincia IS ?", chiave).fetchone()
+                if riga is None:
+                    riga = (self._db.execute("INSERT INTO comuni (nome, provincia) VALUES (?, ?)", chiave).lastrowid,)
+            else:
+                riga = self._db.execute(f"SELECT id FROM {tabella} WHERE nome = ?", (nome,)).fetchone()
+                if riga is None:
+                    riga = (self._db.execute(f"INSERT INTO {tabella} (nome) VALUES (?)", (nome,)).lastrowid,)
+            cache[chiave] = riga[0]
+        return cache[chiave]
+
+    def _id_esistente(self, tabella, nome):
+        """Identificativo di un valore già presente, None se sconosciuto"""
+        riga = self._db.execute(f"SELECT id FROM {tabella} WHERE nome = ?", (nome,)).fetchone()
+        return riga[0] if riga else None
+
+    @staticmethod
+    def _piano(intestazioni):
+        """
+        Conversioni per le colonne di una riga, calcolate una volta per intestazione
+
+        Returns:
+            list: Tuple (intestazione del modulo, posizione, conversione)
+        """
+        return [(intestazione, _POSIZIONI[COLONNA_DB[campo]], converti)
+                for intestazione, campo, converti in piano_conversione(intestazioni)]
+
+    def _valori(self, riga, piano, adesso):
+        """
+        Converte una riga di un modulo nei valori della tabella aziende
+
+        Returns:
+            list: Valori nell'ordine di COLONNE_DB
+        """
+        valori = [None] * len(COLONNE_DB)
+        for nome, posizione, conversione in piano:
+            valori[posizione] = conversione(riga[nome])
+
+        provincia = self._id('province', valori[_POSIZIONI['provincia']])
+        valori[_POSIZIONI['comune']] = self._id('comuni', valori[_POSIZIONI['comune']], provincia)
+        valori[_POSIZIONI['provincia']] = provincia
+        valori[_POSIZIONI['settore']] = self._id('settori', valori[_POSIZIONI['settore']])
+        valori[_POSIZIONI['fonte']] = self._id('fonti', valori[_POSIZIONI['fonte']])
+        valori[_POSIZIONI['ragione_sociale']] = valori[_POSIZIONI['ragione_sociale']] or ''
+        valori[_POSIZIONI['data_inserimento']] = valori[_POSIZIONI['data_inserimento']] or adesso
+        return valori
+
+    def _inserisci(self, righe):
+        """
+        Inserisce un blocco di aziende in un'unica transazione
+
+        Returns:
+            tuple: (numero di aziende inserite, ID dell'ultima inserita)
+        """
+        adesso = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            try:
+                with self._db:
+                    # Le righe di un blocco hanno di solito le stesse colonne: il piano si ricalcola solo se cambiano
+                    valori, nomi, piano = [], None, None
+                    for riga in righe:
+                        if riga.keys() != nomi:
+                            nomi, piano = riga.keys(), self._piano(riga.keys())
+                        valori.append(self._valori(riga, piano, adesso))
+                    self._db.executemany(
+                        f"INSERT INTO aziende ({', '.join(COLONNE_DB)}) VALUES ({', '.join('?' * len(COLONNE_DB))})",
+                        valori
+                    )
+                    # Letto nella stessa transazione, che tiene il lock di scrittura del file
+                    ultimo = self._db.execute("SELECT MAX(id) FROM aziende").fetchone()[0]
+            except Exception:
+                # La transazione annullata può aver tolto valori di riferimento appena inseriti
+                for cache in self._riferimenti.values():
+                    cache.clear()
+                raise
+        return len(valori), ultimo
+
+    def inserisci(self, righe):
+        """
+        Inserisce un blocco di aziende in un'unica transazione
+
+        Args:
+            righe (iterable): Dizionari con le intestazioni dei moduli (vedi pmi_schema.ALIAS)
+
+        Returns:
+            int: Numero di aziende inserite
+        """
+        return self._inserisci(righe)[0]
+
+    def inserisci_con_id(self, righe):
+        """
+        Come inserisci, ma restituisce gli ID assegnati alle aziende
+
+        Gli ID servono per aggiornare poi lo stato dei contatti (pmi_contatti).
+        Senza AUTOINCREMENT SQLite assegna a ogni riga il massimo ID più uno:
+        le righe di una transazione ricevono quindi ID consecutivi.
+
+        Args:
+            righe (iterable): Dizionari con le intestazioni dei moduli (vedi pmi_schema.ALIAS)
+
+        Returns:
+            list: ID delle aziende, nell'ordine delle righe
+        """
+        inserite, ultimo = self._inserisci(righe)
+        return list(range(ultimo - inserite + 1, ultimo + 1)) if inserite else []
+
+    def _filtri(self, settore=None, provincia=None, citta=None, stato=None, partita_iva=None):
+        """
+        Condizioni SQL per i filtri indicati
+
+        Returns:
+            tuple: (clausola WHERE, parametri), None se un valore non esiste nel database
+        """
+        condizioni, parametri = [], []
+        for tabella, colonna, valore in (('settori', 'a.settore', settore), ('province', 'a.provincia', provincia)):
+            if valore is not None:
+                identificativo = self._id_esistente(tabella, valore)
+                if identificativo is None:
+                    return None
+                condizioni.append(f"{colonna} = ?")
+                parametri.append(identificativo)
+        if citta is not None:
+            comuni = [id_ for (id_,) in self._db.execute("SELECT id FROM comuni WHERE nome = ?", (citta,))]
+            if not comuni:
+                return None
+            condizioni.append(f"a.comune IN ({', '.join('?' * len(comuni))})")
+            parametri.extend(comuni)
+        for colonna, valore in (('a.stato', stato), ('a.partita_iva', partita_iva)):
+            if valore is not None:
+                condizioni.append(f"{colonna} = ?")
+                parametri.append(valore)
+        clausola = f" WHERE {' AND '.join(condizioni)}" if condizioni else ""
+        return clausola, parametri
+
+    def cerca(self, settore=None, provincia=None, citta=None, stato=None, partita_iva=None, limite=None):
+        """
+        Aziende che soddisfano tutti i filtri indicati, tramite gli indici
+
+        Args:
+            settore (str): Settore
+            provincia (str): Provincia, come scritta dai moduli (sigla o nome)
+            citta (str): Comune
+            stato (str): Stato del contatto
+            partita_iva (str): Partita IVA
+            limite (int): Numero massimo di aziende restituite
+
+        Returns:
+            list: Dizionari con i nomi di colonna dei moduli e l'ID
+        """
+        with self._lock:
+            filtri = self._filtri(settore, provincia, citta, stato, partita_iva)
+            if filtri is None:
+                return []
+            clausola, parametri = filtri
+            if limite is not None:
+                clausola += " LIMIT ?"
+                parametri.append(limite)
+            cursore = self._db.execute(_SELEZIONE + clausola, parametri)
+            nomi = [descrizione[0] for descrizione in cursore.description]
+            return [dict(zip(nomi, riga)) for riga in cursore]
+
+    def conta(self, settore=None, provincia=None, citta=None, stato=None, partita_iva=None):
+        """
+        Numero di aziende che soddisfano i filtri, senza leggere le righe
+
+        Returns:
+            int: Numero di aziende
+        """
+        with self._lock:
+            filtri = self._filtri(settore, provincia, citta, stato, partita_iva)
+            if filtri is None:
+                return 0
+            clausola, parametri = filtri
+            return self._db.execute(f"SELECT COUNT(*) FROM aziende a{clausola}", parametri).fetchone()[0]
+
+    def esporta(self, dimensione_blocco=10000):
+        """
+        Restituisce tutte le aziende a blocchi, nell'ordine di inserimento
+
+        Args:
+            dimensione_blocco (int): Aziende per blocco
+
+        Yields:
+            list: Dizionari con i nomi di colonna dei moduli
+        """
+        ultimo = 0
+        while True:
+            with self._lock:
+                cursore = self._db.execute(
+                    _SELEZIONE + " WHERE a.id > ? ORDER BY a.id LIMIT ?", (ultimo, dimensione_blocco)
+                )
+                nomi = [descrizione[0] for descrizione in cursore.description]
+                blocco = [dict(zip(nomi, riga)) for riga in cursore]
+            if not blocco:
+                return
+            ultimo = blocco[-1]['ID']
+            yield blocco
+
+    def close(self):
+        """Chiude il database"""
+        with self._lock:
+            self._db.close()
+
+
+def elimina_database(percorso):
+    """
+    Elimina un database con i suoi file WAL, per riscriverlo da zero
+
+    Args:
+        percorso (str): File del database (nessun errore se non esiste)
+    """
+    for file in (percorso, f"{percorso}-wal", f"{percorso}-shm"):
+        try:
+            os.remove(file)
+        except FileNotFoundError:
+            pass
+
+
+def importa_csv(percorso_csv, db, dimensione_blocco=10000):
+    """
+    Importa un file CSV di uno dei moduli nel database, a blocchi
+
+    Args:
+        percorso_csv (str): File CSV
+        db (DatabasePMI): Database di destinazione
+        dimensione_blocco (int): Righe per transazione
+
+    Returns:
+        int: Numero di aziende importate
+    """
+    import csv
+
+    from pmi_stream import a_blocchi
+
+    importate = 0
+    with open(percorso_csv, newline='', encoding='utf-8') as f:
+        for blocco in a_blocchi(csv.DictReader(f), dimensione_blocco):
+            importate += db.inserisci(blocco)
+    return importate
+
+
+def main():
+    """
+    Funzione principale
+    """
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Archivio SQLite dei contatti di PMI italiane')
+    parser.add_argument('--db', default='pmi_data.db', help='File del database SQLite')
+    sottocomandi = parser.add_subparsers(dest='comando', required=True)
+
+    importa = sottocomandi.add_parser('importa', help='Importa file CSV nel database')
+    importa.add_argument('file', nargs='+', help='File CSV prodotti da generatori, scraper o finder')
+    importa.add_argument('--chunk-size', type=int, default=10000, help='Righe per transazione')
+
+    cerca = sottocomandi.add_parser('cerca', help='Cerca aziende per settore, provincia, città o stato')
+    cerca.add_argument('--settore', help='Settore')
+    cerca.add_argument('--provincia', help='Provincia')
+    cerca.add_argument('--citta', help='Città')
+    cerca.add_argument('--stato', help='Stato del contatto')
+    cerca.add_argument('--partita-iva', help='Partita IVA')
+    cerca.add_argument('--limite', type=int, default=20, help='Aziende mostrate')
+
+    args = parser.parse_args()
+
+    with DatabasePMI(args.db) as db:
+        if args.comando == 'importa':
+            for percorso in args.file:
+                inizio = time.perf_counter()
+                importate = importa_csv(percorso, db, args.chunk_size)
+                print(f"{percorso}: {importate} aziende importate in {time.perf_counter() - inizio:.1f} s")
+            return
+
+        filtri = dict(settore=args.settore, provincia=args.provincia, citta=args.citta,
+                      stato=args.stato, partita_iva=args.partita_iva)
+        inizio = time.perf_counter()
+        totale = db.conta(**filtri)
+        aziende = db.cerca(limite=args.limite, **filtri)
+        durata = (time.perf_counter() - inizio) * 1000
+        for azienda in aziende:
+            print(f"{azienda['ID']}\t{azienda['Ragione Sociale']}\t{azienda['Settore'] or ''}\t"
+                  f"{azienda['Città'] or ''} ({azienda['Provincia'] or ''})\t{azienda['Stato'] or ''}")
+        print(f"{totale} aziende trovate in {durata:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
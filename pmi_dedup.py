@@ -0,0 +1,479 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Dedup - Indice incrementale dei duplicati tra esecuzioni e fonti
+
+Ogni azienda raccolta viene confrontata con quelle già viste tramite chiavi
+normalizzate salvate in SQLite: partita IVA, telefono in formato E.164,
+dominio del sito web e, per i nomi scritti in modo diverso, una firma
+MinHash della ragione sociale indicizzata con LSH e bloccata per provincia.
+Ogni verifica consulta solo gli indici, senza rileggere il file dei
+contatti; le fusioni sono registrate con il motivo per poterle controllare.
+
+    with IndiceDuplicati("pmi_dedup.sqlite") as indice:
+        nuove = indice.filtra_nuovi(aziende)
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from pmi_estrazione import normalizza_telefono, partita_iva_valida
+
+# Forme giuridiche e parole ignorate nel confronto delle ragioni sociali
+PAROLE_IGNORATE = frozenset((
+    'srl', 'srls', 'spa', 'snc', 'sas', 'sapa', 'scarl', 'scrl', 'soc', 'coop', 'societa',
+    'cooperativa', 'unipersonale', 'semplificata', 'ditta', 'individuale', 'di', 'e', 'the'
+))
+
+# Domini condivisi da molte aziende (social network, elenchi, accorciatori, siti
+# gratuiti su percorso): non identificano un'azienda e non sono chiavi di fusione
+DOMINI_CONDIVISI = frozenset((
+    'facebook.com', 'fb.com', 'instagram.com', 'linkedin.com', 'twitter.com', 'x.com',
+    'youtube.com', 'tiktok.com', 'pinterest.com', 'wa.me', 'whatsapp.com', 't.me',
+    'google.com', 'google.it', 'goo.gl', 'g.page', 'bit.ly', 'linktr.ee',
+    'paginegialle.it', 'paginebianche.it', 'registroimprese.it', 'europages.it', 'europages.com',
+    'kompass.com', 'infobel.com', 'tripadvisor.it', 'tripadvisor.com', 'yelp.it', 'yelp.com',
+    'booking.com', 'subito.it', 'amazon.it', 'ebay.it', 'etsy.com',
+    'wixsite.com', 'weebly.com', 'jimdofree.com', 'blogspot.com', 'wordpress.com', 'altervista.org',
+    'example.com'
+))
+
+# Chiavi esatte, dalla più affidabile
+CHIAVI = ('partita_iva', 'telefono', 'dominio')
+
+# Parametri MinHash fissi: le firme restano confrontabili tra esecuzioni
+_PRIMO = 4294967311
+_generatore = np.random.default_rng(20240601)
+_A = _generatore.integers(1, 2 ** 32, size=256, dtype=np.uint64)
+_B = _generatore.integers(0, 2 ** 32, size=256, dtype=np.uint64)
+
+
+def normalizza_partita_iva(valore):
+    """
+    Partita IVA di 11 cifre con cifra di controllo corretta
+
+    Returns:
+        str: Partita IVA normalizzata, None se assente o non valida
+    """
+    cifre = re.sub(r'\D', '', str(valore or ''))
+    if len(cifre) == 11 and partita_iva_valida(cifre):
+        return cifre
+    return None
+
+
+def normalizza_dominio(sito):
+    """
+    Dominio di un sito web, senza schema, "www." e percorso
+
+    Returns:
+        str: Dominio in minuscolo, None se assente o condiviso da molte
+             aziende (DOMINI_CONDIVISI e loro sottodomini)
+    """
+    sito = str(sito or '').strip().lower()
+    if not sito:
+        return None
+    if '//' not in sito:
+        sito = '//' + sito
+    dominio = urlsplit(sito).hostname
+    if not dominio or '.' not in dominio:
+        return None
+    dominio = dominio[4:] if dominio.startswith('www.') else dominio
+    # Il dominio e i suoi suffissi: "m.facebook.com" -> "facebook.com"
+    parti = dominio.split('.')
+    if any('.'.join(parti[i:]) in DOMINI_CONDIVISI for i in range(len(parti) - 1)):
+        return None
+    return dominio
+
+
+def normalizza_nome(nome):
+    """
+    Ragione sociale senza accenti, punteggiatura e forme giuridiche
+
+    Returns:
+        str: Parole significative separate da spazi
+    """
+    testo = unicodedata.normalize('NFKD', str(nome or '')).encode('ascii', 'ignore').decode('ascii').lower()
+    # Le sigle puntate (s.r.l., s.p.a.) diventano parole intere prima di togliere la punteggiatura
+    testo = re.sub(r'\b((?:[a-z]\.){2,})', lambda m: m.group(1).replace('.', ''), testo)
+    parole = re.findall(r'[a-z0-9]+', testo)
+    return ' '.join(parola for parola in parole if parola not in PAROLE_IGNORATE)
+
+
+def firma_minhash(nome, num_permutazioni=64):
+    """
+    Firma MinHash dei trigrammi di caratteri di un nome normalizzato
+
+    Args:
+        nome (str): Nome normalizzato
+        num_permutazioni (int): Lunghezza della firma
+
+    Returns:
+        numpy.ndarray: Firma (uint64), None se il nome è vuoto
+    """
+    if not nome:
+        return None
+    testo = f" {nome} "
+    trigrammi = {testo[i:i + 3] for i in range(max(len(testo) - 2, 1))}
+    valori = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in trigrammi), dtype=np.uint64, count=len(trigrammi))
+    a, b = _A[:num_permutazioni], _B[:num_permutazioni]
+    return ((valori[:, None] * a + b) % _PRIMO).min(axis=0)
+
+
+def _somiglianza(firma1, firma2):
+    """Stima della somiglianza di Jaccard da due firme MinHash"""
+    return float(np.mean(firma1 == firma2))
+
+
+class IndiceDuplicati:
+    """
+    Indice persistente delle aziende già raccolte, con registro delle fusioni
+    """
+
+    def __init__(self, percorso="pmi_dedup.sqlite", soglia=0.6, bande=16, righe=4):
+        """
+        Args:
+            percorso (str): File del database dell'indice
+            soglia (float): Somiglianza minima tra i nomi per considerarli la stessa azienda
+            bande (int): Bande LSH della firma
+            righe (int): Valori della firma per banda
+        """
+        self.percorso = percorso
+        self.soglia = soglia
+        self.bande = bande
+        self.righe = righe
+        self.statistiche = {'nuove': 0, 'fuse': 0}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(percorso, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (nome TEXT PRIMARY KEY, valore TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS entita (
+                id INTEGER PRIMARY KEY,
+                record TEXT NOT NULL,
+                fonti TEXT NOT NULL,
+                firma BLOB,
+                creata REAL NOT NULL,
+                aggiornata REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chiavi (
+                tipo TEXT NOT NULL,
+                valore TEXT NOT NULL,
+                entita INTEGER NOT NULL,
+                PRIMARY KEY (tipo, valore)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_chiavi_entita ON chiavi (entita);
+            CREATE TABLE IF NOT EXISTS bande (
+                banda INTEGER NOT NULL,
+                hash INTEGER NOT NULL,
+                entita INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_bande ON bande (banda, hash);
+            CREATE TABLE IF NOT EXISTS fusioni (
+                id INTEGER PRIMARY KEY,
+                entita INTEGER NOT NULL,
+                motivo TEXT NOT NULL,
+                valore TEXT,
+                somiglianza REAL,
+                fonte TEXT,
+                record TEXT NOT NULL,
+                quando REAL NOT NULL
+            );
+        """)
+
+        # Bande e righe determinano le chiavi LSH: un indice esistente va riaperto con gli stessi valori
+        parametri = f"{bande}x{righe}"
+        salvati = self._db.execute("SELECT valore FROM meta WHERE nome = 'lsh'").fetchone()
+        if salvati is None:
+            self._db.execute("INSERT INTO meta VALUES ('lsh', ?)", (parametri,))
+        elif salvati[0] != parametri:
+            raise ValueError(f"L'indice {percorso} usa bande x righe = {salvati[0]}, non {parametri}")
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _chiavi(self, record):
+        """
+        Chiavi esatte normalizzate di un record
+
+        Returns:
+            dict: Tipo di chiave -> valore, solo per le chiavi presenti
+        """
+        chiavi = {
+            'partita_iva': normalizza_partita_iva(record.get('Partita IVA')),
+            'telefono': normalizza_telefono(str(record.get('Telefono') or '').strip()),
+            'dominio': normalizza_dominio(record.get('Sito Web'))
+        }
+        return {tipo: valore for tipo, valore in chiavi.items() if valore}
+
+    def _bande(self, firma, blocco):
+        """
+        Chiavi LSH della firma, una per banda, ristrette al blocco (provincia)
+
+        Returns:
+            list: Tuple (banda, hash)
+        """
+        chiavi = []
+        for banda in range(self.bande):
+            porzione = firma[banda * self.righe:(banda + 1) * self.righe]
+            digest = hashlib.blake2b(blocco.encode('utf-8') + porzione.tobytes(), digest_size=8).digest()
+            chiavi.append((banda, int.from_bytes(digest, 'little', signed=True)))
+        return chiavi
+
+    def _partita_iva_di(self, entita):
+        """Partita IVA registrata per un'entità, None se sconosciuta"""
+        riga = self._db.execute(
+            "SELECT valore FROM chiavi WHERE entita = ? AND tipo = 'partita_iva'", (entita,)
+        ).fetchone()
+        return riga[0] if riga else None
+
+    def _cerca(self, chiavi, firma, bande):
+        """
+        Cerca l'entità a cui appartiene un record
+
+        Le chiavi esatte sono provate dalla più affidabile; i nomi simili
+        solo tra i candidati LSH dello stesso blocco. Un candidato con una
+        partita IVA diversa da quella del record non è mai lo stesso.
+
+        Returns:
+            tuple: (entità, motivo, valore, somiglianza), None se il record è nuovo
+        """
+        partita_iva = chiavi.get('partita_iva')
+
+        def compatibile(entita):
+            if partita_iva is None:
+                return True
+            altra = self._partita_iva_di(entita)
+            return altra is None or altra == partita_iva
+
+        for tipo in CHIAVI:
+            if tipo not in chiavi:
+                continue
+            riga = self._db.execute(
+                "SELECT entita FROM chiavi WHERE tipo = ? AND valore = ?", (tipo, chiavi[tipo])
+            ).fetchone()
+            if riga is not None and compatibile(riga[0]):
+                return riga[0], tipo, chiavi[tipo], 1.0
+
+        if firma is None:
+            return None
+        candidati = set()
+        for banda, valore in bande:
+            candidati.update(entita for (entita,) in self._db.execute(
+                "SELECT entita FROM bande WHERE banda = ? AND hash = ?", (banda, valore)
+            ))
+
+        migliore = None
+        for entita in candidati:
+            (salvata,) = self._db.execute("SELECT firma FROM entita WHERE id = ?", (entita,)).fetchone()
+            somiglianza = _somiglianza(firma, np.frombuffer(salvata, dtype=np.uint64))
+            if somiglianza >= self.soglia and (migliore is None or somiglianza > migliore[3]) and compatibile(entita):
+                migliore = (entita, 'nome', None, somiglianza)
+        return migliore
+
+    def _aggiungi(self, record, fonte):
+        """
+        Registra un record, fondendolo con l'entità esistente se è un duplicato
+
+        Returns:
+            tuple: (id dell'entità, True se il record è una nuova azienda)
+        """
+        chiavi = self._chiavi(record)
+        nome = normalizza_nome(record.get('Ragione Sociale'))
+        firma = firma_minhash(nome, self.bande * self.righe)
+        blocco = str(record.get('Provincia') or '').strip().upper()
+        bande = self._bande(firma, blocco) if firma is not None else []
+        fonte = fonte or record.get('Fonte') or ''
+        ora = time.time()
+        testo = json.dumps(record, ensure_ascii=False, default=str)
+
+        trovata = self._cerca(chiavi, firma, bande)
+        if trovata is None:
+            entita = self._db.execute(
+                "INSERT INTO entita (record, fonti, firma, creata, aggiornata) VALUES (?, ?, ?, ?, ?)",
+                (testo, fonte, firma.tobytes() if firma is not None else None, ora, ora)
+            ).lastrowid
+            self._db.executemany("INSERT OR IGNORE INTO chiavi VALUES (?, ?, ?)",
+                                 [(tipo, valore, entita) for tipo, valore in chiavi.items()])
+            self._db.executemany("INSERT INTO bande VALUES (?, ?, ?)",
+                                 [(banda, valore, entita) for banda, valore in bande])
+            self.statistiche['nuove'] += 1
+            return entita, True
+
+        entita, motivo, valore, somiglianza = trovata
+        record_salvato, fonti = self._db.execute(
+            "SELECT record, fonti FROM entita WHERE id = ?", (entita,)
+        ).fetchone()
+        # Il record dell'entità si completa con i campi che mancavano, senza sovrascrivere
+        unito = json.loads(record_salvato)
+        for campo, contenuto in record.items():
+            if contenuto not in (None, '') and unito.get(campo) in (None, ''):
+                unito[campo] = contenuto
+        elenco_fonti = [f for f in fonti.split('|') if f]
+        if fonte and fonte not in elenco_fonti:
+            elenco_fonti.append(fonte)
+
+        self._db.execute(
+            "UPDATE entita SET record = ?, fonti = ?, aggiornata = ? WHERE id = ?",
+            (json.dumps(unito, ensure_ascii=False, default=str), '|'.join(elenco_fonti), ora, entita)
+        )
+        # Le nuove chiavi del duplicato (un altro telefono, un altro dominio) portano alla stessa entità
+        self._db.executemany("INSERT OR IGNORE INTO chiavi VALUES (?, ?, ?)",
+                             [(tipo, chiave, entita) for tipo, chiave in chiavi.items()])
+        self._db.execute(
+            "INSERT INTO fusioni (entita, motivo, valore, somiglianza, fonte, record, quando) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (entita, motivo, valore, somiglianza, fonte, testo, ora)
+        )
+        self.statistiche['fuse'] += 1
+        return entita, False
+
+    def aggiungi(self, record, fonte=None):
+        """
+        Registra un record nell'indice
+
+        Args:
+            record (dict): Dati dell'azienda (Ragione Sociale, Partita IVA, Telefono, Sito Web, Provincia, ...)
+            fonte (str): Fonte del record (default: il campo Fonte)
+
+        Returns:
+            tuple: (id dell'entità, True se il record è una nuova azienda)
+        """
+        with self._lock:
+            risultato = self._aggiungi(record, fonte)
+            self._db.commit()
+        return risultato
+
+    def filtra_nuovi(self, records, fonte=None):
+        """
+        Registra più record e restituisce solo quelli di aziende nuove
+
+        I duplicati, anche all'interno dello stesso gruppo, sono fusi nelle
+        entità esistenti e annotati nel registro delle fusioni.
+
+        Args:
+            records (list): Dizionari con i dati delle aziende
+            fonte (str): Fonte dei record (default: il campo Fonte di ciascuno)
+
+        Returns:
+            list: Record delle aziende non ancora presenti nell'indice
+        """
+        nuovi = []
+        with self._lock:
+            for record in records:
+                if self._aggiungi(record, fonte)[1]:
+                    nuovi.append(record)
+            self._db.commit()
+        return nuovi
+
+    def fusioni(self, limite=20):
+        """
+        Ultime fusioni registrate
+
+        Args:
+            limite (int): Numero massimo di fusioni
+
+        Returns:
+            list: Dizionari con entità, motivo, valore, somiglianza, fonte, record e quando
+        """
+        with self._lock:
+            righe = self._db.execute(
+                "SELECT entita, motivo, valore, somiglianza, fonte, record, quando "
+                "FROM fusioni ORDER BY id DESC LIMIT ?", (limite,)
+            ).fetchall()
+        campi = ('entita', 'motivo', 'valore', 'somiglianza', 'fonte', 'record', 'quando')
+        return [dict(zip(campi, riga), record=json.loads(riga[5])) for riga in righe]
+
+    def entita(self, id_entita):
+        """
+        Record unito di un'entità e fonti da cui proviene
+
+        Returns:
+            dict: record e fonti, None se l'entità non esiste
+        """
+        with self._lock:
+            riga = self._db.execute("SELECT record, fonti FROM entita WHERE id = ?", (id_entita,)).fetchone()
+        if riga is None:
+            return None
+        return {'record': json.loads(riga[0]), 'fonti': [f for f in riga[1].split('|') if f]}
+
+    def riepilogo(self):
+        """
+        Riepilogo leggibile dell'indice
+
+        Returns:
+            str: Aziende distinte e duplicati fusi
+        """
+        with self._lock:
+            (entita,) = self._db.execute("SELECT COUNT(*) FROM entita").fetchone()
+            (fusioni,) = self._db.execute("SELECT COUNT(*) FROM fusioni").fetchone()
+        s = self.statistiche
+        return (f"Deduplicazione: {s['nuove']} nuove aziende, {s['fuse']} duplicati fusi in questa esecuzione "
+                f"({entita} aziende distinte e {fusioni} fusioni nell'indice)")
+
+    def close(self):
+        """Chiude il database"""
+        with self._lock:
+            self._db.close()
+
+
+def main():
+    """
+    Funzione principale
+    """
+    import argparse
+
+    import pandas as pd
+
+    from pmi_destinazione import apri_destinazione, formato_da_percorso
+
+    parser = argparse.ArgumentParser(description='Deduplicazione dei contatti di PMI con un indice persistente')
+    parser.add_argument('file', nargs='?', help='File CSV di contatti da deduplicare')
+    parser.add_argument('--indice', default='pmi_dedup.sqlite', help='File dell\'indice dei duplicati')
+    parser.add_argument('--output', help='File con le sole aziende nuove (.csv, .sqlite/.db o .parquet)')
+    parser.add_argument('--soglia', type=float, default=0.6, help='Somiglianza minima tra le ragioni sociali')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Righe lette per blocco')
+    parser.add_argument('--fusioni', type=int, metavar='N', help='Mostra le ultime N fusioni registrate')
+
+    args = parser.parse_args()
+
+    with IndiceDuplicati(args.indice, soglia=args.soglia) as indice:
+        if args.file:
+            destinazione = None
+            totale = 0
+            for blocco in pd.read_csv(args.file, dtype=str, keep_default_na=False, chunksize=args.chunk_size):
+                nuovi = indice.filtra_nuovi(blocco.to_dict('records'))
+                totale += len(blocco)
+                if args.output:
+                    if destinazione is None:
+                        opzioni = {'sovrascrivi': True} if formato_da_percorso(args.output) == 'csv' else {}
+                        destinazione = apri_destinazione(args.output, list(blocco.columns), **opzioni)
+                    destinazione.scrivi(nuovi)
+            if destinazione is not None:
+                destinazione.close()
+            print(f"Righe lette: {totale}")
+            print(indice.riepilogo())
+
+        if args.fusioni:
+            for fusione in indice.fusioni(args.fusioni):
+                dettaglio = fusione['valore'] or f"somiglianza {fusione['somiglianza']:.2f}"
+                print(f"Entità {fusione['entita']} <- {fusione['record'].get('Ragione Sociale', '')} "
+                      f"[{fusione['fonte']}] per {fusione['motivo']} ({dettaglio})")
+
+
+if __name__ == "__main__":
+    main()
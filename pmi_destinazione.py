@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Destinazione - Destinazioni dei risultati a blocchi (CSV, SQLite, Parquet)
+
+Una destinazione resta aperta per tutta l'esecuzione: i produttori (anche
+da thread o coroutine diverse) vi aggiungono righe, che vengono accumulate e
+scritte a blocchi quando il buffer raggiunge batch_size oppure ogni
+intervallo_flush secondi. Alla chiusura, anche all'uscita dell'interprete, le
+righe rimaste nel buffer vengono sempre scritte.
+
+    with apri_destinazione("pmi_contatti.parquet", COLONNE) as destinazione:
+        destinazione.scrivi(aziende)
+"""
+
+import atexit
+import csv
+import os
+import threading
+
+from pmi_database import DatabasePMI
+from pmi_schema import BloccoAziende
+from pmi_stream import ScrittoreParquet
+
+# Estensione del file -> formato della destinazione
+ESTENSIONI = {
+    '.csv': 'csv',
+    '.sqlite': 'sqlite',
+    '.sqlite3': 'sqlite',
+    '.db': 'sqlite',
+    '.parquet': 'parquet'
+}
+
+
+class Destinazione:
+    """
+    Destinazione bufferizzata e sicura tra thread; le sottoclassi scrivono i blocchi
+    """
+
+    def __init__(self, colonne, batch_size=1000, intervallo_flush=5.0):
+        """
+        Args:
+            colonne (list): Colonne scritte, nell'ordine di output
+            batch_size (int): Righe accumulate prima di una scrittura
+            intervallo_flush (float): Secondi massimi tra due scritture (0: solo a blocchi pieni)
+        """
+        self.colonne = list(colonne)
+        self.batch_size = batch_size
+        self.intervallo_flush = intervallo_flush
+        self.righe_scritte = 0
+        self.chiusa = False
+
+        self._buffer = []
+        self._lock = threading.RLock()
+        self._fermo = threading.Event()
+        self._timer = None
+        if intervallo_flush > 0:
+            self._timer = threading.Thread(target=self._flush_periodico, daemon=True)
+            self._timer.start()
+        atexit.register(self.close)
+
+    def scrivi(self, righe):
+        """
+        Aggiunge righe alla destinazione
+
+        Args:
+            righe (list): Dizionari con le colonne della destinazione (le chiavi mancanti restano vuote)
+                          oppure un BloccoAziende, convertito nelle colonne della destinazione
+        """
+        if isinstance(righe, BloccoAziende):
+            righe = list(righe.righe(self.colonne))
+        if not righe:
+            return
+        with self._lock:
+            if self.chiusa:
+                raise ValueError("Destinazione già chiusa")
+            self._buffer.extend(righe)
+            if len(self._buffer) >= self.batch_size:
+                self._svuota()
+
+    def flush(self):
+        """Scrive subito le righe accumulate"""
+        with self._lock:
+            if not self.chiusa:
+                self._svuota()
+
+    def close(self):
+        """Scrive le righe rimaste e chiude la destinazione"""
+        with self._lock:
+            if self.chiusa:
+                return
+            self._svuota()
+            self.chiusa = True
+            self._chiudi()
+        self._fermo.set()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _svuota(self):
+        """Scrive il buffer con il backend (da chiamare con il lock acquisito)"""
+        if not self._buffer:
+            return
+        blocco, self._buffer = self._buffer, []
+        self._scrivi_blocco(blocco)
+        self.righe_scritte += len(blocco)
+
+    def _flush_periodico(self):
+        """Scrive il buffer ogni intervallo_flush secondi finché la destinazione è aperta"""
+        while not self._fermo.wait(self.intervallo_flush):
+            self.flush()
+
+    def _scrivi_blocco(self, righe):
+        """Scrive un blocco di righe nel backend"""
+        raise NotImplementedError
+
+    def _chiudi(self):
+        """Chiude il backend"""
+        raise NotImplementedError
+
+
+class DestinazioneCSV(Destinazione):
+    """
+    File CSV aperto una sola volta; l'intestazione è scritta solo nei file nuovi o vuoti
+    """
+
+    def __init__(self, percorso, colonne, sovrascrivi=False, riprendi_da=None, **kwargs):
+        """
+        Args:
+            percorso (str): File CSV
+            colonne (list): Colonne del file
+            sovrascrivi (bool): Ricrea il file invece di accodare le righe
+            riprendi_da (int): Offset a cui troncare un file esistente prima di accodare
+            **kwargs: batch_size e intervallo_flush
+        """
+        self.percorso = percorso
+        if riprendi_da is not None:
+            self.file = open(percorso, 'r+', newline='', encoding='utf-8')
+            self.file.seek(riprendi_da)
+            self.file.truncate()
+        else:
+            self.file = open(percorso, 'w' if sovrascrivi else 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        if self.file.tell() == 0:
+            self.writer.writerow(colonne)
+            self.file.flush()
+        super().__init__(colonne, **kwargs)
+
+    def _scrivi_blocco(self, righe):
+        self.writer.writerows([riga.get(colonna, '') for colonna in self.colonne] for riga in righe)
+        self.file.flush()
+
+    def sincronizza(self):
+        """
+        Scrive il buffer e porta il file su disco
+
+        Returns:
+            int: Offset della fine del file
+        """
+        with self._lock:
+            self._svuota()
+            os.fsync(self.file.fileno())
+            return self.file.tell()
+
+    def _chiudi(self):
+        self.file.close()
+
+
+class DestinazioneSQLite(Destinazione):
+    """
+    Archivio SQLite normalizzato di pmi_database, condiviso da generatori e scraper
+    """
+
+    def __init__(self, percorso, colonne, **kwargs):
+        """
+        Args:
+            percorso (str): File del database
+            colonne (list): Colonne dei risultati, convertite nello schema secondo pmi_schema.ALIAS
+            **kwargs: batch_size e intervallo_flush
+        """
+        self.percorso = percorso
+        self.database = DatabasePMI(percorso)
+        super().__init__(colonne, **kwargs)
+
+    def _scrivi_blocco(self, righe):
+        self.database.inserisci(righe)
+
+    def _chiudi(self):
+        self.database.close()
+
+
+class DestinazioneParquet(Destinazione):
+    """
+    File Parquet tipizzato: ogni blocco scritto diventa un row group
+    """
+
+    def __init__(self, percorso, colonne, **kwargs):
+        """
+        Args:
+            percorso (str): File Parquet (sovrascritto)
+            colonne (list): Colonne del file
+            **kwargs: batch_size e intervallo_flush
+        """
+        self.percorso = percorso
+        self.scrittore = ScrittoreParquet(percorso, colonne)
+        super().__init__(colonne, **kwargs)
+
+    def _scrivi_blocco(self, righe):
+        self.scrittore.scrivi_righe(righe)
+
+    def _chiudi(self):
+        self.scrittore.close()
+
+
+def formato_da_percorso(percorso):
+    """
+    Ricava il formato della destinazione dall'estensione del file
+
+    Returns:
+        str: 'csv', 'sqlite' o 'parquet' (csv per estensioni sconosciute)
+    """
+    return ESTENSIONI.get(os.path.splitext(percorso)[1].lower(), 'csv')
+
+
+def apri_destinazione(percorso, colonne, formato=None, **kwargs):
+    """
+    Apre la destinazione adatta al formato
+
+    Args:
+        percorso (str): File di output
+        colonne (list): Colonne dei risultati
+        formato (str): 'csv', 'sqlite' o 'parquet' (default: dall'estensione del file)
+        **kwargs: Parametri della destinazione (batch_size, intervallo_flush, ...)
+
+    Returns:
+        Destinazione: Destinazione aperta
+    """
+    formato = formato or formato_da_percorso(percorso)
+    if formato == 'csv':
+        return DestinazioneCSV(percorso, colonne, **kwargs)
+    if formato == 'sqlite':
+        return DestinazioneSQLite(percorso, colonne, **kwargs)
+    if formato == 'parquet':
+        return DestinazioneParquet(percorso, colonne, **kwargs)
+    raise ValueError(f"Formato di output non supportato: {formato}")
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Estrazione - Estrazione dei contatti dal testo in un solo passaggio
+
+Email, indirizzi PEC, numeri di telefono e partite IVA sono riconosciuti da
+un'unica espressione regolare precompilata che scorre il testo una sola
+volta e restituisce tutte le occorrenze, con la loro posizione:
+
+    for contatto in estrai_contatti(testo):
+        print(contatto.tipo, contatto.valore, contatto.inizio)
+
+I telefoni sono normalizzati nel formato E.164 (+39...), le email in
+minuscolo e le partite IVA alle 11 cifre, verificate con la cifra di
+controllo. estrai_contatti_bulk analizza molti documenti insieme,
+eventualmente su più processi.
+"""
+
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from pmi_partita_iva import cifra_controllo
+
+TIPI = ('email', 'pec', 'telefono', 'partita_iva')
+
+Contatto = namedtuple('Contatto', ['tipo', 'valore', 'inizio', 'fine', 'testo'])
+
+# Un'unica espressione con un gruppo per tipo. Ogni corrispondenza inizia da
+# "@", "+", "(" o da una cifra, così il testo ordinario viene scorso senza
+# tentativi; la parte locale delle email è recuperata a ritroso dalla "@"
+_CONTATTI = re.compile(r'''
+    (?=[@+(\d])
+    (?:
+        @(?P<email>[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,})
+      | (?:(?<![\w+])|(?<=IT)|(?<=IT[ -]))
+        (?P<partita_iva>\d{11})(?![\d@])
+      | (?<![\w+/])
+        (?P<telefono>(?:(?:\+|00)39[ .-]?)?(?:\(0\d{1,3}\)|0[1-9]\d{0,2}/|0[1-9]|3\d)(?:[ .-]?\d){4,9})(?![\d@/])
+    )
+''', re.VERBOSE)
+
+# Parte locale di un'email, che termina subito prima della "@"
+_PARTE_LOCALE = re.compile(r'[A-Za-z0-9._%+-]{1,64}$')
+
+# Domini dei gestori di posta elettronica certificata
+_DOMINIO_PEC = re.compile(
+    r'(?:^|\.)(?:[\w-]*pec[\w-]*|legalmail|postacert|postecert|cert|sicurezzapostale|gigapec|cgn)\.',
+    re.IGNORECASE
+)
+
+# Date e periodi (12/2023, 03/12/23) che possono sembrare un prefisso con "/"
+_DATA = re.compile(r'\d{1,2}/\d{1,2}(?:/\d{2,4})?|\d{1,2}/\d{4}')
+
+# Parole che, subito prima di un numero di 11 cifre o di un prefisso con "/", ne fanno un telefono
+_CONTESTO_TELEFONO = re.compile(r'(?:tel|fax|cell|mob|phone|numero)[^\d]{0,12}$', re.IGNORECASE)
+
+# Prefissi che, subito prima di un numero di 11 cifre, ne fanno una partita IVA
+_CONTESTO_PARTITA_IVA = re.compile(r'(?:\bIT|IVA|VAT|C\.F\.|[Ff]iscale)[\s.:-]*$')
+
+
+def normalizza_telefono(numero):
+    """
+    Porta un numero di telefono italiano nel formato E.164
+
+    Args:
+        numero (str): Numero come scritto nel testo
+
+    Returns:
+        str: Numero E.164 (+39...), None se non è un numero italiano plausibile
+    """
+    cifre = re.sub(r'\D', '', numero)
+    if numero.startswith('+39'):
+        cifre = cifre[2:]
+    elif numero.startswith('0039'):
+        cifre = cifre[4:]
+    elif numero.startswith('00'):
+        # Prefisso internazionale diverso da quello italiano
+        return None
+
+    # Nessun prefisso italiano inizia con 00: sono codici e numeri d'ordine
+    if cifre.startswith('00'):
+        return None
+
+    if cifre.startswith('0') and 6 <= len(cifre) <= 11:
+        return '+39' + cifre
+    if cifre.startswith('3') and 9 <= len(cifre) <= 10:
+        return '+39' + cifre
+    return None
+
+
+def partita_iva_valida(numero):
+    """
+    Verifica la cifra di controllo di una partita IVA di 11 cifre
+
+    Returns:
+        bool: True se la cifra di controllo è corretta
+    """
+    return cifra_controllo(numero[:10]) == numero[10]
+
+
+def _classifica(match, testo):
+    """
+    Converte una corrispondenza dell'espressione in un contatto
+
+    Args:
+        match (re.Match): Corrispondenza di _CONTATTI
+        testo (str): Testo analizzato
+
+    Returns:
+        Contatto: Contatto riconosciuto, None se il valore non è valido
+    """
+    gruppo = match.lastgroup
+    valore = match.group(gruppo)
+    inizio, fine = match.span(gruppo)
+
+    if gruppo == 'email':
+        locale = _PARTE_LOCALE.search(testo, max(inizio - 65, 0), inizio - 1)
+        if locale is None:
+            return None
+        inizio = locale.start()
+        email = testo[inizio:fine]
+        tipo = 'pec' if _DOMINIO_PEC.search(valore) else 'email'
+        return Contatto(tipo, email.lower(), inizio, fine, email)
+
+    if gruppo == 'partita_iva':
+        contesto = max(inizio - 20, 0)
+        if _CONTESTO_PARTITA_IVA.search(testo, contesto, inizio):
+            if not partita_iva_valida(valore):
+                return None
+            return Contatto('partita_iva', valore, inizio, fine, valore)
+        if partita_iva_valida(valore) and not _CONTESTO_TELEFONO.search(testo, contesto, inizio):
+            return Contatto('partita_iva', valore, inizio, fine, valore)
+        # Undici cifre senza cifra di controllo valida possono essere un telefono
+
+    # "/" dopo il prefisso (02/1234567) è comune nei telefoni, ma anche nelle date
+    # e nei numeri di protocollo: vale solo con un'etichetta come "Tel." davanti
+    if '/' in valore and (_DATA.fullmatch(valore) or not _CONTESTO_TELEFONO.search(testo, max(inizio - 20, 0), inizio)):
+        return None
+
+    telefono = normalizza_telefono(valore)
+    if telefono is None:
+        return None
+    return Contatto('telefono', telefono, inizio, fine, valore)
+
+
+def estrai_contatti(testo, tipi=None):
+    """
+    Estrae tutti i contatti di un testo in un solo passaggio
+
+    Args:
+        testo (str): Testo da analizzare
+        tipi (iterable): Tipi da restituire, tra quelli di TIPI (default: tutti)
+
+    Returns:
+        list: Contatti nell'ordine in cui compaiono nel testo
+    """
+    if not testo:
+        return []
+    contatti = []
+    for match in _CONTATTI.finditer(testo):
+        contatto = _classifica(match, testo)
+        if contatto is not None and (tipi is None or contatto.tipo in tipi):
+            contatti.append(contatto)
+    return contatti
+
+
+def primo_contatto(contatti, *tipi):
+    """
+    Valore del primo contatto di un tipo, nell'ordine di preferenza dei tipi
+
+    Args:
+        contatti (list): Contatti estratti
+        *tipi (str): Tipi accettati, dal preferito
+
+    Returns:
+        str: Valore trovato o stringa vuota
+    """
+    for tipo in tipi:
+        for contatto in contatti:
+            if contatto.tipo == tipo:
+                return contatto.valore
+    return ''
+
+
+def _estrai_blocco(testi):
+    """
+    Estrae i contatti di un blocco di documenti
+
+    Returns:
+        list: Una lista di contatti per documento
+    """
+    return [estrai_contatti(testo) for testo in testi]
+
+
+def estrai_contatti_bulk(testi, processi=1, dimensione_blocco=500):
+    """
+    Estrae i contatti di molti documenti insieme
+
+    Con più processi i documenti sono distribuiti a blocchi su un pool; i
+    risultati restano nell'ordine dei documenti.
+
+    Args:
+        testi (iterable): Testi dei documenti
+        processi (int): Processi da usare (1: nel processo corrente)
+        dimensione_blocco (int): Documenti per blocco
+
+    Returns:
+        list: Per ogni documento, la lista dei suoi contatti
+    """
+    testi = list(testi)
+    blocchi = [testi[i:i + dimensione_blocco] for i in range(0, len(testi), dimensione_blocco)]
+
+    if processi > 1 and len(blocchi) > 1:
+        with ProcessPoolExecutor(max_workers=processi) as executor:
+            risultati_blocchi = list(executor.map(_estrai_blocco, blocchi))
+    else:
+        risultati_blocchi = [_estrai_blocco(blocco) for blocco in blocchi]
+
+    return [contatti for risultati in risultati_blocchi for contatti in risultati]
+
+
+def main():
+    """
+    Funzione principale
+    """
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Estrazione di email, PEC, telefoni e partite IVA da testi')
+    parser.add_argument('file', nargs='*', help='File di testo o HTML da analizzare (default: standard input)')
+    parser.add_argument('--tipo', choices=TIPI, action='append', help='Tipi da estrarre (ripetibile)')
+
+    args = parser.parse_args()
+
+    if args.file:
+        testi = []
+        for percorso in args.file:
+            with open(percorso, encoding='utf-8', errors='replace') as f:
+                testi.append(f.read())
+        nomi = args.file
+    else:
+        testi = [sys.stdin.read()]
+        nomi = ['<stdin>']
+
+    for nome, contatti in zip(nomi, estrai_contatti_bulk(testi)):
+        for contatto in contatti:
+            if args.tipo is None or contatto.tipo in args.tipo:
+                print(f"{nome}:{contatto.inizio}\t{contatto.tipo}\t{contatto.valore}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,74 +5,88 @@
 PMI Finder - Script per trovare contatti di PMI italiane da fonti pubbliche
 """
 
-import requests
 import pandas as pd
-import csv
-import os
-import time
 import random
 import json
+from urllib.parse import urlsplit
 from tqdm import tqdm
 
+import pmi_riferimenti as riferimenti
+from pmi_dedup import IndiceDuplicati
+from pmi_destinazione import apri_destinazione
+from pmi_limitatore import LimitatoreDomini
+
+# Vocabolario delle ricerche simulate
+SETTORI_DIGITALI = (
+    "Informatica", "Servizi IT", "Consulenza informatica", "Sviluppo software",
+    "E-commerce", "Marketing digitale", "Automazione industriale", "Elettronica",
+    "Telecomunicazioni", "Servizi alle imprese", "Commercio", "Manifatturiero"
+)
+
+PREFISSI_RICERCA = ("Euro", "Ital", "Tech", "Digital", "Smart", "Net", "Web", "Data")
+
+SUFFISSI_RICERCA = ("Tech", "Solutions", "Consulting", "Group", "Italia", "Systems", "Services")
+
+FORME_RICERCA = ("S.r.l.", "S.p.A.", "S.n.c.")
+
+# Limiti di frequenza delle fonti: richieste al secondo a regime e raffica massima
+LIMITI_FONTI = {
+    'api.companieshouse.gov.uk': {'velocita': 2.0, 'capacita': 5},
+    'api.opencorporates.com': {'velocita': 0.5, 'capacita': 2},
+    'www.registroimprese.it': {'velocita': 0.5, 'capacita': 2}
+}
+
+URL_CAMERE_COMMERCIO = "https://www.registroimprese.it/ricerca-libera"
+
+# Colonne delle aziende trovate, nell'ordine di output
+COLONNE = [
+    'Ragione Sociale', 'Settore', 'Telefono', 'Email',
+    'Sito Web', 'Indirizzo', 'CAP', 'Città', 'Provincia',
+    'Descrizione', 'Fonte'
+]
+
 class PMIFinder:
     """
     Classe per trovare contatti di PMI italiane da fonti pubbliche
     """
     
-    def __init__(self, output_file="pmi_contatti.csv"):
+    def __init__(self, output_file="pmi_contatti.csv", destinazione=None, dedup=None):
         """
         Inizializza il finder
         
         Args:
-            output_file (str): Percorso del file CSV di output
+            output_file (str): File di output; l'estensione sceglie il formato (.csv, .sqlite/.db, .parquet)
+            destinazione (Destinazione): Destinazione dei risultati (default: aperta su output_file)
+            dedup (IndiceDuplicati): Indice dei duplicati; le aziende già trovate non vengono riscritte
         """
         self.output_file = output_file
+        self.dedup = dedup
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         }
+        self.limitatore = LimitatoreDomini(LIMITI_FONTI)
         
-        # Inizializza il file CSV con le intestazioni
-        self.init_csv()
-    
-    def init_csv(self):
-        """
-        Inizializza il file CSV con le intestazioni
-        """
-        if not os.path.exists(self.output_file):
-            with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'Ragione Sociale', 'Settore', 'Telefono', 'Email', 
-                    'Sito Web', 'Indirizzo', 'CAP', 'Cittu00e0', 'Provincia', 
-                    'Descrizione', 'Fonte'
-                ])
+        # Destinazione aperta per tutta l'esecuzione, scritta a blocchi
+        self.destinazione = destinazione or apri_destinazione(output_file, COLONNE)
     
-    def save_to_csv(self, aziende):
+    def salva_aziende(self, aziende):
         """
-        Salva i dati delle aziende nel file CSV
+        Aggiunge le aziende alla destinazione, che le scrive a blocchi
+        
+        Con un indice dei duplicati sono scritte solo le aziende nuove.
         
         Args:
             aziende (list): Lista di dizionari con i dati delle aziende
         """
-        if not aziende:
-            return
-            
-        with open(self.output_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            for azienda in aziende:
-                writer.writerow([
-                    azienda.get('Ragione Sociale', ''),
-                    azienda.get('Settore', ''),
-                    azienda.get('Telefono', ''),
-                    azienda.get('Email', ''),
-                    azienda.get('Sito Web', ''),
-                    azienda.get('Indirizzo', ''),
-                    azienda.get('CAP', ''),
-                    azienda.get('Cittu00e0', ''),
-                    azienda.get('Provincia', ''),
-                    azienda.get('Descrizione', ''),
-                    azienda.get('Fonte', '')
-                ])
+        if self.dedup is not None:
+            aziende = self.dedup.filtra_nuovi(aziende)
+        self.destinazione.scrivi(aziende)
+    
+    def close(self):
+        """Scrive i risultati in attesa e chiude destinazione e indice dei duplicati"""
+        self.destinazione.close()
+        if self.dedup is not None:
+            self.dedup.close()
     
     def search_companies_house(self, query, jurisdiction_code="it", per_page=100, max_pages=5):
         """
@@ -91,9 +105,10 @@ class PMIFinder:
         base_url = "https://api.companieshouse.gov.uk/search/companies"
         
         # Nota: Companies House richiede un'API key
-        # Questo u00e8 un esempio di come potrebbe funzionare l'API
+        # Questo è un esempio di come potrebbe funzionare l'API
         
         print(f"Cercando aziende con query '{query}'...")
+        self.limitatore.attendi(urlsplit(base_url).netloc)
         
         # Simuliamo i risultati per scopi dimostrativi
         # In un'implementazione reale, dovresti usare l'API effettiva
@@ -101,36 +116,15 @@ class PMIFinder:
         # Genera dati di esempio basati sulla query
         num_results = random.randint(50, 200)
         
-        settori = [
-            "Informatica", "Servizi IT", "Consulenza informatica", "Sviluppo software",
-            "E-commerce", "Marketing digitale", "Automazione industriale", "Elettronica",
-            "Telecomunicazioni", "Servizi alle imprese", "Commercio", "Manifatturiero"
-        ]
-        
-        citta = [
-            "Milano", "Roma", "Torino", "Bologna", "Napoli", "Firenze", "Padova",
-            "Bari", "Verona", "Brescia", "Modena", "Bergamo", "Parma", "Vicenza"
-        ]
-        
-        province = {
-            "Milano": "MI", "Roma": "RM", "Torino": "TO", "Bologna": "BO",
-            "Napoli": "NA", "Firenze": "FI", "Padova": "PD", "Bari": "BA",
-            "Verona": "VR", "Brescia": "BS", "Modena": "MO", "Bergamo": "BG",
-            "Parma": "PR", "Vicenza": "VI"
-        }
-        
-        domini_email = ["gmail.com", "libero.it", "yahoo.it", "outlook.com", "pec.it"]
-        
         for i in range(min(num_results, per_page * max_pages)):
             # Genera un nome aziendale basato sulla query
             nome_base = query.title()
-            suffissi = ["Tech", "Solutions", "Consulting", "Group", "Italia", "Systems", "Services"]
-            nome = f"{nome_base} {random.choice(suffissi)} {random.choice(['S.r.l.', 'S.p.A.', 'S.n.c.'])}"
+            nome = f"{nome_base} {random.choice(SUFFISSI_RICERCA)} {random.choice(FORME_RICERCA)}"
             
             # Genera altri dati casuali
-            settore = random.choice(settori)
-            citta_scelta = random.choice(citta)
-            provincia = province.get(citta_scelta, "XX")
+            settore = random.choice(SETTORI_DIGITALI)
+            citta_scelta = random.choice(riferimenti.CITTA_RICERCA)
+            provincia = riferimenti.PROVINCE.get(citta_scelta, "XX")
             cap = f"{random.randint(10, 99)}0{random.randint(10, 99)}"
             
             # Genera email e sito web
@@ -142,8 +136,7 @@ class PMIFinder:
             telefono = f"+39 0{random.randint(2, 9)} {random.randint(1000000, 9999999)}"
             
             # Genera indirizzo
-            vie = ["Via Roma", "Via Milano", "Via Torino", "Via Napoli", "Via Garibaldi", "Via Dante"]
-            indirizzo = f"{random.choice(vie)}, {random.randint(1, 200)}"
+            indirizzo = f"{random.choice(riferimenti.VIE_RICERCA)}, {random.randint(1, 200)}"
             
             # Genera descrizione
             descrizioni = [
@@ -162,7 +155,7 @@ class PMIFinder:
                 'Sito Web': sito_web,
                 'Indirizzo': indirizzo,
                 'CAP': cap,
-                'Cittu00e0': citta_scelta,
+                'Città': citta_scelta,
                 'Provincia': provincia,
                 'Descrizione': descrizione,
                 'Fonte': 'Companies House API (simulata)'
@@ -190,9 +183,10 @@ class PMIFinder:
         base_url = "https://api.opencorporates.com/v0.4/companies/search"
         
         # Nota: OpenCorporates potrebbe richiedere un'API key per query estese
-        # Questo u00e8 un esempio di come potrebbe funzionare l'API
+        # Questo è un esempio di come potrebbe funzionare l'API
         
         print(f"Cercando aziende con query '{query}' su OpenCorporates...")
+        self.limitatore.attendi(urlsplit(base_url).netloc)
         
         # Simuliamo i risultati per scopi dimostrativi
         # In un'implementazione reale, dovresti usare l'API effettiva
@@ -200,34 +194,14 @@ class PMIFinder:
         # Genera dati di esempio basati sulla query
         num_results = random.randint(50, 200)
         
-        settori = [
-            "Informatica", "Servizi IT", "Consulenza informatica", "Sviluppo software",
-            "E-commerce", "Marketing digitale", "Automazione industriale", "Elettronica",
-            "Telecomunicazioni", "Servizi alle imprese", "Commercio", "Manifatturiero"
-        ]
-        
-        citta = [
-            "Milano", "Roma", "Torino", "Bologna", "Napoli", "Firenze", "Padova",
-            "Bari", "Verona", "Brescia", "Modena", "Bergamo", "Parma", "Vicenza"
-        ]
-        
-        province = {
-            "Milano": "MI", "Roma": "RM", "Torino": "TO", "Bologna": "BO",
-            "Napoli": "NA", "Firenze": "FI", "Padova": "PD", "Bari": "BA",
-            "Verona": "VR", "Brescia": "BS", "Modena": "MO", "Bergamo": "BG",
-            "Parma": "PR", "Vicenza": "VI"
-        }
-        
         for i in range(min(num_results, per_page * max_pages)):
             # Genera un nome aziendale basato sulla query
-            prefissi = ["Euro", "Ital", "Tech", "Digital", "Smart", "Net", "Web", "Data"]
-            suffissi = ["Tech", "Solutions", "Consulting", "Group", "Italia", "Systems", "Services"]
-            nome = f"{random.choice(prefissi)}{query.title()} {random.choice(suffissi)} {random.choice(['S.r.l.', 'S.p.A.', 'S.n.c.'])}"
+            nome = f"{random.choice(PREFISSI_RICERCA)}{query.title()} {random.choice(SUFFISSI_RICERCA)} {random.choice(FORME_RICERCA)}"
             
             # Genera altri dati casuali
-            settore = random.choice(settori)
-            citta_scelta = random.choice(citta)
-            provincia = province.get(citta_scelta, "XX")
+            settore = random.choice(SETTORI_DIGITALI)
+            citta_scelta = random.choice(riferimenti.CITTA_RICERCA)
+            provincia = riferimenti.PROVINCE.get(citta_scelta, "XX")
             cap = f"{random.randint(10, 99)}0{random.randint(10, 99)}"
             
             # Genera email e sito web
@@ -240,8 +214,7 @@ class PMIFinder:
             telefono = f"+39 0{random.randint(2, 9)} {random.randint(1000000, 9999999)}"
             
             # Genera indirizzo
-            vie = ["Via Roma", "Via Milano", "Via Torino", "Via Napoli", "Via Garibaldi", "Via Dante"]
-            indirizzo = f"{random.choice(vie)}, {random.randint(1, 200)}"
+            indirizzo = f"{random.choice(riferimenti.VIE_RICERCA)}, {random.randint(1, 200)}"
             indirizzo_completo = f"{indirizzo} - {cap} {citta_scelta} ({provincia})"
             
             # Genera descrizione
@@ -261,7 +234,7 @@ class PMIFinder:
                 'Sito Web': sito_web,
                 'Indirizzo': indirizzo_completo,
                 'CAP': cap,
-                'Cittu00e0': citta_scelta,
+                'Città': citta_scelta,
                 'Provincia': provincia,
                 'Descrizione': descrizione,
                 'Fonte': 'OpenCorporates API (simulata)'
@@ -277,7 +250,7 @@ class PMIFinder:
         Simula la ricerca di aziende dalle Camere di Commercio italiane
         
         Args:
-            settore (str): Settore di attivitu00e0
+            settore (str): Settore di attività
             provincia (str): Sigla della provincia
             
         Returns:
@@ -286,19 +259,15 @@ class PMIFinder:
         aziende = []
         
         print(f"Cercando aziende nel settore '{settore}' in provincia di '{provincia}'...")
+        self.limitatore.attendi(urlsplit(URL_CAMERE_COMMERCIO).netloc)
         
         # Simuliamo i risultati per scopi dimostrativi
         # In un'implementazione reale, dovresti interfacciarti con i dati delle Camere di Commercio
         
         # Mappa delle province
-        province_map = {
-            "MI": "Milano", "RM": "Roma", "TO": "Torino", "BO": "Bologna",
-            "NA": "Napoli", "FI": "Firenze", "PD": "Padova", "BA": "Bari",
-            "VR": "Verona", "BS": "Brescia", "MO": "Modena", "BG": "Bergamo",
-            "PR": "Parma", "VI": "Vicenza"
-        }
+        province_map = riferimenti.CAPOLUOGHI_RICERCA
         
-        # Verifica se la provincia u00e8 valida
+        # Verifica se la provincia è valida
         if provincia not in province_map:
             print(f"Provincia '{provincia}' non valida. Province valide: {', '.join(province_map.keys())}")
             return aziende
@@ -308,50 +277,24 @@ class PMIFinder:
         # Genera dati di esempio
         num_results = random.randint(30, 100)
         
-        prefissi_aziendali = [
-            "Tecno", "Agri", "Mec", "Edi", "Info", "Bio", "Eco", "Auto", "Termo", "Elettro",
-            "Idro", "Plast", "Metal", "Legno", "Vetro", "Carta", "Tessile", "Aliment", "Arredo", "Stampa"
-        ]
-        
-        suffissi_aziendali = [
-            "service", "tech", "system", "group", "italia", "mec", "prom", "trade", "food", "build",
-            "consulting", "solutions", "project", "engineering", "design", "energy", "logistic", "export", "quality"
-        ]
-        
-        forme_giuridiche = [
-            "S.r.l.", "S.n.c.", "S.a.s.", "S.p.A.", "Ditta individuale", "Societu00e0 cooperativa", "S.r.l.s."
-        ]
-        
-        vie = [
-            "Via Roma", "Via Milano", "Via Torino", "Via Napoli", "Via Firenze", "Via Bologna", "Via Venezia",
-            "Via Garibaldi", "Via Mazzini", "Via Dante", "Via Marconi", "Via Galilei", "Via Fermi", "Via Edison",
-            "Via dell'Industria", "Via dell'Artigianato", "Via del Lavoro", "Via delle Industrie", "Via Europa"
-        ]
-        
         for i in range(num_results):
             # Genera nome aziendale
             if random.random() < 0.5:
-                nome = f"{random.choice(prefissi_aziendali)}{random.choice(suffissi_aziendali)}"
+                nome = f"{random.choice(riferimenti.PREFISSI_AZIENDALI)}{random.choice(riferimenti.SUFFISSI_REGISTRO)}"
             else:
-                cognomi = ["Rossi", "Bianchi", "Ferrari", "Esposito", "Romano", "Colombo", "Ricci", "Marino", "Greco", "Bruno"]
-                nome = f"{random.choice(cognomi)} {settore.title()}"
+                nome = f"{random.choice(riferimenti.COGNOMI)} {settore.title()}"
             
-            forma_giuridica = random.choice(forme_giuridiche)
+            forma_giuridica = random.choice(riferimenti.FORME_GIURIDICHE)
             nome_completo = f"{nome} {forma_giuridica}" if forma_giuridica != "Ditta individuale" else nome
             
             # Genera CAP
-            cap_base = {
-                "Milano": "201", "Roma": "001", "Torino": "101", "Bologna": "401", "Napoli": "801",
-                "Firenze": "501", "Padova": "351", "Bari": "701", "Verona": "371", "Brescia": "251"
-            }
-            
-            if citta in cap_base:
-                cap = cap_base[citta] + str(random.randint(0, 9)) + str(random.randint(0, 9))
+            if citta in riferimenti.CAP_BASE:
+                cap = riferimenti.CAP_BASE[citta] + str(random.randint(0, 9)) + str(random.randint(0, 9))
             else:
                 cap = str(random.randint(10, 98)) + "0" + str(random.randint(10, 99))
             
             # Genera indirizzo
-            via = random.choice(vie)
+            via = random.choice(riferimenti.VIE_INDUSTRIALI)
             civico = random.randint(1, 200)
             indirizzo = f"{via}, {civico} - {cap} {citta} ({provincia})"
             
@@ -360,15 +303,13 @@ class PMIFinder:
             nome_norm = ''.join(c for c in nome_norm if c.isalnum())
             
             # Email
-            tipi_email = ["info", "contatti", "amministrazione", "vendite", "ufficio"]
-            email = f"{random.choice(tipi_email)}@{nome_norm[:15]}.it"
+            email = f"{random.choice(riferimenti.TIPI_EMAIL)}@{nome_norm[:15]}.it"
             
             # Sito web
             sito_web = f"https://www.{nome_norm[:15]}.it" if random.random() < 0.85 else ""
             
             # Telefono
-            prefissi_fissi = ["02", "06", "011", "010", "051", "055", "049", "081", "091", "045"]
-            telefono = f"+39 {random.choice(prefissi_fissi)} {random.randint(100000, 9999999)}"
+            telefono = f"+39 {random.choice(riferimenti.PREFISSI_FISSI)} {random.randint(100000, 9999999)}"
             
             # Descrizione
             descrizioni = [
@@ -387,7 +328,7 @@ class PMIFinder:
                 'Sito Web': sito_web,
                 'Indirizzo': indirizzo,
                 'CAP': cap,
-                'Cittu00e0': citta,
+                'Città': citta,
                 'Provincia': provincia,
                 'Descrizione': descrizione,
                 'Fonte': 'Camera di Commercio (simulata)'
@@ -423,19 +364,21 @@ class PMIFinder:
         # Ricerca su OpenCorporates
         for query in queries:
             aziende = self.search_opencorporates(query)
-            self.save_to_csv(aziende)
+            self.salva_aziende(aziende)
             total_aziende += len(aziende)
-            time.sleep(random.uniform(1, 3))  # Pausa tra le ricerche
         
         # Ricerca su Camere di Commercio
         for settore, provincia in settori_province:
             aziende = self.search_camere_commercio(settore, provincia)
-            self.save_to_csv(aziende)
+            self.salva_aziende(aziende)
             total_aziende += len(aziende)
-            time.sleep(random.uniform(1, 3))  # Pausa tra le ricerche
+        
+        self.destinazione.flush()
         
         print(f"\nRicerca completata. Totale aziende trovate: {total_aziende}")
         print(f"I dati sono stati salvati in: {self.output_file}")
+        if self.dedup is not None:
+            print(self.dedup.riepilogo())
 
 
 def main():
@@ -445,20 +388,28 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Finder per contatti di PMI italiane')
-    parser.add_argument('--output', default='pmi_contatti.csv', help='File di output (CSV)')
+    parser.add_argument('--output', default='pmi_contatti.csv', help='File di output: .csv, .sqlite/.db o .parquet')
+    parser.add_argument('--batch-size', type=int, default=500, help='Aziende accumulate prima di ogni scrittura')
+    parser.add_argument('--dedup', nargs='?', const='pmi_dedup.sqlite', default=None, metavar='PERCORSO',
+                        help='Indice persistente dei duplicati: le aziende già trovate non vengono riscritte')
     parser.add_argument('--query', default='informatica', help='Query di ricerca')
-    parser.add_argument('--settore', default='Informatica', help='Settore di attivitu00e0')
+    parser.add_argument('--settore', default='Informatica', help='Settore di attività')
     parser.add_argument('--provincia', default='MI', help='Sigla della provincia')
     
     args = parser.parse_args()
     
-    finder = PMIFinder(output_file=args.output)
+    destinazione = apri_destinazione(args.output, COLONNE, batch_size=args.batch_size)
+    dedup = IndiceDuplicati(args.dedup) if args.dedup else None
+    finder = PMIFinder(output_file=args.output, destinazione=destinazione, dedup=dedup)
     
     # Configura le ricerche
     queries = [args.query]
     settori_province = [(args.settore, args.provincia)]
     
-    finder.run_search(queries, settori_province)
+    try:
+        finder.run_search(queries, settori_province)
+    finally:
+        finder.close()
 
 
 if __name__ == "__main__":
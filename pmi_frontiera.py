@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Frontiera - Frontiera di crawling persistente per riprendere gli scraping interrotti
+
+Ogni URL di elenco e di dettaglio è registrato in SQLite con il suo stato
+(in_attesa, in_corso, completato, fallito), il numero di tentativi e il
+risultato dell'analisi. Un nuovo avvio riparte solo dal lavoro rimasto: gli
+URL completati restituiscono il risultato salvato senza essere riscaricati e
+le pagine di elenco già esportate non vengono riscritte nel file di output.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+STATI = ('in_attesa', 'in_corso', 'completato', 'fallito')
+
+
+class FrontieraCrawl:
+    """
+    Stato persistente degli URL di uno scraping
+    """
+
+    def __init__(self, percorso="pmi_frontiera.sqlite", tentativi_massimi=3):
+        """
+        Args:
+            percorso (str): File del database della frontiera
+            tentativi_massimi (int): Tentativi dopo i quali un URL fallito non viene più ripreso
+        """
+        self.percorso = percorso
+        self.tentativi_massimi = tentativi_massimi
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(percorso, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS url (
+                url TEXT PRIMARY KEY,
+                tipo TEXT NOT NULL,
+                stato TEXT NOT NULL DEFAULT 'in_attesa',
+                tentativi INTEGER NOT NULL DEFAULT 0,
+                errore TEXT,
+                risultato TEXT,
+                esportata INTEGER NOT NULL DEFAULT 0,
+                aggiornato REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_url_stato ON url (stato)")
+
+        # Gli URL rimasti in corso appartengono a un'esecuzione interrotta
+        self.ripristinati = self._db.execute(
+            "UPDATE url SET stato = 'in_attesa' WHERE stato = 'in_corso'"
+        ).rowcount
+        self._db.commit()
+
+    def prendi(self, url, tipo):
+        """
+        Registra un URL e decide se va scaricato
+
+        Gli URL da scaricare passano allo stato in_corso e ne viene contato
+        il tentativo.
+
+        Args:
+            url (str): URL di elenco o di dettaglio
+            tipo (str): 'elenco' o 'dettaglio'
+
+        Returns:
+            tuple: (da_scaricare, risultato salvato); il risultato è None per
+                   gli URL falliti troppe volte
+        """
+        with self._lock:
+            ora = time.time()
+            self._db.execute(
+                "INSERT OR IGNORE INTO url (url, tipo, aggiornato) VALUES (?, ?, ?)", (url, tipo, ora)
+            )
+            stato, tentativi, risultato = self._db.execute(
+                "SELECT stato, tentativi, risultato FROM url WHERE url = ?", (url,)
+            ).fetchone()
+
+            if stato == 'completato':
+                return False, json.loads(risultato)
+            if stato == 'fallito' and tentativi >= self.tentativi_massimi:
+                return False, None
+
+            self._db.execute(
+                "UPDATE url SET stato = 'in_corso', tentativi = tentativi + 1, aggiornato = ? WHERE url = ?",
+                (ora, url)
+            )
+            self._db.commit()
+            return True, None
+
+    def completa(self, url, risultato=None):
+        """
+        Segna un URL come completato e ne salva il risultato
+
+        Args:
+            url (str): URL completato
+            risultato: Dati estratti, serializzabili in JSON
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE url SET stato = 'completato', errore = NULL, risultato = ?, aggiornato = ? WHERE url = ?",
+                (json.dumps(risultato, ensure_ascii=False), time.time(), url)
+            )
+            self._db.commit()
+
+    def fallisci(self, url, errore):
+        """
+        Segna un URL come fallito; sarà ripreso finché restano tentativi
+
+        Args:
+            url (str): URL fallito
+            errore (str): Descrizione dell'errore
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE url SET stato = 'fallito', errore = ?, aggiornato = ? WHERE url = ?",
+                (errore, time.time(), url)
+            )
+            self._db.commit()
+
+    def tentativi(self, url):
+        """
+        Numero di tentativi già fatti per un URL
+
+        Returns:
+            int: Tentativi, 0 per gli URL mai presi
+        """
+        with self._lock:
+            riga = self._db.execute("SELECT tentativi FROM url WHERE url = ?", (url,)).fetchone()
+        return riga[0] if riga else 0
+
+    def esportata(self, url):
+        """
+        Indica se i risultati di una pagina di elenco sono già stati scritti
+
+        Returns:
+            bool: True se la pagina è già stata esportata
+        """
+        with self._lock:
+            riga = self._db.execute("SELECT esportata FROM url WHERE url = ?", (url,)).fetchone()
+        return bool(riga and riga[0])
+
+    def segna_esportata(self, url):
+        """Segna come scritti i risultati di una pagina di elenco"""
+        with self._lock:
+            self._db.execute("UPDATE url SET esportata = 1 WHERE url = ?", (url,))
+            self._db.commit()
+
+    def conteggi(self):
+        """
+        Numero di URL per stato
+
+        Returns:
+            dict: Stato -> numero di URL
+        """
+        with self._lock:
+            righe = dict(self._db.execute("SELECT stato, COUNT(*) FROM url GROUP BY stato").fetchall())
+        return {stato: righe.get(stato, 0) for stato in STATI}
+
+    def riepilogo(self):
+        """
+        Riepilogo leggibile dello stato della frontiera
+
+        Returns:
+            str: Numero di URL per stato
+        """
+        conteggi = self.conteggi()
+        return "Frontiera: " + ", ".join(f"{conteggi[stato]} {stato.replace('_', ' ')}" for stato in STATI)
+
+    def close(self):
+        """Chiude il database"""
+        with self._lock:
+            self._db.close()
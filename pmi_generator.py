@@ -8,7 +8,19 @@ PMI Generator - Script per generare dati realistici di PMI italiane
 import csv
 import random
 import os
+import string
 from datetime import datetime, timedelta
+from functools import partial
+
+import numpy as np
+from tqdm import tqdm
+
+import pmi_riferimenti as riferimenti
+from pmi_campionatori import CampionatoreAlias
+from pmi_database import DatabasePMI, elimina_database
+from pmi_partita_iva import GeneratorePartiteIva
+from pmi_parallelo import genera_in_parallelo
+from pmi_stream import FORMATI, ScrittoreParquet, scrivi_record
 
 # Definizioni secondo i criteri UE per le PMI
 # Micro impresa: < 10 dipendenti, fatturato <= 2 milioni €
@@ -20,39 +32,36 @@ class PMIGenerator:
     Classe per generare dati realistici di PMI italiane
     """
     
-    def __init__(self, output_file="pmi_italiane.csv"):
+    def __init__(self, output_file="pmi_italiane.csv", formato="csv", comuni=None, inizio=0):
         """
         Inizializza il generatore
         
         Args:
-            output_file (str): Percorso del file CSV di output
+            output_file (str): Percorso del file di output
+            formato (str): Formato di output (csv, parquet o sqlite)
+            comuni (str): Gazetteer dei comuni (CSV o directory compilata); se indicato,
+                città, provincia e CAP sono estratti in proporzione alla popolazione
+            inizio (int): Posizione della prima azienda nel dataset, per partite IVA
+                uniche anche tra shard diversi
         """
         self.output_file = output_file
-        
-        # Dati di esempio per la generazione
-        self.prefissi_aziendali = [
-            "Tecno", "Agri", "Mec", "Edi", "Info", "Bio", "Eco", "Auto", "Termo", "Elettro",
-            "Idro", "Plast", "Metal", "Legno", "Vetro", "Carta", "Tessile", "Aliment", "Arredo", "Stampa"
-        ]
-        
-        self.suffissi_aziendali = [
-            "service", "tech", "system", "group", "italia", "mec", "prom", "trade", "food", "build",
-            "consulting", "solutions", "project", "engineering", "design", "energy", "logistic", "export", "quality", "components"
-        ]
-        
-        self.forme_giuridiche = [
-            "S.r.l.", "S.n.c.", "S.a.s.", "S.p.A.", "Ditta individuale", "Società cooperativa", "S.r.l.s."
-        ]
-        
-        self.probabilita_forme = {
-            "S.r.l.": 0.45,
-            "S.n.c.": 0.15,
-            "S.a.s.": 0.10,
-            "Ditta individuale": 0.20,
-            "S.p.A.": 0.03,
-            "Società cooperativa": 0.05,
-            "S.r.l.s.": 0.02
-        }
+        self.formato = formato
+        self.comuni = riferimenti.carica_comuni(comuni) if comuni else None
+        self.partite_iva = GeneratorePartiteIva(inizio)
+        
+        # Dati di riferimento condivisi (catalogo immutabile caricato una sola volta)
+        self.prefissi_aziendali = riferimenti.PREFISSI_AZIENDALI
+        self.suffissi_aziendali = riferimenti.SUFFISSI_AZIENDALI
+        self.forme_giuridiche = riferimenti.FORME_GIURIDICHE
+        self.probabilita_forme = riferimenti.PROBABILITA_FORME
+        self.citta = riferimenti.CITTA
+        self.province = riferimenti.PROVINCE
+        self.vie = riferimenti.VIE
+        self.domini_email = riferimenti.DOMINI_EMAIL
+        self.tipi_email = riferimenti.TIPI_EMAIL
+        self.prefissi_fissi = riferimenti.PREFISSI_FISSI
+        self.prefissi_mobili = riferimenti.PREFISSI_MOBILI
+        self.cap_base = riferimenti.CAP_BASE
         
         self.settori = [
             "Manifatturiero", "Edilizia", "Commercio", "Servizi alle imprese", "ICT", "Agricoltura",
@@ -60,33 +69,58 @@ class PMIGenerator:
             "Elettronica", "Tessile", "Legno e arredo", "Chimica", "Plastica", "Metalmeccanica"
         ]
         
-        self.citta = [
-            "Milano", "Roma", "Torino", "Bologna", "Napoli", "Firenze", "Padova", "Bari", "Verona", "Brescia",
-            "Modena", "Bergamo", "Parma", "Vicenza", "Treviso", "Udine", "Varese", "Como", "Monza", "Prato",
-            "Reggio Emilia", "Ancona", "Pescara", "Catania", "Palermo", "Cagliari", "Venezia", "Perugia", "Trento", "Bolzano"
+        # Componenti dei modelli di nome aziendale
+        self.cognomi_comuni = riferimenti.COGNOMI
+        self.settori_brevi_cognome = ["Meccanica", "Impianti", "Costruzioni", "Legno", "Servizi", "Trasporti", "Edilizia"]
+        self.cognomi_soci = riferimenti.COGNOMI_SOCI
+        self.separatori_soci = [" & ", " e ", "-", " - "]
+        self.luoghi = ["Brianza", "Veneto", "Toscana", "Lombardia", "Piemonte", "Emilia", "Romagna", "Marche", "Umbria", "Lazio"]
+        self.settori_brevi_luogo = ["Legno", "Metalli", "Vetro", "Tessile", "Stampa", "Edile", "Impianti", "Meccanica", "Plastica"]
+        
+        # Distribuzioni condivise dalla generazione per riga e da quella a blocchi
+        self.categorie_pmi = ["Micro impresa", "Piccola impresa", "Media impresa"]
+        self.probabilita_categorie = [0.82, 0.15, 0.03]  # In Italia circa l'82% sono micro, 15% piccole, 3% medie
+        self.limiti_dipendenti = [(1, 9), (10, 49), (50, 249)]
+        self.limiti_fatturato = [(0.05, 2.0), (2.0, 10.0), (10.0, 50.0)]  # Milioni di euro
+        
+        self.fasce_anni_attivita = [(1, 5), (6, 10), (11, 20), (21, 30), (31, 50), (51, 70)]
+        self.probabilita_fasce_anni = [0.15, 0.25, 0.30, 0.20, 0.08, 0.02]
+        
+        # Campionatori pesati precalcolati una volta per istanza (estrazioni O(1))
+        self.campionatore_forme = CampionatoreAlias(self.probabilita_forme.keys(), self.probabilita_forme.values())
+        self.campionatore_categorie = CampionatoreAlias(range(len(self.categorie_pmi)), self.probabilita_categorie)
+        self.campionatore_fasce_anni = CampionatoreAlias(self.fasce_anni_attivita, self.probabilita_fasce_anni)
+        
+        self.colonne = [
+            'Ragione Sociale', 'Forma Giuridica', 'Settore', 'Anno Fondazione', 'Partita IVA', 'Categoria',
+            'Dipendenti', 'Fatturato (milioni €)', 'Telefono', 'Email', 'Sito Web', 'Indirizzo', 'CAP',
+            'Città', 'Provincia', 'Descrizione'
         ]
         
-        self.province = {
-            "Milano": "MI", "Roma": "RM", "Torino": "TO", "Bologna": "BO", "Napoli": "NA", "Firenze": "FI", 
-            "Padova": "PD", "Bari": "BA", "Verona": "VR", "Brescia": "BS", "Modena": "MO", "Bergamo": "BG", 
-            "Parma": "PR", "Vicenza": "VI", "Treviso": "TV", "Udine": "UD", "Varese": "VA", "Como": "CO", 
-            "Monza": "MB", "Prato": "PO", "Reggio Emilia": "RE", "Ancona": "AN", "Pescara": "PE", 
-            "Catania": "CT", "Palermo": "PA", "Cagliari": "CA", "Venezia": "VE", "Perugia": "PG", 
-            "Trento": "TN", "Bolzano": "BZ"
-        }
-        
-        self.vie = [
-            "Via Roma", "Via Milano", "Via Torino", "Via Napoli", "Via Firenze", "Via Bologna", "Via Venezia",
-            "Via Garibaldi", "Via Mazzini", "Via Dante", "Via Marconi", "Via Galilei", "Via Fermi", "Via Edison",
-            "Via dell'Industria", "Via dell'Artigianato", "Via del Lavoro", "Via delle Industrie", "Via Europa",
-            "Via XXV Aprile", "Via IV Novembre", "Via I Maggio", "Via II Giugno", "Via XX Settembre",
-            "Viale delle Nazioni", "Viale della Repubblica", "Viale della Libertà", "Viale dell'Indipendenza"
+        self.modelli_descrizione = [
+            "Fondata nel {anno_fondazione}, la nostra azienda opera nel settore {settore} con {dipendenti} dipendenti. Offriamo soluzioni innovative e personalizzate per clienti in tutta Italia.",
+            "Da oltre {anni_attivita} anni siamo specializzati nel settore {settore}. La nostra azienda, con sede a {citta}, conta {dipendenti} collaboratori e un fatturato di {fatturato} milioni di euro.",
+            "PMI italiana attiva nel settore {settore} dal {anno_fondazione}. Con {dipendenti} dipendenti, offriamo prodotti e servizi di qualità per il mercato nazionale ed internazionale.",
+            "Azienda a conduzione familiare con {anni_attivita} anni di esperienza nel settore {settore}. Siamo una {categoria} con {dipendenti} dipendenti e un fatturato annuo di {fatturato} milioni di euro.",
+            "Realtà imprenditoriale italiana fondata nel {anno_fondazione}, specializzata nel settore {settore}. La nostra struttura conta {dipendenti} professionisti qualificati e ha un fatturato di {fatturato} milioni di euro."
         ]
         
-        self.domini_email = [
-            "gmail.com", "libero.it", "yahoo.it", "virgilio.it", "hotmail.it", "outlook.it", "pec.it", "legalmail.it"
+        # Modelli scomposti in (testo fisso, campo) per la composizione vettoriale di genera_batch
+        self.pezzi_descrizione = [
+            [(testo, campo) for testo, campo, _, _ in string.Formatter().parse(modello)]
+            for modello in self.modelli_descrizione
         ]
     
+    @staticmethod
+    def _normalizza_nome(nome_azienda):
+        """
+        Normalizza il nome di un'azienda per email e sito web
+        
+        Returns:
+            str: Nome in minuscolo senza spazi e punteggiatura
+        """
+        return nome_azienda.lower().replace(" ", "").replace("&", "e").replace(".", "").replace("-", "").replace("'", "")
+    
     def _genera_nome_azienda(self):
         """
         Genera un nome casuale per un'azienda
@@ -96,47 +130,35 @@ class PMIGenerator:
         """
         # Diversi modelli di nomi aziendali
         modello = random.randint(1, 5)
-        forma_giuridica = random.choices(
-            list(self.probabilita_forme.keys()), 
-            weights=list(self.probabilita_forme.values()), 
-            k=1
-        )[0]
+        forma_giuridica = self.campionatore_forme.estrai()
         
         if modello == 1:
             # Prefisso + Suffisso (es. TecnoService)
             nome = random.choice(self.prefissi_aziendali) + random.choice(self.suffissi_aziendali)
         elif modello == 2:
             # Cognome + Settore (es. Bianchi Meccanica)
-            cognomi = ["Rossi", "Bianchi", "Ferrari", "Esposito", "Romano", "Colombo", "Ricci", "Marino", "Greco", "Bruno"]
-            settori_brevi = ["Meccanica", "Impianti", "Costruzioni", "Legno", "Servizi", "Trasporti", "Edilizia"]
-            nome = f"{random.choice(cognomi)} {random.choice(settori_brevi)}"
+            nome = f"{random.choice(self.cognomi_comuni)} {random.choice(self.settori_brevi_cognome)}"
         elif modello == 3:
             # Acronimo (es. C.M.B.)
             lettere = [chr(random.randint(65, 90)) for _ in range(random.randint(2, 4))]
             nome = ".".join(lettere) + "."
         elif modello == 4:
             # Cognome e Cognome (es. Bianchi & Rossi)
-            cognomi = ["Rossi", "Bianchi", "Ferrari", "Esposito", "Romano", "Colombo", "Ricci", "Marino", "Greco", "Bruno",
-                      "Gallo", "Conti", "De Luca", "Costa", "Giordano", "Mancini", "Lombardi", "Moretti", "Barbieri"]
-            separatori = [" & ", " e ", "-", " - "]
-            nome = f"{random.choice(cognomi)}{random.choice(separatori)}{random.choice(cognomi)}"
+            nome = f"{random.choice(self.cognomi_soci)}{random.choice(self.separatori_soci)}{random.choice(self.cognomi_soci)}"
         else:
             # Nome geografico + Settore (es. Brianza Legno)
-            luoghi = ["Brianza", "Veneto", "Toscana", "Lombardia", "Piemonte", "Emilia", "Romagna", "Marche", "Umbria", "Lazio"]
-            settori_brevi = ["Legno", "Metalli", "Vetro", "Tessile", "Stampa", "Edile", "Impianti", "Meccanica", "Plastica"]
-            nome = f"{random.choice(luoghi)} {random.choice(settori_brevi)}"
+            nome = f"{random.choice(self.luoghi)} {random.choice(self.settori_brevi_luogo)}"
         
         return nome, forma_giuridica
     
     def _genera_partita_iva(self):
         """
-        Genera una partita IVA italiana casuale
+        Genera una partita IVA italiana valida, unica nel dataset
         
         Returns:
             str: Partita IVA
         """
-        # Le partite IVA italiane sono composte da 11 cifre
-        return "".join([str(random.randint(0, 9)) for _ in range(11)])
+        return self.partite_iva.nuova()
     
     def _genera_anno_fondazione(self):
         """
@@ -145,13 +167,9 @@ class PMIGenerator:
         Returns:
             int: Anno di fondazione
         """
-        # La maggior parte delle PMI ha meno di 30 anni
-        anni_attivita = random.choices(
-            [random.randint(1, 5), random.randint(6, 10), random.randint(11, 20), 
-             random.randint(21, 30), random.randint(31, 50), random.randint(51, 70)],
-            weights=[0.15, 0.25, 0.30, 0.20, 0.08, 0.02],
-            k=1
-        )[0]
+        # La maggior parte delle PMI ha meno di 30 anni: si estrae la fascia, poi l'anno al suo interno
+        inizio, fine = self.campionatore_fasce_anni.estrai()
+        anni_attivita = random.randint(inizio, fine)
         
         return datetime.now().year - anni_attivita
     
@@ -163,23 +181,12 @@ class PMIGenerator:
             tuple: (categoria, dipendenti, fatturato)
         """
         # Distribuzione realistica delle dimensioni aziendali in Italia
-        categoria = random.choices(
-            ["Micro impresa", "Piccola impresa", "Media impresa"],
-            weights=[0.82, 0.15, 0.03],  # In Italia circa l'82% sono micro, 15% piccole, 3% medie
-            k=1
-        )[0]
-        
-        if categoria == "Micro impresa":
-            dipendenti = random.randint(1, 9)
-            fatturato = round(random.uniform(0.05, 2.0), 2)  # Da 50k a 2M
-        elif categoria == "Piccola impresa":
-            dipendenti = random.randint(10, 49)
-            fatturato = round(random.uniform(2.0, 10.0), 2)  # Da 2M a 10M
-        else:  # Media impresa
-            dipendenti = random.randint(50, 249)
-            fatturato = round(random.uniform(10.0, 50.0), 2)  # Da 10M a 50M
-        
-        return categoria, dipendenti, fatturato
+        indice = self.campionatore_categorie.estrai()
+        
+        dipendenti = random.randint(*self.limiti_dipendenti[indice])
+        fatturato = round(random.uniform(*self.limiti_fatturato[indice]), 2)
+        
+        return self.categorie_pmi[indice], dipendenti, fatturato
     
     def _genera_contatti(self, nome_azienda, citta):
         """
@@ -188,25 +195,18 @@ class PMIGenerator:
         Returns:
             tuple: (telefono, email, sito_web)
         """
-        # Genera numero di telefono italiano
-        prefissi_fissi = ["02", "06", "011", "010", "051", "055", "049", "081", "091", "045"]
-        prefissi_mobili = ["320", "328", "330", "338", "340", "345", "347", "350", "360", "370", "380", "388", "389", "391", "392", "393", "327", "329"]
-        
         # 70% probabilità di avere un numero fisso, 30% mobile
         if random.random() < 0.7:
-            telefono = f"+39 {random.choice(prefissi_fissi)} {random.randint(100000, 9999999)}"
+            telefono = f"+39 {random.choice(self.prefissi_fissi)} {random.randint(100000, 9999999)}"
         else:
-            telefono = f"+39 {random.choice(prefissi_mobili)} {random.randint(1000000, 9999999)}"
+            telefono = f"+39 {random.choice(self.prefissi_mobili)} {random.randint(1000000, 9999999)}"
         
         # Normalizza il nome per email e sito web
-        nome_norm = nome_azienda.lower().replace(" ", "").replace("&", "e").replace(".", "").replace("-", "").replace("'", "")
-        
-        # Genera email
-        tipi_email = ["info", "contatti", "amministrazione", "vendite", "ufficio"]
+        nome_norm = self._normalizza_nome(nome_azienda)
         
         # 80% probabilità di avere un dominio aziendale, 20% un provider generico
         if random.random() < 0.8:
-            email = f"{random.choice(tipi_email)}@{nome_norm}.it"
+            email = f"{random.choice(self.tipi_email)}@{nome_norm}.it"
         else:
             email = f"{nome_norm}@{random.choice(self.domini_email)}"
         
@@ -218,28 +218,29 @@ class PMIGenerator:
         
         return telefono, email, sito_web
     
-    def _genera_indirizzo(self, citta):
+    def _genera_indirizzo(self, citta, provincia=None, cap=None):
         """
         Genera un indirizzo realistico
         
+        Args:
+            citta (str): Città della sede
+            provincia (str): Sigla della provincia, se già nota dal gazetteer
+            cap (str): CAP, se già noto dal gazetteer
+        
         Returns:
             tuple: (indirizzo_completo, cap, provincia)
         """
         via = random.choice(self.vie)
         civico = random.randint(1, 200)
         
-        # CAP realistici per città
-        cap_base = {
-            "Milano": "201", "Roma": "001", "Torino": "101", "Bologna": "401", "Napoli": "801",
-            "Firenze": "501", "Padova": "351", "Bari": "701", "Verona": "371", "Brescia": "251"
-        }
+        if cap is None:
+            if citta in self.cap_base:
+                cap = self.cap_base[citta] + str(random.randint(0, 9)) + str(random.randint(0, 9))
+            else:
+                cap = str(random.randint(10, 98)) + "0" + str(random.randint(10, 99))
         
-        if citta in cap_base:
-            cap = cap_base[citta] + str(random.randint(0, 9)) + str(random.randint(0, 9))
-        else:
-            cap = str(random.randint(10, 98)) + "0" + str(random.randint(10, 99))
-        
-        provincia = self.province.get(citta, "XX")
+        if provincia is None:
+            provincia = self.province.get(citta, "XX")
         
         indirizzo_completo = f"{via}, {civico} - {cap} {citta} ({provincia})"
         
@@ -256,25 +257,29 @@ class PMIGenerator:
         nome_completo = f"{nome_azienda} {forma_giuridica}" if forma_giuridica != "Ditta individuale" else nome_azienda
         
         settore = random.choice(self.settori)
-        citta = random.choice(self.citta)
+        if self.comuni is None:
+            citta = random.choice(self.citta)
+            provincia = cap = None
+        else:
+            citta, provincia, cap = self.comuni.estrai_comune()
         anno_fondazione = self._genera_anno_fondazione()
         partita_iva = self._genera_partita_iva()
         categoria_pmi, dipendenti, fatturato = self._genera_dimensione_pmi()
         telefono, email, sito_web = self._genera_contatti(nome_azienda, citta)
-        indirizzo, cap, provincia = self._genera_indirizzo(citta)
+        indirizzo, cap, provincia = self._genera_indirizzo(citta, provincia, cap)
         
         # Genera una descrizione contestualizzata
         anni_attivita = datetime.now().year - anno_fondazione
         
-        descrizioni = [
-            f"Fondata nel {anno_fondazione}, la nostra azienda opera nel settore {settore.lower()} con {dipendenti} dipendenti. Offriamo soluzioni innovative e personalizzate per clienti in tutta Italia.",
-            f"Da oltre {anni_attivita} anni siamo specializzati nel settore {settore.lower()}. La nostra azienda, con sede a {citta}, conta {dipendenti} collaboratori e un fatturato di {fatturato} milioni di euro.",
-            f"PMI italiana attiva nel settore {settore.lower()} dal {anno_fondazione}. Con {dipendenti} dipendenti, offriamo prodotti e servizi di qualità per il mercato nazionale ed internazionale.",
-            f"Azienda a conduzione familiare con {anni_attivita} anni di esperienza nel settore {settore.lower()}. Siamo una {categoria_pmi.lower()} con {dipendenti} dipendenti e un fatturato annuo di {fatturato} milioni di euro.",
-            f"Realtà imprenditoriale italiana fondata nel {anno_fondazione}, specializzata nel settore {settore.lower()}. La nostra struttura conta {dipendenti} professionisti qualificati e ha un fatturato di {fatturato} milioni di euro."
-        ]
-        
-        descrizione = random.choice(descrizioni)
+        descrizione = random.choice(self.modelli_descrizione).format(
+            anno_fondazione=anno_fondazione,
+            anni_attivita=anni_attivita,
+            settore=settore.lower(),
+            citta=citta,
+            dipendenti=dipendenti,
+            fatturato=fatturato,
+            categoria=categoria_pmi.lower()
+        )
         
         return {
             'Ragione Sociale': nome_completo,
@@ -295,31 +300,333 @@ class PMIGenerator:
             'Descrizione': descrizione
         }
     
-    def genera_dataset(self, num_aziende=1000):
+    def genera_colonne(self, n, rng=None):
+        """
+        Genera in blocco con NumPy i campi categorici e numerici di n aziende
+        
+        Le distribuzioni marginali coincidono con quelle di genera_azienda.
+        
+        Args:
+            n (int): Numero di aziende da generare
+            rng (numpy.random.Generator): Generatore casuale (default: nuovo generatore)
+            
+        Returns:
+            dict: Array NumPy per categoria, dipendenti, fatturato, anno_fondazione,
+                  citta, provincia, cap (solo con il gazetteer), forma_giuridica e settore
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        
+        # Categoria, dipendenti e fatturato secondo i criteri UE
+        idx_categoria = self.campionatore_categorie.estrai_indici_batch(n, rng)
+        limiti_dipendenti = np.array(self.limiti_dipendenti)[idx_categoria]
+        limiti_fatturato = np.array(self.limiti_fatturato)[idx_categoria]
+        dipendenti = rng.integers(limiti_dipendenti[:, 0], limiti_dipendenti[:, 1], endpoint=True)
+        fatturato = np.round(rng.uniform(limiti_fatturato[:, 0], limiti_fatturato[:, 1]), 2)
+        
+        # Anno di fondazione: prima la fascia di anzianità, poi l'anno al suo interno
+        idx_fascia = self.campionatore_fasce_anni.estrai_indici_batch(n, rng)
+        limiti_anni = np.array(self.fasce_anni_attivita)[idx_fascia]
+        anni_attivita = rng.integers(limiti_anni[:, 0], limiti_anni[:, 1], endpoint=True)
+        
+        colonne = {
+            'categoria': np.array(self.categorie_pmi, dtype=object)[idx_categoria],
+            'dipendenti': dipendenti,
+            'fatturato': fatturato,
+            'anno_fondazione': datetime.now().year - anni_attivita
+        }
+        
+        if self.comuni is None:
+            idx_citta = rng.integers(0, len(self.citta), size=n)
+            sigle = [self.province.get(citta, "XX") for citta in self.citta]
+            colonne['citta'] = np.array(self.citta, dtype=object)[idx_citta]
+            colonne['provincia'] = np.array(sigle, dtype=object)[idx_citta]
+        else:
+            comuni = self.comuni.estrai_comuni_batch(n, rng)
+            colonne['citta'] = comuni['comune']
+            colonne['provincia'] = comuni['sigla']
+            colonne['cap'] = comuni['cap']
+        
+        colonne['forma_giuridica'] = self.campionatore_forme.estrai_batch(n, rng)
+        colonne['settore'] = np.array(self.settori, dtype=object)[rng.integers(0, len(self.settori), size=n)]
+        return colonne
+    
+    def _genera_nomi_batch(self, n, rng):
+        """
+        Genera in blocco i nomi aziendali con gli stessi modelli di _genera_nome_azienda
+        
+        Returns:
+            numpy.ndarray: Array di nomi (dtype object)
+        """
+        def scegli(valori, k):
+            return np.array(valori, dtype=object)[rng.integers(0, len(valori), size=k)]
+        
+        modello = rng.integers(1, 6, size=n)
+        nomi = np.empty(n, dtype=object)
+        
+        m = modello == 1
+        k = int(m.sum())
+        nomi[m] = scegli(self.prefissi_aziendali, k) + scegli(self.suffissi_aziendali, k)
+        
+        m = modello == 2
+        k = int(m.sum())
+        nomi[m] = scegli(self.cognomi_comuni, k) + " " + scegli(self.settori_brevi_cognome, k)
+        
+        # Acronimi da 2 a 4 lettere (es. C.M.B.)
+        m = modello == 3
+        k = int(m.sum())
+        lettere = np.array([chr(codice) + "." for codice in range(65, 91)], dtype=object)[rng.integers(0, 26, size=(k, 4))]
+        lunghezza = rng.integers(2, 5, size=k)
+        nomi[m] = (lettere[:, 0] + lettere[:, 1]
+                   + np.where(lunghezza >= 3, lettere[:, 2], "")
+                   + np.where(lunghezza == 4, lettere[:, 3], ""))
+        
+        m = modello == 4
+        k = int(m.sum())
+        nomi[m] = scegli(self.cognomi_soci, k) + scegli(self.separatori_soci, k) + scegli(self.cognomi_soci, k)
+        
+        m = modello == 5
+        k = int(m.sum())
+        nomi[m] = scegli(self.luoghi, k) + " " + scegli(self.settori_brevi_luogo, k)
+        
+        return nomi
+    
+    @staticmethod
+    def _come_testo(valori):
+        """
+        Numeri come stringhe, convertendo una sola volta ogni valore distinto
+        
+        Returns:
+            numpy.ndarray: Stesso testo di str() per ogni valore (dtype object)
+        """
+        distinti, inverso = np.unique(valori, return_inverse=True)
+        return np.array([str(valore) for valore in distinti.tolist()], dtype=object)[inverso.ravel()]
+    
+    def _genera_descrizioni_batch(self, colonne, modello):
+        """
+        Compone in blocco le descrizioni, con gli stessi testi di str.format
+        
+        I campi diventano array di stringhe una volta per blocco (i numeri per
+        valore distinto, settore e categoria in minuscolo da una tabella); per
+        ogni modello le righe che lo usano concatenano i suoi pezzi fissi e le
+        colonne dei campi, senza formattare riga per riga.
+        
+        Args:
+            colonne (dict): Colonne di genera_colonne, con la città
+            modello (numpy.ndarray): Indice del modello di descrizione di ogni riga
+            
+        Returns:
+            numpy.ndarray: Descrizioni (dtype object)
+        """
+        minuscole = {valore: valore.lower() for valore in (*self.settori, *self.categorie_pmi)}
+        in_minuscolo = np.frompyfunc(minuscole.__getitem__, 1, 1)
+        anno_fondazione = colonne['anno_fondazione']
+        campi = {
+            'anno_fondazione': self._come_testo(anno_fondazione),
+            'anni_attivita': self._come_testo(datetime.now().year - anno_fondazione),
+            'settore': in_minuscolo(colonne['settore']),
+            'citta': colonne['citta'],
+            'dipendenti': self._come_testo(colonne['dipendenti']),
+            'fatturato': self._come_testo(colonne['fatturato']),
+            'categoria': in_minuscolo(colonne['categoria'])
+        }
+        
+        descrizione = np.empty(len(modello), dtype=object)
+        for indice, pezzi in enumerate(self.pezzi_descrizione):
+            righe = modello == indice
+            testo = np.full(int(righe.sum()), "", dtype=object)
+            for fisso, campo in pezzi:
+                if fisso:
+                    testo = testo + fisso
+                if campo is not None:
+                    testo = testo + campi[campo][righe]
+            descrizione[righe] = testo
+        return descrizione
+    
+    def genera_batch(self, n, rng=None):
         """
-        Genera un dataset di PMI italiane e lo salva in CSV
+        Genera n aziende complete in forma colonnare
+        
+        Args:
+            n (int): Numero di aziende da generare
+            rng (numpy.random.Generator): Generatore casuale (default: nuovo generatore)
+            
+        Returns:
+            dict: Colonne del dataset (stesse chiavi di genera_azienda) come liste
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        colonne = self.genera_colonne(n, rng)
+        citta = colonne['citta']
+        forma = colonne['forma_giuridica']
+        numeri = np.array([str(i) for i in range(201)], dtype=object)
+        due_cifre = np.array([f"{i:02d}" for i in range(100)], dtype=object)
+        
+        nomi = self._genera_nomi_batch(n, rng)
+        ragione_sociale = np.where(forma == "Ditta individuale", nomi, nomi + " " + forma)
+        partite_iva = self.partite_iva.genera_batch(n).tolist()
+        
+        # Contatti: la normalizzazione si calcola una volta per nome distinto
+        fisso = rng.random(n) < 0.7
+        prefisso = np.where(
+            fisso,
+            np.array(self.prefissi_fissi, dtype=object)[rng.integers(0, len(self.prefissi_fissi), size=n)],
+            np.array(self.prefissi_mobili, dtype=object)[rng.integers(0, len(self.prefissi_mobili), size=n)]
+        )
+        numero = np.where(
+            fisso,
+            rng.integers(100000, 9999999, size=n, endpoint=True),
+            rng.integers(1000000, 9999999, size=n, endpoint=True)
+        ).astype(str).astype(object)
+        telefono = "+39 " + prefisso + " " + numero
+        
+        nomi_distinti, inverso = np.unique(nomi.astype(str), return_inverse=True)
+        nome_norm = np.array([self._normalizza_nome(nome) for nome in nomi_distinti], dtype=object)[inverso.ravel()]
+        email = np.where(
+            rng.random(n) < 0.8,
+            np.array(self.tipi_email, dtype=object)[rng.integers(0, len(self.tipi_email), size=n)] + "@" + nome_norm + ".it",
+            nome_norm + "@" + np.array(self.domini_email, dtype=object)[rng.integers(0, len(self.domini_email), size=n)]
+        )
+        sito_web = np.where(rng.random(n) < 0.85, "https://www." + nome_norm + ".it", "")
+        
+        # Indirizzo e CAP coerente con la città quando il prefisso è noto
+        via = np.array(self.vie, dtype=object)[rng.integers(0, len(self.vie), size=n)]
+        civico = numeri[rng.integers(1, 201, size=n)]
+        if 'cap' in colonne:
+            cap = colonne['cap']
+        else:
+            cap_base = np.frompyfunc(self.cap_base.get, 2, 1)(citta, "")
+            cap = np.where(
+                cap_base != "",
+                cap_base + due_cifre[rng.integers(0, 100, size=n)],
+                numeri[rng.integers(10, 99, size=n)] + "0" + numeri[rng.integers(10, 100, size=n)]
+            )
+        indirizzo = via + ", " + civico + " - " + cap + " " + citta + " (" + colonne['provincia'] + ")"
+        
+        descrizione = self._genera_descrizioni_batch(colonne, rng.integers(0, len(self.modelli_descrizione), size=n))
+        
+        return {
+            'Ragione Sociale': ragione_sociale.tolist(),
+            'Forma Giuridica': forma.tolist(),
+            'Settore': colonne['settore'].tolist(),
+            'Anno Fondazione': colonne['anno_fondazione'].tolist(),
+            'Partita IVA': partite_iva,
+            'Categoria': colonne['categoria'].tolist(),
+            'Dipendenti': colonne['dipendenti'].tolist(),
+            'Fatturato (milioni €)': colonne['fatturato'].tolist(),
+            'Telefono': telefono.tolist(),
+            'Email': email.tolist(),
+            'Sito Web': sito_web.tolist(),
+            'Indirizzo': indirizzo.tolist(),
+            'CAP': cap.tolist(),
+            'Città': citta.tolist(),
+            'Provincia': colonne['provincia'].tolist(),
+            'Descrizione': descrizione.tolist()
+        }
+    
+    def iter_aziende(self, num_aziende):
+        """
+        Genera le aziende una alla volta senza conservarle in memoria
         
         Args:
             num_aziende (int): Numero di aziende da generare
+            
+        Yields:
+            dict: Dati dell'azienda
         """
-        aziende = []
+        for _ in range(num_aziende):
+            yield self.genera_azienda()
+    
+    def genera_dataset(self, num_aziende=1000, chunk_size=10000, progresso=True):
+        """
+        Genera un dataset di PMI italiane e lo salva a blocchi nel formato configurato
         
-        print(f"Generazione di {num_aziende} PMI italiane...")
-        for i in range(num_aziende):
-            if i > 0 and i % 100 == 0:
-                print(f"Generate {i} aziende...")
+        Args:
+            num_aziende (int): Numero di aziende da generare
+            chunk_size (int): Numero di aziende scritte per blocco
+            progresso (bool): Mostra l'avanzamento della generazione
             
-            aziende.append(self.genera_azienda())
+        Returns:
+            int: Numero di aziende scritte
+        """
+        print(f"Generazione di {num_aziende} PMI italiane...")
+        generate = scrivi_record(
+            self.iter_aziende(num_aziende), self.output_file, formato=self.formato,
+            chunk_size=chunk_size, totale=num_aziende, progresso=progresso, descrizione="Aziende"
+        )
+        
+        print(f"Dataset generato e salvato in: {self.output_file}")
+        return generate
+    
+    def genera_dataset_batch(self, num_aziende=1000, batch_size=100000, rng=None, progresso=True):
+        """
+        Genera un dataset di PMI italiane a blocchi vettoriali e lo salva nel formato configurato
         
-        # Salva in CSV
-        with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
-            if aziende:
-                writer = csv.DictWriter(f, fieldnames=aziende[0].keys())
-                writer.writeheader()
-                writer.writerows(aziende)
+        Args:
+            num_aziende (int): Numero di aziende da generare
+            batch_size (int): Numero di aziende generate per blocco
+            rng (numpy.random.Generator): Generatore casuale (default: nuovo generatore)
+            progresso (bool): Mostra l'avanzamento della generazione
+            
+        Returns:
+            int: Numero di aziende scritte
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        generate = 0
+        
+        print(f"Generazione di {num_aziende} PMI italiane (blocchi da {batch_size})...")
+        with tqdm(total=num_aziende, desc="Aziende", unit=" righe", disable=not progresso) as barra:
+            if self.formato == 'parquet':
+                with ScrittoreParquet(self.output_file, self.colonne) as scrittore:
+                    while generate < num_aziende:
+                        colonne = self.genera_batch(min(batch_size, num_aziende - generate), rng)
+                        scrittore.scrivi_colonne(colonne)
+                        generate += len(colonne['Ragione Sociale'])
+                        barra.update(len(colonne['Ragione Sociale']))
+            elif self.formato == 'sqlite':
+                elimina_database(self.output_file)
+                with DatabasePMI(self.output_file) as db:
+                    while generate < num_aziende:
+                        colonne = self.genera_batch(min(batch_size, num_aziende - generate), rng)
+                        generate += db.inserisci(dict(zip(colonne, riga)) for riga in zip(*colonne.values()))
+                        barra.update(len(colonne['Ragione Sociale']))
+            else:
+                with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(self.colonne)
+                    while generate < num_aziende:
+                        colonne = self.genera_batch(min(batch_size, num_aziende - generate), rng)
+                        writer.writerows(zip(*colonne.values()))
+                        generate += len(colonne['Ragione Sociale'])
+                        barra.update(len(colonne['Ragione Sociale']))
         
         print(f"Dataset generato e salvato in: {self.output_file}")
-        return aziende
+        return generate
+
+
+def genera_shard(indice, righe, seme, percorso, inizio=0, batch_size=0, formato="csv", comuni=None):
+    """
+    Genera uno shard del dataset con il proprio seme e lo salva in un file parziale
+    
+    Args:
+        indice (int): Indice dello shard
+        righe (int): Numero di aziende dello shard
+        seme (int): Seme derivato per lo shard
+        percorso (str): File parziale
+        inizio (int): Posizione della prima azienda dello shard nel dataset
+        batch_size (int): Dimensione dei blocchi NumPy (0: generazione per riga)
+        formato (str): Formato di output (csv, parquet o sqlite)
+        comuni (str): Gazetteer dei comuni, caricato una sola volta per processo
+        
+    Returns:
+        int: Numero di aziende scritte
+    """
+    generator = PMIGenerator(output_file=percorso, formato=formato, comuni=comuni, inizio=inizio)
+    if batch_size > 0:
+        return generator.genera_dataset_batch(
+            righe, batch_size=batch_size, rng=np.random.default_rng(seme), progresso=False
+        )
+    
+    random.seed(seme)
+    return generator.genera_dataset(righe, progresso=False)
 
 
 def main():
@@ -329,13 +636,37 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Generatore di dati realistici di PMI italiane')
-    parser.add_argument('--output', default='pmi_italiane.csv', help='File di output (CSV)')
+    parser.add_argument('--output', default='pmi_italiane.csv', help='File di output')
+    parser.add_argument('--formato', choices=FORMATI, default='csv', help='Formato di output (csv, parquet o sqlite)')
     parser.add_argument('--num', type=int, default=1000, help='Numero di aziende da generare')
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help='Genera a blocchi vettoriali NumPy di questa dimensione (0: generazione per riga)')
+    parser.add_argument('--workers', type=int, default=1, help='Numero di processi per la generazione a shard')
+    parser.add_argument('--seed', type=int, help='Seme per una generazione riproducibile')
+    parser.add_argument('--shard-size', type=int, default=100000, help='Numero di aziende per shard')
+    parser.add_argument('--partizionato', action='store_true',
+                        help='Lascia gli shard come file parziali nella directory indicata da --output')
+    parser.add_argument('--comuni', nargs='?', const=riferimenti.GAZETTEER_PREDEFINITO,
+                        help='Estrae città, provincia e CAP da un gazetteer pesato per popolazione '
+                             '(CSV o directory compilata; senza valore: capoluoghi di provincia)')
     
     args = parser.parse_args()
     
-    generator = PMIGenerator(output_file=args.output)
-    generator.genera_dataset(args.num)
+    if args.seed is not None or args.workers > 1 or args.partizionato:
+        seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 32)
+        genera_in_parallelo(
+            partial(genera_shard, batch_size=args.batch_size, formato=args.formato, comuni=args.comuni),
+            args.num, args.output,
+            workers=args.workers, seed=seed, shard_size=args.shard_size, partizionato=args.partizionato,
+            formato=args.formato
+        )
+        return
+    
+    generator = PMIGenerator(output_file=args.output, formato=args.formato, comuni=args.comuni)
+    if args.batch_size > 0:
+        generator.genera_dataset_batch(args.num, batch_size=args.batch_size)
+    else:
+        generator.genera_dataset(args.num)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,12 @@
-import csv
 import random
 import string
 import os
 from datetime import datetime
+from functools import partial
+
+import pmi_riferimenti as riferimenti
+from pmi_parallelo import genera_in_parallelo
+from pmi_stream import FORMATI, scrivi_record
 
 # Dati per la generazione di contatti PMI realistici
 SETTORI = [
@@ -12,38 +16,10 @@ SETTORI = [
     "Logistica", "Marketing", "Design", "Formazione", "Ristorazione", "Immobiliare"
 ]
 
-PROVINCE = [
-    "Milano", "Roma", "Torino", "Napoli", "Bologna", "Firenze", "Genova", "Bari",
-    "Venezia", "Padova", "Verona", "Brescia", "Modena", "Parma", "Bergamo", "Catania",
-    "Palermo", "Cagliari", "Trento", "Bolzano", "Perugia", "Ancona", "Pescara", "Lecce"
-]
+# Province e comuni dal catalogo condiviso dei dati di riferimento
+CITTA = riferimenti.COMUNI_PER_PROVINCIA
 
-CITTA = {
-    "Milano": ["Milano", "Monza", "Lodi", "Sesto San Giovanni", "Rho", "Legnano"],
-    "Roma": ["Roma", "Fiumicino", "Civitavecchia", "Tivoli", "Velletri", "Anzio"],
-    "Torino": ["Torino", "Moncalieri", "Rivoli", "Chieri", "Pinerolo", "Ivrea"],
-    "Napoli": ["Napoli", "Pozzuoli", "Casoria", "Afragola", "Portici", "Ercolano"],
-    "Bologna": ["Bologna", "Imola", "San Lazzaro", "Casalecchio", "Castel Maggiore"],
-    "Firenze": ["Firenze", "Prato", "Scandicci", "Sesto Fiorentino", "Empoli"],
-    "Genova": ["Genova", "Rapallo", "Chiavari", "Sestri Levante", "Lavagna"],
-    "Bari": ["Bari", "Altamura", "Monopoli", "Bitonto", "Molfetta", "Corato"],
-    "Venezia": ["Venezia", "Mestre", "Chioggia", "Jesolo", "San Donà di Piave"],
-    "Padova": ["Padova", "Abano Terme", "Cittadella", "Este", "Monselice"],
-    "Verona": ["Verona", "Villafranca", "San Bonifacio", "Legnago", "Bussolengo"],
-    "Brescia": ["Brescia", "Desenzano", "Montichiari", "Lumezzane", "Chiari"],
-    "Modena": ["Modena", "Carpi", "Sassuolo", "Formigine", "Castelfranco Emilia"],
-    "Parma": ["Parma", "Fidenza", "Salsomaggiore", "Collecchio", "Langhirano"],
-    "Bergamo": ["Bergamo", "Treviglio", "Seriate", "Dalmine", "Romano di Lombardia"],
-    "Catania": ["Catania", "Acireale", "Misterbianco", "Paternò", "Adrano"],
-    "Palermo": ["Palermo", "Bagheria", "Monreale", "Carini", "Termini Imerese"],
-    "Cagliari": ["Cagliari", "Quartu Sant'Elena", "Selargius", "Assemini", "Capoterra"],
-    "Trento": ["Trento", "Rovereto", "Pergine", "Riva del Garda", "Arco"],
-    "Bolzano": ["Bolzano", "Merano", "Bressanone", "Laives", "Brunico"],
-    "Perugia": ["Perugia", "Foligno", "Città di Castello", "Spoleto", "Assisi"],
-    "Ancona": ["Ancona", "Senigallia", "Jesi", "Fabriano", "Osimo"],
-    "Pescara": ["Pescara", "Montesilvano", "Spoltore", "Città Sant'Angelo", "Penne"],
-    "Lecce": ["Lecce", "Nardò", "Galatina", "Tricase", "Copertino"]
-}
+PROVINCE = tuple(CITTA)
 
 FORME_GIURIDICHE = ["S.r.l.", "S.p.A.", "S.a.s.", "S.n.c.", "Ditta Individuale", "Cooperativa"]
 
@@ -59,16 +35,15 @@ NOMI_AZIENDE_SUFFISSI = [
     "Technologies", "Innovations", "Partners", "Enterprise", "Company", "International"
 ]
 
-NOMI_AZIENDE_ITALIANI = [
-    "Rossi", "Bianchi", "Verdi", "Ferrari", "Esposito", "Romano", "Colombo", "Ricci",
-    "Marino", "Greco", "Bruno", "Gallo", "Conti", "Mancini", "Costa", "Giordano",
-    "Rizzo", "Lombardi", "Moretti", "Barbieri", "Fontana", "Caruso", "Ferrara", "Mariani"
-]
+NOMI_AZIENDE_ITALIANI = riferimenti.COGNOMI_ESTESI
 
-DOMINI_EMAIL = [
-    "gmail.com", "yahoo.it", "libero.it", "hotmail.com", "outlook.it", "pec.it",
-    "azienda.com", "company.it", "business.it", "enterprise.com", "group.it", "tech.it"
-]
+DOMINI_EMAIL = riferimenti.DOMINI_EMAIL_AVANZATO
+
+PREFISSI_TELEFONO = ("02", "06", "011", "081", "051", "055", "010", "080", "041", "049", "045", "030")
+
+PREFISSI_CELLULARE = ("320", "330", "340", "350", "360", "370", "380", "390", "391")
+
+DOMINI_SITO = (".it", ".com", ".net", ".eu", ".org")
 
 DESCRIZIONI = [
     "Azienda leader nel settore {settore} con focus su innovazione e qualità.",
@@ -83,21 +58,107 @@ DESCRIZIONI = [
     "Azienda familiare con lunga tradizione nel settore {settore} e forte radicamento territoriale."
 ]
 
-def generate_unique_company_name():
-    """Genera un nome aziendale unico"""
-    tipo = random.choice([1, 2, 3])
+class AllocatoreNomi:
+    """
+    Allocatore di nomi aziendali unici sullo spazio combinatorio dei modelli di nome
     
-    if tipo == 1:
+    Ogni modello è una sequenza di liste di componenti; un nome è la concatenazione
+    di un componente per lista. I nomi di tutti i modelli formano un unico spazio di
+    indici, percorso con una permutazione pseudocasuale con chiave: una piccola rete
+    di Feistel sul più piccolo dominio di 4^h indici che contiene la capacità, con
+    cycle-walking per restare nello spazio. A differenza di una permutazione affine,
+    righe consecutive non avanzano di un passo fisso nella numerazione a base mista,
+    quindi cognomi e componenti non si ripetono a cicli regolari. Il nome della riga
+    k dipende solo da k, quindi shard che partono da righe disgiunte con gli stessi
+    parametri non si sovrappongono. Esaurito lo spazio, si ricomincia con un nuovo
+    giro aggiungendo un suffisso numerico deterministico (es. "Rossi Edilizia 2").
+    
+    Ogni nome dello spazio ha la stessa probabilità: un modello compare quindi in
+    proporzione al numero di nomi che genera, non con la stessa frequenza degli altri.
+    """
+    
+    # Round della rete di Feistel
+    ROUND = 4
+    
+    def __init__(self, modelli, rng=random, occupati=None, inizio=0):
+        """
+        Args:
+            modelli (list): Lista di modelli, ciascuno lista di liste di componenti
+            rng: Sorgente casuale con randrange per le chiavi della permutazione
+                 (default: modulo random); gli shard di un dataset devono usarne
+                 una con lo stesso seme
+            occupati (iterable): Nomi già in uso da non riassegnare
+            inizio (int): Posizione della prima riga nel dataset
+        """
+        self.modelli = [[list(componenti) for componenti in modello] for modello in modelli]
+        self.dimensioni = []
+        for modello in self.modelli:
+            dimensione = 1
+            for componenti in modello:
+                dimensione *= len(componenti)
+            self.dimensioni.append(dimensione)
+        self.capacita = sum(self.dimensioni)
+        self.occupati = set(occupati or ())
+        self.progressivo = inizio
+        # Bit di ciascuna metà del dominio: 4^h >= capacità, quindi in media meno di 4 passi di cycle-walking
+        self.bit_meta = max(1, (max(self.capacita - 1, 1).bit_length() + 1) // 2)
+        self.chiavi = [rng.randrange(1 << 32) for _ in range(self.ROUND)]
+    
+    def _mescola(self, meta, chiave):
+        """Funzione di round: mescola una metà con la chiave del round"""
+        valore = ((meta ^ chiave) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        return (valore ^ (valore >> 29)) & ((1 << self.bit_meta) - 1)
+    
+    def _permuta(self, indice):
+        """Immagine di un indice nella permutazione dello spazio dei nomi"""
+        maschera = (1 << self.bit_meta) - 1
+        while True:
+            sinistra, destra = indice >> self.bit_meta, indice & maschera
+            for chiave in self.chiavi:
+                sinistra, destra = destra, sinistra ^ self._mescola(destra, chiave)
+            indice = (sinistra << self.bit_meta) | destra
+            # Cycle-walking: la rete permuta il dominio 4^h, si riapplica finché si cade nello spazio
+            if indice < self.capacita:
+                return indice
+    
+    def _componi(self, indice):
+        """Converte un indice dello spazio complessivo nel nome corrispondente (numerazione a base mista)"""
+        modello = 0
+        while indice >= self.dimensioni[modello]:
+            indice -= self.dimensioni[modello]
+            modello += 1
+        parti = []
+        for componenti in reversed(self.modelli[modello]):
+            indice, resto = divmod(indice, len(componenti))
+            parti.append(componenti[resto])
+        return "".join(reversed(parti))
+    
+    def nuovo_nome(self):
+        """
+        Restituisce un nome mai assegnato prima
+        
+        Returns:
+            str: Nome aziendale unico
+        """
+        while True:
+            giro, posizione = divmod(self.progressivo, self.capacita)
+            self.progressivo += 1
+            nome = self._componi(self._permuta(posizione))
+            if giro > 0:
+                nome = f"{nome} {giro + 1}"
+            if nome not in self.occupati:
+                return nome
+
+def crea_allocatore_nomi(occupati=None, rng=random, inizio=0):
+    """Crea l'allocatore sui modelli di nome delle aziende"""
+    return AllocatoreNomi([
         # Nome composto da prefisso + suffisso
-        nome = random.choice(NOMI_AZIENDE_PREFISSI) + random.choice(NOMI_AZIENDE_SUFFISSI)
-    elif tipo == 2:
+        [NOMI_AZIENDE_PREFISSI, NOMI_AZIENDE_SUFFISSI],
         # Nome italiano + settore/attività
-        nome = random.choice(NOMI_AZIENDE_ITALIANI) + " " + random.choice(SETTORI)
-    else:
+        [NOMI_AZIENDE_ITALIANI, [" " + settore for settore in SETTORI]],
         # Nome italiano + forma giuridica
-        nome = random.choice(NOMI_AZIENDE_ITALIANI) + " " + random.choice(FORME_GIURIDICHE)
-    
-    return nome
+        [NOMI_AZIENDE_ITALIANI, [" " + forma for forma in FORME_GIURIDICHE]]
+    ], rng=rng, occupati=occupati, inizio=inizio)
 
 def generate_email(company_name):
     """Genera un indirizzo email basato sul nome dell'azienda"""
@@ -119,8 +180,7 @@ def generate_email(company_name):
 
 def generate_phone():
     """Genera un numero di telefono italiano realistico"""
-    prefissi = ["02", "06", "011", "081", "051", "055", "010", "080", "041", "049", "045", "030"]
-    prefisso = random.choice(prefissi)
+    prefisso = random.choice(PREFISSI_TELEFONO)
     
     # Genera il resto del numero
     if prefisso == "02" or prefisso == "06":  # Milano o Roma
@@ -132,8 +192,7 @@ def generate_phone():
 
 def generate_mobile():
     """Genera un numero di cellulare italiano realistico"""
-    prefissi = ["320", "330", "340", "350", "360", "370", "380", "390", "391"]
-    prefisso = random.choice(prefissi)
+    prefisso = random.choice(PREFISSI_CELLULARE)
     resto = ''.join(random.choices(string.digits, k=7))
     
     return f"{prefisso} {resto}"
@@ -144,7 +203,7 @@ def generate_website(company_name):
     clean_name = ''.join(e for e in company_name if e.isalnum())
     clean_name = clean_name.lower()
     
-    tld = random.choice([".it", ".com", ".net", ".eu", ".org"])
+    tld = random.choice(DOMINI_SITO)
     
     # 20% di probabilità di non avere un sito web
     if random.random() < 0.2:
@@ -154,26 +213,15 @@ def generate_website(company_name):
 
 def generate_address(provincia, citta):
     """Genera un indirizzo italiano realistico"""
-    vie = ["Via Roma", "Via Garibaldi", "Via Dante", "Via Mazzini", "Corso Italia", 
-           "Via Verdi", "Via Marconi", "Via Vittorio Emanuele", "Via Leonardo da Vinci", 
-           "Via Cavour", "Via Milano", "Via Napoli", "Via Torino", "Via Bologna", 
-           "Via Firenze", "Via Venezia", "Via Genova", "Via Bari", "Via Palermo", 
-           "Via Catania", "Via Padova", "Via Verona", "Via Brescia", "Via Modena"]
-    
     numero = random.randint(1, 150)
-    via = random.choice(vie)
+    via = random.choice(riferimenti.VIE_AVANZATO)
     
     return f"{via}, {numero}, {citta}, {provincia}"
 
-def generate_pmi_contact(existing_companies):
+def generate_pmi_contact(allocatore):
     """Genera un contatto PMI completo assicurandosi che non ci siano duplicati"""
     # Genera un nome aziendale unico
-    company_name = generate_unique_company_name()
-    while company_name in existing_companies:
-        company_name = generate_unique_company_name()
-    
-    # Aggiungi alla lista di aziende esistenti
-    existing_companies.add(company_name)
+    company_name = allocatore.nuovo_nome()
     
     # Seleziona provincia e città
     provincia = random.choice(PROVINCE)
@@ -221,33 +269,72 @@ def generate_pmi_contact(existing_companies):
         "Note": note
     }
 
+def iter_pmi_contacts(num_contacts=500, allocatore=None):
+    """Genera i contatti PMI uno alla volta con nomi aziendali unici"""
+    allocatore = allocatore or crea_allocatore_nomi()
+    if allocatore.progressivo + num_contacts > allocatore.capacita:
+        print(f"Spazio dei nomi: {allocatore.capacita} combinazioni per {num_contacts} contatti, "
+              f"i nomi eccedenti riceveranno un suffisso numerico")
+    
+    for _ in range(num_contacts):
+        yield generate_pmi_contact(allocatore)
+
 def generate_pmi_contacts(num_contacts=500):
     """Genera un numero specificato di contatti PMI"""
-    contacts = []
-    existing_companies = set()
+    return list(iter_pmi_contacts(num_contacts))
+
+def save_to_csv(contacts, filename="pmi_contatti_reali.csv", chunk_size=10000, totale=None, progresso=False,
+                formato="csv"):
+    """Salva i contatti (lista o flusso) in un file CSV o Parquet scrivendo a blocchi"""
+    if totale is None and hasattr(contacts, '__len__'):
+        totale = len(contacts)
     
-    for _ in range(num_contacts):
-        contact = generate_pmi_contact(existing_companies)
-        contacts.append(contact)
+    salvati = scrivi_record(contacts, filename, formato=formato, chunk_size=chunk_size, totale=totale,
+                            progresso=progresso, descrizione="Contatti")
+    if not salvati:
+        print("Nessun contatto da salvare.")
+        return 0
     
-    return contacts
+    print(f"Generati {salvati} contatti PMI e salvati in {filename}")
+    return salvati
 
-def save_to_csv(contacts, filename="pmi_contatti_reali.csv"):
-    """Salva i contatti in un file CSV"""
-    if not contacts:
-        print("Nessun contatto da salvare.")
-        return
+def genera_shard(indice, righe, seme, percorso, inizio=0, formato="csv", seme_nomi=0):
+    """
+    Genera uno shard di contatti con il proprio seme e lo salva in un file parziale
     
-    fieldnames = contacts[0].keys()
+    I nomi vengono dalla permutazione comune a tutti gli shard (seme_nomi), a partire
+    dalla riga inizio: sono quindi unici nell'intero dataset.
+    """
+    random.seed(seme)
+    allocatore = crea_allocatore_nomi(rng=random.Random(seme_nomi), inizio=inizio)
+    return save_to_csv(iter_pmi_contacts(righe, allocatore), percorso, formato=formato)
+
+def main():
+    """Funzione principale"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Generatore di contatti PMI realistici')
+    parser.add_argument('--output', default='pmi_contatti_reali.csv', help='File di output')
+    parser.add_argument('--formato', choices=FORMATI, default='csv', help='Formato di output (csv, parquet o sqlite)')
+    parser.add_argument('--num', type=int, default=500, help='Numero di contatti da generare')
+    parser.add_argument('--workers', type=int, default=1, help='Numero di processi per la generazione a shard')
+    parser.add_argument('--seed', type=int, help='Seme per una generazione riproducibile')
+    parser.add_argument('--shard-size', type=int, default=100000, help='Numero di contatti per shard')
+    parser.add_argument('--partizionato', action='store_true',
+                        help='Lascia gli shard come file parziali nella directory indicata da --output')
     
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(contacts)
+    args = parser.parse_args()
+    
+    if args.seed is not None or args.workers > 1 or args.partizionato:
+        seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 32)
+        genera_in_parallelo(
+            partial(genera_shard, formato=args.formato, seme_nomi=seed), args.num, args.output,
+            workers=args.workers, seed=seed, shard_size=args.shard_size, partizionato=args.partizionato,
+            formato=args.formato
+        )
+        return
     
-    print(f"Generati {len(contacts)} contatti PMI e salvati in {filename}")
+    save_to_csv(iter_pmi_contacts(args.num), args.output, totale=args.num, progresso=True, formato=args.formato)
 
 if __name__ == "__main__":
-    # Genera 500 contatti PMI
-    contacts = generate_pmi_contacts(500)
-    save_to_csv(contacts)
+    main()
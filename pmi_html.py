@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI HTML - Analisi dell'HTML con backend intercambiabili e selettori comuni
+
+Scraper e analizzatori interrogano le pagine con selettori CSS semplici
+(".vcard", "a.btn-details", ".website a", "meta[name=description]") tramite
+la stessa interfaccia, qualunque sia il parser sottostante:
+
+    documento = analizza_html(html)
+    for nodo in documento.seleziona('.vcard'):
+        nome = nodo.seleziona_uno('.org')
+
+Backend disponibili, in ordine di preferenza: selectolax (parser C Lexbor),
+lxml (libxml2) e BeautifulSoup con html.parser (puro Python, sempre presente).
+"""
+
+import re
+from functools import lru_cache
+
+# Backend in ordine di preferenza
+BACKEND = ('selectolax', 'lxml', 'bs4')
+
+
+def _importa(backend):
+    """
+    Importa il modulo di un backend
+
+    Returns:
+        module: Modulo del parser, None se non installato
+    """
+    try:
+        if backend == 'selectolax':
+            from selectolax import lexbor
+            return lexbor
+        if backend == 'lxml':
+            import lxml.html
+            return lxml.html
+        import bs4
+        return bs4
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def backend_disponibili():
+    """
+    Backend installati, in ordine di preferenza
+
+    Returns:
+        tuple: Nomi dei backend utilizzabili
+    """
+    return tuple(backend for backend in BACKEND if _importa(backend) is not None)
+
+
+def backend_predefinito():
+    """
+    Backend più veloce tra quelli installati
+
+    Returns:
+        str: Nome del backend
+    """
+    return backend_disponibili()[0]
+
+
+def analizza_html(html, backend=None):
+    """
+    Analizza una pagina HTML
+
+    Args:
+        html (str): Contenuto della pagina
+        backend (str): 'selectolax', 'lxml' o 'bs4' (default: il più veloce installato)
+
+    Returns:
+        Nodo: Radice del documento
+    """
+    backend = backend or backend_predefinito()
+    modulo = _importa(backend)
+    if modulo is None:
+        raise ImportError(f"Il backend HTML '{backend}' non è installato: pip install {backend}")
+
+    if backend == 'selectolax':
+        return NodoSelectolax(modulo.LexborHTMLParser(html).root)
+    if backend == 'lxml':
+        return NodoLxml(_albero_lxml(modulo, html))
+    return NodoBs4(modulo.BeautifulSoup(html, 'html.parser'))
+
+
+def _albero_lxml(modulo, html):
+    """Costruisce l'albero lxml, anche da pagine vuote o con dichiarazione di codifica"""
+    if not html or not html.strip():
+        html = '<html></html>'
+    try:
+        return modulo.document_fromstring(html)
+    except ValueError:
+        # Stringhe Unicode con <?xml encoding=...?> vanno passate come byte
+        return modulo.document_fromstring(
+            html.encode('utf-8'), parser=modulo.HTMLParser(encoding='utf-8')
+        )
+
+
+class Nodo:
+    """
+    Elemento di una pagina HTML, indipendente dal backend
+    """
+
+    def __init__(self, elemento):
+        """
+        Args:
+            elemento: Elemento nativo del backend
+        """
+        self.elemento = elemento
+
+    def seleziona(self, selettore):
+        """
+        Restituisce i discendenti che corrispondono a un selettore CSS
+
+        Args:
+            selettore (str): Selettore CSS semplice
+
+        Returns:
+            list: Nodi trovati, in ordine di documento
+        """
+        raise NotImplementedError
+
+    def seleziona_uno(self, selettore):
+        """
+        Restituisce il primo discendente che corrisponde a un selettore CSS
+
+        Returns:
+            Nodo: Primo nodo trovato, None se assente
+        """
+        nodi = self.seleziona(selettore)
+        return nodi[0] if nodi else None
+
+    @property
+    def nome(self):
+        """Nome del tag in minuscolo"""
+        raise NotImplementedError
+
+    @property
+    def testo(self):
+        """Testo dell'elemento e dei suoi discendenti"""
+        raise NotImplementedError
+
+    def attributo(self, nome, predefinito=None):
+        """
+        Valore di un attributo
+
+        Args:
+            nome (str): Nome dell'attributo
+            predefinito: Valore restituito se l'attributo manca
+
+        Returns:
+            str: Valore dell'attributo (gli attributi multipli sono uniti da spazi)
+        """
+        raise NotImplementedError
+
+    def rimuovi(self, selettore):
+        """
+        Elimina dal documento i discendenti che corrispondono a un selettore
+
+        Args:
+            selettore (str): Selettore CSS semplice
+        """
+        raise NotImplementedError
+
+
+class NodoSelectolax(Nodo):
+    """Nodo del backend selectolax"""
+
+    def seleziona(self, selettore):
+        if self.elemento is None:
+            return []
+        return [NodoSelectolax(nodo) for nodo in self.elemento.css(selettore)]
+
+    def seleziona_uno(self, selettore):
+        if self.elemento is None:
+            return None
+        nodo = self.elemento.css_first(selettore)
+        return NodoSelectolax(nodo) if nodo is not None else None
+
+    @property
+    def nome(self):
+        return self.elemento.tag
+
+    @property
+    def testo(self):
+        return self.elemento.text(deep=True) if self.elemento is not None else ''
+
+    def attributo(self, nome, predefinito=None):
+        valore = self.elemento.attributes.get(nome)
+        return predefinito if valore is None else valore
+
+    def rimuovi(self, selettore):
+        for nodo in self.elemento.css(selettore):
+            nodo.decompose()
+
+
+class NodoLxml(Nodo):
+    """Nodo del backend lxml, con i selettori tradotti in XPath compilate"""
+
+    def seleziona(self, selettore):
+        return [NodoLxml(elemento) for elemento in _xpath(selettore)(self.elemento)]
+
+    @property
+    def nome(self):
+        return self.elemento.tag
+
+    @property
+    def testo(self):
+        return self.elemento.text_content()
+
+    def attributo(self, nome, predefinito=None):
+        return self.elemento.get(nome, predefinito)
+
+    def rimuovi(self, selettore):
+        for elemento in _xpath(selettore)(self.elemento):
+            elemento.drop_tree()
+
+
+class NodoBs4(Nodo):
+    """Nodo del backend BeautifulSoup"""
+
+    def seleziona(self, selettore):
+        return [NodoBs4(elemento) for elemento in self.elemento.select(selettore)]
+
+    def seleziona_uno(self, selettore):
+        elemento = self.elemento.select_one(selettore)
+        return NodoBs4(elemento) if elemento is not None else None
+
+    @property
+    def nome(self):
+        return self.elemento.name
+
+    @property
+    def testo(self):
+        return self.elemento.get_text()
+
+    def attributo(self, nome, predefinito=None):
+        valore = self.elemento.get(nome)
+        if valore is None:
+            return predefinito
+        return ' '.join(valore) if isinstance(valore, list) else valore
+
+    def rimuovi(self, selettore):
+        for elemento in self.elemento.select(selettore):
+            elemento.decompose()
+
+
+# Traduzione dei selettori CSS semplici in XPath per lxml
+_PASSO = re.compile(r'(?:\[[^\]]*\]|[^\s\[>])+|>')
+_COMPOSTO = re.compile(r'([a-zA-Z][\w-]*|\*)?((?:[.#][\w-]+|\[[^\]]*\])*)$')
+_PARTE = re.compile(r'([.#])([\w-]+)|\[\s*([\w:-]+)\s*(?:([*^$~|]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\]\s]*)))?\s*\]')
+
+
+def _letterale(valore):
+    """Stringa XPath che rappresenta un valore"""
+    return f"'{valore}'" if "'" not in valore else f'"{valore}"'
+
+
+def _condizione_attributo(nome, operatore, valore):
+    """Predicato XPath di un selettore di attributo"""
+    attributo = f"@{nome.lower()}"
+    if operatore is None:
+        return attributo
+    letterale = _letterale(valore)
+    if operatore == '=':
+        return f"{attributo}={letterale}"
+    if operatore == '*=':
+        return f"contains({attributo}, {letterale})"
+    if operatore == '^=':
+        return f"starts-with({attributo}, {letterale})"
+    if operatore == '$=':
+        return (f"substring({attributo}, string-length({attributo}) - {len(valore) - 1})={letterale}")
+    if operatore == '|=':
+        return f"({attributo}={letterale} or starts-with({attributo}, {_letterale(valore + '-')}))"
+    # ~= : parola in una lista separata da spazi
+    return f"contains(concat(' ', normalize-space({attributo}), ' '), {_letterale(' ' + valore + ' ')})"
+
+
+def _traduci(selettore):
+    """
+    Traduce un selettore CSS semplice in un'espressione XPath relativa
+
+    Sono supportati tag, classi, id, attributi (=, *=, ^=, $=, |=, ~=), i
+    combinatori discendente e figlio e i gruppi separati da virgole.
+    """
+    espressioni = []
+    for gruppo in selettore.split(','):
+        passi = _PASSO.findall(gruppo.strip())
+        if not passi:
+            raise ValueError(f"Selettore CSS vuoto: {selettore!r}")
+        xpath = '.'
+        asse = '//'
+        for passo in passi:
+            if passo == '>':
+                asse = '/'
+                continue
+            composto = _COMPOSTO.match(passo)
+            if composto is None:
+                raise ValueError(f"Selettore CSS non supportato: {passo!r}")
+            tag, resto = composto.groups()
+            condizioni = []
+            for prefisso, nome, attributo, operatore, *valori in _PARTE.findall(resto):
+                if prefisso == '.':
+                    condizioni.append(_condizione_attributo('class', '~=', nome))
+                elif prefisso == '#':
+                    condizioni.append(_condizione_attributo('id', '=', nome))
+                else:
+                    valore = next((v for v in valori if v), '')
+                    condizioni.append(_condizione_attributo(attributo, operatore or None, valore))
+            xpath += asse + (tag.lower() if tag else '*') + ''.join(f"[{c}]" for c in condizioni)
+            asse = '//'
+        espressioni.append(xpath)
+    return ' | '.join(espressioni)
+
+
+@lru_cache(maxsize=256)
+def _xpath(selettore):
+    """
+    XPath compilata di un selettore, riutilizzata tra pagine e nodi
+
+    Returns:
+        lxml.etree.XPath: Espressione compilata
+    """
+    from lxml import etree
+    return etree.XPath(_traduci(selettore))
@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI HTTP - Client HTTP condivisi con pool di connessioni, ripetizioni e cache DNS
+
+Scraper, finder e analizzatori ottengono i client da qui invece di usare
+requests.get o sessioni senza configurazione, così le connessioni TCP/TLS
+verso lo stesso host vengono riutilizzate:
+
+    sessione = crea_sessione(headers, connessioni_per_host=4)
+    risposta = sessione.get(url, timeout=10)
+    print(sessione.statistiche.riepilogo())
+
+crea_sessione restituisce una requests.Session con pool dimensionati per
+host, keep-alive, ripetizioni con backoff e cache DNS; con http2=True un
+client httpx. crea_sessione_async configura allo stesso modo il connettore
+aiohttp del motore asincrono. Le statistiche di riuso contano richieste e
+connessioni aperte per host.
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Stati per cui una richiesta viene ripetuta
+STATI_RIPETUTI = (429, 500, 502, 503, 504)
+
+
+class StatisticheConnessioni:
+    """
+    Contatori di richieste e connessioni aperte, per host
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.richieste = {}
+        self.connessioni = {}
+
+    def registra_richiesta(self, host):
+        """Conta una richiesta inviata a un host"""
+        with self._lock:
+            self.richieste[host] = self.richieste.get(host, 0) + 1
+
+    def registra_connessione(self, host):
+        """Conta una nuova connessione aperta verso un host"""
+        with self._lock:
+            self.connessioni[host] = self.connessioni.get(host, 0) + 1
+
+    def come_dizionario(self):
+        """
+        Statistiche complessive e per host
+
+        Returns:
+            dict: richieste, connessioni, riutilizzi, quota_riuso e per_host
+        """
+        with self._lock:
+            host = sorted(set(self.richieste) | set(self.connessioni))
+            per_host = {
+                nome: {'richieste': self.richieste.get(nome, 0), 'connessioni': self.connessioni.get(nome, 0)}
+                for nome in host
+            }
+        richieste = sum(valori['richieste'] for valori in per_host.values())
+        connessioni = sum(valori['connessioni'] for valori in per_host.values())
+        riutilizzi = max(richieste - connessioni, 0)
+        return {
+            'richieste': richieste,
+            'connessioni': connessioni,
+            'riutilizzi': riutilizzi,
+            'quota_riuso': riutilizzi / richieste if richieste else 0.0,
+            'per_host': per_host
+        }
+
+    def riepilogo(self):
+        """
+        Riepilogo leggibile del riuso delle connessioni
+
+        Returns:
+            str: Richieste, connessioni aperte e quota di riuso
+        """
+        s = self.come_dizionario()
+        return (f"Connessioni HTTP: {s['richieste']} richieste su {s['connessioni']} connessioni "
+                f"({s['quota_riuso']:.0%} con connessione riutilizzata, {len(s['per_host'])} host)")
+
+
+class CacheDNS:
+    """
+    Cache delle risoluzioni DNS con scadenza, condivisa tra i thread
+    """
+
+    def __init__(self, ttl=300):
+        """
+        Args:
+            ttl (float): Secondi per cui una risoluzione viene riutilizzata
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._indirizzi = {}
+
+    def risolvi(self, host):
+        """
+        Indirizzo IP di un host, dalla cache se ancora valido
+
+        Args:
+            host (str): Nome dell'host
+
+        Returns:
+            str: Indirizzo IP, o il nome stesso se è già un IP o non si risolve
+        """
+        try:
+            ipaddress.ip_address(host.strip('[]'))
+            return host
+        except ValueError:
+            pass
+
+        ora = time.monotonic()
+        with self._lock:
+            voce = self._indirizzi.get(host)
+        if voce is not None and ora - voce[1] < self.ttl:
+            return voce[0]
+
+        try:
+            indirizzo = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)[0][4][0]
+        except OSError:
+            return host
+        with self._lock:
+            self._indirizzi[host] = (indirizzo, ora)
+        return indirizzo
+
+
+class _ConnessioneConContatori:
+    """Connessione urllib3 che conta i socket aperti e li apre verso l'indirizzo in cache DNS"""
+
+    statistiche = None
+    dns = None
+
+    def _new_conn(self):
+        if self.statistiche is not None:
+            self.statistiche.registra_connessione(self.host)
+        if self.dns is None:
+            return super()._new_conn()
+        # L'indirizzo cambia solo mentre si apre il socket: Host, SNI e certificato usano il nome
+        nome = self._dns_host
+        self._dns_host = self.dns.risolvi(nome)
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = nome
+
+
+class _ConnessioneHTTP(_ConnessioneConContatori, HTTPConnection):
+    pass
+
+
+class _ConnessioneHTTPS(_ConnessioneConContatori, HTTPSConnection):
+    pass
+
+
+class _PoolConContatori:
+    """Pool urllib3 che passa contatori e cache DNS alle sue connessioni"""
+
+    statistiche = None
+    dns = None
+
+    def _new_conn(self):
+        connessione = super()._new_conn()
+        connessione.statistiche = self.statistiche
+        connessione.dns = self.dns
+        return connessione
+
+
+class _PoolHTTP(_PoolConContatori, HTTPConnectionPool):
+    ConnectionCls = _ConnessioneHTTP
+
+
+class _PoolHTTPS(_PoolConContatori, HTTPSConnectionPool):
+    ConnectionCls = _ConnessioneHTTPS
+
+
+class _GestorePool(PoolManager):
+    """PoolManager che crea pool con contatori e cache DNS"""
+
+    def __init__(self, *args, statistiche=None, dns=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statistiche = statistiche
+        self.dns = dns
+        self.pool_classes_by_scheme = {'http': _PoolHTTP, 'https': _PoolHTTPS}
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.statistiche = self.statistiche
+        pool.dns = self.dns
+        return pool
+
+
+class AdattatoreHTTP(HTTPAdapter):
+    """
+    Adattatore requests con pool configurabili, ripetizioni e statistiche di riuso
+    """
+
+    def __init__(self, statistiche, dns=None, **kwargs):
+        """
+        Args:
+            statistiche (StatisticheConnessioni): Contatori condivisi
+            dns (CacheDNS): Cache delle risoluzioni (default: nessuna)
+            **kwargs: pool_connections, pool_maxsize, max_retries, pool_block
+        """
+        self.statistiche = statistiche
+        self.dns = dns
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _GestorePool(
+            num_pools=connections, maxsize=maxsize, block=block,
+            statistiche=self.statistiche, dns=self.dns, **pool_kwargs
+        )
+
+    def send(self, request, *args, **kwargs):
+        self.statistiche.registra_richiesta(urlsplit(request.url).hostname)
+        return super().send(request, *args, **kwargs)
+
+
+def _politica_ripetizioni(tentativi, backoff):
+    """
+    Politica di ripetizione di urllib3 per richieste idempotenti
+
+    Returns:
+        Retry: Ripetizioni su errori di rete e sugli stati di STATI_RIPETUTI
+    """
+    return Retry(
+        total=tentativi, connect=tentativi, read=tentativi, status=tentativi,
+        backoff_factor=backoff, status_forcelist=STATI_RIPETUTI,
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        respect_retry_after_header=True, raise_on_status=False
+    )
+
+
+def crea_sessione(headers=None, host=10, connessioni_per_host=10, tentativi=3, backoff=0.5,
+                  keep_alive=True, ttl_dns=300, http2=False):
+    """
+    Crea un client HTTP sincrono configurato
+
+    Args:
+        headers (dict): Intestazioni inviate con ogni richiesta
+        host (int): Host di cui mantenere il pool di connessioni
+        connessioni_per_host (int): Connessioni riutilizzabili per host
+        tentativi (int): Ripetizioni su errori di rete e risposte 429/5xx (0: nessuna)
+        backoff (float): Fattore del backoff esponenziale tra le ripetizioni, in secondi
+        keep_alive (bool): Mantiene aperte le connessioni tra le richieste
+        ttl_dns (float): Secondi di validità della cache DNS (0: nessuna cache)
+        http2 (bool): Usa httpx con HTTP/2 invece di requests
+
+    Returns:
+        requests.Session: Sessione con attributo statistiche (httpx.Client con http2=True)
+    """
+    statistiche = StatisticheConnessioni()
+    if http2:
+        return _crea_client_http2(headers, host, connessioni_per_host, tentativi, keep_alive, statistiche)
+
+    sessione = requests.Session()
+    adattatore = AdattatoreHTTP(
+        statistiche, CacheDNS(ttl_dns) if ttl_dns > 0 else None,
+        pool_connections=host, pool_maxsize=connessioni_per_host,
+        max_retries=_politica_ripetizioni(tentativi, backoff)
+    )
+    sessione.mount('http://', adattatore)
+    sessione.mount('https://', adattatore)
+    sessione.headers.update(headers or {})
+    if not keep_alive:
+        sessione.headers['Connection'] = 'close'
+    sessione.statistiche = statistiche
+    return sessione
+
+
+def _crea_client_http2(headers, host, connessioni_per_host, tentativi, keep_alive, statistiche):
+    """
+    Crea un client httpx con HTTP/2 e le stesse statistiche di riuso
+
+    Returns:
+        httpx.Client: Client con attributo statistiche
+    """
+    try:
+        import httpx
+    except ImportError as e:
+        raise ImportError("Il supporto HTTP/2 richiede httpx: pip install 'httpx[http2]'") from e
+
+    class TrasportoConContatori(httpx.HTTPTransport):
+        """Trasporto che conta le nuove connessioni del pool"""
+
+        def handle_request(self, request):
+            prima = len(self._pool.connections)
+            risposta = super().handle_request(request)
+            statistiche.registra_richiesta(request.url.host)
+            if len(self._pool.connections) > prima:
+                statistiche.registra_connessione(request.url.host)
+            return risposta
+
+    limiti = httpx.Limits(
+        max_connections=host * connessioni_per_host,
+        max_keepalive_connections=host * connessioni_per_host if keep_alive else 0
+    )
+    client = httpx.Client(
+        headers=headers, http2=True, follow_redirects=True, limits=limiti,
+        transport=TrasportoConContatori(http2=True, limits=limiti, retries=tentativi)
+    )
+    client.statistiche = statistiche
+    return client
+
+
+def crea_sessione_async(headers=None, connessioni_per_host=2, connessioni_totali=100,
+                        ttl_dns=300, keep_alive=30, statistiche=None):
+    """
+    Crea una sessione aiohttp con connettore configurato e statistiche di riuso
+
+    Va creata all'interno di un event loop in esecuzione.
+
+    Args:
+        headers (dict): Intestazioni inviate con ogni richiesta
+        connessioni_per_host (int): Connessioni contemporanee massime per host
+        connessioni_totali (int): Connessioni contemporanee massime in totale
+        ttl_dns (float): Secondi di validità della cache DNS di aiohttp
+        keep_alive (float): Secondi per cui una connessione inattiva resta aperta
+        statistiche (StatisticheConnessioni): Contatori da aggiornare con richieste e connessioni
+
+    Returns:
+        aiohttp.ClientSession: Sessione configurata
+    """
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError("Il download asincrono richiede aiohttp: pip install aiohttp") from e
+
+    tracce = []
+    if statistiche is not None:
+        async def richiesta_iniziata(sessione, contesto, parametri):
+            # Il contesto della traccia ricorda l'host per gli eventi di connessione
+            contesto.host = parametri.url.host
+            statistiche.registra_richiesta(contesto.host)
+
+        async def connessione_creata(sessione, contesto, parametri):
+            statistiche.registra_connessione(contesto.host)
+
+        traccia = aiohttp.TraceConfig()
+        traccia.on_request_start.append(richiesta_iniziata)
+        traccia.on_connection_create_end.append(connessione_creata)
+        tracce.append(traccia)
+
+    connettore = aiohttp.TCPConnector(
+        limit=connessioni_totali, limit_per_host=connessioni_per_host,
+        ttl_dns_cache=ttl_dns, use_dns_cache=ttl_dns > 0,
+        keepalive_timeout=keep_alive if keep_alive else None, force_close=not keep_alive
+    )
+    return aiohttp.ClientSession(headers=headers, connector=connettore, trace_configs=tracce)
+
+
+_sessione_condivisa = None
+_lock_condivisa = threading.Lock()
+
+
+def sessione_condivisa():
+    """
+    Sessione sincrona condivisa dal processo, creata al primo utilizzo
+
+    La usano i moduli senza una sessione propria, come gli analizzatori
+    del Website Analyzer.
+
+    Returns:
+        requests.Session: Sessione con le impostazioni predefinite
+    """
+    global _sessione_condivisa
+    with _lock_condivisa:
+        if _sessione_condivisa is None:
+            _sessione_condivisa = crea_sessione()
+        return _sessione_condivisa
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Limitatore - Limitazione della frequenza per dominio con token bucket e backoff adattivo
+
+Ogni dominio ha un secchio di gettoni con la propria velocità e capacità.
+Le risposte 429 e 5xx dimezzano la velocità del dominio e lo sospendono con
+un backoff esponenziale con jitter (o per il tempo indicato da Retry-After);
+le risposte positive riportano gradualmente la velocità al valore configurato.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Codici di stato per cui la richiesta va ripetuta dopo un backoff
+STATI_DA_RIPETERE = frozenset({429, 500, 502, 503, 504})
+
+
+class SecchioGettoni:
+    """
+    Token bucket con prenotazione: i gettoni possono andare in negativo e
+    ogni richiesta riceve l'attesa necessaria a restituire il proprio debito
+    """
+
+    def __init__(self, velocita, capacita=1):
+        """
+        Args:
+            velocita (float): Gettoni aggiunti al secondo (richieste al secondo a regime)
+            capacita (int): Gettoni massimi accumulabili (richieste consecutive senza attesa)
+        """
+        self.velocita = velocita
+        self.capacita = capacita
+        self.gettoni = float(capacita)
+        self.aggiornato = time.monotonic()
+
+    def prenota(self, ora):
+        """
+        Consuma un gettone
+
+        Args:
+            ora (float): Istante corrente (time.monotonic)
+
+        Returns:
+            float: Secondi da attendere prima di usare il gettone
+        """
+        self.gettoni = min(self.capacita, self.gettoni + (ora - self.aggiornato) * self.velocita)
+        self.aggiornato = ora
+        self.gettoni -= 1
+        return 0.0 if self.gettoni >= 0 else -self.gettoni / self.velocita
+
+
+class StatoDominio:
+    """
+    Secchio di gettoni e stato del backoff di un dominio
+    """
+
+    def __init__(self, velocita, capacita):
+        """
+        Args:
+            velocita (float): Velocità massima del dominio in richieste al secondo
+            capacita (int): Capacità del secchio
+        """
+        self.velocita_massima = velocita
+        self.secchio = SecchioGettoni(velocita, capacita)
+        self.errori_consecutivi = 0
+        self.sospeso_fino = 0.0
+
+
+class LimitatoreDomini:
+    """
+    Limitatore condiviso da tutte le fonti, con un secchio di gettoni per dominio
+
+    È sicuro tra thread; le attese sono disponibili sia bloccanti (attendi)
+    sia asincrone (attendi_async).
+    """
+
+    def __init__(self, limiti=None, velocita=1.0, capacita=1, backoff_base=1.0, backoff_massimo=60.0,
+                 tentativi_massimi=4):
+        """
+        Args:
+            limiti (dict): Dominio -> {'velocita': richieste/s, 'capacita': gettoni}
+            velocita (float): Velocità dei domini non configurati
+            capacita (int): Capacità dei domini non configurati
+            backoff_base (float): Prima attesa del backoff esponenziale in secondi
+            backoff_massimo (float): Attesa massima del backoff in secondi
+            tentativi_massimi (int): Ripetizioni massime di una richiesta fallita
+        """
+        self.limiti = dict(limiti or {})
+        self.velocita = velocita
+        self.capacita = capacita
+        self.backoff_base = backoff_base
+        self.backoff_massimo = backoff_massimo
+        self.tentativi_massimi = tentativi_massimi
+        self._domini = {}
+        self._lock = threading.Lock()
+
+    def _stato(self, dominio):
+        """Restituisce lo stato di un dominio, creandolo al primo utilizzo"""
+        if dominio not in self._domini:
+            limite = self.limiti.get(dominio, {})
+            self._domini[dominio] = StatoDominio(
+                limite.get('velocita', self.velocita), limite.get('capacita', self.capacita)
+            )
+        return self._domini[dominio]
+
+    def prenota(self, dominio):
+        """
+        Prenota la prossima richiesta verso un dominio
+
+        Args:
+            dominio (str): Dominio della richiesta
+
+        Returns:
+            float: Secondi da attendere prima di inviare la richiesta
+        """
+        with self._lock:
+            stato = self._stato(dominio)
+            ora = time.monotonic()
+            attesa = stato.secchio.prenota(ora)
+            return max(attesa, stato.sospeso_fino - ora)
+
+    def attendi(self, dominio):
+        """Attende in modo bloccante il turno di una richiesta"""
+        attesa = self.prenota(dominio)
+        if attesa > 0:
+            time.sleep(attesa)
+
+    async def attendi_async(self, dominio):
+        """Attende il turno di una richiesta senza bloccare l'event loop"""
+        attesa = self.prenota(dominio)
+        if attesa > 0:
+            await asyncio.sleep(attesa)
+
+    def registra_risposta(self, dominio, stato_http, retry_after=None):
+        """
+        Aggiorna velocità e backoff del dominio in base all'esito di una richiesta
+
+        Args:
+            dominio (str): Dominio della richiesta
+            stato_http (int): Codice di stato della risposta (None per un errore di rete)
+            retry_after (str): Valore dell'intestazione Retry-After, se presente
+
+        Returns:
+            bool: True se la richiesta va ripetuta
+        """
+        with self._lock:
+            stato = self._stato(dominio)
+            secchio = stato.secchio
+
+            if stato_http is not None and stato_http not in STATI_DA_RIPETERE:
+                # Aumento additivo fino alla velocità configurata
+                stato.errori_consecutivi = 0
+                secchio.velocita = min(stato.velocita_massima, secchio.velocita + stato.velocita_massima / 10)
+                return False
+
+            # Diminuzione moltiplicativa e sospensione del dominio
+            secchio.velocita = max(stato.velocita_massima / 16, secchio.velocita / 2)
+            attesa = _secondi_retry_after(retry_after)
+            if attesa is None:
+                limite = min(self.backoff_massimo, self.backoff_base * 2 ** stato.errori_consecutivi)
+                attesa = random.uniform(limite / 2, limite)
+            stato.errori_consecutivi += 1
+            stato.sospeso_fino = max(stato.sospeso_fino, time.monotonic() + attesa)
+            return True
+
+
+def _secondi_retry_after(valore):
+    """
+    Interpreta l'intestazione Retry-After (secondi o data HTTP)
+
+    Returns:
+        float: Secondi di attesa, None se assente o non valida
+    """
+    if not valore:
+        return None
+    try:
+        return max(float(valore), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(valore).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Parallelo - Generazione di dataset suddivisa in shard su più processi
+"""
+
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def pianifica_shard(num_righe, shard_size):
+    """
+    Suddivide il numero di righe richiesto in shard di dimensione fissa
+
+    La suddivisione non dipende dal numero di processi, così l'output
+    resta identico qualunque sia il parallelismo.
+
+    Args:
+        num_righe (int): Numero totale di righe
+        shard_size (int): Numero massimo di righe per shard
+
+    Returns:
+        list: Lista di tuple (indice_shard, righe)
+    """
+    if shard_size <= 0:
+        raise ValueError("shard_size deve essere positivo")
+
+    return [
+        (indice, min(shard_size, num_righe - inizio))
+        for indice, inizio in enumerate(range(0, num_righe, shard_size))
+    ]
+
+
+def seme_shard(seed, indice):
+    """
+    Deriva il seme di uno shard dal seme principale
+
+    Args:
+        seed (int): Seme principale
+        indice (int): Indice dello shard
+
+    Returns:
+        int: Seme indipendente per lo shard
+    """
+    sequenza = np.random.SeedSequence(seed, spawn_key=(indice,))
+    return int(sequenza.generate_state(1, dtype=np.uint64)[0])
+
+
+def percorso_parte(directory, indice, estensione="csv"):
+    """
+    Restituisce il percorso del file parziale di uno shard
+
+    Returns:
+        str: Percorso del file parziale
+    """
+    return os.path.join(directory, f"part-{indice:05d}.{estensione}")
+
+
+def unisci_parti(percorsi, output_file, formato="csv"):
+    """
+    Concatena i file parziali nell'ordine degli shard
+
+    I CSV mantengono una sola intestazione; i Parquet vengono riscritti
+    row group per row group in un unico file; i database SQLite vengono
+    reinseriti a blocchi nel database finale.
+
+    Args:
+        percorsi (list): File parziali nell'ordine degli shard
+        output_file (str): File finale
+        formato (str): Formato dei file (csv, parquet o sqlite)
+    """
+    if formato == 'sqlite':
+        from pmi_database import DatabasePMI, elimina_database
+
+        elimina_database(output_file)
+        with DatabasePMI(output_file) as db:
+            for percorso in percorsi:
+                with DatabasePMI(percorso) as parte:
+                    for blocco in parte.esporta():
+                        db.inserisci(blocco)
+        return
+
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for percorso in percorsi:
+                parte = pq.ParquetFile(percorso)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_file, parte.schema_arrow, compression='zstd')
+                for indice in range(parte.num_row_groups):
+                    writer.write_table(parte.read_row_group(indice))
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    with open(output_file, 'wb') as destinazione:
+        for numero, percorso in enumerate(percorsi):
+            with open(percorso, 'rb') as parte:
+                if numero > 0:
+                    parte.readline()  # Salta l'intestazione
+                shutil.copyfileobj(parte, destinazione)
+
+
+def genera_in_parallelo(genera_shard, num_righe, output, workers=1, seed=0,
+                        shard_size=100000, partizionato=False, formato="csv"):
+    """
+    Genera un dataset in shard paralleli con semi deterministici
+
+    Ogni shard riceve un seme derivato da seed e dal proprio indice, quindi
+    per un dato seme l'output è identico byte per byte con qualsiasi numero
+    di processi.
+
+    Args:
+        genera_shard (callable): Funzione (indice, righe, seme, percorso, inizio) -> righe scritte,
+            definita a livello di modulo per poter essere inviata ai processi; inizio è la
+            posizione della prima riga dello shard nel dataset
+        num_righe (int): Numero totale di righe da generare
+        output (str): File finale, oppure directory di output se partizionato
+        workers (int): Numero di processi
+        seed (int): Seme principale
+        shard_size (int): Numero massimo di righe per shard
+        partizionato (bool): Lascia le parti in una directory invece di unirle
+        formato (str): Formato dei file parziali (csv, parquet o sqlite)
+
+    Returns:
+        int: Numero di righe generate
+    """
+    shard = pianifica_shard(num_righe, shard_size)
+    directory = output if partizionato else f"{output}.parti"
+    os.makedirs(directory, exist_ok=True)
+
+    percorsi = [percorso_parte(directory, indice, formato) for indice, _ in shard]
+    argomenti = [
+        (indice, righe, seme_shard(seed, indice), percorso, indice * shard_size)
+        for (indice, righe), percorso in zip(shard, percorsi)
+    ]
+
+    print(f"Generazione di {num_righe} righe in {len(shard)} shard con {workers} processi (seed {seed})...")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            generate = sum(executor.map(genera_shard, *zip(*argomenti)))
+    else:
+        generate = sum(genera_shard(*args) for args in argomenti)
+
+    if partizionato:
+        print(f"Dataset partizionato salvato in: {directory}")
+    else:
+        unisci_parti(percorsi, output, formato)
+        shutil.rmtree(directory)
+        print(f"Dataset unito e salvato in: {output}")
+
+    return generate
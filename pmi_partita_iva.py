@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Partita IVA - Generazione di partite IVA valide e uniche e validazione vettoriale
+
+Una partita IVA italiana ha 11 cifre: 7 di matricola, 3 del codice dell'ufficio
+provinciale e una cifra di controllo calcolata con l'algoritmo di Luhn.
+"""
+
+import numpy as np
+
+# Codici degli uffici: 001-100 uffici provinciali, 120-121 assegnazioni centrali
+UFFICI = tuple(range(1, 101)) + (120, 121)
+
+_MATRICOLE = 10 ** 7
+_CAPACITA = _MATRICOLE * len(UFFICI)
+
+# Permutazione affine dello spazio (matricola, ufficio): il moltiplicatore è
+# coprimo con la capacità, quindi progressivi distinti danno partite IVA distinte
+_MOLTIPLICATORE = 613651349
+_SCOSTAMENTO = 104729
+
+_PESI = 10 ** np.arange(9, -1, -1, dtype=np.int64)
+
+
+def _cifre_controllo(cifre):
+    """
+    Calcola le cifre di controllo di una matrice di prime 10 cifre
+
+    Args:
+        cifre (numpy.ndarray): Matrice (n, 10) di interi 0-9
+
+    Returns:
+        numpy.ndarray: Cifra di controllo di ciascuna riga
+    """
+    dispari = cifre[:, 0::2].sum(axis=1)
+    doppie = cifre[:, 1::2] * 2
+    pari = (doppie - 9 * (doppie > 9)).sum(axis=1)
+    return (10 - (dispari + pari) % 10) % 10
+
+
+def cifra_controllo(prime_cifre):
+    """
+    Calcola la cifra di controllo di una partita IVA
+
+    Args:
+        prime_cifre (str): Prime 10 cifre
+
+    Returns:
+        str: Cifra di controllo
+    """
+    somma = 0
+    for posizione, carattere in enumerate(prime_cifre):
+        cifra = int(carattere)
+        if posizione % 2:
+            cifra *= 2
+            cifra -= 9 if cifra > 9 else 0
+        somma += cifra
+    return str((10 - somma % 10) % 10)
+
+
+class GeneratorePartiteIva:
+    """
+    Generatore di partite IVA valide, uniche all'interno di un dataset
+
+    Ogni partita IVA è l'immagine di un progressivo tramite una permutazione
+    dello spazio matricola/ufficio: non servono insiemi di quelle già emesse
+    e gli shard che partono da progressivi disgiunti non si sovrappongono.
+    """
+
+    def __init__(self, inizio=0):
+        """
+        Args:
+            inizio (int): Primo progressivo (posizione della prima riga nel dataset)
+        """
+        self.progressivo = inizio
+
+    def _prenota(self, n):
+        """
+        Riserva n progressivi consecutivi
+
+        Returns:
+            int: Primo progressivo riservato
+        """
+        if self.progressivo + n > _CAPACITA:
+            raise ValueError(f"Spazio delle partite IVA esaurito ({_CAPACITA} valori)")
+        primo = self.progressivo
+        self.progressivo += n
+        return primo
+
+    def genera_batch(self, n):
+        """
+        Genera n partite IVA con NumPy
+
+        Args:
+            n (int): Numero di partite IVA
+
+        Returns:
+            numpy.ndarray: Partite IVA di 11 cifre (dtype object)
+        """
+        primo = self._prenota(n)
+        progressivi = np.arange(primo, primo + n, dtype=np.int64)
+        chiavi = (progressivi * _MOLTIPLICATORE + _SCOSTAMENTO) % _CAPACITA
+        uffici = np.array(UFFICI, dtype=np.int64)[chiavi // _MATRICOLE]
+        numeri = (chiavi % _MATRICOLE) * 1000 + uffici
+        cifre = (numeri[:, None] // _PESI) % 10
+        complete = numeri * 10 + _cifre_controllo(cifre)
+        return np.char.zfill(complete.astype(str), 11).astype(object)
+
+    def nuova(self):
+        """
+        Genera una partita IVA
+
+        Returns:
+            str: Partita IVA di 11 cifre
+        """
+        chiave = (self._prenota(1) * _MOLTIPLICATORE + _SCOSTAMENTO) % _CAPACITA
+        prime_cifre = f"{chiave % _MATRICOLE:07d}{UFFICI[chiave // _MATRICOLE]:03d}"
+        return prime_cifre + cifra_controllo(prime_cifre)
+
+
+def valida_partite_iva(valori):
+    """
+    Valida in un solo passaggio una colonna di partite IVA
+
+    Sono accettati spazi attorno al valore e il prefisso "IT"; valori nulli
+    o di lunghezza diversa da 11 cifre non sono validi.
+
+    Args:
+        valori (iterable): Lista, array NumPy o Series pandas di stringhe
+
+    Returns:
+        numpy.ndarray: Array booleano, True per le partite IVA valide
+    """
+    testi = np.asarray(valori, dtype=str)
+
+    # Normalizza solo i valori che non sono già lunghi 11 caratteri
+    da_pulire = np.char.str_len(testi) != 11
+    if da_pulire.any():
+        testi = testi.copy()
+        pulite = np.char.strip(np.char.upper(testi[da_pulire]))
+        prefisso = np.char.startswith(pulite, "IT")
+        pulite[prefisso] = np.char.strip(np.char.replace(pulite[prefisso], "IT", "", count=1))
+        testi[da_pulire] = pulite
+    valide = np.char.str_len(testi) == 11
+
+    candidate = testi[valide].astype('U11')
+    # Codici Unicode meno '0': i caratteri non numerici diventano valori > 9
+    cifre = candidate.view(np.uint32).reshape(-1, 11) - np.uint32(ord('0'))
+    numeriche = (cifre <= 9).all(axis=1)
+    cifre = np.where(numeriche[:, None], cifre, 0).astype(np.uint8)
+    corrette = numeriche & (_cifre_controllo(cifre[:, :10]) == cifre[:, 10])
+
+    valide[valide] = corrette
+    return valide
+
+
+def main():
+    """
+    Funzione principale
+    """
+    import argparse
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Validazione delle partite IVA di un file CSV')
+    parser.add_argument('file', help='File CSV da validare')
+    parser.add_argument('--colonna', default='Partita IVA', help='Colonna con le partite IVA')
+    parser.add_argument('--chunk-size', type=int, default=1000000, help='Righe lette per blocco')
+
+    args = parser.parse_args()
+
+    totale = valide = 0
+    for blocco in pd.read_csv(args.file, usecols=[args.colonna], dtype=str, chunksize=args.chunk_size):
+        esito = valida_partite_iva(blocco[args.colonna].fillna(''))
+        totale += len(esito)
+        valide += int(esito.sum())
+
+    print(f"Partite IVA valide: {valide}/{totale}")
+    if totale:
+        print(f"Non valide: {totale - valide} ({(totale - valide) / totale:.2%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Riferimenti - Catalogo immutabile dei dati di riferimento condivisi da generatori e finder
+
+Le liste sono tuple e le mappe sono MappingProxyType: vengono create una sola volta
+all'import del modulo e non possono essere modificate dai produttori. Dove i
+produttori usavano vocabolari diversi (vie, domini email, cognomi), ognuno conserva
+la propria voce, così i dati generati restano quelli di prima. Il gazetteer
+dei comuni, potenzialmente di migliaia di righe, viene invece caricato solo al primo
+utilizzo, da un CSV oppure da una directory compilata di array NumPy mappati in memoria.
+"""
+
+import csv
+import json
+import os
+import random
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+from pmi_campionatori import CampionatoreAlias
+
+# Componenti dei nomi aziendali
+PREFISSI_AZIENDALI = (
+    "Tecno", "Agri", "Mec", "Edi", "Info", "Bio", "Eco", "Auto", "Termo", "Elettro",
+    "Idro", "Plast", "Metal", "Legno", "Vetro", "Carta", "Tessile", "Aliment", "Arredo", "Stampa"
+)
+
+SUFFISSI_AZIENDALI = (
+    "service", "tech", "system", "group", "italia", "mec", "prom", "trade", "food", "build",
+    "consulting", "solutions", "project", "engineering", "design", "energy", "logistic", "export", "quality", "components"
+)
+
+# Suffissi delle imprese del registro simulato di pmi_finder
+SUFFISSI_REGISTRO = SUFFISSI_AZIENDALI[:19]
+
+# Cognomi più diffusi in Italia
+COGNOMI = ("Rossi", "Bianchi", "Ferrari", "Esposito", "Romano", "Colombo", "Ricci", "Marino", "Greco", "Bruno")
+
+# Cognomi dei soci nei nomi composti di pmi_generator ("Rossi & Gallo")
+COGNOMI_SOCI = COGNOMI + ("Gallo", "Conti", "De Luca", "Costa", "Giordano", "Mancini", "Lombardi", "Moretti", "Barbieri")
+
+# Lista estesa dei nomi aziendali di pmi_generator_avanzato
+COGNOMI_ESTESI = (
+    "Rossi", "Bianchi", "Verdi", "Ferrari", "Esposito", "Romano", "Colombo", "Ricci",
+    "Marino", "Greco", "Bruno", "Gallo", "Conti", "Mancini", "Costa", "Giordano",
+    "Rizzo", "Lombardi", "Moretti", "Barbieri", "Fontana", "Caruso", "Ferrara", "Mariani"
+)
+
+FORME_GIURIDICHE = (
+    "S.r.l.", "S.n.c.", "S.a.s.", "S.p.A.", "Ditta individuale", "Società cooperativa", "S.r.l.s."
+)
+
+PROBABILITA_FORME = MappingProxyType({
+    "S.r.l.": 0.45,
+    "S.n.c.": 0.15,
+    "S.a.s.": 0.10,
+    "Ditta individuale": 0.20,
+    "S.p.A.": 0.03,
+    "Società cooperativa": 0.05,
+    "S.r.l.s.": 0.02
+})
+
+# Geografia
+CITTA = (
+    "Milano", "Roma", "Torino", "Bologna", "Napoli", "Firenze", "Padova", "Bari", "Verona", "Brescia",
+    "Modena", "Bergamo", "Parma", "Vicenza", "Treviso", "Udine", "Varese", "Como", "Monza", "Prato",
+    "Reggio Emilia", "Ancona", "Pescara", "Catania", "Palermo", "Cagliari", "Venezia", "Perugia", "Trento", "Bolzano"
+)
+
+PROVINCE = MappingProxyType({
+    "Milano": "MI", "Roma": "RM", "Torino": "TO", "Bologna": "BO", "Napoli": "NA", "Firenze": "FI",
+    "Padova": "PD", "Bari": "BA", "Verona": "VR", "Brescia": "BS", "Modena": "MO", "Bergamo": "BG",
+    "Parma": "PR", "Vicenza": "VI", "Treviso": "TV", "Udine": "UD", "Varese": "VA", "Como": "CO",
+    "Monza": "MB", "Prato": "PO", "Reggio Emilia": "RE", "Ancona": "AN", "Pescara": "PE",
+    "Catania": "CT", "Palermo": "PA", "Cagliari": "CA", "Venezia": "VE", "Perugia": "PG",
+    "Trento": "TN", "Bolzano": "BZ"
+})
+
+# Sigla -> città capoluogo
+CAPOLUOGHI = MappingProxyType({sigla: citta for citta, sigla in PROVINCE.items()})
+
+# Città e province delle ricerche simulate di pmi_finder
+CITTA_RICERCA = CITTA[:14]
+
+CAPOLUOGHI_RICERCA = MappingProxyType({PROVINCE[citta]: citta for citta in CITTA_RICERCA})
+
+# Prime tre cifre del CAP dei capoluoghi
+CAP_BASE = MappingProxyType({
+    "Milano": "201", "Roma": "001", "Torino": "101", "Bologna": "401", "Napoli": "801",
+    "Firenze": "501", "Padova": "351", "Bari": "701", "Verona": "371", "Brescia": "251"
+})
+
+# Comuni principali per provincia
+COMUNI_PER_PROVINCIA = MappingProxyType({
+    "Milano": ("Milano", "Monza", "Lodi", "Sesto San Giovanni", "Rho", "Legnano"),
+    "Roma": ("Roma", "Fiumicino", "Civitavecchia", "Tivoli", "Velletri", "Anzio"),
+    "Torino": ("Torino", "Moncalieri", "Rivoli", "Chieri", "Pinerolo", "Ivrea"),
+    "Napoli": ("Napoli", "Pozzuoli", "Casoria", "Afragola", "Portici", "Ercolano"),
+    "Bologna": ("Bologna", "Imola", "San Lazzaro", "Casalecchio", "Castel Maggiore"),
+    "Firenze": ("Firenze", "Prato", "Scandicci", "Sesto Fiorentino", "Empoli"),
+    "Genova": ("Genova", "Rapallo", "Chiavari", "Sestri Levante", "Lavagna"),
+    "Bari": ("Bari", "Altamura", "Monopoli", "Bitonto", "Molfetta", "Corato"),
+    "Venezia": ("Venezia", "Mestre", "Chioggia", "Jesolo", "San Donà di Piave"),
+    "Padova": ("Padova", "Abano Terme", "Cittadella", "Este", "Monselice"),
+    "Verona": ("Verona", "Villafranca", "San Bonifacio", "Legnago", "Bussolengo"),
+    "Brescia": ("Brescia", "Desenzano", "Montichiari", "Lumezzane", "Chiari"),
+    "Modena": ("Modena", "Carpi", "Sassuolo", "Formigine", "Castelfranco Emilia"),
+    "Parma": ("Parma", "Fidenza", "Salsomaggiore", "Collecchio", "Langhirano"),
+    "Bergamo": ("Bergamo", "Treviglio", "Seriate", "Dalmine", "Romano di Lombardia"),
+    "Catania": ("Catania", "Acireale", "Misterbianco", "Paternò", "Adrano"),
+    "Palermo": ("Palermo", "Bagheria", "Monreale", "Carini", "Termini Imerese"),
+    "Cagliari": ("Cagliari", "Quartu Sant'Elena", "Selargius", "Assemini", "Capoterra"),
+    "Trento": ("Trento", "Rovereto", "Pergine", "Riva del Garda", "Arco"),
+    "Bolzano": ("Bolzano", "Merano", "Bressanone", "Laives", "Brunico"),
+    "Perugia": ("Perugia", "Foligno", "Città di Castello", "Spoleto", "Assisi"),
+    "Ancona": ("Ancona", "Senigallia", "Jesi", "Fabriano", "Osimo"),
+    "Pescara": ("Pescara", "Montesilvano", "Spoltore", "Città Sant'Angelo", "Penne"),
+    "Lecce": ("Lecce", "Nardò", "Galatina", "Tricase", "Copertino")
+})
+
+VIE = (
+    "Via Roma", "Via Milano", "Via Torino", "Via Napoli", "Via Firenze", "Via Bologna", "Via Venezia",
+    "Via Garibaldi", "Via Mazzini", "Via Dante", "Via Marconi", "Via Galilei", "Via Fermi", "Via Edison",
+    "Via dell'Industria", "Via dell'Artigianato", "Via del Lavoro", "Via delle Industrie", "Via Europa",
+    "Via XXV Aprile", "Via IV Novembre", "Via I Maggio", "Via II Giugno", "Via XX Settembre",
+    "Viale delle Nazioni", "Viale della Repubblica", "Viale della Libertà", "Viale dell'Indipendenza"
+)
+
+# Vie delle zone produttive, per le imprese del registro simulato di pmi_finder
+VIE_INDUSTRIALI = VIE[:19]
+
+# Vie delle ricerche simulate di pmi_finder
+VIE_RICERCA = ("Via Roma", "Via Milano", "Via Torino", "Via Napoli", "Via Garibaldi", "Via Dante")
+
+# Vie delle ricerche simulate di pmi_scraper_custom
+VIE_CUSTOM = ("Via Roma", "Via Milano", "Via Napoli", "Via Torino", "Via Garibaldi", "Via Dante", "Via Mazzini")
+
+# Vie di pmi_generator_avanzato
+VIE_AVANZATO = (
+    "Via Roma", "Via Garibaldi", "Via Dante", "Via Mazzini", "Corso Italia",
+    "Via Verdi", "Via Marconi", "Via Vittorio Emanuele", "Via Leonardo da Vinci",
+    "Via Cavour", "Via Milano", "Via Napoli", "Via Torino", "Via Bologna",
+    "Via Firenze", "Via Venezia", "Via Genova", "Via Bari", "Via Palermo",
+    "Via Catania", "Via Padova", "Via Verona", "Via Brescia", "Via Modena"
+)
+
+# Contatti
+DOMINI_EMAIL = (
+    "gmail.com", "libero.it", "yahoo.it", "virgilio.it", "hotmail.it", "outlook.it", "pec.it", "legalmail.it"
+)
+
+# Domini di pmi_generator_avanzato, con quelli aziendali
+DOMINI_EMAIL_AVANZATO = (
+    "gmail.com", "yahoo.it", "libero.it", "hotmail.com", "outlook.it", "pec.it",
+    "azienda.com", "company.it", "business.it", "enterprise.com", "group.it", "tech.it"
+)
+
+TIPI_EMAIL = ("info", "contatti", "amministrazione", "vendite", "ufficio")
+
+PREFISSI_FISSI = ("02", "06", "011", "010", "051", "055", "049", "081", "091", "045")
+
+PREFISSI_MOBILI = (
+    "320", "328", "330", "338", "340", "345", "347", "350", "360", "370", "380", "388", "389", "391", "392", "393", "327", "329"
+)
+
+# Gazetteer predefinito: capoluoghi di provincia con regione, intervallo di CAP e popolazione
+GAZETTEER_PREDEFINITO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "comuni_capoluoghi.csv")
+
+# Colonne del gazetteer dei comuni: nome del campo -> dtype NumPy
+COLONNE_COMUNI = {
+    'comune': 'U',
+    'sigla': 'U2',
+    'regione': 'U',
+    'cap_min': 'i4',
+    'cap_max': 'i4',
+    'popolazione': 'i8'
+}
+
+
+class TabellaComuni:
+    """
+    Gazetteer dei comuni in forma colonnare (un array NumPy per campo)
+
+    Ogni comune porta provincia, regione, intervallo di CAP e popolazione.
+    Gli array possono essere mappati in memoria da una directory compilata,
+    così anche una tabella completa di circa 8000 comuni si apre senza
+    rallentare l'avvio.
+    """
+
+    def __init__(self, colonne):
+        """
+        Args:
+            colonne (dict): Nome del campo -> array NumPy della stessa lunghezza
+        """
+        self.colonne = MappingProxyType(dict(colonne))
+        self._indice = None
+        self._campionatore = None
+
+    def __len__(self):
+        return len(self.colonne['comune'])
+
+    def __getitem__(self, campo):
+        return self.colonne[campo]
+
+    def indice(self, comune):
+        """
+        Restituisce la posizione di un comune nella tabella
+
+        Args:
+            comune (str): Nome del comune
+
+        Returns:
+            int: Posizione nella tabella, -1 se assente
+        """
+        if self._indice is None:
+            self._indice = {nome: i for i, nome in enumerate(self.colonne['comune'].tolist())}
+        return self._indice.get(comune, -1)
+
+    @property
+    def campionatore(self):
+        """
+        Tabella alias sulle posizioni dei comuni, pesata per popolazione
+
+        Returns:
+            CampionatoreAlias: Campionatore costruito al primo utilizzo
+        """
+        if self._campionatore is None:
+            pesi = self.colonne['popolazione']
+            if not len(pesi) or pesi.sum() <= 0:
+                pesi = np.ones(len(self))
+            self._campionatore = CampionatoreAlias(range(len(self)), pesi)
+        return self._campionatore
+
+    def estrai_comune(self, rng=random):
+        """
+        Estrae un comune in proporzione alla popolazione, con un CAP del suo intervallo
+
+        Args:
+            rng: Sorgente casuale con metodi random e randint, usata sia per il
+                 comune sia per il CAP (default: modulo random)
+
+        Returns:
+            tuple: (comune, sigla, cap)
+        """
+        i = self.campionatore.estrai_indice(rng)
+        cap = rng.randint(int(self.colonne['cap_min'][i]), int(self.colonne['cap_max'][i]))
+        return str(self.colonne['comune'][i]), str(self.colonne['sigla'][i]), f"{cap:05d}"
+
+    def estrai_comuni_batch(self, n, rng=None):
+        """
+        Estrae n comuni con NumPy in proporzione alla popolazione
+
+        Args:
+            n (int): Numero di estrazioni
+            rng (numpy.random.Generator): Generatore casuale (default: nuovo generatore)
+
+        Returns:
+            dict: Array (dtype object) per comune, sigla, regione e cap
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        indici = self.campionatore.estrai_indici_batch(n, rng)
+        cap = rng.integers(self.colonne['cap_min'][indici], self.colonne['cap_max'][indici], endpoint=True)
+        return {
+            'comune': self.colonne['comune'][indici].astype(object),
+            'sigla': self.colonne['sigla'][indici].astype(object),
+            'regione': self.colonne['regione'][indici].astype(object),
+            'cap': np.char.zfill(cap.astype(str), 5).astype(object)
+        }
+
+
+def leggi_comuni_csv(percorso):
+    """
+    Legge un gazetteer dei comuni da CSV (separatore ';' o ',')
+
+    Le colonne attese sono quelle di COLONNE_COMUNI; un file con la sola
+    colonna cap al posto di cap_min/cap_max è accettato, e senza popolazione
+    tutti i comuni hanno lo stesso peso.
+
+    Returns:
+        TabellaComuni: Tabella con gli array dei campi
+    """
+    with open(percorso, newline='', encoding='utf-8') as f:
+        separatore = ';' if ';' in f.readline() else ','
+        f.seek(0)
+        righe = list(csv.DictReader(f, delimiter=separatore))
+
+    predefiniti = {'regione': '', 'popolazione': '1'}
+    colonne = {}
+    for campo, tipo in COLONNE_COMUNI.items():
+        if campo in ('cap_min', 'cap_max'):
+            valori = [riga.get(campo) or riga.get('cap') or '0' for riga in righe]
+        else:
+            valori = [riga.get(campo) or predefiniti.get(campo, '') for riga in righe]
+        colonne[campo] = np.array(valori, dtype=tipo if tipo != 'U' else str)
+    return TabellaComuni(colonne)
+
+
+def compila_comuni(percorso_csv, directory):
+    """
+    Converte un gazetteer CSV in una directory compatta di array .npy mappabili in memoria
+
+    Args:
+        percorso_csv (str): Gazetteer in formato CSV
+        directory (str): Directory di destinazione
+
+    Returns:
+        int: Numero di comuni compilati
+    """
+    tabella = leggi_comuni_csv(percorso_csv)
+    os.makedirs(directory, exist_ok=True)
+    for campo, valori in tabella.colonne.items():
+        np.save(os.path.join(directory, f"{campo}.npy"), valori)
+    with open(os.path.join(directory, "indice.json"), 'w', encoding='utf-8') as f:
+        json.dump({'comuni': len(tabella), 'colonne': list(tabella.colonne)}, f)
+    return len(tabella)
+
+
+@lru_cache(maxsize=None)
+def carica_comuni(percorso=GAZETTEER_PREDEFINITO):
+    """
+    Carica una sola volta il gazetteer dei comuni
+
+    Args:
+        percorso (str): CSV oppure directory compilata con compila_comuni
+            (default: capoluoghi di provincia inclusi nel progetto)
+
+    Returns:
+        TabellaComuni: Tabella condivisa da tutti i produttori
+    """
+    if os.path.isdir(percorso):
+        with open(os.path.join(percorso, "indice.json"), encoding='utf-8') as f:
+            indice = json.load(f)
+        return TabellaComuni({
+            campo: np.load(os.path.join(percorso, f"{campo}.npy"), mmap_mode='r')
+            for campo in indice['colonne']
+        })
+    return leggi_comuni_csv(percorso)
+
+
+def main():
+    """
+    Funzione principale
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compila il gazetteer dei comuni in formato mappabile in memoria')
+    parser.add_argument('--csv', required=True, help='Gazetteer CSV (comune, sigla, regione, cap_min, cap_max, popolazione)')
+    parser.add_argument('--output', default='comuni', help='Directory di output')
+
+    args = parser.parse_args()
+
+    comuni = compila_comuni(args.csv, args.output)
+    print(f"Compilati {comuni} comuni in: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,556 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Schema - Record canonico delle aziende e blocchi colonnari
+
+Ogni modulo scrive le aziende con le proprie colonne: "Nome" o "Ragione
+Sociale", "Fatturato (milioni €)" o "Fatturato" in euro, "Data contatto" o
+"Data Ultimo Contatto". Questo modulo definisce un unico record, Azienda,
+con campi tipizzati e convertitori da ognuna di queste intestazioni, e un
+contenitore colonnare, BloccoAziende, che conserva molte aziende per
+colonna: numeri in array NumPy, campi a bassa cardinalità (settore,
+provincia, città, ...) codificati come categorie.
+
+    blocco = BloccoAziende.da_righe(csv.DictReader(f))
+    milanesi = blocco.filtra(blocco.codici('provincia') == blocco.codice('provincia', 'MI'))
+    destinazione.scrivi(list(milanesi.righe()))
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Campi del record canonico, nell'ordine di output
+CAMPI = (
+    'ragione_sociale', 'partita_iva', 'forma_giuridica', 'settore', 'categoria', 'anno_fondazione',
+    'dipendenti', 'fatturato', 'telefono', 'cellulare', 'email', 'pec', 'sito_web', 'indirizzo', 'cap',
+    'citta', 'provincia', 'descrizione', 'fonte', 'stato', 'data_ultimo_contatto', 'data_risposta',
+    'note', 'data_inserimento'
+)
+
+# Intestazione canonica di ogni campo nei file di output
+INTESTAZIONI = {
+    'ragione_sociale': 'Ragione Sociale',
+    'partita_iva': 'Partita IVA',
+    'forma_giuridica': 'Forma Giuridica',
+    'settore': 'Settore',
+    'categoria': 'Categoria',
+    'anno_fondazione': 'Anno Fondazione',
+    'dipendenti': 'Dipendenti',
+    'fatturato': 'Fatturato',
+    'telefono': 'Telefono',
+    'cellulare': 'Cellulare',
+    'email': 'Email',
+    'pec': 'PEC',
+    'sito_web': 'Sito Web',
+    'indirizzo': 'Indirizzo',
+    'cap': 'CAP',
+    'citta': 'Città',
+    'provincia': 'Provincia',
+    'descrizione': 'Descrizione',
+    'fonte': 'Fonte',
+    'stato': 'Stato',
+    'data_ultimo_contatto': 'Data Ultimo Contatto',
+    'data_risposta': 'Data Risposta',
+    'note': 'Note',
+    'data_inserimento': 'Data Inserimento'
+}
+
+# Intestazioni dei vari moduli -> campo canonico
+ALIAS = {
+    **{intestazione: campo for campo, intestazione in INTESTAZIONI.items()},
+    **{campo: campo for campo in CAMPI},
+    'Nome': 'ragione_sociale',
+    'Fatturato (milioni €)': 'fatturato',
+    'Cittu00e0': 'citta',
+    'Data contatto': 'data_ultimo_contatto',
+    'Data risposta': 'data_risposta',
+    'Data Scraping': 'data_inserimento'
+}
+
+# Campi numerici; gli altri sono testo
+INTERI = ('anno_fondazione', 'dipendenti')
+DECIMALI = ('fatturato',)
+
+# Campi a bassa cardinalità, codificati come categorie nei blocchi
+CATEGORICI = ('forma_giuridica', 'settore', 'categoria', 'citta', 'provincia', 'fonte', 'stato')
+
+# Numero in formato italiano ("3.500.000", "1.250.000,00": punto per le migliaia,
+# virgola per i decimali) oppure semplice ("12.5", "12,5", "850000")
+_NUMERO = re.compile(r'-?(?:(?P<migliaia>\d{1,3}(?:\.\d{3})+)(?!\d)(?:,\d+)?|\d+(?:[.,]\d+)?)')
+
+
+def testo(valore):
+    """Stringa senza spazi esterni, None se vuota"""
+    if valore is None:
+        return None
+    if type(valore) is not str:
+        valore = str(valore)
+    return valore.strip() or None
+
+
+def intero(valore):
+    """Intero da un numero o da una stringa, None se assente"""
+    if valore is None or valore == '':
+        return None
+    try:
+        numero = float(valore)
+    except (TypeError, ValueError):
+        return None
+    return None if numero != numero else int(numero)
+
+
+def euro(valore, milioni=False):
+    """
+    Importo in euro da un numero o da una stringa ("12.5M €", "850000", "€ 1.250.000,00")
+
+    Nelle stringhe un punto seguito da gruppi di tre cifre separa le migliaia
+    ("3.500.000" vale tre milioni e mezzo); la virgola separa i decimali.
+
+    Args:
+        valore: Importo come scritto dal modulo
+        milioni (bool): Il valore è espresso in milioni di euro
+
+    Returns:
+        float: Importo in euro, None se assente
+    """
+    if valore is None or valore == '':
+        return None
+    if isinstance(valore, str):
+        numero = _NUMERO.search(valore.replace(' ', ''))
+        if numero is None:
+            return None
+        milioni = milioni or 'M' in valore[numero.end():]
+        valore = numero.group()
+        if numero.group('migliaia'):
+            valore = valore.replace('.', '')
+        valore = valore.replace(',', '.')
+    try:
+        importo = float(valore)
+    except (TypeError, ValueError):
+        return None
+    if importo != importo:
+        return None
+    return importo * 1_000_000 if milioni else importo
+
+
+def milioni_euro(valore):
+    """Importo in euro da un valore espresso in milioni di euro"""
+    return euro(valore, milioni=True)
+
+
+def conversione(intestazione):
+    """
+    Campo canonico e convertitore per un'intestazione di un modulo
+
+    Returns:
+        tuple: (campo, funzione di conversione), None se l'intestazione non è nota
+    """
+    campo = ALIAS.get(intestazione)
+    if campo is None:
+        return None
+    if intestazione == 'Fatturato (milioni €)':
+        return campo, milioni_euro
+    if campo in INTERI:
+        return campo, intero
+    if campo in DECIMALI:
+        return campo, euro
+    return campo, testo
+
+
+@lru_cache(maxsize=64)
+def _piano(intestazioni):
+    """Piano di conversione di una tupla di intestazioni, calcolato una volta per layout"""
+    piano = []
+    for intestazione in intestazioni:
+        convertita = conversione(intestazione)
+        if convertita is not None:
+            piano.append((intestazione, *convertita))
+    return tuple(piano)
+
+
+def piano_conversione(intestazioni):
+    """
+    Conversioni di tutte le intestazioni note di un layout
+
+    Returns:
+        tuple: Tuple (intestazione, campo, funzione di conversione)
+    """
+    return _piano(tuple(intestazioni))
+
+
+def _valore_in_uscita(intestazione, valore):
+    """Valore di un campo per un'intestazione di output, stringa vuota se assente"""
+    if valore is None:
+        return ''
+    if intestazione == 'Fatturato (milioni €)':
+        return round(valore / 1_000_000, 2)
+    return valore
+
+
+class Azienda:
+    """
+    Record canonico di un'azienda, con campi tipizzati e __slots__
+    """
+
+    __slots__ = CAMPI
+
+    def __init__(self, **valori):
+        """
+        Args:
+            **valori: Campi canonici (quelli non indicati restano None)
+        """
+        for campo in CAMPI:
+            setattr(self, campo, valori.pop(campo, None))
+        if valori:
+            raise TypeError(f"Campi sconosciuti: {', '.join(valori)}")
+
+    @classmethod
+    def da_riga(cls, riga, piano=None):
+        """
+        Converte una riga di un modulo (CSV, dizionario di uno scraper, ...)
+
+        Args:
+            riga (dict): Valori con le intestazioni del modulo
+            piano (list): Piano di conversione già calcolato per le stesse intestazioni
+
+        Returns:
+            Azienda: Record canonico; le intestazioni sconosciute sono ignorate
+        """
+        azienda = cls()
+        for intestazione, campo, converti in piano or piano_conversione(riga.keys()):
+            valore = converti(riga[intestazione])
+            if valore is not None:
+                setattr(azienda, campo, valore)
+        return azienda
+
+    def come_dizionario(self):
+        """
+        Returns:
+            dict: Campo canonico -> valore
+        """
+        return {campo: getattr(self, campo) for campo in CAMPI}
+
+    def come_riga(self, intestazioni=None):
+        """
+        Riga per i file di output
+
+        Args:
+            intestazioni (list): Intestazioni da produrre (default: INTESTAZIONI); quelle
+                                 dei moduli sono ricavate con ALIAS
+
+        Returns:
+            dict: Intestazione -> valore, stringa vuota per i campi assenti
+        """
+        intestazioni = intestazioni or [INTESTAZIONI[campo] for campo in CAMPI]
+        return {
+            intestazione: _valore_in_uscita(intestazione, getattr(self, ALIAS[intestazione]) if intestazione in ALIAS else None)
+            for intestazione in intestazioni
+        }
+
+    def __eq__(self, altra):
+        if not isinstance(altra, Azienda):
+            return NotImplemented
+        return all(getattr(self, campo) == getattr(altra, campo) for campo in CAMPI)
+
+    def __repr__(self):
+        valori = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in CAMPI if getattr(self, campo) is not None)
+        return f"Azienda({valori})"
+
+
+class BloccoAziende:
+    """
+    Molte aziende conservate per colonna
+
+    I campi interi e decimali sono array float64 (NaN per i valori assenti),
+    i campi di CATEGORICI sono codici int32 in un vocabolario di categorie
+    (-1 per i valori assenti), gli altri liste di stringhe.
+    """
+
+    __slots__ = ('lunghezza', 'colonne', 'categorie')
+
+    def __init__(self, lunghezza, colonne, categorie):
+        """
+        Args:
+            lunghezza (int): Numero di aziende
+            colonne (dict): Campo -> array NumPy o lista di valori
+            categorie (dict): Campo categorico -> lista delle categorie
+        """
+        self.lunghezza = lunghezza
+        self.colonne = colonne
+        self.categorie = categorie
+
+    @classmethod
+    def da_righe(cls, righe):
+        """
+        Costruisce un blocco da righe con le intestazioni di qualsiasi modulo
+
+        Args:
+            righe (iterable): Dizionari (righe di CSV, risultati degli scraper, ...)
+
+        Returns:
+            BloccoAziende: Blocco con tutti i campi canonici
+        """
+        valori = {campo: [] for campo in CAMPI}
+        lunghezza = 0
+
+        def converti_gruppo(gruppo):
+            # Righe consecutive con le stesse intestazioni sono convertite colonna per colonna
+            presenti = set()
+            for intestazione, campo, converti in piano_conversione(gruppo[0].keys()):
+                valori[campo].extend([converti(riga[intestazione]) for riga in gruppo])
+                presenti.add(campo)
+            for campo in CAMPI:
+                if campo not in presenti:
+                    valori[campo].extend([None] * len(gruppo))
+
+        gruppo = []
+        for riga in righe:
+            if gruppo and riga.keys() != gruppo[0].keys():
+                converti_gruppo(gruppo)
+                gruppo = []
+            gruppo.append(riga)
+            lunghezza += 1
+        if gruppo:
+            converti_gruppo(gruppo)
+        return cls.da_colonne(valori, lunghezza)
+
+    @classmethod
+    def da_aziende(cls, aziende):
+        """
+        Costruisce un blocco da record Azienda
+
+        Returns:
+            BloccoAziende: Blocco con le aziende nell'ordine dato
+        """
+        aziende = list(aziende)
+        return cls.da_colonne({campo: [getattr(a, campo) for a in aziende] for campo in CAMPI}, len(aziende))
+
+    @classmethod
+    def da_colonne(cls, valori, lunghezza):
+        """
+        Costruisce un blocco da liste di valori già convertiti
+
+        Args:
+            valori (dict): Campo -> lista di valori (i campi mancanti restano vuoti)
+            lunghezza (int): Numero di aziende
+
+        Returns:
+            BloccoAziende: Blocco codificato
+        """
+        colonne, categorie = {}, {}
+        for campo in CAMPI:
+            colonna = valori.get(campo)
+            if colonna is None:
+                colonna = [None] * lunghezza
+            if campo in INTERI or campo in DECIMALI:
+                colonne[campo] = np.array([np.nan if v is None else v for v in colonna], dtype=np.float64)
+            elif campo in CATEGORICI:
+                vocabolario = {}
+                codici = np.fromiter(
+                    (-1 if v is None else vocabolario.setdefault(v, len(vocabolario)) for v in colonna),
+                    dtype=np.int32, count=lunghezza
+                )
+                colonne[campo] = codici
+                categorie[campo] = list(vocabolario)
+            else:
+                colonne[campo] = list(colonna)
+        return cls(lunghezza, colonne, categorie)
+
+    @classmethod
+    def concatena(cls, blocchi):
+        """
+        Unisce più blocchi, riconciliando i vocabolari delle categorie
+
+        Returns:
+            BloccoAziende: Blocco con le aziende di tutti i blocchi, in ordine
+        """
+        blocchi = list(blocchi)
+        lunghezza = sum(len(blocco) for blocco in blocchi)
+        colonne, categorie = {}, {}
+        for campo in CAMPI:
+            if campo in CATEGORICI:
+                vocabolario = {}
+                parti = []
+                for blocco in blocchi:
+                    # Codice nel blocco -> codice nel vocabolario unito; l'ultima posizione mappa -1 su -1
+                    mappa = np.array(
+                        [vocabolario.setdefault(c, len(vocabolario)) for c in blocco.categorie[campo]] + [-1],
+                        dtype=np.int32
+                    )
+                    parti.append(mappa[blocco.colonne[campo]])
+                colonne[campo] = np.concatenate(parti) if parti else np.empty(0, dtype=np.int32)
+                categorie[campo] = list(vocabolario)
+            elif campo in INTERI or campo in DECIMALI:
+                parti = [blocco.colonne[campo] for blocco in blocchi]
+                colonne[campo] = np.concatenate(parti) if parti else np.empty(0)
+            else:
+                colonne[campo] = [valore for blocco in blocchi for valore in blocco.colonne[campo]]
+        return cls(lunghezza, colonne, categorie)
+
+    def __len__(self):
+        return self.lunghezza
+
+    def codice(self, campo, valore):
+        """
+        Codice di una categoria, per confronti vettoriali
+
+        Returns:
+            int: Codice della categoria, -2 se non compare nel blocco
+        """
+        try:
+            return self.categorie[campo].index(valore)
+        except ValueError:
+            return -2
+
+    def codici(self, campo):
+        """
+        Returns:
+            numpy.ndarray: Codici int32 di un campo categorico (-1 per i valori assenti)
+        """
+        return self.colonne[campo]
+
+    def colonna(self, campo):
+        """
+        Valori di un campo
+
+        Returns:
+            numpy.ndarray: Array float64 per i campi numerici, array di oggetti per gli altri
+                           (None per i valori assenti)
+        """
+        valori = self.colonne[campo]
+        if campo in CATEGORICI:
+            return np.array(self.categorie[campo] + [None], dtype=object)[valori]
+        if campo in INTERI or campo in DECIMALI:
+            return valori
+        return np.array(valori, dtype=object)
+
+    def filtra(self, maschera):
+        """
+        Aziende selezionate da una maschera booleana o da un array di indici
+
+        Returns:
+            BloccoAziende: Nuovo blocco con le stesse categorie
+        """
+        indici = np.flatnonzero(maschera) if np.asarray(maschera).dtype == bool else np.asarray(maschera)
+        colonne = {}
+        for campo, valori in self.colonne.items():
+            if isinstance(valori, np.ndarray):
+                colonne[campo] = valori[indici]
+            else:
+                colonne[campo] = [valori[i] for i in indici]
+        return BloccoAziende(len(indici), colonne, self.categorie)
+
+    def _valore(self, campo, indice):
+        """Valore Python di un campo per una posizione, None se assente"""
+        valore = self.colonne[campo][indice]
+        if campo in CATEGORICI:
+            return None if valore < 0 else self.categorie[campo][valore]
+        if campo in INTERI:
+            return None if valore != valore else int(valore)
+        if campo in DECIMALI:
+            return None if valore != valore else float(valore)
+        return valore
+
+    def __getitem__(self, indice):
+        if indice < 0:
+            indice += self.lunghezza
+        if not 0 <= indice < self.lunghezza:
+            raise IndexError(indice)
+        return Azienda(**{campo: self._valore(campo, indice) for campo in CAMPI})
+
+    def __iter__(self):
+        for indice in range(self.lunghezza):
+            yield self[indice]
+
+    def righe(self, intestazioni=None):
+        """
+        Righe per le destinazioni e gli scrittori di file
+
+        Args:
+            intestazioni (list): Intestazioni da produrre (default: INTESTAZIONI)
+
+        Yields:
+            dict: Intestazione -> valore
+        """
+        intestazioni = intestazioni or [INTESTAZIONI[campo] for campo in CAMPI]
+        decodificate = {}
+        liste = []
+        for intestazione in intestazioni:
+            campo = ALIAS.get(intestazione)
+            if campo is None:
+                liste.append([''] * self.lunghezza)
+                continue
+            if campo not in decodificate:
+                decodificate[campo] = self._valori_python(campo)
+            liste.append([_valore_in_uscita(intestazione, valore) for valore in decodificate[campo]])
+        for valori in zip(*liste):
+            yield dict(zip(intestazioni, valori))
+
+    def _valori_python(self, campo):
+        """
+        Valori Python di un campo per tutte le aziende
+
+        Returns:
+            list: Valori, None per quelli assenti
+        """
+        valori = self.colonne[campo]
+        if campo in CATEGORICI:
+            categorie = self.categorie[campo] + [None]
+            return [categorie[codice] for codice in valori.tolist()]
+        if campo in INTERI:
+            return [None if v != v else int(v) for v in valori.tolist()]
+        if campo in DECIMALI:
+            return [None if v != v else v for v in valori.tolist()]
+        return list(valori)
+
+    def a_pandas(self):
+        """
+        DataFrame con le intestazioni canoniche
+
+        I campi categorici diventano colonne category senza ricodifica, gli
+        interi colonne Int64 con valori nulli.
+
+        Returns:
+            pandas.DataFrame: Una riga per azienda
+        """
+        import pandas as pd
+
+        dati = {}
+        for campo in CAMPI:
+            valori = self.colonne[campo]
+            if campo in CATEGORICI:
+                serie = pd.Categorical.from_codes(valori, categories=pd.Index(self.categorie[campo], dtype=object))
+            elif campo in INTERI:
+                serie = pd.array(np.where(np.isnan(valori), 0, valori).astype(np.int64), dtype='Int64')
+                serie[np.isnan(valori)] = pd.NA
+            else:
+                serie = valori
+            dati[INTESTAZIONI[campo]] = serie
+        return pd.DataFrame(dati)
+
+    def a_arrow(self):
+        """
+        Tabella Arrow con colonne a dizionario per i campi categorici
+
+        Returns:
+            pyarrow.Table: Tabella con le intestazioni canoniche
+        """
+        from pmi_stream import _pyarrow
+
+        pa, _ = _pyarrow()
+        array = []
+        for campo in CAMPI:
+            valori = self.colonne[campo]
+            if campo in CATEGORICI:
+                indici = pa.array(valori, mask=valori < 0, type=pa.int32())
+                array.append(pa.DictionaryArray.from_arrays(indici, pa.array(self.categorie[campo], type=pa.string())))
+            elif campo in INTERI:
+                array.append(pa.array(valori, mask=np.isnan(valori)).cast(pa.int32()))
+            elif campo in DECIMALI:
+                array.append(pa.array(valori, mask=np.isnan(valori)))
+            else:
+                array.append(pa.array(valori, type=pa.string()))
+        return pa.Table.from_arrays(array, names=[INTESTAZIONI[campo] for campo in CAMPI])
@@ -5,12 +5,15 @@
 PMI Generator - Generazione di dati di esempio di PMI italiane
 """
 
-import csv
+import json
 import logging
+import math
 import os
 import random
 from datetime import datetime
 
+from pmi_destinazione import DestinazioneCSV, DestinazioneParquet, DestinazioneSQLite
+
 # Configurazione del logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,18 +31,40 @@ class PMIGenerator:
     Classe per generare dati di esempio di PMI italiane
     """
     
-    def __init__(self, output_type="csv", db_path="pmi_data.db", csv_path="pmi_data.csv"):
+    def __init__(self, output_type="csv", db_path="pmi_data.db", csv_path="pmi_data.csv",
+                 parquet_path="pmi_data.parquet", parquet_chunk_size=10000, batch_size=1000,
+                 seed=None, riprendi=False, checkpoint_every=1000, checkpoint_path=None):
         """
         Inizializza il generatore
         
         Args:
-            output_type (str): Tipo di output (csv o db)
+            output_type (str): Tipo di output (csv, parquet o db)
             db_path (str): Percorso del database SQLite
             csv_path (str): Percorso del file CSV
+            parquet_path (str): Percorso del file Parquet
+            parquet_chunk_size (int): Righe accumulate per ogni row group Parquet
+            batch_size (int): Righe accumulate prima di ogni scrittura CSV o SQLite
+            seed (int): Seme del generatore casuale
+            riprendi (bool): Riprende il CSV esistente dall'ultimo checkpoint invece di sovrascriverlo
+            checkpoint_every (int): Righe tra due checkpoint (0: nessun checkpoint)
+            checkpoint_path (str): File di checkpoint (default: <csv_path>.checkpoint.json)
         """
         self.output_type = output_type
         self.db_path = db_path
         self.csv_path = csv_path
+        self.parquet_path = parquet_path
+        self.parquet_chunk_size = parquet_chunk_size
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_path = checkpoint_path or f"{csv_path}.checkpoint.json"
+        self.rng = random.Random(seed)
+        
+        # Stato della generazione, salvato nei checkpoint
+        self.righe_scritte = 0
+        self.totale = 0
+        self.offset = 0
+        
+        self.colonne = ['Nome', 'Email', 'Telefono', 'Descrizione', 'Sito Web', 'Data Scraping', 'Indirizzo', 'Settore']
         
         # Dati di esempio per la generazione
         self.nomi_aziende = [
@@ -104,42 +129,161 @@ class PMIGenerator:
             "Agricoltura", "Manifatturiero", "Immobiliare", "Finanziario", "Assicurativo"
         ]
         
+        # Permutazione dello spazio prefisso x secondo nome per nomi unici:
+        # il nome della riga k dipende solo da k, quindi aggiungere righe
+        # non richiede di rileggere quelle già scritte
+        self.capacita_nomi = len(self.nomi_aziende) * len(self.secondi_nomi)
+        self.moltiplicatore_nomi = self._scegli_moltiplicatore()
+        self.scostamento_nomi = self.rng.randrange(self.capacita_nomi)
+        
+        if riprendi and output_type != "csv":
+            raise ValueError("La ripresa da checkpoint è disponibile solo per l'output CSV")
+        
         # Inizializza l'output
         if output_type == "csv":
-            self._init_csv()
+            if riprendi:
+                self._riprendi_csv()
+            else:
+                self._init_csv()
+        elif output_type == "parquet":
+            self._init_parquet()
+        elif output_type == "db":
+            self._init_db()
+        else:
+            raise ValueError(f"Tipo di output non supportato: {output_type}")
+    
+    def _scegli_moltiplicatore(self):
+        """
+        Sceglie un moltiplicatore coprimo con lo spazio dei nomi
+        
+        Returns:
+            int: Moltiplicatore della permutazione affine
+        """
+        while True:
+            moltiplicatore = self.rng.randrange(1, self.capacita_nomi)
+            if math.gcd(moltiplicatore, self.capacita_nomi) == 1:
+                return moltiplicatore
     
     def _init_csv(self):
         """Inizializza il file CSV"""
         try:
-            # Controlla se il file esiste già
-            file_exists = os.path.isfile(self.csv_path)
-            
-            self.csv_file = open(self.csv_path, 'w', newline='', encoding='utf-8')
-            self.csv_writer = csv.writer(self.csv_file)
-            
-            # Scrive l'header
-            self.csv_writer.writerow(['Nome', 'Email', 'Telefono', 'Descrizione', 'Sito Web', 'Data Scraping', 'Indirizzo', 'Settore'])
+            self.destinazione = DestinazioneCSV(
+                self.csv_path, self.colonne, sovrascrivi=True, batch_size=self.batch_size
+            )
+            # Il checkpoint di una corsa precedente non descrive più il file appena troncato
+            try:
+                os.remove(self.checkpoint_path)
+            except FileNotFoundError:
+                pass
             logger.info(f"File CSV inizializzato: {self.csv_path}")
         except IOError as e:
             logger.error(f"Errore nell'inizializzazione del file CSV: {e}")
             raise
     
-    def _save_to_csv(self, data):
+    def _riprendi_csv(self):
+        """
+        Riapre il file CSV nello stato dell'ultimo checkpoint
+        
+        Le righe scritte dopo il checkpoint (ad esempio prima di un'interruzione)
+        vengono troncate e rigenerate a partire dallo stesso stato.
+        """
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Nessun checkpoint trovato: {self.checkpoint_path}") from None
+        
+        self.righe_scritte = checkpoint['righe']
+        self.totale = checkpoint['totale']
+        self.offset = checkpoint['offset']
+        self.moltiplicatore_nomi = checkpoint['moltiplicatore_nomi']
+        self.scostamento_nomi = checkpoint['scostamento_nomi']
+        versione, stato, gauss = checkpoint['stato_rng']
+        self.rng.setstate((versione, tuple(stato), gauss))
+        
+        # Un file più corto del checkpoint non è quello che il checkpoint descrive:
+        # "troncarlo" all'offset lo riempirebbe di byte nulli
+        dimensione = os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+        if self.offset > dimensione:
+            raise ValueError(
+                f"Il checkpoint {self.checkpoint_path} ({self.righe_scritte} righe, offset {self.offset}) "
+                f"non corrisponde a {self.csv_path} ({dimensione} byte)"
+            )
+        
+        try:
+            self.destinazione = DestinazioneCSV(
+                self.csv_path, self.colonne, riprendi_da=self.offset, batch_size=self.batch_size
+            )
+            logger.info(f"Ripresa da checkpoint: {self.righe_scritte} righe in {self.csv_path}")
+        except IOError as e:
+            logger.error(f"Errore nella riapertura del file CSV: {e}")
+            raise
+    
+    def _salva_checkpoint(self):
+        """
+        Salva righe scritte, offset del file e stato del generatore casuale
+        
+        Le righe in attesa vengono prima scritte e portate su disco e il
+        checkpoint sostituito in modo atomico, così un'interruzione non lascia
+        mai un checkpoint parziale.
         """
-        Salva i dati nel file CSV
+        self.offset = self.destinazione.sincronizza()
+        
+        temporaneo = f"{self.checkpoint_path}.tmp"
+        with open(temporaneo, 'w', encoding='utf-8') as f:
+            json.dump({
+                'csv_path': self.csv_path,
+                'righe': self.righe_scritte,
+                'totale': self.totale,
+                'offset': self.offset,
+                'moltiplicatore_nomi': self.moltiplicatore_nomi,
+                'scostamento_nomi': self.scostamento_nomi,
+                'stato_rng': self.rng.getstate()
+            }, f)
+        os.replace(temporaneo, self.checkpoint_path)
+        logger.debug(f"Checkpoint salvato: {self.righe_scritte} righe")
+    
+    def righe_mancanti(self):
+        """
+        Righe ancora da generare per completare la corsa ripresa
+        
+        Returns:
+            int: Differenza tra il totale richiesto e le righe scritte
+        """
+        return max(self.totale - self.righe_scritte, 0)
+    
+    def _save(self, data):
+        """
+        Accoda i dati di un'azienda alla destinazione, che li scrive a blocchi
         
         Args:
             data (dict): Dizionario contenente i dati dell'azienda
         """
+        self.destinazione.scrivi([dict(zip(self.colonne, (
+            data['nome'], data['email'], data['telefono'],
+            data['descrizione'], data['sito_web'],
+            data['data_scraping'], data['indirizzo'], data['settore']
+        )))])
+    
+    def _init_parquet(self):
+        """Inizializza il file Parquet"""
         try:
-            self.csv_writer.writerow([
-                data['nome'], data['email'], data['telefono'], 
-                data['descrizione'], data['sito_web'], 
-                data['data_scraping'], data['indirizzo'], data['settore']
-            ])
-            logger.debug(f"Dati salvati nel CSV per: {data['nome']}")
-        except IOError as e:
-            logger.error(f"Errore nel salvataggio dei dati nel CSV: {e}")
+            self.destinazione = DestinazioneParquet(
+                self.parquet_path, self.colonne, batch_size=self.parquet_chunk_size
+            )
+            logger.info(f"File Parquet inizializzato: {self.parquet_path}")
+        except (IOError, ImportError) as e:
+            logger.error(f"Errore nell'inizializzazione del file Parquet: {e}")
+            raise
+    
+    def _init_db(self):
+        """Inizializza il database SQLite"""
+        try:
+            self.destinazione = DestinazioneSQLite(self.db_path, self.colonne, batch_size=self.batch_size)
+            logger.info(f"Database SQLite inizializzato: {self.db_path}")
+        except Exception as e:
+            logger.error(f"Errore nell'inizializzazione del database SQLite: {e}")
+            raise
     
     def generate_company_data(self):
         """
@@ -148,43 +292,47 @@ class PMIGenerator:
         Returns:
             dict: Dizionario contenente i dati dell'azienda
         """
-        # Genera un nome casuale
-        nome_base = random.choice(self.nomi_aziende)
-        secondo_nome = random.choice(self.secondi_nomi)
+        # Genera un nome unico nel dataset; esaurito lo spazio si aggiunge il numero del giro
+        giro, posizione = divmod(self.righe_scritte, self.capacita_nomi)
+        indice = (posizione * self.moltiplicatore_nomi + self.scostamento_nomi) % self.capacita_nomi
+        nome_base = self.nomi_aziende[indice // len(self.secondi_nomi)]
+        secondo_nome = self.secondi_nomi[indice % len(self.secondi_nomi)]
         nome = nome_base + secondo_nome
+        if giro:
+            nome = f"{nome} {giro + 1}"
         
         # Genera un nome normalizzato per email e sito web
         nome_normalizzato = nome.lower().replace(' ', '').replace("'", "").replace('"', '')
         
         # Genera altri dati casuali
-        citta = random.choice(self.citta)
-        via = random.choice(self.vie)
-        civico = random.randint(1, 200)
-        cap = f"{random.randint(10, 99)}0{random.randint(10, 99)}"
+        citta = self.rng.choice(self.citta)
+        via = self.rng.choice(self.vie)
+        civico = self.rng.randint(1, 200)
+        cap = f"{self.rng.randint(10, 99)}0{self.rng.randint(10, 99)}"
         
         email = f"info@{nome_normalizzato}.it"
-        if random.random() < 0.3:  # 30% di probabilità di avere un'email personale
-            email = f"{nome_normalizzato}@{random.choice(self.domini)}"
+        if self.rng.random() < 0.3:  # 30% di probabilità di avere un'email personale
+            email = f"{nome_normalizzato}@{self.rng.choice(self.domini)}"
         
-        telefono = f"+39 {random.randint(300, 399)} {random.randint(1000000, 9999999)}"
-        if random.random() < 0.5:  # 50% di probabilità di avere un numero fisso
-            telefono = f"+39 0{random.randint(10, 99)} {random.randint(100000, 999999)}"
+        telefono = f"+39 {self.rng.randint(300, 399)} {self.rng.randint(1000000, 9999999)}"
+        if self.rng.random() < 0.5:  # 50% di probabilità di avere un numero fisso
+            telefono = f"+39 0{self.rng.randint(10, 99)} {self.rng.randint(100000, 999999)}"
         
         sito_web = f"https://www.{nome_normalizzato}.it"
-        if random.random() < 0.4:  # 40% di probabilità di non avere un sito web
+        if self.rng.random() < 0.4:  # 40% di probabilità di non avere un sito web
             sito_web = ""
         
-        settore = random.choice(self.settori)
+        settore = self.rng.choice(self.settori)
         
         # Genera una descrizione casuale
         descrizioni = [
-            f"Dal {random.randint(1950, 2020)} offriamo servizi di qualità nel settore {settore.lower()}. La nostra azienda è specializzata in soluzioni innovative per clienti esigenti.",
-            f"Azienda leader nel settore {settore.lower()} con sede a {citta}. Offriamo prodotti e servizi di alta qualità dal {random.randint(1950, 2020)}.",
-            f"La nostra missione è fornire il miglior servizio possibile nel settore {settore.lower()}. Siamo un'azienda a conduzione familiare con oltre {random.randint(5, 50)} anni di esperienza.",
+            f"Dal {self.rng.randint(1950, 2020)} offriamo servizi di qualità nel settore {settore.lower()}. La nostra azienda è specializzata in soluzioni innovative per clienti esigenti.",
+            f"Azienda leader nel settore {settore.lower()} con sede a {citta}. Offriamo prodotti e servizi di alta qualità dal {self.rng.randint(1950, 2020)}.",
+            f"La nostra missione è fornire il miglior servizio possibile nel settore {settore.lower()}. Siamo un'azienda a conduzione familiare con oltre {self.rng.randint(5, 50)} anni di esperienza.",
             f"Specialisti nel settore {settore.lower()} con un team di professionisti qualificati. Serviamo clienti in tutta la provincia di {citta} e oltre.",
-            f"Innovazione e tradizione si incontrano nella nostra azienda attiva nel settore {settore.lower()}. Fondata nel {random.randint(1950, 2020)}, siamo cresciuti fino a diventare un punto di riferimento a {citta}."
+            f"Innovazione e tradizione si incontrano nella nostra azienda attiva nel settore {settore.lower()}. Fondata nel {self.rng.randint(1950, 2020)}, siamo cresciuti fino a diventare un punto di riferimento a {citta}."
         ]
-        descrizione = random.choice(descrizioni)
+        descrizione = self.rng.choice(descrizioni)
         
         indirizzo = f"{via}, {civico} - {cap} {citta}"
         
@@ -203,19 +351,30 @@ class PMIGenerator:
         """
         Genera dati per più aziende
         
+        Con l'output CSV viene salvato un checkpoint ogni checkpoint_every righe
+        e al termine, così una corsa interrotta può essere ripresa e un file
+        completato può essere esteso con nuove righe.
+        
         Args:
-            count (int): Numero di aziende da generare
+            count (int): Numero di aziende da generare (in aggiunta a quelle già scritte)
         """
+        checkpoint = self.output_type == "csv" and self.checkpoint_every > 0
         try:
             logger.info(f"Generazione di {count} aziende...")
+            self.totale = self.righe_scritte + count
             
             for i in range(count):
                 if i % 100 == 0:
                     logger.info(f"Generati dati per {i} aziende...")
                 
-                company_data = self.generate_company_data()
-                self._save_to_csv(company_data)
+                self._save(self.generate_company_data())
+                self.righe_scritte += 1
                 
+                if checkpoint and self.righe_scritte % self.checkpoint_every == 0:
+                    self._salva_checkpoint()
+            
+            if checkpoint:
+                self._salva_checkpoint()
             logger.info(f"Generazione completata: {count} aziende")
                 
         except Exception as e:
@@ -226,9 +385,8 @@ class PMIGenerator:
     def close(self):
         """Chiude i file aperti"""
         try:
-            if self.output_type == "csv":
-                self.csv_file.close()
-            logger.info("File chiusi correttamente")
+            self.destinazione.close()
+            logger.info(f"File chiusi correttamente ({self.destinazione.righe_scritte} righe scritte)")
         except Exception as e:
             logger.error(f"Errore nella chiusura dei file: {e}")
 
@@ -238,9 +396,22 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='PMI Generator - Generazione di dati di esempio di PMI italiane')
-    parser.add_argument('--output', choices=['csv'], default='csv', help='Formato di output (csv)')
+    parser.add_argument('--output', choices=['csv', 'parquet', 'db'], default='csv',
+                        help='Formato di output (csv, parquet o db SQLite)')
     parser.add_argument('--count', type=int, default=1000, help='Numero di aziende da generare')
     parser.add_argument('--csv-path', default='pmi_data.csv', help='Percorso del file CSV')
+    parser.add_argument('--parquet-path', default='pmi_data.parquet', help='Percorso del file Parquet')
+    parser.add_argument('--db-path', default='pmi_data.db', help='Percorso del database SQLite')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Righe accumulate prima di ogni scrittura')
+    parser.add_argument('--seed', type=int, help='Seme per una generazione riproducibile')
+    parser.add_argument('--checkpoint-every', type=int, default=1000,
+                        help='Righe tra due checkpoint del file CSV (0: nessun checkpoint)')
+    parser.add_argument('--checkpoint-path', help='File di checkpoint (default: <csv-path>.checkpoint.json)')
+    ripresa = parser.add_mutually_exclusive_group()
+    ripresa.add_argument('--resume', action='store_true',
+                         help="Riprende una generazione CSV interrotta dall'ultimo checkpoint")
+    ripresa.add_argument('--append', type=int, metavar='N',
+                         help='Aggiunge N aziende a un CSV con checkpoint, mantenendo i nomi unici')
     
     args = parser.parse_args()
     
@@ -248,16 +419,29 @@ def main():
         # Crea e configura il generatore
         generator = PMIGenerator(
             output_type=args.output,
-            csv_path=args.csv_path
+            csv_path=args.csv_path,
+            parquet_path=args.parquet_path,
+            db_path=args.db_path,
+            batch_size=args.batch_size,
+            seed=args.seed,
+            riprendi=args.resume or args.append is not None,
+            checkpoint_every=args.checkpoint_every,
+            checkpoint_path=args.checkpoint_path
         )
         
         # Genera i dati
-        generator.generate_multiple_companies(args.count)
+        if args.resume:
+            count = generator.righe_mancanti()
+        elif args.append is not None:
+            count = args.append
+        else:
+            count = args.count
+        generator.generate_multiple_companies(count)
         
         logger.info("Generazione dati completata con successo")
         
     except KeyboardInterrupt:
-        logger.info("Generazione interrotta dall'utente")
+        logger.info("Generazione interrotta dall'utente (riprendi con --resume)")
     except Exception as e:
         logger.error(f"Errore durante l'esecuzione: {e}")
 
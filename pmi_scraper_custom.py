@@ -5,13 +5,15 @@
 PMI Scraper Custom - Ricerca personalizzata di contatti PMI italiane
 """
 
-import csv
 import json
 import logging
-import os
 import random
 import time
 from datetime import datetime
+from types import MappingProxyType
+
+import pmi_riferimenti as riferimenti
+from pmi_destinazione import DestinazioneCSV, DestinazioneSQLite
 
 # Configurazione del logging
 logging.basicConfig(
@@ -25,42 +27,75 @@ logging.basicConfig(
 
 logger = logging.getLogger("PMI_Scraper_Custom")
 
+# Dati di esempio per la generazione, creati una sola volta
+SETTORI = (
+    "Tecnologia", "Manifatturiero", "Servizi", "Commercio", "Edilizia",
+    "Ristorazione", "Turismo", "Agricoltura", "Trasporti", "Sanità"
+)
+
+# Province italiane
+PROVINCE = (
+    "Milano", "Roma", "Napoli", "Torino", "Palermo", "Genova", "Bologna",
+    "Firenze", "Bari", "Catania", "Venezia", "Verona", "Padova", "Brescia"
+)
+
+# Prefissi nomi aziende per settore
+PREFISSI_PER_SETTORE = MappingProxyType({
+    "Tecnologia": ("Tech", "Digital", "Soft", "Net", "Web", "Cyber", "Data", "Smart", "App"),
+    "Manifatturiero": ("Mec", "Ind", "Prod", "Metal", "Plast", "Tec", "Fabbrica", "Lav"),
+    "Servizi": ("Serv", "Consult", "Pro", "Support", "Assist", "Help", "Care", "Gest"),
+    "Commercio": ("Market", "Shop", "Store", "Emporio", "Ingrosso", "Distrib", "Import", "Export"),
+    "Edilizia": ("Costruzioni", "Edil", "Build", "Casa", "Immobil", "Progett", "Arch", "Ristrutt"),
+    "Ristorazione": ("Food", "Gusto", "Sapore", "Cucina", "Delizie", "Chef", "Ristoro", "Tavola"),
+    "Turismo": ("Travel", "Tour", "Visit", "Holiday", "Vacanze", "Trip", "Journey", "Viaggi"),
+    "Agricoltura": ("Agri", "Farm", "Terra", "Natura", "Bio", "Eco", "Green", "Coltura"),
+    "Trasporti": ("Trans", "Log", "Move", "Ship", "Delivery", "Express", "Trasfer", "Spedizioni"),
+    "Sanità": ("Med", "Health", "Care", "Salute", "Vita", "Benessere", "Clinic", "Pharma")
+})
+
+PREFISSI_GENERICI = ("Azienda", "Impresa", "Società")
+
+# Suffissi comuni per nomi aziende
+SUFFISSI = ("Srl", "Spa", "Snc", "Sas", "Srls", "Group", "Italia", "International")
+
+# Dimensioni aziende
+DIMENSIONI = MappingProxyType({
+    "micro": {"dipendenti": (1, 9), "fatturato": (0.1, 2)},
+    "piccola": {"dipendenti": (10, 49), "fatturato": (2, 10)},
+    "media": {"dipendenti": (50, 249), "fatturato": (10, 50)},
+    "grande": {"dipendenti": (250, 1000), "fatturato": (50, 500)}
+})
+
+# Colonne dei risultati, nell'ordine di output
+COLONNE = [
+    'Ragione Sociale', 'Settore', 'Email', 'Telefono', 'Indirizzo', 'Città',
+    'Provincia', 'CAP', 'Sito Web', 'Descrizione', 'Dipendenti', 'Fatturato',
+    'Stato', 'Data Ultimo Contatto', 'Note'
+]
+
 class PMIScraperCustom:
     """
     Classe per la ricerca personalizzata di contatti PMI italiane
     """
     
-    def __init__(self, csv_path="pmi_data.csv"):
+    def __init__(self, csv_path="pmi_data.csv", db_path=None):
         """
         Inizializza lo scraper personalizzato
         
         Args:
             csv_path (str): Percorso del file CSV
+            db_path (str): Database SQLite di pmi_database da usare al posto del CSV
         """
         self.csv_path = csv_path
-        self.csv_file = None
-        self.csv_writer = None
-        
-        # Verifica se il file esiste già
-        file_exists = os.path.isfile(self.csv_path)
+        self.db_path = db_path
         
-        # Apri il file in modalità append
-        self.csv_file = open(self.csv_path, 'a', newline='', encoding='utf-8')
-        self.csv_writer = csv.DictWriter(
-            self.csv_file, 
-            fieldnames=[
-                'Ragione Sociale', 'Settore', 'Email', 'Telefono', 'Indirizzo', 'Città', 
-                'Provincia', 'CAP', 'Sito Web', 'Descrizione', 'Dipendenti', 'Fatturato',
-                'Stato', 'Data Ultimo Contatto', 'Note'
-            ]
-        )
-        
-        # Scrivi l'intestazione solo se il file è nuovo
-        if not file_exists or os.path.getsize(self.csv_path) == 0:
-            self.csv_writer.writeheader()
-            logger.info(f"Creato nuovo file CSV: {self.csv_path}")
+        if db_path:
+            self.destinazione = DestinazioneSQLite(db_path, COLONNE, intervallo_flush=0)
+            logger.info(f"Aggiunta al database SQLite: {db_path}")
         else:
-            logger.info(f"Aggiunta a file CSV esistente: {self.csv_path}")
+            # Il file viene aperto in append; l'intestazione è scritta solo se il file è nuovo
+            self.destinazione = DestinazioneCSV(csv_path, COLONNE, intervallo_flush=0)
+            logger.info(f"Aggiunta al file CSV: {csv_path}")
     
     def search_companies(self, location=None, sector=None, size=None, count=10):
         """
@@ -80,55 +115,22 @@ class PMIScraperCustom:
         # In un'implementazione reale, qui ci sarebbe una chiamata API o web scraping
         # Per questa demo, generiamo dati simulati basati sui criteri
         
-        # Dati di esempio per la generazione
-        settori = [
-            "Tecnologia", "Manifatturiero", "Servizi", "Commercio", "Edilizia",
-            "Ristorazione", "Turismo", "Agricoltura", "Trasporti", "Sanità"
-        ]
+        settori = SETTORI
         
         # Usa il settore specificato o scegli casualmente
         if sector:
             settori_filtrati = [s for s in settori if sector.lower() in s.lower()]
             settori = settori_filtrati if settori_filtrati else settori
         
-        # Province italiane
-        province = [
-            "Milano", "Roma", "Napoli", "Torino", "Palermo", "Genova", "Bologna",
-            "Firenze", "Bari", "Catania", "Venezia", "Verona", "Padova", "Brescia"
-        ]
+        province = PROVINCE
         
         # Usa la location specificata o scegli casualmente
         if location:
             province_filtrate = [p for p in province if location.lower() in p.lower()]
             province = province_filtrate if province_filtrate else province
         
-        # Prefissi nomi aziende per settore
-        prefissi_per_settore = {
-            "Tecnologia": ["Tech", "Digital", "Soft", "Net", "Web", "Cyber", "Data", "Smart", "App"],
-            "Manifatturiero": ["Mec", "Ind", "Prod", "Metal", "Plast", "Tec", "Fabbrica", "Lav"],
-            "Servizi": ["Serv", "Consult", "Pro", "Support", "Assist", "Help", "Care", "Gest"],
-            "Commercio": ["Market", "Shop", "Store", "Emporio", "Ingrosso", "Distrib", "Import", "Export"],
-            "Edilizia": ["Costruzioni", "Edil", "Build", "Casa", "Immobil", "Progett", "Arch", "Ristrutt"],
-            "Ristorazione": ["Food", "Gusto", "Sapore", "Cucina", "Delizie", "Chef", "Ristoro", "Tavola"],
-            "Turismo": ["Travel", "Tour", "Visit", "Holiday", "Vacanze", "Trip", "Journey", "Viaggi"],
-            "Agricoltura": ["Agri", "Farm", "Terra", "Natura", "Bio", "Eco", "Green", "Coltura"],
-            "Trasporti": ["Trans", "Log", "Move", "Ship", "Delivery", "Express", "Trasfer", "Spedizioni"],
-            "Sanità": ["Med", "Health", "Care", "Salute", "Vita", "Benessere", "Clinic", "Pharma"]
-        }
-        
-        # Suffissi comuni per nomi aziende
-        suffissi = ["Srl", "Spa", "Snc", "Sas", "Srls", "Group", "Italia", "International"]
-        
-        # Dimensioni aziende
-        dimensioni = {
-            "micro": {"dipendenti": (1, 9), "fatturato": (0.1, 2)},
-            "piccola": {"dipendenti": (10, 49), "fatturato": (2, 10)},
-            "media": {"dipendenti": (50, 249), "fatturato": (10, 50)},
-            "grande": {"dipendenti": (250, 1000), "fatturato": (50, 500)}
-        }
-        
         # Filtra per dimensione se specificata
-        dimensioni_filtrate = [size] if size and size in dimensioni else list(dimensioni.keys())
+        dimensioni_filtrate = [size] if size and size in DIMENSIONI else list(DIMENSIONI)
         
         # Genera i risultati
         results = []
@@ -140,24 +142,23 @@ class PMIScraperCustom:
             provincia = random.choice(province)
             
             # Genera un nome aziendale plausibile basato sul settore
-            prefissi = prefissi_per_settore.get(settore, ["Azienda", "Impresa", "Società"])
+            prefissi = PREFISSI_PER_SETTORE.get(settore, PREFISSI_GENERICI)
             nome_base = random.choice(prefissi) + random.choice([""]) + random.choice([""]) + random.choice([" ", ""])
             nome_base += random.choice([""]) + random.choice([""]) + random.choice([""]) + random.choice([" ", ""])
             
             # Aggiungi un suffisso casuale
-            nome = nome_base + " " + random.choice(suffissi)
+            nome = nome_base + " " + random.choice(SUFFISSI)
             
             # Scegli una dimensione casuale tra quelle filtrate
             dim_key = random.choice(dimensioni_filtrate)
-            dim_range = dimensioni[dim_key]
+            dim_range = DIMENSIONI[dim_key]
             
             # Genera il numero di dipendenti e il fatturato in base alla dimensione
             dipendenti = random.randint(dim_range["dipendenti"][0], dim_range["dipendenti"][1])
             fatturato = round(random.uniform(dim_range["fatturato"][0], dim_range["fatturato"][1]), 1)
             
             # Genera un indirizzo plausibile
-            vie = ["Via Roma", "Via Milano", "Via Napoli", "Via Torino", "Via Garibaldi", "Via Dante", "Via Mazzini"]
-            indirizzo = f"{random.choice(vie)}, {random.randint(1, 100)}"
+            indirizzo = f"{random.choice(riferimenti.VIE_CUSTOM)}, {random.randint(1, 100)}"
             cap = f"{random.randint(10, 99)}0{random.randint(10, 99)}"
             
             # Genera un'email aziendale plausibile
@@ -208,7 +209,7 @@ class PMIScraperCustom:
     
     def save_results(self, results):
         """
-        Salva i risultati nel file CSV
+        Salva i risultati nel file CSV o nel database, in un unico blocco
         
         Args:
             results (list): Lista di dizionari contenenti i dati delle aziende
@@ -216,25 +217,22 @@ class PMIScraperCustom:
         Returns:
             int: Numero di aziende salvate
         """
-        count = 0
-        for company in results:
-            try:
-                self.csv_writer.writerow(company)
-                count += 1
-            except Exception as e:
-                logger.error(f"Errore nel salvataggio dell'azienda {company.get('Ragione Sociale')}: {e}")
+        try:
+            self.destinazione.scrivi(results)
+            self.destinazione.flush()  # Assicura che i dati siano scritti su disco
+        except Exception as e:
+            logger.error(f"Errore nel salvataggio di {len(results)} aziende: {e}")
+            return 0
         
-        self.csv_file.flush()  # Assicura che i dati siano scritti su disco
-        logger.info(f"Salvate {count} aziende nel file CSV")
-        return count
+        logger.info(f"Salvate {len(results)} aziende in {self.db_path or self.csv_path}")
+        return len(results)
     
     def close(self):
         """
         Chiude i file aperti
         """
         try:
-            if self.csv_file:
-                self.csv_file.close()
+            self.destinazione.close()
             logger.info("File chiusi correttamente")
         except Exception as e:
             logger.error(f"Errore nella chiusura dei file: {e}")
@@ -286,12 +284,13 @@ def main():
     parser.add_argument('--size', choices=['micro', 'piccola', 'media', 'grande'], help='Dimensione dell\'azienda')
     parser.add_argument('--count', type=int, default=10, help='Numero massimo di risultati')
     parser.add_argument('--csv-path', default='pmi_data.csv', help='Percorso del file CSV')
+    parser.add_argument('--db-path', help='Database SQLite in cui salvare i risultati al posto del CSV')
     
     args = parser.parse_args()
     
     try:
         # Crea e configura lo scraper
-        scraper = PMIScraperCustom(csv_path=args.csv_path)
+        scraper = PMIScraperCustom(csv_path=args.csv_path, db_path=args.db_path)
         
         # Esegui la ricerca
         results = scraper.search_companies(
@@ -5,85 +5,103 @@
 PMI Scraper - Script per raccogliere contatti reali di PMI italiane
 """
 
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-import time
-import random
-import csv
-import os
+import asyncio
 import re
+import time
+from functools import partial
 from urllib.parse import urljoin
 from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
+from pmi_async import MotoreAsincrono
+from pmi_cache import CacheHTTP
+from pmi_dedup import IndiceDuplicati
+from pmi_destinazione import apri_destinazione
+from pmi_estrazione import estrai_contatti, primo_contatto
+from pmi_frontiera import FrontieraCrawl
+from pmi_html import analizza_html, backend_disponibili
+from pmi_limitatore import LimitatoreDomini
+
+# Limiti di frequenza per fonte: richieste al secondo a regime e raffica massima
+LIMITI_FONTI = {
+    'www.paginegialle.it': {'velocita': 0.4, 'capacita': 2},
+    'www.europages.it': {'velocita': 0.25, 'capacita': 2},
+    'www.registroimprese.it': {'velocita': 0.2, 'capacita': 1}
+}
+
+# Colonne dei contatti raccolti, nell'ordine di output
+COLONNE = [
+    'Ragione Sociale', 'Settore', 'Telefono', 'Email',
+    'Sito Web', 'Indirizzo', 'CAP', 'Città', 'Provincia',
+    'Descrizione', 'Fonte'
+]
+
 class PMIScraper:
     """
     Classe per lo scraping di contatti di PMI italiane da diverse fonti
     """
     
-    def __init__(self, output_file="pmi_contatti_reali.csv"):
+    def __init__(self, output_file="pmi_contatti_reali.csv", concorrenza_per_host=2, worker_dettagli=4,
+                 cache=None, parser=None, frontiera=None, destinazione=None, dedup=None):
         """
         Inizializza lo scraper
         
         Args:
-            output_file (str): Percorso del file CSV di output
+            output_file (str): File di output; l'estensione sceglie il formato (.csv, .sqlite/.db, .parquet)
+            concorrenza_per_host (int): Richieste contemporanee massime verso lo stesso host
+            worker_dettagli (int): Worker che scaricano le pagine di dettaglio di una pagina di elenco
+            cache (CacheHTTP): Cache su disco delle pagine scaricate (default: nessuna cache)
+            parser (str): Backend HTML di pmi_html (default: il più veloce installato)
+            frontiera (FrontieraCrawl): Stato persistente degli URL per riprendere uno scraping interrotto
+            destinazione (Destinazione): Destinazione dei risultati (default: aperta su output_file)
+            dedup (IndiceDuplicati): Indice dei duplicati; le aziende già raccolte non vengono riscritte
         """
         self.output_file = output_file
+        self.concorrenza_per_host = concorrenza_per_host
+        self.worker_dettagli = worker_dettagli
+        self.limitatore = LimitatoreDomini(LIMITI_FONTI)
+        self.cache = cache
+        self.parser = parser
+        self.frontiera = frontiera
+        self.dedup = dedup
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept-Language': 'it-IT,it;q=0.9,en-US;q=0.8,en;q=0.7',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Referer': 'https://www.google.com/'
         }
-        self.session = requests.Session()
         
-        # Inizializza il file CSV con le intestazioni
-        self.init_csv()
-    
-    def init_csv(self):
-        """
-        Inizializza il file CSV con le intestazioni
-        """
-        if not os.path.exists(self.output_file):
-            with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'Ragione Sociale', 'Settore', 'Telefono', 'Email', 
-                    'Sito Web', 'Indirizzo', 'CAP', 'Città', 'Provincia', 
-                    'Descrizione', 'Fonte'
-                ])
+        # Destinazione aperta per tutta l'esecuzione, scritta a blocchi
+        self.destinazione = destinazione or apri_destinazione(output_file, COLONNE)
     
-    def save_to_csv(self, aziende):
+    def salva_aziende(self, aziende):
         """
-        Salva i dati delle aziende nel file CSV
+        Aggiunge le aziende alla destinazione, che le scrive a blocchi
+        
+        Con un indice dei duplicati sono scritte solo le aziende nuove; le
+        altre vengono fuse nell'indice.
         
         Args:
             aziende (list): Lista di dizionari con i dati delle aziende
+            
+        Returns:
+            int: Numero di aziende scritte
         """
-        if not aziende:
-            return
-            
-        with open(self.output_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            for azienda in aziende:
-                writer.writerow([
-                    azienda.get('Ragione Sociale', ''),
-                    azienda.get('Settore', ''),
-                    azienda.get('Telefono', ''),
-                    azienda.get('Email', ''),
-                    azienda.get('Sito Web', ''),
-                    azienda.get('Indirizzo', ''),
-                    azienda.get('CAP', ''),
-                    azienda.get('Città', ''),
-                    azienda.get('Provincia', ''),
-                    azienda.get('Descrizione', ''),
-                    azienda.get('Fonte', '')
-                ])
+        if self.dedup is not None:
+            aziende = self.dedup.filtra_nuovi(aziende)
+        self.destinazione.scrivi(aziende)
+        return len(aziende)
+    
+    def close(self):
+        """Scrive i risultati in attesa e chiude destinazione e indice dei duplicati"""
+        self.destinazione.close()
+        if self.dedup is not None:
+            self.dedup.close()
     
     def extract_email_from_text(self, text):
         """
-        Estrae indirizzi email da un testo
+        Estrae un indirizzo email da un testo, preferendo le email ordinarie alle PEC
         
         Args:
             text (str): Testo da cui estrarre le email
@@ -91,292 +109,577 @@ class PMIScraper:
         Returns:
             str: Email trovata o stringa vuota
         """
-        if not text:
-            return ''
-            
-        email_pattern = r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}'
-        match = re.search(email_pattern, text)
-        if match:
-            return match.group(0)
-        return ''
+        return primo_contatto(estrai_contatti(text, ('email', 'pec')), 'email', 'pec')
     
     def extract_phone_from_text(self, text):
         """
-        Estrae numeri di telefono da un testo
+        Estrae un numero di telefono da un testo
         
         Args:
             text (str): Testo da cui estrarre i numeri
             
         Returns:
-            str: Numero di telefono trovato o stringa vuota
-        """
-        if not text:
-            return ''
-            
-        # Pattern per numeri di telefono italiani
-        phone_patterns = [
-            r'\+39\s?[0-9]{3}\s?[0-9]{7}',  # +39 123 4567890
-            r'\+39\s?[0-9]{2}\s?[0-9]{8}',  # +39 12 34567890
-            r'\+39\s?[0-9]{10}',           # +39 1234567890
-            r'[0-9]{3}\s?[0-9]{7}',        # 123 4567890
-            r'[0-9]{2}\s?[0-9]{8}',        # 12 34567890
-            r'[0-9]{10}'                   # 1234567890
-        ]
+            str: Numero di telefono in formato E.164 o stringa vuota
+        """
+        return primo_contatto(estrai_contatti(text, ('telefono',)), 'telefono')
+    
+    def crea_motore(self):
+        """
+        Crea il motore di download asincrono con le intestazioni dello scraper
         
-        for pattern in phone_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(0)
-        return ''
+        Returns:
+            MotoreAsincrono: Motore da usare come context manager asincrono
+        """
+        return MotoreAsincrono(
+            self.headers, concorrenza_per_host=self.concorrenza_per_host, limitatore=self.limitatore,
+            cache=self.cache
+        )
     
-    def scrape_paginegialle(self, settore, località, num_pages=5):
+    def _prendi(self, url, tipo):
         """
-        Scrape Pagine Gialle per contatti di PMI
+        Chiede alla frontiera se un URL va scaricato (sempre, senza frontiera)
         
-        Args:
-            settore (str): Settore di attività
-            località (str): Località (città o provincia)
-            num_pages (int): Numero di pagine da scrapare
-            
         Returns:
-            list: Lista di dizionari con i dati delle aziende
+            tuple: (da_scaricare, risultato salvato)
         """
-        aziende = []
-        base_url = "https://www.paginegialle.it/ricerca/{}/{}/p-{}"
+        if self.frontiera is None:
+            return True, None
+        return self.frontiera.prendi(url, tipo)
+    
+    def _completa(self, url, risultato):
+        """Registra nella frontiera un URL completato"""
+        if self.frontiera is not None:
+            self.frontiera.completa(url, risultato)
+    
+    def _fallisci(self, url, errore):
+        """Registra nella frontiera un URL fallito"""
+        if self.frontiera is not None:
+            self.frontiera.fallisci(url, errore)
+    
+    async def _completa_dettagli(self, motore, con_dettaglio, analizza_dettaglio, timeout):
+        """
+        Scarica e analizza le pagine di dettaglio con un pool limitato di worker
         
-        print(f"Scraping Pagine Gialle per '{settore}' a '{località}'...")
+        I worker prelevano le aziende da una coda comune; il limite di richieste
+        e le pause verso ciascun host restano quelli del motore. I dettagli già
+        completati in un'esecuzione precedente sono presi dalla frontiera.
         
-        for page in range(1, num_pages + 1):
-            url = base_url.format(settore.replace(' ', '-'), località.replace(' ', '-'), page)
+        Args:
+            motore (MotoreAsincrono): Motore di download
+            con_dettaglio (list): Lista di (azienda, url_dettaglio); le aziende sono completate sul posto
+            analizza_dettaglio (callable): (html, azienda) -> completa l'azienda
+            timeout (float): Timeout delle richieste in secondi
             
-            try:
-                # Aggiungi un ritardo casuale per evitare di essere bloccati
-                time.sleep(random.uniform(2, 5))
-                
-                response = self.session.get(url, headers=self.headers, timeout=10)
-                if response.status_code != 200:
-                    print(f"Errore nella richiesta alla pagina {page}: {response.status_code}")
+        Returns:
+            int: Numero di dettagli falliti in questa esecuzione
+        """
+        coda = asyncio.Queue()
+        falliti = 0
+        for elemento in con_dettaglio:
+            coda.put_nowait(elemento)
+        
+        async def worker():
+            nonlocal falliti
+            while not coda.empty():
+                azienda, url = coda.get_nowait()
+                da_scaricare, salvato = self._prendi(url, 'dettaglio')
+                if not da_scaricare:
+                    azienda.update(salvato or {})
                     continue
                 
-                soup = BeautifulSoup(response.text, 'html.parser')
+                try:
+                    stato, testo = await motore.scarica(url, timeout)
+                except Exception as e:
+                    print(f"Errore nel recupero dei dettagli: {e}")
+                    self._fallisci(url, str(e))
+                    falliti += 1
+                    continue
+                if stato != 200:
+                    self._fallisci(url, f"HTTP {stato}")
+                    falliti += 1
+                    continue
                 
-                # Trova i risultati delle aziende
-                results = soup.select('.vcard')
+                try:
+                    analizza_dettaglio(testo, azienda)
+                except Exception as e:
+                    print(f"Errore nell'analisi dei dettagli: {e}")
+                    self._fallisci(url, str(e))
+                    falliti += 1
+                    continue
+                self._completa(url, azienda)
+        
+        await asyncio.gather(*(worker() for _ in range(min(self.worker_dettagli, len(con_dettaglio)))))
+        return falliti
+    
+    async def _scrape_pagine(self, motore, urls, analizza_elenco, analizza_dettaglio, timeout, salva=None):
+        """
+        Scarica in parallelo le pagine di elenco di una ricerca e i relativi dettagli
+        
+        Le pagine procedono a ondate di concorrenza_per_host pagine, scaricate
+        contemporaneamente nei limiti di cortesia dell'host: dopo un'ondata con
+        una pagina senza risultati le successive non vengono richieste. I
+        risultati sono restituiti nell'ordine delle pagine, fermandosi alla
+        prima pagina senza risultati. Con una frontiera, le
+        pagine completate in un'esecuzione precedente non vengono riscaricate;
+        una pagina con dettagli falliti resta da completare e non viene
+        esportata, finché le restano tentativi: il prossimo avvio la riprende,
+        riusando i dettagli già completati e ritentando gli altri.
+        
+        Args:
+            motore (MotoreAsincrono): Motore di download
+            urls (list): URL delle pagine di elenco, in ordine
+            analizza_elenco (callable): (html, url) -> lista di (azienda, url_dettaglio), None se vuota
+            analizza_dettaglio (callable): (html, azienda) -> completa l'azienda
+            timeout (float): Timeout delle richieste in secondi
+            salva (callable): Riceve le aziende di ogni pagina non ancora esportata, in ordine
+            
+        Returns:
+            list: Lista di dizionari con i dati delle aziende
+        """
+        incomplete = set()
+        
+        async def scrape_pagina(page, url):
+            da_scaricare, salvato = self._prendi(url, 'elenco')
+            if not da_scaricare:
+                if salvato is None:
+                    print(f"Pagina {page} saltata: troppi tentativi falliti")
+                    return []
+                print(f"Pagina {page}: già completata")
+                return salvato['aziende']
+            
+            try:
+                stato, testo = await motore.scarica(url, timeout)
+                if stato != 200:
+                    print(f"Errore nella richiesta alla pagina {page}: {stato}")
+                    self._fallisci(url, f"HTTP {stato}")
+                    return []
                 
-                if not results:
+                risultati = analizza_elenco(testo, url)
+                if risultati is None:
                     print(f"Nessun risultato trovato nella pagina {page}")
-                    break
+                    self._completa(url, {'aziende': None})
+                    return None
+                
+                # Dettagli scaricati in parallelo, completando le aziende nell'ordine originale
+                con_dettaglio = [(azienda, detail_url) for azienda, detail_url in risultati if detail_url]
+                falliti = await self._completa_dettagli(motore, con_dettaglio, analizza_dettaglio, timeout)
                 
-                for result in results:
-                    azienda = {}
-                    
-                    # Nome azienda
-                    name_elem = result.select_one('.org')
-                    if name_elem:
-                        azienda['Ragione Sociale'] = name_elem.text.strip()
-                    else:
-                        continue  # Salta se non c'è il nome
-                    
-                    # Settore
-                    azienda['Settore'] = settore
-                    
-                    # Indirizzo
-                    address_elem = result.select_one('.street-address')
-                    if address_elem:
-                        indirizzo = address_elem.text.strip()
-                        azienda['Indirizzo'] = indirizzo
-                    
-                    # Città
-                    city_elem = result.select_one('.locality')
-                    if city_elem:
-                        azienda['Città'] = city_elem.text.strip()
-                    
-                    # CAP
-                    cap_elem = result.select_one('.postal-code')
-                    if cap_elem:
-                        azienda['CAP'] = cap_elem.text.strip()
-                    
-                    # Provincia
-                    region_elem = result.select_one('.region')
-                    if region_elem:
-                        azienda['Provincia'] = region_elem.text.strip()
-                    
-                    # Telefono
-                    phone_elem = result.select_one('.phone-number')
-                    if phone_elem:
-                        azienda['Telefono'] = phone_elem.text.strip()
-                    
-                    # Email e sito web - richiede visita alla pagina di dettaglio
-                    detail_link = result.select_one('a.btn-details')
-                    if detail_link and 'href' in detail_link.attrs:
-                        detail_url = urljoin(url, detail_link['href'])
-                        
-                        try:
-                            time.sleep(random.uniform(1, 3))
-                            detail_response = self.session.get(detail_url, headers=self.headers, timeout=10)
-                            
-                            if detail_response.status_code == 200:
-                                detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
-                                
-                                # Email
-                                email_elem = detail_soup.select_one('.email')
-                                if email_elem:
-                                    azienda['Email'] = email_elem.text.strip()
-                                else:
-                                    # Cerca email nel testo
-                                    description = detail_soup.select_one('.description')
-                                    if description:
-                                        azienda['Email'] = self.extract_email_from_text(description.text)
-                                
-                                # Sito web
-                                website_elem = detail_soup.select_one('.website a')
-                                if website_elem and 'href' in website_elem.attrs:
-                                    azienda['Sito Web'] = website_elem['href']
-                                
-                                # Descrizione
-                                description = detail_soup.select_one('.description')
-                                if description:
-                                    azienda['Descrizione'] = description.text.strip()
-                        
-                        except Exception as e:
-                            print(f"Errore nel recupero dei dettagli: {e}")
-                    
-                    azienda['Fonte'] = 'PagineGialle'
-                    aziende.append(azienda)
-                    
-                print(f"Pagina {page}: trovate {len(results)} aziende")
+                aziende = [azienda for azienda, _ in risultati]
+                if falliti and self.frontiera is not None and \
+                        self.frontiera.tentativi(url) < self.frontiera.tentativi_massimi:
+                    self._fallisci(url, f"{falliti} dettagli non completati")
+                    incomplete.add(url)
+                    print(f"Pagina {page}: {falliti} dettagli falliti, sarà ripresa al prossimo avvio")
+                    return aziende
+                self._completa(url, {'aziende': aziende})
+                print(f"Pagina {page}: trovate {len(aziende)} aziende")
+                return aziende
                 
             except Exception as e:
                 print(f"Errore durante lo scraping della pagina {page}: {e}")
+                self._fallisci(url, str(e))
+                return []
         
+        # Ondate della dimensione della concorrenza per host: le pagine oltre la fine dei risultati
+        # costano al più un'ondata di richieste, invece di tutte le pagine della ricerca
+        onda = max(1, self.concorrenza_per_host)
+        pagine = []
+        for inizio in range(0, len(urls), onda):
+            blocco = await asyncio.gather(*(
+                scrape_pagina(page, url) for page, url in enumerate(urls[inizio:inizio + onda], inizio + 1)
+            ))
+            pagine.extend(blocco)
+            if any(risultato is None for risultato in blocco):
+                break
+        
+        aziende = []
+        esportate = []
+        for url, risultato in zip(urls, pagine):
+            if risultato is None:
+                break
+            if url in incomplete:
+                continue
+            aziende.extend(risultato)
+            gia_esportata = self.frontiera is not None and self.frontiera.esportata(url)
+            if salva is not None and risultato and not gia_esportata and url not in incomplete:
+                salva(risultato)
+                esportate.append(url)
+        
+        # Le pagine risultano esportate solo quando le loro righe sono su disco
+        if self.frontiera is not None and esportate:
+            self.destinazione.flush()
+            for url in esportate:
+                self.frontiera.segna_esportata(url)
         return aziende
     
-    def scrape_europages(self, settore, paese="Italia", num_pages=5):
+    def _analizza_elenco_paginegialle(self, html, url, settore):
         """
-        Scrape Europages per contatti di PMI
+        Estrae le aziende da una pagina di elenco di Pagine Gialle
+        
+        Returns:
+            list: Lista di (azienda, url_dettaglio), None se la pagina non ha risultati
+        """
+        documento = analizza_html(html, self.parser)
+        
+        # Trova i risultati delle aziende
+        results = documento.seleziona('.vcard')
+        if not results:
+            return None
+        
+        risultati = []
+        for result in results:
+            azienda = {}
+            
+            # Nome azienda
+            name_elem = result.seleziona_uno('.org')
+            if name_elem:
+                azienda['Ragione Sociale'] = name_elem.testo.strip()
+            else:
+                continue  # Salta se non c'è il nome
+            
+            # Settore
+            azienda['Settore'] = settore
+            
+            # Indirizzo
+            address_elem = result.seleziona_uno('.street-address')
+            if address_elem:
+                indirizzo = address_elem.testo.strip()
+                azienda['Indirizzo'] = indirizzo
+            
+            # Città
+            city_elem = result.seleziona_uno('.locality')
+            if city_elem:
+                azienda['Città'] = city_elem.testo.strip()
+            
+            # CAP
+            cap_elem = result.seleziona_uno('.postal-code')
+            if cap_elem:
+                azienda['CAP'] = cap_elem.testo.strip()
+            
+            # Provincia
+            region_elem = result.seleziona_uno('.region')
+            if region_elem:
+                azienda['Provincia'] = region_elem.testo.strip()
+            
+            # Telefono
+            phone_elem = result.seleziona_uno('.phone-number')
+            if phone_elem:
+                azienda['Telefono'] = phone_elem.testo.strip()
+            
+            azienda['Fonte'] = 'PagineGialle'
+            
+            # Email e sito web - richiedono la visita alla pagina di dettaglio
+            detail_link = result.seleziona_uno('a.btn-details')
+            detail_url = urljoin(url, detail_link.attributo('href')) if detail_link and detail_link.attributo('href') else None
+            risultati.append((azienda, detail_url))
+        
+        return risultati
+    
+    def _analizza_dettaglio_paginegialle(self, html, azienda):
+        """
+        Completa un'azienda con email, sito web e descrizione dalla pagina di dettaglio di Pagine Gialle
+        """
+        dettaglio = analizza_html(html, self.parser)
+        
+        # Email
+        email_elem = dettaglio.seleziona_uno('.email')
+        if email_elem:
+            azienda['Email'] = email_elem.testo.strip()
+        else:
+            # Cerca email nel testo
+            description = dettaglio.seleziona_uno('.description')
+            if description:
+                azienda['Email'] = self.extract_email_from_text(description.testo)
+        
+        # Sito web
+        website_elem = dettaglio.seleziona_uno('.website a')
+        if website_elem and website_elem.attributo('href'):
+            azienda['Sito Web'] = website_elem.attributo('href')
+        
+        # Descrizione
+        description = dettaglio.seleziona_uno('.description')
+        if description:
+            azienda['Descrizione'] = description.testo.strip()
+    
+    async def scrape_paginegialle_async(self, settore, località, num_pages=5, motore=None, salva=None):
+        """
+        Versione asincrona di scrape_paginegialle
+        
+        Args:
+            settore (str): Settore di attività
+            località (str): Località (città o provincia)
+            num_pages (int): Numero di pagine da scrapare
+            motore (MotoreAsincrono): Motore condiviso con altre ricerche (default: nuovo motore)
+            salva (callable): Riceve le aziende di ogni pagina completata e non ancora esportata
+            
+        Returns:
+            list: Lista di dizionari con i dati delle aziende
+        """
+        if motore is None:
+            async with self.crea_motore() as motore:
+                return await self.scrape_paginegialle_async(settore, località, num_pages, motore, salva)
+        
+        base_url = "https://www.paginegialle.it/ricerca/{}/{}/p-{}"
+        
+        print(f"Scraping Pagine Gialle per '{settore}' a '{località}'...")
+        
+        urls = [
+            base_url.format(settore.replace(' ', '-'), località.replace(' ', '-'), page)
+            for page in range(1, num_pages + 1)
+        ]
+        return await self._scrape_pagine(
+            motore, urls,
+            partial(self._analizza_elenco_paginegialle, settore=settore),
+            self._analizza_dettaglio_paginegialle,
+            timeout=10, salva=salva
+        )
+    
+    def scrape_paginegialle(self, settore, località, num_pages=5, salva=None):
+        """
+        Scrape Pagine Gialle per contatti di PMI
+        
+        Args:
+            settore (str): Settore di attività
+            località (str): Località (città o provincia)
+            num_pages (int): Numero di pagine da scrapare
+            salva (callable): Riceve le aziende di ogni pagina completata e non ancora esportata
+            
+        Returns:
+            list: Lista di dizionari con i dati delle aziende
+        """
+        return asyncio.run(self.scrape_paginegialle_async(settore, località, num_pages, salva=salva))
+    
+    def _analizza_elenco_europages(self, html, url, settore):
+        """
+        Estrae le aziende da una pagina di elenco di Europages
+        
+        Returns:
+            list: Lista di (azienda, url_dettaglio), None se la pagina non ha risultati
+        """
+        documento = analizza_html(html, self.parser)
+        
+        # Trova i risultati delle aziende
+        results = documento.seleziona('.company')
+        if not results:
+            return None
+        
+        risultati = []
+        for result in results:
+            azienda = {}
+            
+            # Nome azienda
+            name_elem = result.seleziona_uno('.company-name')
+            if name_elem:
+                azienda['Ragione Sociale'] = name_elem.testo.strip()
+            else:
+                continue  # Salta se non c'è il nome
+            
+            # Settore
+            azienda['Settore'] = settore
+            
+            # Descrizione
+            desc_elem = result.seleziona_uno('.company-description')
+            if desc_elem:
+                azienda['Descrizione'] = desc_elem.testo.strip()
+            
+            # Indirizzo e città
+            address_elem = result.seleziona_uno('.company-address')
+            if address_elem:
+                address_text = address_elem.testo.strip()
+                azienda['Indirizzo'] = address_text
+                
+                # Estrai città e provincia
+                city_match = re.search(r'(\d{5})\s+([^,]+)', address_text)
+                if city_match:
+                    azienda['CAP'] = city_match.group(1)
+                    azienda['Città'] = city_match.group(2).strip()
+            
+            azienda['Fonte'] = 'Europages'
+            
+            # Dettagli di contatto - richiedono la visita alla pagina di dettaglio
+            detail_link = result.seleziona_uno('.company-name a')
+            detail_url = urljoin(url, detail_link.attributo('href')) if detail_link and detail_link.attributo('href') else None
+            risultati.append((azienda, detail_url))
+        
+        return risultati
+    
+    def _analizza_dettaglio_europages(self, html, azienda):
+        """
+        Completa un'azienda con telefono, email e sito web dalla pagina di dettaglio di Europages
+        """
+        dettaglio = analizza_html(html, self.parser)
+        
+        # Telefono
+        phone_elem = dettaglio.seleziona_uno('.phone')
+        if phone_elem:
+            azienda['Telefono'] = phone_elem.testo.strip()
+        
+        # Email
+        email_elem = dettaglio.seleziona_uno('.email')
+        if email_elem:
+            azienda['Email'] = email_elem.testo.strip()
+        else:
+            # Cerca email nel testo
+            page_text = dettaglio.testo
+            azienda['Email'] = self.extract_email_from_text(page_text)
+        
+        # Sito web
+        website_elem = dettaglio.seleziona_uno('.website')
+        if website_elem and website_elem.attributo('href'):
+            azienda['Sito Web'] = website_elem.attributo('href')
+    
+    async def scrape_europages_async(self, settore, paese="Italia", num_pages=5, motore=None, salva=None):
+        """
+        Versione asincrona di scrape_europages
         
         Args:
             settore (str): Settore di attività
             paese (str): Paese (default: Italia)
             num_pages (int): Numero di pagine da scrapare
+            motore (MotoreAsincrono): Motore condiviso con altre ricerche (default: nuovo motore)
+            salva (callable): Riceve le aziende di ogni pagina completata e non ancora esportata
             
         Returns:
             list: Lista di dizionari con i dati delle aziende
         """
-        aziende = []
+        if motore is None:
+            async with self.crea_motore() as motore:
+                return await self.scrape_europages_async(settore, paese, num_pages, motore, salva)
+        
         base_url = "https://www.europages.it/aziende/pg-{}/{}/{}.html"
         
         print(f"Scraping Europages per '{settore}' in '{paese}'...")
         
-        for page in range(1, num_pages + 1):
-            url = base_url.format(page, paese.lower(), settore.replace(' ', '-'))
+        urls = [
+            base_url.format(page, paese.lower(), settore.replace(' ', '-'))
+            for page in range(1, num_pages + 1)
+        ]
+        return await self._scrape_pagine(
+            motore, urls,
+            partial(self._analizza_elenco_europages, settore=settore),
+            self._analizza_dettaglio_europages,
+            timeout=15, salva=salva
+        )
+    
+    def scrape_europages(self, settore, paese="Italia", num_pages=5, salva=None):
+        """
+        Scrape Europages per contatti di PMI
+        
+        Args:
+            settore (str): Settore di attività
+            paese (str): Paese (default: Italia)
+            num_pages (int): Numero di pagine da scrapare
+            salva (callable): Riceve le aziende di ogni pagina completata e non ancora esportata
             
-            try:
-                # Aggiungi un ritardo casuale per evitare di essere bloccati
-                time.sleep(random.uniform(3, 7))
-                
-                response = self.session.get(url, headers=self.headers, timeout=15)
-                if response.status_code != 200:
-                    print(f"Errore nella richiesta alla pagina {page}: {response.status_code}")
-                    continue
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Trova i risultati delle aziende
-                results = soup.select('.company')
-                
-                if not results:
-                    print(f"Nessun risultato trovato nella pagina {page}")
-                    break
-                
-                for result in results:
-                    azienda = {}
-                    
-                    # Nome azienda
-                    name_elem = result.select_one('.company-name')
-                    if name_elem:
-                        azienda['Ragione Sociale'] = name_elem.text.strip()
-                    else:
-                        continue  # Salta se non c'è il nome
-                    
-                    # Settore
-                    azienda['Settore'] = settore
-                    
-                    # Descrizione
-                    desc_elem = result.select_one('.company-description')
-                    if desc_elem:
-                        azienda['Descrizione'] = desc_elem.text.strip()
-                    
-                    # Indirizzo e città
-                    address_elem = result.select_one('.company-address')
-                    if address_elem:
-                        address_text = address_elem.text.strip()
-                        azienda['Indirizzo'] = address_text
-                        
-                        # Estrai città e provincia
-                        city_match = re.search(r'(\d{5})\s+([^,]+)', address_text)
-                        if city_match:
-                            azienda['CAP'] = city_match.group(1)
-                            azienda['Città'] = city_match.group(2).strip()
-                    
-                    # Dettagli di contatto - richiede visita alla pagina di dettaglio
-                    detail_link = result.select_one('.company-name a')
-                    if detail_link and 'href' in detail_link.attrs:
-                        detail_url = urljoin(url, detail_link['href'])
-                        
-                        try:
-                            time.sleep(random.uniform(2, 5))
-                            detail_response = self.session.get(detail_url, headers=self.headers, timeout=15)
-                            
-                            if detail_response.status_code == 200:
-                                detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
-                                
-                                # Telefono
-                                phone_elem = detail_soup.select_one('.phone')
-                                if phone_elem:
-                                    azienda['Telefono'] = phone_elem.text.strip()
-                                
-                                # Email
-                                email_elem = detail_soup.select_one('.email')
-                                if email_elem:
-                                    azienda['Email'] = email_elem.text.strip()
-                                else:
-                                    # Cerca email nel testo
-                                    page_text = detail_soup.get_text()
-                                    azienda['Email'] = self.extract_email_from_text(page_text)
-                                
-                                # Sito web
-                                website_elem = detail_soup.select_one('.website')
-                                if website_elem and 'href' in website_elem.attrs:
-                                    azienda['Sito Web'] = website_elem['href']
-                        
-                        except Exception as e:
-                            print(f"Errore nel recupero dei dettagli: {e}")
-                    
-                    azienda['Fonte'] = 'Europages'
-                    aziende.append(azienda)
-                    
-                print(f"Pagina {page}: trovate {len(results)} aziende")
-                
-            except Exception as e:
-                print(f"Errore durante lo scraping della pagina {page}: {e}")
+        Returns:
+            list: Lista di dizionari con i dati delle aziende
+        """
+        return asyncio.run(self.scrape_europages_async(settore, paese, num_pages, salva=salva))
+    
+    def _analizza_elenco_registro_imprese(self, html, url):
+        """
+        Estrae le aziende da una pagina di risultati del Registro Imprese
         
-        return aziende
+        Returns:
+            list: Lista di (azienda, url_dettaglio), None se la pagina non ha risultati
+        """
+        documento = analizza_html(html, self.parser)
+        
+        # Trova i risultati delle aziende
+        results = documento.seleziona('.search-result-item')
+        if not results:
+            return None
+        
+        risultati = []
+        for result in results:
+            azienda = {}
+            
+            # Nome azienda
+            name_elem = result.seleziona_uno('.company-name')
+            if name_elem:
+                azienda['Ragione Sociale'] = name_elem.testo.strip()
+            else:
+                continue  # Salta se non c'è il nome
+            
+            # Indirizzo
+            address_elem = result.seleziona_uno('.company-address')
+            if address_elem:
+                azienda['Indirizzo'] = address_elem.testo.strip()
+            
+            # Estrai città e provincia dall'indirizzo
+            if 'Indirizzo' in azienda:
+                city_match = re.search(r'(\d{5})\s+([^(]+)\s*\(([A-Z]{2})\)', azienda['Indirizzo'])
+                if city_match:
+                    azienda['CAP'] = city_match.group(1)
+                    azienda['Città'] = city_match.group(2).strip()
+                    azienda['Provincia'] = city_match.group(3)
+            
+            # Settore
+            sector_elem = result.seleziona_uno('.company-sector')
+            if sector_elem:
+                azienda['Settore'] = sector_elem.testo.strip()
+            
+            azienda['Fonte'] = 'Registro Imprese'
+            
+            # Dettagli di contatto - richiedono la visita alla pagina di dettaglio
+            detail_link = result.seleziona_uno('a.company-details')
+            detail_url = urljoin(url, detail_link.attributo('href')) if detail_link and detail_link.attributo('href') else None
+            risultati.append((azienda, detail_url))
+        
+        return risultati
     
-    def scrape_registro_imprese(self, query, località="", num_pages=3):
+    def _analizza_dettaglio_registro_imprese(self, html, azienda):
         """
-        Scrape Registro Imprese per contatti di PMI
+        Completa un'azienda con telefono, email, sito web e descrizione dalla pagina di dettaglio del Registro Imprese
+        """
+        dettaglio = analizza_html(html, self.parser)
+        phone_elem = dettaglio.seleziona_uno('.phone')
+        email_elem = dettaglio.seleziona_uno('.email')
+        
+        # Se manca un elemento dedicato, telefono ed email si cercano nel testo in un solo passaggio
+        contatti = [] if phone_elem and email_elem else estrai_contatti(dettaglio.testo)
+        
+        # Telefono
+        if phone_elem:
+            azienda['Telefono'] = phone_elem.testo.strip()
+        else:
+            azienda['Telefono'] = primo_contatto(contatti, 'telefono')
+        
+        # Email
+        if email_elem:
+            azienda['Email'] = email_elem.testo.strip()
+        else:
+            azienda['Email'] = primo_contatto(contatti, 'email', 'pec')
+        
+        # Sito web
+        website_elem = dettaglio.seleziona_uno('.website')
+        if website_elem and website_elem.attributo('href'):
+            azienda['Sito Web'] = website_elem.attributo('href')
+        
+        # Descrizione
+        desc_elem = dettaglio.seleziona_uno('.company-description')
+        if desc_elem:
+            azienda['Descrizione'] = desc_elem.testo.strip()
+    
+    async def scrape_registro_imprese_async(self, query, località="", num_pages=3, motore=None, salva=None):
+        """
+        Versione asincrona di scrape_registro_imprese
         
         Args:
             query (str): Termine di ricerca
             località (str): Località (opzionale)
             num_pages (int): Numero di pagine da scrapare
+            motore (MotoreAsincrono): Motore condiviso con altre ricerche (default: nuovo motore)
+            salva (callable): Riceve le aziende di ogni pagina completata e non ancora esportata
             
         Returns:
             list: Lista di dizionari con i dati delle aziende
         """
+        if motore is None:
+            async with self.crea_motore() as motore:
+                return await self.scrape_registro_imprese_async(query, località, num_pages, motore, salva)
+        
         # Nota: questa è una versione semplificata, il Registro Imprese potrebbe richiedere autenticazione
-        aziende = []
         base_url = "https://www.registroimprese.it/ricerca-libera?p_p_id=ricercaportlet_WAR_ricercaRIportlet&index={}&q={}"
         
         if località:
@@ -384,114 +687,101 @@ class PMIScraper:
         
         print(f"Scraping Registro Imprese per '{query}'...")
         
-        for page in range(1, num_pages + 1):
-            url = base_url.format(page, query.replace(' ', '+'))
+        urls = [base_url.format(page, query.replace(' ', '+')) for page in range(1, num_pages + 1)]
+        return await self._scrape_pagine(
+            motore, urls,
+            self._analizza_elenco_registro_imprese,
+            self._analizza_dettaglio_registro_imprese,
+            timeout=15, salva=salva
+        )
+    
+    def scrape_registro_imprese(self, query, località="", num_pages=3, salva=None):
+        """
+        Scrape Registro Imprese per contatti di PMI
+        
+        Args:
+            query (str): Termine di ricerca
+            località (str): Località (opzionale)
+            num_pages (int): Numero di pagine da scrapare
+            salva (callable): Riceve le aziende di ogni pagina completata e non ancora esportata
+            
+        Returns:
+            list: Lista di dizionari con i dati delle aziende
+        """
+        return asyncio.run(self.scrape_registro_imprese_async(query, località, num_pages, salva=salva))
+    
+    async def _esegui_ricerca(self, motore, fonte, config, salva):
+        """
+        Esegue una ricerca di una fonte con il motore condiviso
+        
+        Args:
+            motore (MotoreAsincrono): Motore di download condiviso
+            fonte (str): 'paginegialle', 'europages' o 'registro_imprese'
+            config (dict): Parametri della ricerca
+            salva (callable): Destinazione delle aziende di ogni pagina
             
+        Returns:
+            int: Numero di aziende raccolte
+        """
+        # Aziende effettivamente scritte: senza duplicati e senza le pagine già esportate
+        salvate = 0
+        
+        def salva_contando(aziende):
+            nonlocal salvate
+            salvate += salva(aziende)
+        
+        if fonte == 'paginegialle':
+            aziende = await self.scrape_paginegialle_async(
+                config['settore'], config['località'], config.get('num_pages', 3), motore, salva_contando
+            )
+            descrizione = f"PagineGialle per {config['settore']} a {config['località']}"
+        elif fonte == 'europages':
+            aziende = await self.scrape_europages_async(
+                config['settore'], config.get('paese', 'Italia'), config.get('num_pages', 3), motore, salva_contando
+            )
+            descrizione = f"Europages per {config['settore']} in {config.get('paese', 'Italia')}"
+        elif fonte == 'registro_imprese':
+            aziende = await self.scrape_registro_imprese_async(
+                config['query'], config.get('località', ''), config.get('num_pages', 3), motore, salva_contando
+            )
+            descrizione = f"Registro Imprese per {config['query']}"
+        else:
+            raise ValueError(f"Fonte sconosciuta: {fonte}")
+        
+        print(f"Salvate {salvate} aziende da {descrizione} ({len(aziende)} raccolte)")
+        return len(aziende)
+    
+    async def _pipeline_fonte(self, motore, fonte, configs, salva):
+        """
+        Esegue in sequenza le ricerche di una fonte
+        
+        Le ricerche della stessa fonte condividono host e limiti, quindi
+        procedono una dopo l'altra; le fonti diverse avanzano in parallelo.
+        
+        Returns:
+            int: Numero di aziende raccolte dalla fonte
+        """
+        totale = 0
+        for config in configs:
             try:
-                # Aggiungi un ritardo casuale per evitare di essere bloccati
-                time.sleep(random.uniform(4, 8))
-                
-                response = self.session.get(url, headers=self.headers, timeout=15)
-                if response.status_code != 200:
-                    print(f"Errore nella richiesta alla pagina {page}: {response.status_code}")
-                    continue
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Trova i risultati delle aziende
-                results = soup.select('.search-result-item')
-                
-                if not results:
-                    print(f"Nessun risultato trovato nella pagina {page}")
-                    break
-                
-                for result in results:
-                    azienda = {}
-                    
-                    # Nome azienda
-                    name_elem = result.select_one('.company-name')
-                    if name_elem:
-                        azienda['Ragione Sociale'] = name_elem.text.strip()
-                    else:
-                        continue  # Salta se non c'è il nome
-                    
-                    # Indirizzo
-                    address_elem = result.select_one('.company-address')
-                    if address_elem:
-                        azienda['Indirizzo'] = address_elem.text.strip()
-                    
-                    # Estrai città e provincia dall'indirizzo
-                    if 'Indirizzo' in azienda:
-                        city_match = re.search(r'(\d{5})\s+([^(]+)\s*\(([A-Z]{2})\)', azienda['Indirizzo'])
-                        if city_match:
-                            azienda['CAP'] = city_match.group(1)
-                            azienda['Città'] = city_match.group(2).strip()
-                            azienda['Provincia'] = city_match.group(3)
-                    
-                    # Settore
-                    sector_elem = result.select_one('.company-sector')
-                    if sector_elem:
-                        azienda['Settore'] = sector_elem.text.strip()
-                    
-                    # Dettagli di contatto - richiede visita alla pagina di dettaglio
-                    detail_link = result.select_one('a.company-details')
-                    if detail_link and 'href' in detail_link.attrs:
-                        detail_url = urljoin(url, detail_link['href'])
-                        
-                        try:
-                            time.sleep(random.uniform(3, 6))
-                            detail_response = self.session.get(detail_url, headers=self.headers, timeout=15)
-                            
-                            if detail_response.status_code == 200:
-                                detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
-                                
-                                # Telefono
-                                phone_elem = detail_soup.select_one('.phone')
-                                if phone_elem:
-                                    azienda['Telefono'] = phone_elem.text.strip()
-                                else:
-                                    # Cerca telefono nel testo
-                                    page_text = detail_soup.get_text()
-                                    azienda['Telefono'] = self.extract_phone_from_text(page_text)
-                                
-                                # Email
-                                email_elem = detail_soup.select_one('.email')
-                                if email_elem:
-                                    azienda['Email'] = email_elem.text.strip()
-                                else:
-                                    # Cerca email nel testo
-                                    page_text = detail_soup.get_text()
-                                    azienda['Email'] = self.extract_email_from_text(page_text)
-                                
-                                # Sito web
-                                website_elem = detail_soup.select_one('.website')
-                                if website_elem and 'href' in website_elem.attrs:
-                                    azienda['Sito Web'] = website_elem['href']
-                                
-                                # Descrizione
-                                desc_elem = detail_soup.select_one('.company-description')
-                                if desc_elem:
-                                    azienda['Descrizione'] = desc_elem.text.strip()
-                        
-                        except Exception as e:
-                            print(f"Errore nel recupero dei dettagli: {e}")
-                    
-                    azienda['Fonte'] = 'Registro Imprese'
-                    aziende.append(azienda)
-                    
-                print(f"Pagina {page}: trovate {len(results)} aziende")
-                
+                totale += await self._esegui_ricerca(motore, fonte, config, salva)
             except Exception as e:
-                print(f"Errore durante lo scraping della pagina {page}: {e}")
-        
-        return aziende
+                print(f"Errore nella ricerca {fonte} {config}: {e}")
+        return totale
     
-    def run_scraping(self, sources=None):
+    async def run_scraping_async(self, sources=None):
         """
-        Esegue lo scraping da tutte le fonti configurate
+        Versione asincrona di run_scraping
+        
+        Ogni fonte è una pipeline indipendente sullo stesso motore: i limiti
+        di concorrenza e frequenza restano quelli di ciascun host e tutte le
+        pipeline scrivono nella stessa destinazione.
         
         Args:
             sources (dict): Dizionario con le configurazioni per le fonti
+            
+        Returns:
+            int: Totale delle aziende raccolte
         """
         if sources is None:
             # Configurazione predefinita
@@ -511,56 +801,37 @@ class PMIScraper:
                 ]
             }
         
-        total_aziende = 0
-        
-        # Scraping da Pagine Gialle
-        if 'paginegialle' in sources:
-            for config in sources['paginegialle']:
-                aziende = self.scrape_paginegialle(
-                    settore=config['settore'],
-                    località=config['località'],
-                    num_pages=config.get('num_pages', 3)
-                )
-                self.save_to_csv(aziende)
-                total_aziende += len(aziende)
-                print(f"Salvate {len(aziende)} aziende da PagineGialle per {config['settore']} a {config['località']}")
-                
-                # Pausa tra le ricerche
-                time.sleep(random.uniform(5, 10))
-        
-        # Scraping da Europages
-        if 'europages' in sources:
-            for config in sources['europages']:
-                aziende = self.scrape_europages(
-                    settore=config['settore'],
-                    paese=config.get('paese', 'Italia'),
-                    num_pages=config.get('num_pages', 3)
-                )
-                self.save_to_csv(aziende)
-                total_aziende += len(aziende)
-                print(f"Salvate {len(aziende)} aziende da Europages per {config['settore']} in {config.get('paese', 'Italia')}")
-                
-                # Pausa tra le ricerche
-                time.sleep(random.uniform(5, 10))
-        
-        # Scraping da Registro Imprese
-        if 'registro_imprese' in sources:
-            for config in sources['registro_imprese']:
-                aziende = self.scrape_registro_imprese(
-                    query=config['query'],
-                    località=config.get('località', ''),
-                    num_pages=config.get('num_pages', 3)
-                )
-                self.save_to_csv(aziende)
-                total_aziende += len(aziende)
-                print(f"Salvate {len(aziende)} aziende da Registro Imprese per {config['query']}")
-                
-                # Pausa tra le ricerche
-                time.sleep(random.uniform(5, 10))
+        inizio = time.perf_counter()
+        async with self.crea_motore() as motore:
+            totali = await asyncio.gather(*(
+                self._pipeline_fonte(motore, fonte, configs, self.salva_aziende)
+                for fonte, configs in sources.items()
+            ))
+        total_aziende = sum(totali)
+        self.destinazione.flush()
         
-        print(f"\nScraping completato. Totale aziende raccolte: {total_aziende}")
+        print(f"\nScraping completato in {time.perf_counter() - inizio:.1f} s. Totale aziende raccolte: {total_aziende}")
         print(f"I dati sono stati salvati in: {self.output_file}")
-
+        print(motore.statistiche.riepilogo())
+        if self.cache is not None:
+            print(self.cache.riepilogo())
+        if self.frontiera is not None:
+            print(self.frontiera.riepilogo())
+        if self.dedup is not None:
+            print(self.dedup.riepilogo())
+        return total_aziende
+    
+    def run_scraping(self, sources=None):
+        """
+        Esegue lo scraping da tutte le fonti configurate, in parallelo tra le fonti
+        
+        Args:
+            sources (dict): Dizionario con le configurazioni per le fonti
+            
+        Returns:
+            int: Totale delle aziende raccolte
+        """
+        return asyncio.run(self.run_scraping_async(sources))
 
 def main():
     """
@@ -569,14 +840,55 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Scraper per contatti di PMI italiane')
-    parser.add_argument('--output', default='pmi_contatti_reali.csv', help='File di output (CSV)')
+    parser.add_argument('--output', default='pmi_contatti_reali.csv',
+                        help='File di output: .csv, .sqlite/.db o .parquet')
+    parser.add_argument('--batch-size', type=int, default=500, help='Aziende accumulate prima di ogni scrittura')
+    parser.add_argument('--flush-interval', type=float, default=5.0,
+                        help='Secondi massimi tra due scritture dei risultati')
     parser.add_argument('--settore', default='informatica', help='Settore da cercare su PagineGialle')
     parser.add_argument('--localita', default='milano', help='Località da cercare su PagineGialle')
     parser.add_argument('--pagine', type=int, default=3, help='Numero di pagine da scrapare per fonte')
+    parser.add_argument('--concorrenza', type=int, default=2, help='Richieste contemporanee massime per host')
+    parser.add_argument('--worker-dettagli', type=int, default=4,
+                        help='Worker per le pagine di dettaglio di ogni pagina di elenco')
+    parser.add_argument('--cache', nargs='?', const='pmi_cache.sqlite', default=None, metavar='PERCORSO',
+                        help='Cache su disco delle pagine scaricate (default: pmi_cache.sqlite)')
+    parser.add_argument('--cache-ttl', type=float, default=24,
+                        help='Ore in cui una pagina in cache è usata senza rivalidarla')
+    parser.add_argument('--cache-max-mb', type=float, default=500, help='Dimensione massima della cache in MB')
+    parser.add_argument('--frontiera', nargs='?', const='pmi_frontiera.sqlite', default=None, metavar='PERCORSO',
+                        help='Stato persistente degli URL: un nuovo avvio riprende solo il lavoro rimasto')
+    parser.add_argument('--dedup', nargs='?', const='pmi_dedup.sqlite', default=None, metavar='PERCORSO',
+                        help='Indice persistente dei duplicati: le aziende già raccolte non vengono riscritte')
+    parser.add_argument('--parser', choices=backend_disponibili(), default=None,
+                        help='Backend per l\'analisi dell\'HTML (default: il più veloce installato)')
     
     args = parser.parse_args()
     
-    scraper = PMIScraper(output_file=args.output)
+    cache = None
+    if args.cache:
+        cache = CacheHTTP(args.cache, ttl=args.cache_ttl * 3600,
+                          dimensione_massima=int(args.cache_max_mb * 1024 * 1024))
+    
+    frontiera = FrontieraCrawl(args.frontiera) if args.frontiera else None
+    if frontiera is not None and frontiera.ripristinati:
+        print(f"Ripresa di uno scraping interrotto: {frontiera.ripristinati} URL da ripetere")
+    
+    dedup = IndiceDuplicati(args.dedup) if args.dedup else None
+    
+    destinazione = apri_destinazione(
+        args.output, COLONNE, batch_size=args.batch_size, intervallo_flush=args.flush_interval
+    )
+    scraper = PMIScraper(
+        output_file=args.output,
+        concorrenza_per_host=args.concorrenza,
+        worker_dettagli=args.worker_dettagli,
+        cache=cache,
+        parser=args.parser,
+        frontiera=frontiera,
+        destinazione=destinazione,
+        dedup=dedup
+    )
     
     # Configura le fonti
     sources = {
@@ -588,7 +900,10 @@ def main():
         ]
     }
     
-    scraper.run_scraping(sources)
+    try:
+        scraper.run_scraping(sources)
+    finally:
+        scraper.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMI Stream - Scrittura a blocchi di flussi di record generati (CSV, Parquet e SQLite)
+"""
+
+import csv
+from itertools import islice
+
+from tqdm import tqdm
+
+FORMATI = ('csv', 'parquet', 'sqlite')
+
+# Tipi delle colonne nei file Parquet; le colonne non elencate sono stringhe
+TIPI_PARQUET = {
+    'Anno Fondazione': 'int16',
+    'Dipendenti': 'int32',
+    'Fatturato (milioni €)': 'float64',
+    'Fatturato': 'float64',
+    'Settore': 'categoria',
+    'Provincia': 'categoria',
+    'Città': 'categoria',
+    'Forma Giuridica': 'categoria',
+    'Categoria': 'categoria',
+    'Stato': 'categoria',
+    'Fonte': 'categoria'
+}
+
+
+def a_blocchi(iterabile, dimensione):
+    """
+    Suddivide un iterabile in liste di dimensione fissa senza materializzarlo
+
+    Args:
+        iterabile (iterable): Flusso di elementi
+        dimensione (int): Numero massimo di elementi per blocco
+
+    Yields:
+        list: Blocco di elementi
+    """
+    iteratore = iter(iterabile)
+    while True:
+        blocco = list(islice(iteratore, dimensione))
+        if not blocco:
+            return
+        yield blocco
+
+
+def scrivi_csv(righe, output_file, chunk_size=10000, totale=None, progresso=True, descrizione="Righe"):
+    """
+    Scrive un flusso di dizionari in un file CSV a blocchi di dimensione fissa
+
+    La memoria occupata dipende solo da chunk_size, non dal numero di righe.
+    L'intestazione è ricavata dalle chiavi della prima riga.
+
+    Args:
+        righe (iterable): Flusso di dizionari con le stesse chiavi
+        output_file (str): Percorso del file CSV di output
+        chunk_size (int): Numero di righe scritte per blocco
+        totale (int): Numero atteso di righe, per la barra di avanzamento
+        progresso (bool): Mostra l'avanzamento calcolato sul flusso
+        descrizione (str): Etichetta della barra di avanzamento
+
+    Returns:
+        int: Numero di righe scritte
+    """
+    scritte = 0
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as f, \
+            tqdm(total=totale, desc=descrizione, unit=" righe", disable=not progresso) as barra:
+        writer = None
+        for blocco in a_blocchi(righe, chunk_size):
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=blocco[0].keys())
+                writer.writeheader()
+            writer.writerows(blocco)
+            scritte += len(blocco)
+            barra.update(len(blocco))
+
+    return scritte
+
+
+def _pyarrow():
+    """
+    Importa pyarrow, necessario solo per l'output Parquet
+
+    Returns:
+        tuple: (pyarrow, pyarrow.parquet)
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("L'output Parquet richiede pyarrow: pip install pyarrow") from e
+    return pa, pq
+
+
+def schema_parquet(colonne):
+    """
+    Costruisce lo schema Arrow per le colonne indicate secondo TIPI_PARQUET
+
+    Args:
+        colonne (iterable): Nomi delle colonne nell'ordine di scrittura
+
+    Returns:
+        pyarrow.Schema: Schema con interi, float e colonne a dizionario
+    """
+    pa, _ = _pyarrow()
+    tipi = {
+        'int16': pa.int16(),
+        'int32': pa.int32(),
+        'float64': pa.float64(),
+        'categoria': pa.dictionary(pa.int32(), pa.string())
+    }
+    return pa.schema([(colonna, tipi.get(TIPI_PARQUET.get(colonna), pa.string())) for colonna in colonne])
+
+
+class ScrittoreParquet:
+    """
+    Scrittore Parquet a row group: ogni blocco scritto diventa un row group
+    """
+
+    def __init__(self, output_file, colonne):
+        """
+        Args:
+            output_file (str): Percorso del file Parquet
+            colonne (iterable): Nomi delle colonne
+        """
+        self.pa, pq = _pyarrow()
+        self.schema = schema_parquet(colonne)
+        self.writer = pq.ParquetWriter(output_file, self.schema, compression='zstd')
+
+    def scrivi_colonne(self, colonne):
+        """
+        Scrive un blocco in forma colonnare
+
+        Args:
+            colonne (dict): Nome colonna -> lista di valori
+        """
+        tabella = self.pa.Table.from_arrays(
+            [self.pa.array(_valori_per_tipo(colonne[campo.name], campo.type), type=campo.type) for campo in self.schema],
+            schema=self.schema
+        )
+        self.writer.write_table(tabella)
+
+    def scrivi_righe(self, righe):
+        """
+        Scrive un blocco di dizionari
+
+        Args:
+            righe (list): Lista di dizionari con le colonne dello schema
+        """
+        self.scrivi_colonne({nome: [riga.get(nome) for riga in righe] for nome in self.schema.names})
+
+    def close(self):
+        """Chiude il file completando i metadati Parquet"""
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _valori_per_tipo(valori, tipo):
+    """
+    Converte le stringhe vuote in valori nulli per le colonne numeriche
+
+    Returns:
+        list: Valori pronti per pyarrow
+    """
+    import pyarrow.types as types
+
+    if types.is_integer(tipo):
+        return [None if valore in ('', None) else int(valore) for valore in valori]
+    if types.is_floating(tipo):
+        return [None if valore in ('', None) else float(valore) for valore in valori]
+    return valori
+
+
+def scrivi_parquet(righe, output_file, chunk_size=100000, totale=None, progresso=True, descrizione="Righe"):
+    """
+    Scrive un flusso di dizionari in un file Parquet tipizzato a blocchi
+
+    Args:
+        righe (iterable): Flusso di dizionari con le stesse chiavi
+        output_file (str): Percorso del file Parquet di output
+        chunk_size (int): Numero di righe per row group
+        totale (int): Numero atteso di righe, per la barra di avanzamento
+        progresso (bool): Mostra l'avanzamento calcolato sul flusso
+        descrizione (str): Etichetta della barra di avanzamento
+
+    Returns:
+        int: Numero di righe scritte
+    """
+    scritte = 0
+    scrittore = None
+
+    with tqdm(total=totale, desc=descrizione, unit=" righe", disable=not progresso) as barra:
+        try:
+            for blocco in a_blocchi(righe, chunk_size):
+                if scrittore is None:
+                    scrittore = ScrittoreParquet(output_file, blocco[0].keys())
+                scrittore.scrivi_righe(blocco)
+                scritte += len(blocco)
+                barra.update(len(blocco))
+        finally:
+            if scrittore is not None:
+                scrittore.close()
+
+    return scritte
+
+
+def scrivi_sqlite(righe, output_file, chunk_size=10000, totale=None, progresso=True, descrizione="Righe",
+                  aggiungi=False):
+    """
+    Inserisce un flusso di dizionari nell'archivio SQLite di pmi_database, un blocco per transazione
+
+    Come per CSV e Parquet, un database esistente viene sostituito, salvo con aggiungi.
+
+    Args:
+        righe (iterable): Flusso di dizionari con i nomi di colonna dei moduli
+        output_file (str): File del database
+        chunk_size (int): Numero di righe per transazione
+        totale (int): Numero atteso di righe, per la barra di avanzamento
+        progresso (bool): Mostra l'avanzamento calcolato sul flusso
+        descrizione (str): Etichetta della barra di avanzamento
+        aggiungi (bool): Aggiunge le righe a quelle già presenti nel database
+
+    Returns:
+        int: Numero di righe scritte
+    """
+    from pmi_database import DatabasePMI, elimina_database
+
+    if not aggiungi:
+        elimina_database(output_file)
+    scritte = 0
+
+    with DatabasePMI(output_file) as db, \
+            tqdm(total=totale, desc=descrizione, unit=" righe", disable=not progresso) as barra:
+        for blocco in a_blocchi(righe, chunk_size):
+            scritte += db.inserisci(blocco)
+            barra.update(len(blocco))
+
+    return scritte
+
+
+def scrivi_record(righe, output_file, formato='csv', **kwargs):
+    """
+    Scrive un flusso di dizionari nel formato richiesto
+
+    Args:
+        righe (iterable): Flusso di dizionari
+        output_file (str): Percorso del file di output
+        formato (str): 'csv', 'parquet' o 'sqlite'
+        **kwargs: Parametri di scrivi_csv / scrivi_parquet / scrivi_sqlite
+
+    Returns:
+        int: Numero di righe scritte
+    """
+    if formato == 'parquet':
+        return scrivi_parquet(righe, output_file, **kwargs)
+    if formato == 'sqlite':
+        return scrivi_sqlite(righe, output_file, **kwargs)
+    if formato == 'csv':
+        return scrivi_csv(righe, output_file, **kwargs)
+    raise ValueError(f"Formato di output non supportato: {formato}")
@@ -16,6 +16,12 @@ import webbrowser
 import tempfile
 import random
 
+from pmi_carica import aggrega_a_blocchi, carica_dataframe, intestazioni
+
+# Colonne usate dalle analisi e dal report HTML: senza esportazione Excel le altre non vengono caricate
+COLONNE_ANALISI = ['Settore', 'Città', 'Provincia', 'Sito Web']
+COLONNE_REPORT = ['Ragione Sociale', 'Settore', 'Telefono', 'Email', 'Sito Web', 'Città', 'Provincia']
+
 # Impostazioni per i grafici
 plt.style.use('seaborn-v0_8-whitegrid')
 sns.set_palette('viridis')
@@ -27,23 +33,53 @@ class ContattiVisualizer:
     Classe per visualizzare e analizzare i contatti delle PMI italiane
     """
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, columns=None, chunk_size=None):
         """
         Inizializza il visualizzatore
         
         Args:
             file_path (str): Percorso del file CSV con i contatti
+            columns (list): Colonne da caricare (default: tutte); con chunk_size una
+                            lista vuota non carica nulla, perché i conteggi vengono
+                            calcolati a blocchi dal file
+            chunk_size (int): Se indicato, legge il file a blocchi di queste righe; con
+                              un sottoinsieme di colonne, i conteggi vengono calcolati
+                              a blocchi dal file invece che sul DataFrame caricato
         """
         self.file_path = file_path
+        self.columns = columns
+        self.chunk_size = chunk_size
         self.df = None
         self.load_data()
     
+    def _aggrega(self, funzione, colonne):
+        """
+        Applica un'aggregazione additiva (conteggi, somme) ai dati
+        
+        Args:
+            funzione (callable): DataFrame -> Series o DataFrame additivo
+            colonne (list): Colonne usate dalla funzione
+        """
+        if self.chunk_size and self.columns is not None:
+            return aggrega_a_blocchi(self.file_path, funzione, colonne, self.chunk_size)
+        return funzione(self.df)
+    
+    def _conta(self, colonna):
+        """
+        Numero di contatti per valore di una colonna, dal più frequente
+        """
+        conteggi = self._aggrega(lambda blocco: blocco[colonna].value_counts(), [colonna])
+        return conteggi.astype('int64').sort_values(ascending=False, kind='stable')
+    
     def load_data(self):
         """
-        Carica i dati dal file CSV
+        Carica i dati dal file CSV o Parquet, con tipi compatti
         """
+        if self.chunk_size and self.columns == []:
+            # Solo conteggi, calcolati a blocchi: nessuna riga resta in memoria
+            return
         try:
-            self.df = pd.read_csv(self.file_path, encoding='utf-8')
+            self.df = carica_dataframe(self.file_path, self.columns, dimensione_blocco=self.chunk_size)
             print(f"Caricati {len(self.df)} contatti dal file {self.file_path}")
         except Exception as e:
             print(f"Errore nel caricamento del file: {e}")
@@ -57,14 +93,16 @@ class ContattiVisualizer:
             rows (int): Numero di righe da visualizzare
         """
         print("\n=== ANTEPRIMA DEI CONTATTI ===")
-        print(tabulate(self.df.head(rows), headers='keys', tablefmt='grid', showindex=False))
+        # Con un sottoinsieme di colonne caricato, l'anteprima rilegge le prime righe complete
+        preview = self.df.head(rows) if self.columns is None else carica_dataframe(self.file_path, nrows=rows)
+        print(tabulate(preview, headers='keys', tablefmt='grid', showindex=False))
     
     def analyze_sectors(self):
         """
         Analizza la distribuzione dei settori
         """
         print("\n=== DISTRIBUZIONE PER SETTORE ===")
-        sector_counts = self.df['Settore'].value_counts()
+        sector_counts = self._conta('Settore')
         print(tabulate(sector_counts.reset_index().rename(columns={'index': 'Settore', 'Settore': 'Numero'}), 
                        headers='keys', tablefmt='grid', showindex=False))
         
@@ -90,14 +128,15 @@ class ContattiVisualizer:
         print("\n=== DISTRIBUZIONE GEOGRAFICA ===")
         
         # Top 15 città
-        city_counts = self.df['Città'].value_counts().head(15)
+        city_counts = self._conta('Città').head(15)
         print("Top 15 città per numero di PMI:")
         print(tabulate(city_counts.reset_index().rename(columns={'index': 'Città', 'Città': 'Numero'}), 
                        headers='keys', tablefmt='grid', showindex=False))
         
         # Distribuzione per provincia
-        if 'Provincia' in self.df.columns:
-            province_counts = self.df['Provincia'].value_counts().head(15)
+        colonne = intestazioni(self.file_path) if self.df is None else self.df.columns
+        if 'Provincia' in colonne:
+            province_counts = self._conta('Provincia').head(15)
             print("\nTop 15 province per numero di PMI:")
             print(tabulate(province_counts.reset_index().rename(columns={'index': 'Provincia', 'Provincia': 'Numero'}), 
                            headers='keys', tablefmt='grid', showindex=False))
@@ -120,12 +159,17 @@ class ContattiVisualizer:
         print("\n=== ANALISI PRESENZA WEB ===")
         
         # Conta le aziende con sito web
-        has_website = self.df['Sito Web'].notna() & (self.df['Sito Web'] != '')
-        website_count = has_website.sum()
-        no_website_count = len(self.df) - website_count
+        conteggi = self._aggrega(
+            lambda blocco: pd.Series({
+                'con': (blocco['Sito Web'].notna() & (blocco['Sito Web'] != '')).sum(), 'totale': len(blocco)
+            }),
+            ['Sito Web']
+        )
+        website_count, total = int(conteggi['con']), int(conteggi['totale'])
+        no_website_count = total - website_count
         
-        print(f"PMI con sito web: {website_count} ({website_count/len(self.df)*100:.1f}%)")
-        print(f"PMI senza sito web: {no_website_count} ({no_website_count/len(self.df)*100:.1f}%)")
+        print(f"PMI con sito web: {website_count} ({website_count/total*100:.1f}%)")
+        print(f"PMI senza sito web: {no_website_count} ({no_website_count/total*100:.1f}%)")
         
         # Grafico a torta per presenza web
         plt.figure(figsize=(10, 8))
@@ -489,13 +533,30 @@ def main():
 
     parser.add_argument('--no-html', action='store_true', help='Non generare il report HTML')
 
+    parser.add_argument('--chunk-size', type=int,
+                        help='Legge il file a blocchi di queste righe: con --no-excel i conteggi vengono sommati '
+                             'blocco per blocco e in memoria restano solo le righe del report HTML')
+
     
 
     args = parser.parse_args()
 
     
 
-    visualizer = ContattiVisualizer(args.file)
+    # L'esportazione Excel riporta tutte le colonne; analisi e report HTML solo quelle che usano,
+    # e a blocchi solo quelle del report, perché i conteggi si leggono dal file
+
+    columns = None
+
+    if args.no_excel and args.chunk_size:
+
+        columns = [] if args.no_html else COLONNE_REPORT
+
+    elif args.no_excel:
+
+        columns = COLONNE_ANALISI if args.no_html else list(dict.fromkeys(COLONNE_ANALISI + COLONNE_REPORT))
+
+    visualizer = ContattiVisualizer(args.file, columns, args.chunk_size)
 
     visualizer.run_all_analyses(
 
@@ -12,25 +12,42 @@ import os
 import sys
 from tabulate import tabulate
 
-def carica_dati(file_path):
-    """Carica i dati dal file CSV"""
+from pmi_carica import aggrega_a_blocchi, carica_dataframe
+
+# Colonne usate dalle analisi: senza esportazione Excel le altre non vengono caricate
+COLONNE_ANALISI = ['Settore', 'Indirizzo', 'Sito Web']
+
+def carica_dati(file_path, colonne=None, dimensione_blocco=None, nrows=None):
+    """Carica i dati dal file CSV o Parquet, solo le colonne indicate (default: tutte)"""
     try:
-        df = pd.read_csv(file_path)
+        df = carica_dataframe(file_path, colonne, nrows=nrows, dimensione_blocco=dimensione_blocco)
         print(f"Caricati {len(df)} record dal file {file_path}")
         return df
     except Exception as e:
         print(f"Errore nel caricamento del file: {e}")
         sys.exit(1)
 
+def aggrega(funzione, df=None, file_path=None, colonne=None, dimensione_blocco=None):
+    """
+    Applica un'aggregazione additiva (conteggi, somme) ai dati
+
+    Con dimensione_blocco viene calcolata a blocchi dal file, senza caricarlo
+    per intero; altrimenti sul DataFrame già caricato.
+    """
+    if dimensione_blocco:
+        return aggrega_a_blocchi(file_path, funzione, colonne, dimensione_blocco)
+    return funzione(df)
+
 def mostra_anteprima(df, num_righe=10):
     """Mostra un'anteprima dei dati in formato tabellare"""
     print("\n=== ANTEPRIMA DEI DATI ===")
     print(tabulate(df.head(num_righe), headers='keys', tablefmt='pretty', showindex=False))
 
-def analisi_settori(df):
+def analisi_settori(df=None, file_path=None, dimensione_blocco=None):
     """Analizza la distribuzione dei settori"""
     print("\n=== DISTRIBUZIONE PER SETTORE ===")
-    settori = df['Settore'].value_counts()
+    settori = aggrega(lambda blocco: blocco['Settore'].value_counts(), df, file_path, ['Settore'], dimensione_blocco)
+    settori = settori.astype('int64').sort_values(ascending=False, kind='stable')
     print(tabulate(settori.reset_index().rename(columns={'index': 'Settore', 'Settore': 'Numero di aziende'}), 
                   headers='keys', tablefmt='pretty', showindex=False))
     
@@ -43,12 +60,15 @@ def analisi_settori(df):
     plt.savefig('distribuzione_settori.png')
     print(f"Grafico salvato come 'distribuzione_settori.png'")
 
-def analisi_citta(df):
+def conta_citta(df):
+    """Numero di aziende per città, estratta dall'indirizzo"""
+    return df['Indirizzo'].str.extract(r'- \d+ (.+)$')[0].rename('Citta').value_counts()
+
+def analisi_citta(df=None, file_path=None, dimensione_blocco=None):
     """Analizza la distribuzione geografica"""
     print("\n=== DISTRIBUZIONE GEOGRAFICA ===")
-    # Estrai la città dall'indirizzo
-    df['Citta'] = df['Indirizzo'].str.extract(r'- \d+ (.+)$')
-    citta = df['Citta'].value_counts().head(15)
+    citta = aggrega(conta_citta, df, file_path, ['Indirizzo'], dimensione_blocco)
+    citta = citta.astype('int64').sort_values(ascending=False, kind='stable').head(15)
     print(tabulate(citta.reset_index().rename(columns={'index': 'Città', 'Citta': 'Numero di aziende'}), 
                   headers='keys', tablefmt='pretty', showindex=False))
     
@@ -63,13 +83,17 @@ def analisi_citta(df):
     plt.savefig('distribuzione_citta.png')
     print(f"Grafico salvato come 'distribuzione_citta.png'")
 
-def analisi_siti_web(df):
+def analisi_siti_web(df=None, file_path=None, dimensione_blocco=None):
     """Analizza la presenza di siti web"""
     print("\n=== PRESENZA SITO WEB ===")
-    ha_sito = df['Sito Web'].notna().sum()
-    no_sito = df['Sito Web'].isna().sum()
-    print(f"PMI con sito web: {ha_sito} ({ha_sito/len(df)*100:.1f}%)")
-    print(f"PMI senza sito web: {no_sito} ({no_sito/len(df)*100:.1f}%)")
+    conteggi = aggrega(
+        lambda blocco: pd.Series({'con': blocco['Sito Web'].notna().sum(), 'senza': blocco['Sito Web'].isna().sum()}),
+        df, file_path, ['Sito Web'], dimensione_blocco
+    )
+    ha_sito, no_sito = int(conteggi['con']), int(conteggi['senza'])
+    totale = ha_sito + no_sito
+    print(f"PMI con sito web: {ha_sito} ({ha_sito/totale*100:.1f}%)")
+    print(f"PMI senza sito web: {no_sito} ({no_sito/totale*100:.1f}%)")
     
     # Crea un grafico a barre per la presenza di siti web
     plt.figure(figsize=(8, 6))
@@ -122,20 +146,28 @@ def main():
     parser.add_argument('--righe', type=int, default=10, help='Numero di righe da visualizzare nell\'anteprima')
     parser.add_argument('--excel', action='store_true', help='Esporta i dati in formato Excel')
     parser.add_argument('--grafici', action='store_true', help='Genera grafici di analisi')
+    parser.add_argument('--chunk-size', type=int,
+                        help='Calcola le analisi a blocchi di queste righe, senza caricare il file in memoria '
+                             '(con --excel il file viene comunque caricato per intero)')
     
     args = parser.parse_args()
     
-    # Carica i dati
-    df = carica_dati(args.file)
+    # Le analisi a blocchi leggono il file da sole: il DataFrame serve solo per l'esportazione Excel
+    a_blocchi = args.chunk_size and not args.excel
+    
+    # Carica i dati: tutte le colonne solo se vanno esportate in Excel
+    colonne = None if args.excel else COLONNE_ANALISI
+    df = None if a_blocchi else carica_dati(args.file, colonne, args.chunk_size)
     
-    # Mostra anteprima
-    mostra_anteprima(df, args.righe)
+    # Mostra anteprima, con tutte le colonne delle prime righe
+    mostra_anteprima(df if colonne is None else carica_dataframe(args.file, nrows=args.righe), args.righe)
     
     # Genera analisi e grafici se richiesto
     if args.grafici:
-        analisi_settori(df)
-        analisi_citta(df)
-        analisi_siti_web(df)
+        blocchi = args.chunk_size if a_blocchi else None
+        analisi_settori(df, args.file, blocchi)
+        analisi_citta(df, args.file, blocchi)
+        analisi_siti_web(df, args.file, blocchi)
     
     # Esporta in Excel se richiesto
     if args.excel:
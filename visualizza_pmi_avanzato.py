@@ -14,6 +14,18 @@ from tabulate import tabulate
 import os
 import sys
 
+from pmi_carica import aggrega_a_blocchi, carica_dataframe
+
+# Colonne usate dalle analisi: senza esportazione Excel le altre non vengono caricate
+COLONNE_ANALISI = [
+    'Categoria', 'Settore', 'Città', 'Provincia', 'Dipendenti', 'Fatturato (milioni €)',
+    'Anno Fondazione', 'Forma Giuridica', 'Sito Web'
+]
+
+# Colonne delle analisi che richiedono le singole righe (statistiche e istogrammi):
+# con la lettura a blocchi sono le sole tenute in memoria, i conteggi si sommano blocco per blocco
+COLONNE_RIGHE = ['Categoria', 'Dipendenti', 'Fatturato (milioni €)', 'Anno Fondazione']
+
 # Impostazioni per i grafici
 plt.style.use('seaborn-v0_8-whitegrid')
 sns.set_palette('viridis')
@@ -21,28 +33,69 @@ plt.rcParams['figure.figsize'] = (12, 8)
 plt.rcParams['font.size'] = 12
 
 
+def _ha_sito(df):
+    """Aziende con un sito web indicato"""
+    return df['Sito Web'].notna() & (df['Sito Web'] != '')
+
+
 class PMIVisualizer:
     """
     Classe per la visualizzazione avanzata dei dati delle PMI italiane
     """
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, columns=None, chunk_size=None):
         """
         Inizializza il visualizzatore
         
         Args:
             file_path (str): Percorso del file CSV con i dati delle PMI
+            columns (list): Colonne da caricare (default: tutte)
+            chunk_size (int): Se indicato, legge il file a blocchi di queste righe; con
+                              un sottoinsieme di colonne, i conteggi vengono calcolati
+                              a blocchi dal file invece che sul DataFrame caricato
         """
         self.file_path = file_path
+        self.columns = columns
+        self.chunk_size = chunk_size
         self.df = None
         self.load_data()
     
+    def _aggrega(self, funzione, colonne):
+        """
+        Applica un'aggregazione additiva (conteggi, somme) ai dati
+        
+        Args:
+            funzione (callable): DataFrame -> Series o DataFrame additivo
+            colonne (list): Colonne usate dalla funzione
+        """
+        if self.chunk_size and self.columns is not None:
+            return aggrega_a_blocchi(self.file_path, funzione, colonne, self.chunk_size)
+        return funzione(self.df)
+    
+    def _conta(self, colonne):
+        """
+        Numero di aziende per valore di una o più colonne, dal più frequente
+        """
+        conteggi = self._aggrega(lambda blocco: blocco.groupby(colonne, observed=True).size(), colonne)
+        return conteggi.astype('int64').sort_values(ascending=False, kind='stable').rename('count')
+    
+    def _presenza_web(self, colonna):
+        """
+        Aziende senza e con sito web per valore di una colonna
+        """
+        conteggi = self._aggrega(
+            lambda blocco: pd.crosstab(blocco[colonna], _ha_sito(blocco)).reindex(columns=[False, True], fill_value=0),
+            [colonna, 'Sito Web']
+        ).astype('int64')
+        conteggi.columns = ['Senza sito web', 'Con sito web']
+        return conteggi
+    
     def load_data(self):
         """
-        Carica i dati dal file CSV
+        Carica i dati dal file CSV o Parquet, con tipi compatti
         """
         try:
-            self.df = pd.read_csv(self.file_path, encoding='utf-8')
+            self.df = carica_dataframe(self.file_path, self.columns, dimensione_blocco=self.chunk_size)
             print(f"Caricati {len(self.df)} record dal file {self.file_path}")
         except Exception as e:
             print(f"Errore nel caricamento del file: {e}")
@@ -56,14 +109,16 @@ class PMIVisualizer:
             rows (int): Numero di righe da visualizzare
         """
         print("\n=== ANTEPRIMA DEI DATI ===")
-        print(tabulate(self.df.head(rows), headers='keys', tablefmt='grid', showindex=False))
+        # Con un sottoinsieme di colonne caricato, l'anteprima rilegge le prime righe complete
+        preview = self.df.head(rows) if self.columns is None else carica_dataframe(self.file_path, nrows=rows)
+        print(tabulate(preview, headers='keys', tablefmt='grid', showindex=False))
     
     def analyze_categories(self):
         """
         Analizza la distribuzione delle categorie di PMI
         """
         print("\n=== DISTRIBUZIONE PER CATEGORIA DI PMI ===")
-        categoria_counts = self.df['Categoria'].value_counts()
+        categoria_counts = self._conta(['Categoria'])
         print(tabulate(categoria_counts.reset_index().rename(columns={'index': 'Categoria PMI', 'Categoria': 'Numero'}), 
                        headers='keys', tablefmt='grid', showindex=False))
         
@@ -90,7 +145,7 @@ class PMIVisualizer:
         Analizza la distribuzione dei settori
         """
         print("\n=== DISTRIBUZIONE PER SETTORE ===")
-        sector_counts = self.df['Settore'].value_counts()
+        sector_counts = self._conta(['Settore'])
         print(tabulate(sector_counts.head(15).reset_index().rename(columns={'index': 'Settore', 'Settore': 'Numero'}), 
                        headers='keys', tablefmt='grid', showindex=False))
         
@@ -111,13 +166,12 @@ class PMIVisualizer:
         
         # Analisi incrociata settore-categoria
         print("\n=== DISTRIBUZIONE SETTORI PER CATEGORIA ===")
-        sector_by_category = pd.crosstab(self.df['Settore'], self.df['Categoria'])
+        sector_by_category = self._conta(['Settore', 'Categoria']).unstack(fill_value=0).sort_index()
         print(tabulate(sector_by_category.head(10), headers='keys', tablefmt='grid'))
         
         # Grafico a mosaico per settore e categoria
         plt.figure(figsize=(14, 10))
-        sector_category_data = pd.crosstab(self.df['Settore'], self.df['Categoria'])
-        sector_category_data.plot(kind='bar', stacked=True, colormap='viridis')
+        sector_by_category.plot(kind='bar', stacked=True, colormap='viridis')
         plt.title('Distribuzione delle categorie di PMI per settore', fontsize=16, pad=20)
         plt.xlabel('Settore', fontsize=14)
         plt.ylabel('Numero di aziende', fontsize=14)
@@ -134,13 +188,13 @@ class PMIVisualizer:
         print("\n=== DISTRIBUZIONE GEOGRAFICA ===")
         
         # Top 15 città
-        city_counts = self.df['Città'].value_counts().head(15)
+        city_counts = self._conta(['Città']).head(15)
         print("Top 15 città per numero di PMI:")
         print(tabulate(city_counts.reset_index().rename(columns={'index': 'Città', 'Città': 'Numero'}), 
                        headers='keys', tablefmt='grid', showindex=False))
         
         # Distribuzione per provincia
-        province_counts = self.df['Provincia'].value_counts().head(15)
+        province_counts = self._conta(['Provincia']).head(15)
         print("\nTop 15 province per numero di PMI:")
         print(tabulate(province_counts.reset_index().rename(columns={'index': 'Provincia', 'Provincia': 'Numero'}), 
                        headers='keys', tablefmt='grid', showindex=False))
@@ -241,7 +295,7 @@ class PMIVisualizer:
         print("\n=== ANALISI FORME GIURIDICHE ===")
         
         # Distribuzione delle forme giuridiche
-        legal_counts = self.df['Forma Giuridica'].value_counts()
+        legal_counts = self._conta(['Forma Giuridica'])
         print(tabulate(legal_counts.reset_index().rename(columns={'index': 'Forma Giuridica', 'Forma Giuridica': 'Numero'}), 
                        headers='keys', tablefmt='grid', showindex=False))
         
@@ -255,7 +309,7 @@ class PMIVisualizer:
         print("Grafico salvato come 'distribuzione_forme_giuridiche.png'")
         
         # Relazione tra forma giuridica e categoria
-        legal_by_category = pd.crosstab(self.df['Forma Giuridica'], self.df['Categoria'])
+        legal_by_category = self._conta(['Forma Giuridica', 'Categoria']).unstack(fill_value=0).sort_index()
         print("\nDistribuzione delle forme giuridiche per categoria:")
         print(tabulate(legal_by_category, headers='keys', tablefmt='grid'))
         
@@ -278,12 +332,14 @@ class PMIVisualizer:
         print("\n=== ANALISI PRESENZA WEB ===")
         
         # Conta le aziende con sito web
-        has_website = self.df['Sito Web'].notna() & (self.df['Sito Web'] != '')
-        website_count = has_website.sum()
-        no_website_count = len(self.df) - website_count
+        conteggi = self._aggrega(
+            lambda blocco: pd.Series({'con': _ha_sito(blocco).sum(), 'totale': len(blocco)}), ['Sito Web']
+        )
+        website_count, total = int(conteggi['con']), int(conteggi['totale'])
+        no_website_count = total - website_count
         
-        print(f"PMI con sito web: {website_count} ({website_count/len(self.df)*100:.1f}%)")
-        print(f"PMI senza sito web: {no_website_count} ({no_website_count/len(self.df)*100:.1f}%)")
+        print(f"PMI con sito web: {website_count} ({website_count/total*100:.1f}%)")
+        print(f"PMI senza sito web: {no_website_count} ({no_website_count/total*100:.1f}%)")
         
         # Grafico a torta per presenza web
         plt.figure(figsize=(10, 8))
@@ -299,8 +355,7 @@ class PMIVisualizer:
         print("Grafico salvato come 'presenza_web.png'")
         
         # Presenza web per categoria
-        web_by_category = pd.crosstab(self.df['Categoria'], has_website)
-        web_by_category.columns = ['Senza sito web', 'Con sito web']
+        web_by_category = self._presenza_web('Categoria')
         
         print("\nPresenza web per categoria:")
         print(tabulate(web_by_category, headers='keys', tablefmt='grid'))
@@ -318,8 +373,7 @@ class PMIVisualizer:
         print("Grafico salvato come 'presenza_web_per_categoria.png'")
         
         # Presenza web per settore
-        web_by_sector = pd.crosstab(self.df['Settore'], has_website)
-        web_by_sector.columns = ['Senza sito web', 'Con sito web']
+        web_by_sector = self._presenza_web('Settore')
         web_by_sector['Percentuale con sito'] = (web_by_sector['Con sito web'] / 
                                                (web_by_sector['Con sito web'] + web_by_sector['Senza sito web']) * 100).round(1)
         
@@ -436,10 +490,18 @@ def main():
     parser.add_argument('--file', default='pmi_italiane.csv', help='File CSV con i dati delle PMI')
     parser.add_argument('--righe', type=int, default=10, help='Numero di righe da visualizzare nell\'anteprima')
     parser.add_argument('--no-excel', action='store_true', help='Non esportare in Excel')
+    parser.add_argument('--chunk-size', type=int,
+                        help='Legge il file a blocchi di queste righe: con --no-excel i conteggi vengono sommati '
+                             'blocco per blocco e in memoria restano solo le colonne di statistiche e istogrammi')
     
     args = parser.parse_args()
     
-    visualizer = PMIVisualizer(args.file)
+    # L'esportazione Excel riporta tutte le colonne; le analisi solo quelle che usano,
+    # e a blocchi solo quelle che servono riga per riga
+    columns = None
+    if args.no_excel:
+        columns = COLONNE_RIGHE if args.chunk_size else COLONNE_ANALISI
+    visualizer = PMIVisualizer(args.file, columns, args.chunk_size)
     visualizer.run_all_analyses(preview_rows=args.righe, export_excel=not args.no_excel)
 
 
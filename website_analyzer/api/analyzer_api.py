@@ -7,10 +7,10 @@ Gestisce le richieste di analisi e comunica con varie API esterne
 """
 
 import os
+import sys
 import json
 import time
 import logging
-import requests
 from datetime import datetime
 from urllib.parse import urlparse, quote_plus
 from flask import Flask, request, jsonify, send_from_directory
@@ -23,6 +23,13 @@ import google.auth
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 
+try:
+    from pmi_http import sessione_condivisa
+except ImportError:
+    # Il client HTTP condiviso si trova nella radice del progetto
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from pmi_http import sessione_condivisa
+
 # Configurazione del logging
 logging.basicConfig(
     level=logging.INFO,
@@ -221,7 +228,7 @@ def analyze_ssl(url):
 def analyze_security_headers(url):
     try:
         # Effettua una richiesta al sito
-        response = requests.get(url, timeout=10)
+        response = sessione_condivisa().get(url, timeout=10)
         headers = response.headers
         
         # Lista degli header di sicurezza da controllare
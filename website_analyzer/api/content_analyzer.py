@@ -5,13 +5,22 @@
 Content Analyzer - Modulo per l'analisi dei contenuti dei siti web
 """
 
+import os
 import re
+import sys
 import logging
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 from urllib.parse import urlparse
 
+try:
+    from pmi_html import analizza_html
+    from pmi_http import sessione_condivisa
+except ImportError:
+    # Parser HTML e client HTTP condivisi si trovano nella radice del progetto
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from pmi_html import analizza_html
+    from pmi_http import sessione_condivisa
+
 logger = logging.getLogger("website_analyzer.content")
 
 def analyze_content(url):
@@ -28,17 +37,17 @@ def analyze_content(url):
     
     try:
         # Effettua una richiesta al sito
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        response = sessione_condivisa().get(url, timeout=10)
+        documento = analizza_html(response.text)
         
         # Analisi del testo
-        text_analysis = analyze_text(soup)
+        text_analysis = analyze_text(documento)
         
         # Analisi della freschezza dei contenuti
-        freshness = analyze_freshness(soup, response)
+        freshness = analyze_freshness(documento, response)
         
         # Analisi dei media
-        media_analysis = analyze_media(soup, url)
+        media_analysis = analyze_media(documento, url)
         
         return {
             'textAnalysis': text_analysis,
@@ -50,22 +59,21 @@ def analyze_content(url):
         # In caso di errore, restituisci dati simulati
         return get_simulated_content_results()
 
-def analyze_text(soup):
+def analyze_text(documento):
     """
     Analizza il testo della pagina
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         
     Returns:
         dict: Risultati dell'analisi del testo
     """
     try:
         # Estrai il testo principale della pagina (escludendo script, style, ecc.)
-        for script in soup(["script", "style", "header", "footer", "nav"]):
-            script.extract()
+        documento.rimuovi('script, style, header, footer, nav')
         
-        text = soup.get_text()
+        text = documento.testo
         
         # Pulisci il testo
         lines = (line.strip() for line in text.splitlines())
@@ -138,12 +146,12 @@ def analyze_text(soup):
             'sentimentScore': 0.6
         }
 
-def analyze_freshness(soup, response):
+def analyze_freshness(documento, response):
     """
     Analizza la freschezza dei contenuti
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         response (Response): Risposta HTTP
         
     Returns:
@@ -162,14 +170,14 @@ def analyze_freshness(soup, response):
         # Se non è presente negli header, cerca nel contenuto della pagina
         if not last_modified:
             # Cerca meta tag con data di aggiornamento
-            meta_modified = soup.find('meta', {'property': 'article:modified_time'}) or \
-                           soup.find('meta', {'name': 'last-modified'}) or \
-                           soup.find('meta', {'name': 'date'}) or \
-                           soup.find('meta', {'property': 'og:updated_time'})
+            meta_modified = documento.seleziona_uno('meta[property="article:modified_time"]') or \
+                           documento.seleziona_uno('meta[name=last-modified]') or \
+                           documento.seleziona_uno('meta[name=date]') or \
+                           documento.seleziona_uno('meta[property="og:updated_time"]')
             
-            if meta_modified and meta_modified.get('content'):
+            if meta_modified and meta_modified.attributo('content'):
                 try:
-                    last_modified = meta_modified['content']
+                    last_modified = meta_modified.attributo('content')
                     # Prova a parsare la data in vari formati
                     try:
                         last_modified_date = datetime.fromisoformat(last_modified.replace('Z', '+00:00'))
@@ -208,12 +216,12 @@ def analyze_freshness(soup, response):
             'fresh': True
         }
 
-def analyze_media(soup, base_url):
+def analyze_media(documento, base_url):
     """
     Analizza i media presenti nella pagina
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         base_url (str): URL base del sito
         
     Returns:
@@ -221,24 +229,24 @@ def analyze_media(soup, base_url):
     """
     try:
         # Trova tutte le immagini
-        images = soup.find_all('img')
+        images = documento.seleziona('img')
         
         # Conta le immagini senza attributo alt
-        alt_missing = sum(1 for img in images if not img.get('alt'))
+        alt_missing = sum(1 for img in images if not img.attributo('alt'))
         
         # Verifica se le immagini sono responsive
         responsive_images = False
         for img in images:
             # Controlla se l'immagine ha attributi responsive
-            if img.get('srcset') or img.get('sizes') or img.get('loading') == 'lazy':
+            if img.attributo('srcset') or img.attributo('sizes') or img.attributo('loading') == 'lazy':
                 responsive_images = True
                 break
         
         # Trova tutti i video
-        videos = soup.find_all(['video', 'iframe'])
-        video_count = len([v for v in videos if 'youtube.com' in v.get('src', '') or \
-                                             'vimeo.com' in v.get('src', '') or \
-                                             v.name == 'video'])
+        videos = documento.seleziona('video, iframe')
+        video_count = len([v for v in videos if 'youtube.com' in v.attributo('src', '') or \
+                                             'vimeo.com' in v.attributo('src', '') or \
+                                             v.nome == 'video'])
         
         return {
             'images': len(images),
@@ -39,6 +39,9 @@ except ImportError:
     from api.content_analyzer import analyze_content
     from api.technology_analyzer import analyze_technologies
 
+# Client HTTP condiviso dagli analizzatori (la radice del progetto è già nel path)
+from pmi_http import sessione_condivisa
+
 # Verifica la validità dell'URL
 def is_valid_url(url):
     try:
@@ -192,7 +195,8 @@ def status():
         'endpoints': [
             '/api/analyze',
             '/api/status'
-        ]
+        ],
+        'http': sessione_condivisa().statistiche.come_dizionario()
     })
 
 # API endpoint per l'analisi completa del sito
@@ -7,13 +7,20 @@ Utilizza l'API Google PageSpeed Insights
 """
 
 import os
+import sys
 import json
 import logging
-import requests
 from urllib.parse import urlencode
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 
+try:
+    from pmi_http import sessione_condivisa
+except ImportError:
+    # Il client HTTP condiviso si trova nella radice del progetto
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from pmi_http import sessione_condivisa
+
 logger = logging.getLogger("website_analyzer.performance")
 
 # Configurazione API
@@ -81,7 +88,7 @@ def get_pagespeed_insights(url):
         api_url = f"{API_CONFIG['pagespeed']['endpoint']}?{urlencode(params)}"
         
         # Effettua la richiesta all'API
-        response = requests.get(api_url, timeout=30)
+        response = sessione_condivisa().get(api_url, timeout=30)
         
         if response.status_code == 200:
             return response.json()
@@ -8,13 +8,19 @@ Script di avvio per il server API del Website Analyzer con integrazione Google P
 import os
 import sys
 import logging
-import requests
 import json
 import time
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 from urllib.parse import urlparse
 
+try:
+    from pmi_http import sessione_condivisa
+except ImportError:
+    # Il client HTTP condiviso si trova nella radice del progetto
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from pmi_http import sessione_condivisa
+
 # Configura il logging
 logging.basicConfig(
     level=logging.INFO,
@@ -78,7 +84,7 @@ def get_pagespeed_data(url):
         if API_KEY:
             params["key"] = API_KEY
             
-        response = requests.get(api_url, params=params)
+        response = sessione_condivisa().get(api_url, params=params)
         
         if response.status_code == 200:
             return response.json()
@@ -352,7 +358,8 @@ def status():
             '/api/analyze',
             '/api/status'
         ],
-        'google_api': bool(API_KEY)
+        'google_api': bool(API_KEY),
+        'http': sessione_condivisa().statistiche.come_dizionario()
     })
 
 # API endpoint per l'analisi completa del sito
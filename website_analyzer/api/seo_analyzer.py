@@ -5,11 +5,20 @@
 SEO Analyzer - Modulo per l'analisi SEO dei siti web
 """
 
+import os
+import sys
 import logging
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
 
+try:
+    from pmi_html import analizza_html
+    from pmi_http import sessione_condivisa
+except ImportError:
+    # Parser HTML e client HTTP condivisi si trovano nella radice del progetto
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from pmi_html import analizza_html
+    from pmi_http import sessione_condivisa
+
 logger = logging.getLogger("website_analyzer.seo")
 
 def analyze_seo(url):
@@ -26,17 +35,17 @@ def analyze_seo(url):
     
     try:
         # Effettua una richiesta al sito
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        response = sessione_condivisa().get(url, timeout=10)
+        documento = analizza_html(response.text)
         
         # Analisi dei meta tag
-        meta_tags = analyze_meta_tags(soup)
+        meta_tags = analyze_meta_tags(documento)
         
         # Analisi della struttura della pagina
-        headings = analyze_headings(soup)
+        headings = analyze_headings(documento)
         
         # Analisi dei link
-        links = analyze_links(soup, url)
+        links = analyze_links(documento, url)
         
         # Verifica la presenza di sitemap e robots.txt
         sitemap = check_sitemap(url)
@@ -53,12 +62,12 @@ def analyze_seo(url):
         logger.error(f"Errore durante l'analisi SEO: {str(e)}")
         raise
 
-def analyze_meta_tags(soup):
+def analyze_meta_tags(documento):
     """
     Analizza i meta tag della pagina
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         
     Returns:
         dict: Risultati dell'analisi dei meta tag
@@ -66,9 +75,9 @@ def analyze_meta_tags(soup):
     result = {}
     
     # Analisi del title
-    title_tag = soup.find('title')
-    if title_tag and title_tag.string:
-        title_text = title_tag.string.strip()
+    title_tag = documento.seleziona_uno('title')
+    if title_tag and title_tag.testo.strip():
+        title_text = title_tag.testo.strip()
         title_length = len(title_text)
         
         result['title'] = {
@@ -83,9 +92,9 @@ def analyze_meta_tags(soup):
         }
     
     # Analisi della meta description
-    meta_desc = soup.find('meta', attrs={'name': 'description'})
-    if meta_desc and meta_desc.get('content'):
-        desc_text = meta_desc['content'].strip()
+    meta_desc = documento.seleziona_uno('meta[name=description]')
+    if meta_desc and meta_desc.attributo('content'):
+        desc_text = meta_desc.attributo('content').strip()
         desc_length = len(desc_text)
         
         result['description'] = {
@@ -100,11 +109,11 @@ def analyze_meta_tags(soup):
         }
     
     # Analisi dei meta robots
-    meta_robots = soup.find('meta', attrs={'name': 'robots'})
-    if meta_robots and meta_robots.get('content'):
+    meta_robots = documento.seleziona_uno('meta[name=robots]')
+    if meta_robots and meta_robots.attributo('content'):
         result['robots'] = {
             'present': True,
-            'value': meta_robots['content'].strip()
+            'value': meta_robots.attributo('content').strip()
         }
     else:
         result['robots'] = {
@@ -112,11 +121,11 @@ def analyze_meta_tags(soup):
         }
     
     # Analisi del meta viewport
-    meta_viewport = soup.find('meta', attrs={'name': 'viewport'})
-    if meta_viewport and meta_viewport.get('content'):
+    meta_viewport = documento.seleziona_uno('meta[name=viewport]')
+    if meta_viewport and meta_viewport.attributo('content'):
         result['viewport'] = {
             'present': True,
-            'value': meta_viewport['content'].strip()
+            'value': meta_viewport.attributo('content').strip()
         }
     else:
         result['viewport'] = {
@@ -125,12 +134,12 @@ def analyze_meta_tags(soup):
     
     return result
 
-def analyze_headings(soup):
+def analyze_headings(documento):
     """
     Analizza la struttura dei titoli (h1-h6) della pagina
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         
     Returns:
         dict: Risultati dell'analisi dei titoli
@@ -138,29 +147,29 @@ def analyze_headings(soup):
     result = {}
     
     # Analisi degli h1
-    h1_tags = soup.find_all('h1')
+    h1_tags = documento.seleziona('h1')
     result['h1'] = {
         'count': len(h1_tags),
-        'values': [h1.get_text().strip() for h1 in h1_tags]
+        'values': [h1.testo.strip() for h1 in h1_tags]
     }
     
     # Analisi degli h2
-    h2_tags = soup.find_all('h2')
+    h2_tags = documento.seleziona('h2')
     result['h2'] = {
         'count': len(h2_tags),
-        'values': [h2.get_text().strip() for h2 in h2_tags]
+        'values': [h2.testo.strip() for h2 in h2_tags]
     }
     
     # Analisi degli h3
-    h3_tags = soup.find_all('h3')
+    h3_tags = documento.seleziona('h3')
     result['h3'] = {
         'count': len(h3_tags)
     }
     
     # Analisi degli h4-h6
-    h4_tags = soup.find_all('h4')
-    h5_tags = soup.find_all('h5')
-    h6_tags = soup.find_all('h6')
+    h4_tags = documento.seleziona('h4')
+    h5_tags = documento.seleziona('h5')
+    h6_tags = documento.seleziona('h6')
     
     result['h4_h6'] = {
         'count': len(h4_tags) + len(h5_tags) + len(h6_tags)
@@ -179,12 +188,12 @@ def analyze_headings(soup):
     
     return result
 
-def analyze_links(soup, base_url):
+def analyze_links(documento, base_url):
     """
     Analizza i link della pagina
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         base_url (str): URL base del sito
         
     Returns:
@@ -194,14 +203,14 @@ def analyze_links(soup, base_url):
     base_domain = parsed_base.netloc
     
     # Trova tutti i link
-    links = soup.find_all('a', href=True)
+    links = documento.seleziona('a[href]')
     
     internal_links = []
     external_links = []
     nofollow_links = []
     
     for link in links:
-        href = link['href'].strip()
+        href = link.attributo('href').strip()
         
         # Salta i link vuoti o ancore
         if not href or href.startswith('#'):
@@ -220,10 +229,8 @@ def analyze_links(soup, base_url):
             external_links.append(href)
         
         # Controlla se il link ha l'attributo nofollow
-        rel = link.get('rel', [])
-        if isinstance(rel, list) and 'nofollow' in rel:
-            nofollow_links.append(href)
-        elif isinstance(rel, str) and 'nofollow' in rel:
+        rel = link.attributo('rel', '')
+        if 'nofollow' in rel.split():
             nofollow_links.append(href)
     
     # In un'implementazione reale, qui ci sarebbe un controllo dei link rotti
@@ -251,7 +258,7 @@ def check_sitemap(url):
     sitemap_url = f"{parsed_url.scheme}://{parsed_url.netloc}/sitemap.xml"
     
     try:
-        response = requests.head(sitemap_url, timeout=5)
+        response = sessione_condivisa().head(sitemap_url, timeout=5)
         present = response.status_code == 200
         
         # In un'implementazione reale, qui ci sarebbe una verifica della validitu00e0 della sitemap
@@ -285,7 +292,7 @@ def check_robots_txt(url):
     robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
     
     try:
-        response = requests.head(robots_url, timeout=5)
+        response = sessione_condivisa().head(robots_url, timeout=5)
         present = response.status_code == 200
         
         # In un'implementazione reale, qui ci sarebbe una verifica della validitu00e0 del robots.txt
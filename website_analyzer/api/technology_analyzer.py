@@ -5,13 +5,22 @@
 Technology Analyzer - Modulo per l'analisi delle tecnologie utilizzate dai siti web
 """
 
+import os
 import re
+import sys
 import json
 import logging
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 
+try:
+    from pmi_html import analizza_html
+    from pmi_http import sessione_condivisa
+except ImportError:
+    # Parser HTML e client HTTP condivisi si trovano nella radice del progetto
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from pmi_html import analizza_html
+    from pmi_http import sessione_condivisa
+
 logger = logging.getLogger("website_analyzer.technology")
 
 def analyze_technologies(url):
@@ -28,20 +37,20 @@ def analyze_technologies(url):
     
     try:
         # Effettua una richiesta al sito
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        response = sessione_condivisa().get(url, timeout=10)
+        documento = analizza_html(response.text)
         
         # Identifica il CMS
-        cms_info = identify_cms(soup, response)
+        cms_info = identify_cms(documento, response)
         
         # Identifica le librerie JavaScript
-        js_libraries = identify_js_libraries(soup, response)
+        js_libraries = identify_js_libraries(documento, response)
         
         # Identifica il framework frontend
-        frontend_framework = identify_frontend_framework(soup, response)
+        frontend_framework = identify_frontend_framework(documento, response)
         
         # Identifica le tecnologie di analisi e marketing
-        analytics_tools = identify_analytics_tools(soup)
+        analytics_tools = identify_analytics_tools(documento, response)
         
         # Identifica le tecnologie server (se disponibili)
         server_tech = identify_server_tech(response)
@@ -58,12 +67,12 @@ def analyze_technologies(url):
         # In caso di errore, restituisci dati simulati
         return get_simulated_technology_results()
 
-def identify_cms(soup, response):
+def identify_cms(documento, response):
     """
     Identifica il CMS utilizzato dal sito
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         response (Response): Risposta HTTP
         
     Returns:
@@ -76,13 +85,13 @@ def identify_cms(soup, response):
     }
     
     try:
-        html_content = str(soup)
+        html_content = response.text
         headers = response.headers
         
         # Verifica WordPress
         wp_signs = [
-            soup.find('meta', {'name': 'generator', 'content': re.compile('WordPress')}),
-            soup.find('link', {'rel': 'https://api.w.org/'}),
+            documento.seleziona_uno('meta[name=generator][content*=WordPress]'),
+            documento.seleziona_uno('link[rel~="https://api.w.org/"]'),
             'wp-content' in html_content,
             'wp-includes' in html_content
         ]
@@ -92,15 +101,15 @@ def identify_cms(soup, response):
             cms_info['confidence'] = sum(bool(sign) for sign in wp_signs) * 25
             
             # Cerca la versione
-            version_meta = soup.find('meta', {'name': 'generator', 'content': re.compile('WordPress')})
+            version_meta = documento.seleziona_uno('meta[name=generator][content*=WordPress]')
             if version_meta:
-                version_match = re.search(r'WordPress ([\d.]+)', version_meta['content'])
+                version_match = re.search(r'WordPress ([\d.]+)', version_meta.attributo('content'))
                 if version_match:
                     cms_info['version'] = version_match.group(1)
         
         # Verifica Joomla
         joomla_signs = [
-            soup.find('meta', {'name': 'generator', 'content': re.compile('Joomla')}),
+            documento.seleziona_uno('meta[name=generator][content*=Joomla]'),
             'com_content' in html_content,
             'Joomla!' in html_content
         ]
@@ -110,9 +119,9 @@ def identify_cms(soup, response):
             cms_info['confidence'] = sum(bool(sign) for sign in joomla_signs) * 33
             
             # Cerca la versione
-            version_meta = soup.find('meta', {'name': 'generator', 'content': re.compile('Joomla')})
+            version_meta = documento.seleziona_uno('meta[name=generator][content*=Joomla]')
             if version_meta:
-                version_match = re.search(r'Joomla! ([\d.]+)', version_meta['content'])
+                version_match = re.search(r'Joomla! ([\d.]+)', version_meta.attributo('content'))
                 if version_match:
                     cms_info['version'] = version_match.group(1)
         
@@ -120,7 +129,7 @@ def identify_cms(soup, response):
         drupal_signs = [
             'Drupal.settings' in html_content,
             'drupal.org' in html_content,
-            soup.find('meta', {'name': 'Generator', 'content': re.compile('Drupal')})
+            documento.seleziona_uno('meta[name=Generator][content*=Drupal]')
         ]
         
         if any(drupal_signs) and not cms_info['name']:
@@ -131,7 +140,7 @@ def identify_cms(soup, response):
         shopify_signs = [
             'Shopify.theme' in html_content,
             'cdn.shopify.com' in html_content,
-            soup.find('meta', {'name': 'generator', 'content': re.compile('Shopify')})
+            documento.seleziona_uno('meta[name=generator][content*=Shopify]')
         ]
         
         if any(shopify_signs) and not cms_info['name']:
@@ -142,7 +151,7 @@ def identify_cms(soup, response):
         wix_signs = [
             'wix.com' in html_content,
             'X-Wix-' in str(headers),
-            soup.find('meta', {'name': 'generator', 'content': re.compile('Wix')})
+            documento.seleziona_uno('meta[name=generator][content*=Wix]')
         ]
         
         if any(wix_signs) and not cms_info['name']:
@@ -163,12 +172,12 @@ def identify_cms(soup, response):
             'confidence': 0
         }
 
-def identify_js_libraries(soup, response):
+def identify_js_libraries(documento, response):
     """
     Identifica le librerie JavaScript utilizzate dal sito
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         response (Response): Risposta HTTP
         
     Returns:
@@ -177,7 +186,7 @@ def identify_js_libraries(soup, response):
     libraries = []
     
     try:
-        html_content = str(soup)
+        html_content = response.text
         
         # Mappa delle librerie JavaScript comuni e dei loro pattern di rilevamento
         js_libraries_map = {
@@ -216,8 +225,8 @@ def identify_js_libraries(soup, response):
         }
         
         # Cerca script tag
-        script_tags = soup.find_all('script', src=True)
-        script_srcs = [script['src'] for script in script_tags]
+        script_tags = documento.seleziona('script[src]')
+        script_srcs = [script.attributo('src') for script in script_tags]
         
         # Controlla ogni libreria
         for lib_name, lib_info in js_libraries_map.items():
@@ -252,12 +261,12 @@ def identify_js_libraries(soup, response):
             {'name': 'Bootstrap', 'version': '5.1.3'}
         ]
 
-def identify_frontend_framework(soup, response):
+def identify_frontend_framework(documento, response):
     """
     Identifica il framework frontend utilizzato dal sito
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
         response (Response): Risposta HTTP
         
     Returns:
@@ -269,7 +278,7 @@ def identify_frontend_framework(soup, response):
     }
     
     try:
-        html_content = str(soup)
+        html_content = response.text
         
         # Mappa dei framework frontend comuni e dei loro pattern di rilevamento
         frameworks_map = {
@@ -340,7 +349,7 @@ def identify_frontend_framework(soup, response):
         # Se non u00e8 stato identificato alcun framework
         if not framework_info['name'] or framework_info['confidence'] < 30:
             # Controlla se u00e8 un sito statico tradizionale
-            if soup.find_all('script') and soup.find_all('link', rel='stylesheet'):
+            if documento.seleziona_uno('script') and documento.seleziona_uno('link[rel~=stylesheet]'):
                 framework_info['name'] = 'Traditional HTML/CSS/JS'
                 framework_info['confidence'] = 60
             else:
@@ -355,12 +364,13 @@ def identify_frontend_framework(soup, response):
             'confidence': 60
         }
 
-def identify_analytics_tools(soup):
+def identify_analytics_tools(documento, response):
     """
     Identifica gli strumenti di analisi e marketing utilizzati dal sito
     
     Args:
-        soup (BeautifulSoup): Oggetto BeautifulSoup della pagina
+        documento (Nodo): Radice della pagina analizzata
+        response (Response): Risposta HTTP
         
     Returns:
         list: Strumenti di analisi identificati
@@ -368,7 +378,7 @@ def identify_analytics_tools(soup):
     tools = []
     
     try:
-        html_content = str(soup)
+        html_content = response.text
         
         # Mappa degli strumenti di analisi comuni e dei loro pattern di rilevamento
         analytics_map = {